@@ -6,6 +6,7 @@ from mgraph_ai_service_js.fast_api.routes.Routes__Info                import Rou
 from mgraph_ai_service_js.fast_api.routes.Routes__JS__AST__Simple import Routes__JS__AST__Simple
 from mgraph_ai_service_js.fast_api.routes.Routes__JS__ASTpy           import Routes__JS__AST
 from mgraph_ai_service_js.fast_api.routes.Routes__JS__Execute         import Routes__JS__Execute
+from mgraph_ai_service_js.fast_api.routes.Routes__JS__Functions       import Routes__JS__Functions
 from mgraph_ai_service_js.fast_api.routes.Routes__JS__Module__Execute import Routes__JS__Module__Execute
 from mgraph_ai_service_js.utils.Version                               import version__mgraph_ai_service_js
 
@@ -47,6 +48,7 @@ Features:
         self.add_routes(Routes__Set_Cookie         )
         self.add_routes(Routes__JS__Execute        )
         self.add_routes(Routes__JS__Module__Execute)
+        self.add_routes(Routes__JS__Functions      )
         self.add_routes(Routes__JS__AST            )
         self.add_routes(Routes__JS__AST__Simple    )
 
@@ -1,6 +1,7 @@
 import json
-from typing                                                        import Dict, Any
+from typing                                                        import Dict, Any, Optional
 from fastapi                                                       import HTTPException
+from fastapi.responses                                             import StreamingResponse
 from pydantic                                                      import BaseModel, Field
 from osbot_fast_api.api.routes.Fast_API__Routes                    import Fast_API__Routes
 from osbot_utils.utils.Http                                        import GET
@@ -10,6 +11,11 @@ from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas  import JS__AS
 from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas  import JS__AST__Parse__Request
 from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas  import JS__AST__Generate__Request
 from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas  import Safe_Str__Javascript
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas  import JS__AST__Parse__Stream__Request
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas  import JS__AST__Parse__Bundle__Request
+from mgraph_ai_service_js.schemas.Safe_Str__Javascript__Bundle     import Safe_Str__Javascript__Bundle
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas  import Safe_Str__Stream_Format
+from mgraph_ai_service_js.fast_api.routes.Routes__JS__ASTpy        import MEDIA_TYPES__STREAM_FORMAT
 
 
 # Simple request/response models for easy Swagger UI usage
@@ -90,9 +96,17 @@ class Schema__Simple__JSON_to_AST__Response(BaseModel):
 
 class Schema__Simple__URL_to_AST__Response(BaseModel):
     """Response with AST and metadata from URL"""
-    ast: Dict[str, Any] = Field(
-        ...,
-        description="ESTree AST representation"
+    ast: Optional[Dict[str, Any]] = Field(
+        None,
+        description="ESTree AST representation (empty when a handle was requested)"
+    )
+    handle: Optional[str] = Field(
+        None,
+        description="Handle for /js-ast/node/{handle}, when return_handle was set"
+    )
+    bundle_format: Optional[str] = Field(
+        None,
+        description="webpack or esbuild when bundle=true split the file by module, otherwise empty"
     )
     url: str = Field(
         ...,
@@ -108,6 +122,7 @@ TAG__ROUTES_JS_AST_SIMPLE   = 'js-ast-simple'
 ROUTES_PATHS__JS_AST_SIMPLE = [f'/{TAG__ROUTES_JS_AST_SIMPLE}/js-to-ast',
                                f'/{TAG__ROUTES_JS_AST_SIMPLE}/ast-to-js',
                                f'/{TAG__ROUTES_JS_AST_SIMPLE}/url-to-ast',
+                               f'/{TAG__ROUTES_JS_AST_SIMPLE}/url-to-ast-stream',
                                f'/{TAG__ROUTES_JS_AST_SIMPLE}/json-to-ast']
 
 
@@ -213,7 +228,9 @@ class Routes__JS__AST__Simple(Fast_API__Routes):
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
 
-    def url_to_ast(self, url: str = "https://cdnjs.cloudflare.com/ajax/libs/js-cookie/3.0.1/js.cookie.min.js") -> Schema__Simple__URL_to_AST__Response:
+    def url_to_ast(self, url           : str  = "https://cdnjs.cloudflare.com/ajax/libs/js-cookie/3.0.1/js.cookie.min.js",
+                         return_handle : bool = False,
+                         bundle        : bool = False) -> Schema__Simple__URL_to_AST__Response:
         """
         Fetch JavaScript from URL and convert to AST
 
@@ -227,58 +244,32 @@ class Routes__JS__AST__Simple(Fast_API__Routes):
         - Lodash: `https://cdnjs.cloudflare.com/ajax/libs/lodash.js/4.17.21/lodash.min.js`
 
         Note: The URL must be publicly accessible (no authentication required).
-        Large files may take longer to process.
+        Large files may take longer to process. With `return_handle=true` the AST stays on the
+        server and only a handle is returned, to browse with `/js-ast/node/{handle}`.
+
+        With `bundle=true` a webpack or esbuild bundle is split at its module boundaries and the modules
+        are parsed in parallel (see `/js-ast/parse-bundle`); the stitched AST has the same shape and
+        positions as a normal parse.
         """
         try:
-            # Validate URL format
-            if not url.startswith(('http://', 'https://')):
-                raise HTTPException(
-                    status_code=400,
-                    detail="URL must start with http:// or https://"
-                )
+            response, content_size = self._fetch_url(url)
 
-            # Fetch the JavaScript content
-            try:
-                response = GET(url)
-                if response is None or response == '':
-                    raise HTTPException(
-                        status_code=404,
-                        detail=f"Could not fetch content from URL: {url}"
-                    )
-
-                # Check if content looks like JavaScript (basic validation)
-                content_lower = response[:1000].lower()  # Check first 1KB
-                if 'html' in content_lower and '<html' in content_lower:
-                    raise HTTPException(
-                        status_code=400,
-                        detail="URL returned HTML content, not JavaScript"
-                    )
-
-            except Exception as e:
-                if isinstance(e, HTTPException):
-                    raise
-                raise HTTPException(
-                    status_code=500,
-                    detail=f"Failed to fetch URL: {str(e)}"
+            if bundle:
+                bundle_request = JS__AST__Parse__Bundle__Request(
+                    code          = Safe_Str__Javascript__Bundle(response),
+                    options       = JS__AST__Parser__Options()            ,
+                    return_handle = return_handle
                 )
-
-            # Get size before processing
-            content_size = len(response.encode('utf-8'))
-
-            # Check size limit (10MB)
-            if content_size > 10 * 1024 * 1024:
-                raise HTTPException(
-                    status_code=413,
-                    detail=f"JavaScript file too large: {content_size} bytes (max 10MB)"
+                parse_response = self.ast_service.parse_bundle(bundle_request)
+            else:
+                # Parse the JavaScript code
+                parse_request = JS__AST__Parse__Request(
+                    code          = Safe_Str__Javascript(response),
+                    options       = JS__AST__Parser__Options()    ,
+                    return_handle = return_handle
                 )
 
-            # Parse the JavaScript code
-            parse_request = JS__AST__Parse__Request(
-                code    = Safe_Str__Javascript(response),
-                options = JS__AST__Parser__Options()
-            )
-
-            parse_response = self.ast_service.parse_to_ast(parse_request)
+                parse_response = self.ast_service.parse_to_ast(parse_request)
 
             if not parse_response.success:
                 raise HTTPException(
@@ -287,9 +278,11 @@ class Routes__JS__AST__Simple(Fast_API__Routes):
                 )
 
             return Schema__Simple__URL_to_AST__Response(
-                ast  = parse_response.ast,
-                url  = url,
-                size = content_size
+                ast           = parse_response.ast                              ,
+                handle        = parse_response.handle                           ,
+                bundle_format = parse_response.bundle_format if bundle else None,
+                url           = url                                             ,
+                size          = content_size
             )
 
         except ValueError as e:
@@ -299,6 +292,31 @@ class Routes__JS__AST__Simple(Fast_API__Routes):
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
 
+    def url_to_ast_stream(self, url    : str = "https://cdnjs.cloudflare.com/ajax/libs/js-cookie/3.0.1/js.cookie.min.js",
+                                format : str = "ndjson"):
+        """
+        Fetch JavaScript from URL and stream its AST
+
+        Same as `url-to-ast`, but the AST is streamed one top-level statement at a time instead of
+        being built as one JSON document before the first byte is sent. Use this for large files
+        such as jQuery or React.
+
+        Formats:
+        - `ndjson`: one `{"event": ...}` line for the program, each `Program.body` statement and the end
+        - `json`  : the ESTree Program document, sent in chunks
+        """
+        try:
+            code, _         = self._fetch_url(url)
+            service_request = JS__AST__Parse__Stream__Request(code    = Safe_Str__Javascript   (code  ),
+                                                              options = JS__AST__Parser__Options(     ),
+                                                              format  = Safe_Str__Stream_Format(format))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        lines = self.ast_service.parse_to_ast__stream(service_request)
+        return StreamingResponse((line + '\n' for line in lines),
+                                 media_type = MEDIA_TYPES__STREAM_FORMAT[format])
+
     def json_to_ast(self, json_data: dict
                ) -> dict:
         """
@@ -364,9 +382,55 @@ class Routes__JS__AST__Simple(Fast_API__Routes):
                 detail=f"Unexpected error: {str(e)}"
             )
 
+    def _fetch_url(self, url: str) -> tuple[str, int]:                              # Fetch and validate JavaScript from a URL
+        # Validate URL format
+        if not url.startswith(('http://', 'https://')):
+            raise HTTPException(
+                status_code=400,
+                detail="URL must start with http:// or https://"
+            )
+
+        # Fetch the JavaScript content
+        try:
+            response = GET(url)
+            if response is None or response == '':
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"Could not fetch content from URL: {url}"
+                )
+
+            # Check if content looks like JavaScript (basic validation)
+            content_lower = response[:1000].lower()  # Check first 1KB
+            if 'html' in content_lower and '<html' in content_lower:
+                raise HTTPException(
+                    status_code=400,
+                    detail="URL returned HTML content, not JavaScript"
+                )
+
+        except Exception as e:
+            if isinstance(e, HTTPException):
+                raise
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to fetch URL: {str(e)}"
+            )
+
+        # Get size before processing
+        content_size = len(response.encode('utf-8'))
+
+        # Check size limit (10MB)
+        if content_size > 10 * 1024 * 1024:
+            raise HTTPException(
+                status_code=413,
+                detail=f"JavaScript file too large: {content_size} bytes (max 10MB)"
+            )
+
+        return response, content_size
+
     def setup_routes(self):
         """Configure the FastAPI routes"""
-        self.add_route_post(self.js_to_ast  )
-        self.add_route_post(self.ast_to_js  )
-        self.add_route_get (self.url_to_ast )
-        self.add_route_post(self.json_to_ast)
\ No newline at end of file
+        self.add_route_post(self.js_to_ast        )
+        self.add_route_post(self.ast_to_js        )
+        self.add_route_get (self.url_to_ast       )
+        self.add_route_get (self.url_to_ast_stream)
+        self.add_route_post(self.json_to_ast      )
\ No newline at end of file
@@ -1,5 +1,6 @@
-from typing                                                        import Optional
+from typing                                                        import Optional, List
 from fastapi                                                       import HTTPException
+from fastapi.responses                                             import StreamingResponse
 from pydantic                                                      import BaseModel, Field
 from osbot_fast_api.api.routes.Fast_API__Routes                    import Fast_API__Routes
 from mgraph_ai_service_js.service.js_ast.JS__AST__Roundtrip        import JS__AST__Roundtrip
@@ -8,9 +9,25 @@ from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas  import JS__AS
 from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas  import JS__AST__Parse__Request
 from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas  import JS__AST__Generate__Request
 from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas  import JS__AST__Roundtrip__Request
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas  import JS__AST__Query__Request
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas  import JS__AST__Parse__Batch__Request
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas  import JS__AST__Parse__Batch__Item
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas  import JS__AST__Parse__Stream__Request
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas  import JS__AST__Parse__Bundle__Request
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas  import JS__AST__Graph__Request
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas  import JS__AST__Node__Request
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas  import JS__AST__Reparse__Request
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas  import JS__AST__Text__Edit
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas  import JS__AST__Diff__Request
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas  import JS__AST__Transform__Request
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas  import JS__AST__Transform__Step
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas  import JS__AST__Minify__Request
+from mgraph_ai_service_js.service.js_ast.JS__AST__Transforms       import TRANSFORM__STEPS, TRANSFORM__MAX_STEPS
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas  import Safe_Str__Stream_Format
 from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas  import Safe_Str__ECMAVersion
 from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas  import Safe_Str__SourceType
 from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas  import Safe_Str__Javascript
+from mgraph_ai_service_js.schemas.Safe_Str__Javascript__Bundle     import Safe_Str__Javascript__Bundle
 
 
 # Pydantic models for API
@@ -23,7 +40,7 @@ class Schema__AST__Parser__Options(BaseModel):
     locations    : bool = Field(True, description="Include location info")
     ranges       : bool = Field(True, description="Include range info")
     raw          : bool = Field(True, description="Include raw strings")
-    tokens       : bool = Field(False, description="Include token array")
+    tokens       : bool = Field(False, description="Include the columnar token stream {types, type_ids, starts, ends}")
     comments     : bool = Field(True, description="Preserve comments")
     tolerant     : bool = Field(False, description="Tolerate errors")
 
@@ -33,12 +50,16 @@ class Schema__AST__Generator__Options(BaseModel):
     line_end     : str  = Field("\n", description="Line ending")
     start_indent : str  = Field("", description="Initial indentation")
     comments     : bool = Field(True, description="Include comments")
-    source_map   : bool = Field(False, description="Generate source map")
+    source_map        : bool = Field(False, description="Generate a source map (needs an AST parsed with locations)")
+    source_map_inline : bool = Field(False, description="Append the source map to the code as a data: URL instead of returning it")
+    source_file       : str  = Field("input.js", description="Source file name recorded in the source map", max_length=1024)
+    compact           : bool = Field(False, description="Compact output: no indentation, line breaks, comments or optional spaces (spaces stay when a source map is requested)")
 
 
 class Schema__AST__Parse__Request(BaseModel):                                        # API request for parsing
-    code    : str                                     = Field(..., description="JavaScript code to parse", min_length=0, max_length=1048576)
-    options : Optional[Schema__AST__Parser__Options] = Field(None, description="Parser options")
+    code          : str                                     = Field(..., description="JavaScript code to parse", min_length=0, max_length=1048576)
+    options       : Optional[Schema__AST__Parser__Options] = Field(None, description="Parser options")
+    return_handle : bool                                    = Field(False, description="Keep the AST server side and return a handle for /js-ast/node/{handle} instead of the AST")
 
 
 class Schema__AST__Generate__Request(BaseModel):                                     # API request for generation
@@ -52,10 +73,113 @@ class Schema__AST__Roundtrip__Request(BaseModel):
     generator_options : Optional[Schema__AST__Generator__Options] = Field(None, description="Generator options")
 
 
+class Schema__AST__Query__Request(BaseModel):                                        # API request for ESQuery selectors
+    code              : Optional[str]                           = Field(None, description="JavaScript code to query", max_length=1048576)
+    handle            : Optional[str]                           = Field(None, description="Stored AST (from parse with return_handle) to query instead of code")
+    selectors         : List[str]                               = Field(..., description="ESQuery selectors, e.g. CallExpression[callee.name='fetch']", min_length=1)
+    options           : Optional[Schema__AST__Parser__Options]  = Field(None, description="Parser options")
+    include_ancestors : bool                                    = Field(False, description="Include a type/range summary of each match's ancestors")
+    max_matches       : int                                     = Field(1000, ge=1, le=100000, description="Max matches returned per selector")
+
+
+class Schema__AST__Parse__Batch__Item(BaseModel):                                    # One source file in a batch parse
+    id           : str                                     = Field(..., description="Caller supplied id, echoed back in the item's result", min_length=1, max_length=1024)
+    code         : str                                     = Field(..., description="JavaScript code to parse", min_length=0, max_length=1048576)
+    options      : Optional[Schema__AST__Parser__Options] = Field(None, description="Parser options")
+    start_offset : int                                     = Field(0, description="Offset of the code in a larger file; AST positions are shifted to match")
+    start_line   : int                                     = Field(1, ge=1, description="Line the code starts on in a larger file")
+    start_column : int                                     = Field(0, description="Column the code starts at in a larger file")
+
+
+class Schema__AST__Parse__Batch__Request(BaseModel):                                 # API request for batch parsing
+    items     : List[Schema__AST__Parse__Batch__Item] = Field(..., description="Sources to parse", min_length=1, max_length=1000)
+    processes : int                                   = Field(1, ge=1, le=8, description="Deno processes the items are spread across")
+
+
+class Schema__AST__Parse__Stream__Request(BaseModel):                                # API request for streaming parse
+    code    : str                                     = Field(..., description="JavaScript code to parse", min_length=0, max_length=1048576)
+    options : Optional[Schema__AST__Parser__Options] = Field(None, description="Parser options")
+    format  : str                                     = Field("ndjson", pattern="^(ndjson|json)$", description="ndjson: one event per line, json: the AST as one chunked JSON document")
+
+
+class Schema__AST__Parse__Bundle__Request(BaseModel):                                # API request for bundle-aware parsing
+    code          : str                                     = Field(..., description="webpack or esbuild bundle to parse", min_length=0, max_length=10485760)
+    options       : Optional[Schema__AST__Parser__Options]  = Field(None, description="Parser options")
+    processes     : int                                     = Field(4, ge=1, le=8, description="Deno processes the modules are spread across")
+    stitch        : bool                                    = Field(True, description="Return one Program AST; false returns the runtime plus one AST per module")
+    return_handle : bool                                    = Field(False, description="Keep the stitched AST server side and return a handle for /js-ast/node/{handle}")
+
+
+class Schema__AST__Outline__Request(BaseModel):                                      # API request for a file outline
+    code    : str                                     = Field(..., description="JavaScript code to outline", min_length=0, max_length=1048576)
+    options : Optional[Schema__AST__Parser__Options] = Field(None, description="Parser options")
+
+
+class Schema__AST__Graph__Request(BaseModel):                                        # API request for AST to graph conversion
+    code              : str                                     = Field(..., description="JavaScript code to convert", min_length=0, max_length=1048576)
+    options           : Optional[Schema__AST__Parser__Options]  = Field(None, description="Parser options")
+    include_positions : bool                                    = Field(True, description="Keep start/end and loc on every node; false prunes them")
+
+
+class Schema__AST__Text__Edit(BaseModel):                                          # One text change, in the AST's offsets
+    start : int = Field(..., ge=0, description="Start offset in the handle's current source (UTF-16 code units, as in the AST)")
+    end   : int = Field(..., ge=0, description="End offset (exclusive); equal to start for an insertion")
+    text  : str = Field(''  , description="Replacement text; empty deletes the range")
+
+
+class Schema__AST__Reparse__Request(BaseModel):                                      # API request for an incremental re-parse
+    handle     : str                           = Field(..., description="Handle from a parse with return_handle")
+    edits      : List[Schema__AST__Text__Edit] = Field(..., min_length=1, max_length=1000, description="Non-overlapping edits, all against the current source")
+    return_ast : bool                          = Field(False, description="Return the whole updated Program instead of the statement diff")
+
+
+class Schema__AST__Diff__Request(BaseModel):                                         # API request for a structural diff
+    code_before   : Optional[str]                           = Field(None, description="Previous version of the source", max_length=1048576)
+    code_after    : Optional[str]                           = Field(None, description="New version of the source"     , max_length=1048576)
+    handle_before : Optional[str]                           = Field(None, description="Stored AST to use instead of code_before")
+    handle_after  : Optional[str]                           = Field(None, description="Stored AST to use instead of code_after")
+    options       : Optional[Schema__AST__Parser__Options]  = Field(None, description="Parser options")
+
+
+class Schema__AST__Transform__Step(BaseModel):                                       # One built-in transform step
+    name   : str  = Field(..., description=f"One of: {', '.join(TRANSFORM__STEPS)}")
+    params : dict = Field(default_factory=dict, description="Step parameters, e.g. {\"map\": {\"oldName\": \"newName\"}} for rename")
+
+
+class Schema__AST__Transform__Request(BaseModel):                                    # API request for a server-side transform pipeline
+    code              : str                                     = Field(..., description="JavaScript code to transform", min_length=0, max_length=1048576)
+    steps             : List[Schema__AST__Transform__Step]      = Field(..., description="Transforms applied in order", min_length=1, max_length=TRANSFORM__MAX_STEPS)
+    parser_options    : Optional[Schema__AST__Parser__Options]   = Field(None, description="Parser options")
+    generator_options : Optional[Schema__AST__Generator__Options] = Field(None, description="Generator options (source_map for a map back to the input)")
+
+
+class Schema__AST__Minify__Request(BaseModel):                                       # API request for minification
+    code           : str                                  = Field(..., description="JavaScript code to minify", min_length=0, max_length=1048576)
+    mangle         : bool                                 = Field(True, description="Shorten local variable names (top level names are kept)")
+    steps          : List[Schema__AST__Transform__Step]   = Field(default_factory=list, description="Transforms run before minifying, e.g. strip_console", max_length=TRANSFORM__MAX_STEPS)
+    parser_options : Optional[Schema__AST__Parser__Options] = Field(None, description="Parser options")
+    source_map     : bool                                 = Field(False, description="Return a source map back to the input")
+
+
+MEDIA_TYPES__STREAM_FORMAT = {'ndjson': 'application/x-ndjson',
+                              'json'  : 'application/json'    }
+
 TAG__ROUTES_JS_AST   = 'js-ast'
 ROUTES_PATHS__JS_AST = [f'/{TAG__ROUTES_JS_AST}/parse'    ,
                         f'/{TAG__ROUTES_JS_AST}/generate' ,
                         f'/{TAG__ROUTES_JS_AST}/roundtrip',
+                        f'/{TAG__ROUTES_JS_AST}/query'    ,
+                        f'/{TAG__ROUTES_JS_AST}/parse-batch',
+                        f'/{TAG__ROUTES_JS_AST}/parse-stream',
+                        f'/{TAG__ROUTES_JS_AST}/parse-bundle',
+                        f'/{TAG__ROUTES_JS_AST}/tokenize' ,
+                        f'/{TAG__ROUTES_JS_AST}/to-graph' ,
+                        f'/{TAG__ROUTES_JS_AST}/node/{{handle}}',
+                        f'/{TAG__ROUTES_JS_AST}/reparse'  ,
+                        f'/{TAG__ROUTES_JS_AST}/diff'     ,
+                        f'/{TAG__ROUTES_JS_AST}/transform',
+                        f'/{TAG__ROUTES_JS_AST}/minify'   ,
+                        f'/{TAG__ROUTES_JS_AST}/outline'  ,
                         f'/{TAG__ROUTES_JS_AST}/health'   ]
 
 
@@ -86,25 +210,10 @@ class Routes__JS__AST(Fast_API__Routes):
         ```
         """
         try:
-            options = None
-            if request.options:
-                options = JS__AST__Parser__Options(
-                    ecma_version = Safe_Str__ECMAVersion(request.options.ecma_version),
-                    source_type  = Safe_Str__SourceType(request.options.source_type)  ,
-                    jsx          = request.options.jsx                                ,
-                    typescript   = request.options.typescript                         ,
-                    next         = request.options.next                               ,
-                    locations    = request.options.locations                          ,
-                    ranges       = request.options.ranges                             ,
-                    raw          = request.options.raw                                ,
-                    tokens       = request.options.tokens                             ,
-                    comments     = request.options.comments                           ,
-                    tolerant     = request.options.tolerant
-                )
-
             service_request = JS__AST__Parse__Request(
-                code    = Safe_Str__Javascript(request.code),
-                options = options
+                code          = Safe_Str__Javascript(request.code)      ,
+                options       = self._parser_options(request.options)   ,
+                return_handle = request.return_handle
             )
 
             response = self.ast_service.parse_to_ast(service_request)
@@ -115,6 +224,8 @@ class Routes__JS__AST(Fast_API__Routes):
             return {
                 "success"       : response.success      ,
                 "ast"           : response.ast          ,
+                "tokens"        : response.tokens       ,
+                "handle"        : response.handle       ,
                 "parse_time_ms" : response.parse_time_ms
             }
 
@@ -151,17 +262,9 @@ class Routes__JS__AST(Fast_API__Routes):
         ```
         """
         try:
-            options = None
-            if request.options:
-                options = JS__AST__Generator__Options(indent       = Safe_Str__Code__Formatting(request.options.indent      ),
-                                                      line_end     = Safe_Str__Code__Formatting(request.options.line_end    ),
-                                                      start_indent = Safe_Str__Code__Formatting(request.options.start_indent),
-                                                      comments     = request.options.comments,
-                                                      source_map   = request.options.source_map)
-
             service_request = JS__AST__Generate__Request(
-                ast     = request.ast,
-                options = options
+                ast     = request.ast                                 ,
+                options = self._generator_options(request.options)
             )
 
             response = self.ast_service.generate_from_ast(service_request)
@@ -172,6 +275,7 @@ class Routes__JS__AST(Fast_API__Routes):
             return {
                 "success"            : response.success           ,
                 "code"               : str(response.code)         ,
+                "source_map"         : response.source_map        ,
                 "generation_time_ms" : response.generation_time_ms
             }
 
@@ -202,36 +306,10 @@ class Routes__JS__AST(Fast_API__Routes):
         ```
         """
         try:
-            parser_options = None
-            if request.parser_options:
-                parser_options = JS__AST__Parser__Options(
-                    ecma_version = Safe_Str__ECMAVersion(request.parser_options.ecma_version),
-                    source_type  = Safe_Str__SourceType(request.parser_options.source_type)  ,
-                    jsx          = request.parser_options.jsx                                ,
-                    typescript   = request.parser_options.typescript                         ,
-                    next         = request.parser_options.next                               ,
-                    locations    = request.parser_options.locations                          ,
-                    ranges       = request.parser_options.ranges                             ,
-                    raw          = request.parser_options.raw                                ,
-                    tokens       = request.parser_options.tokens                             ,
-                    comments     = request.parser_options.comments                           ,
-                    tolerant     = request.parser_options.tolerant
-                )
-
-            generator_options = None
-            if request.generator_options:
-                generator_options = JS__AST__Generator__Options(
-                    indent       = Safe_Str__Code__Formatting(request.generator_options.indent)      ,
-                    line_end     = Safe_Str__Code__Formatting(request.generator_options.line_end)    ,
-                    start_indent = Safe_Str__Code__Formatting(request.generator_options.start_indent),
-                    comments     = request.generator_options.comments              ,
-                    source_map   = request.generator_options.source_map
-                )
-
             service_request = JS__AST__Roundtrip__Request(
                 code              = Safe_Str__Javascript(request.code),
-                parser_options    = parser_options                    ,
-                generator_options = generator_options
+                parser_options    = self._parser_options(request.parser_options),
+                generator_options = self._generator_options(request.generator_options)
             )
 
             response = self.ast_service.validate_roundtrip(service_request)
@@ -245,6 +323,7 @@ class Routes__JS__AST(Fast_API__Routes):
                 "original_ast"     : response.original_ast                ,
                 "generated_code"   : str(response.generated_code) if response.generated_code else None,
                 "regenerated_ast"  : response.regenerated_ast             ,
+                "diff_path"        : response.diff_path                   ,
                 "parse_time_ms"    : response.parse_time_ms               ,
                 "generate_time_ms" : response.generate_time_ms            ,
                 "total_time_ms"    : response.total_time_ms
@@ -255,6 +334,108 @@ class Routes__JS__AST(Fast_API__Routes):
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Roundtrip validation failed: {str(e)}")
 
+    def query(self, request: Schema__AST__Query__Request                             # Run ESQuery selectors, returning only matching nodes
+              ):
+        """
+        Run ESQuery selectors against the AST and return only the matching nodes
+
+        Example request:
+        ```json
+        {
+          "code": "import a from 'a'; fetch('/x'); fetch('/y');",
+          "selectors": ["CallExpression[callee.name='fetch']", "ImportDeclaration"],
+          "include_ancestors": false
+        }
+        ```
+
+        Send `handle` (kept by `parse` with `return_handle: true`) instead of `code` to query a stored
+        tree without sending or parsing the source again.
+        """
+        try:
+            service_request = JS__AST__Query__Request(
+                code              = Safe_Str__Javascript(request.code) if request.code is not None else None,
+                handle            = request.handle                          ,
+                selectors         = request.selectors                       ,
+                options           = self._parser_options(request.options)   ,
+                include_ancestors = request.include_ancestors               ,
+                max_matches       = request.max_matches
+            )
+
+            response = self.ast_service.query_ast(service_request)
+
+            if not response.success:
+                raise HTTPException(status_code=400, detail=str(response.error))
+
+            return {
+                "success"       : response.success      ,
+                "results"       : response.results      ,
+                "query_time_ms" : response.query_time_ms
+            }
+
+        except HTTPException:
+            raise
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Query failed: {str(e)}")
+
+    def parse_batch(self, request: Schema__AST__Parse__Batch__Request                # Parse many files in one call, streaming NDJSON results
+                    ):
+        """
+        Parse many JavaScript sources in one call
+
+        Items are parsed inside one Deno process (or spread across `processes` of them) and each
+        item's result is streamed back as one NDJSON line as soon as it completes. Results may arrive
+        out of order when `processes` > 1; a failing item yields `{"id": ..., "success": false, "error": ...}`
+        without failing the rest of the batch.
+
+        Example request:
+        ```json
+        {
+          "items": [
+            {"id": "a.js", "code": "export const a = 1;"},
+            {"id": "b.js", "code": "const b = ;"}
+          ]
+        }
+        ```
+        """
+        try:
+            items = [JS__AST__Parse__Batch__Item(id           = item.id                             ,
+                                                 code         = Safe_Str__Javascript(item.code)     ,
+                                                 options      = self._parser_options(item.options)  ,
+                                                 start_offset = item.start_offset                   ,
+                                                 start_line   = item.start_line                     ,
+                                                 start_column = item.start_column                   )
+                     for item in request.items]
+            service_request = JS__AST__Parse__Batch__Request(items=items, processes=request.processes)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        return StreamingResponse(self._ndjson(self.ast_service.parse_batch__ndjson(service_request)),
+                                 media_type = 'application/x-ndjson')
+
+    def parse_stream(self, request: Schema__AST__Parse__Stream__Request              # Parse JavaScript, streaming the AST statement by statement
+                     ):
+        """
+        Parse JavaScript code, streaming the AST one top-level statement at a time
+
+        With `"format": "ndjson"` the response is one JSON event per line:
+        `{"event": "program", "node": {...Program without body...}}`, then one
+        `{"event": "statement", "index": i, "node": {...}}` per `Program.body` statement, then
+        `{"event": "end", "statements": n, "parse_time_ms": t}` (or `{"event": "error", ...}`).
+
+        With `"format": "json"` the response is the usual ESTree Program document, sent in chunks.
+        """
+        try:
+            service_request = JS__AST__Parse__Stream__Request(code    = Safe_Str__Javascript   (request.code   ),
+                                                              options = self._parser_options   (request.options),
+                                                              format  = Safe_Str__Stream_Format(request.format ))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        return StreamingResponse(self._ndjson(self.ast_service.parse_to_ast__stream(service_request)),
+                                 media_type = MEDIA_TYPES__STREAM_FORMAT[request.format])
+
     def health(self) -> dict:                                                        # Check if the AST service is healthy
 
         try:
@@ -286,8 +467,482 @@ class Routes__JS__AST(Fast_API__Routes):
                 "error"   : str(e)
             }
 
+    def tokenize(self, request: Schema__AST__Parse__Request                          # Return only the token stream, without the AST
+                 ):
+        """
+        Tokenize JavaScript code without returning its AST
+
+        Tokens come back in columnar form: token `i` has type `types[type_ids[i]]` and spans
+        `starts[i]`..`ends[i]` in the source.
+
+        Example request:
+        ```json
+        {
+          "code": "const x = 42;"
+        }
+        ```
+        """
+        try:
+            service_request = JS__AST__Parse__Request(
+                code    = Safe_Str__Javascript(request.code)      ,
+                options = self._parser_options(request.options)
+            )
+
+            response = self.ast_service.tokenize(service_request)
+
+            if not response.success:
+                raise HTTPException(status_code=400, detail=str(response.error))
+
+            return {
+                "success"          : response.success         ,
+                "tokens"           : response.tokens          ,
+                "token_count"      : response.token_count     ,
+                "tokenize_time_ms" : response.tokenize_time_ms
+            }
+
+        except HTTPException:
+            raise
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Tokenize failed: {str(e)}")
+
+    def to_graph(self, request: Schema__AST__Graph__Request                          # Convert JavaScript to a compact node/edge graph
+                 ):
+        """
+        Convert JavaScript code to a node/edge graph of its AST
+
+        Node ids are positions in `nodes`, each node being
+        `[type_id, attrs, start, end, start_line, start_column, end_line, end_column]` (positions are
+        omitted when `include_positions` is false). Edges are `[from, to, edge_type_id, list_index]`,
+        typed by the child key (`body`, `init`, ...), with `list_index` -1 for non-list children.
+
+        Example request:
+        ```json
+        {
+          "code": "const x = f(1);",
+          "include_positions": false
+        }
+        ```
+        """
+        try:
+            service_request = JS__AST__Graph__Request(
+                code              = Safe_Str__Javascript(request.code)      ,
+                options           = self._parser_options(request.options)   ,
+                include_positions = request.include_positions
+            )
+
+            response = self.ast_service.ast_to_graph(service_request)
+
+            if not response.success:
+                raise HTTPException(status_code=400, detail=str(response.error))
+
+            return {
+                "success"       : response.success      ,
+                "node_types"    : response.node_types   ,
+                "edge_types"    : response.edge_types   ,
+                "nodes"         : response.nodes        ,
+                "edges"         : response.edges        ,
+                "graph_time_ms" : response.graph_time_ms
+            }
+
+        except HTTPException:
+            raise
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Graph conversion failed: {str(e)}")
+
+    def node__handle(self, handle    : str,                                          # Fetch a subtree of a stored AST by JSON pointer
+                           pointer   : str = ''  ,
+                           max_depth : int = 2
+                     ):
+        """
+        Fetch part of an AST kept server side by `parse` with `return_handle: true`
+
+        `pointer` is an RFC 6901 JSON pointer into the ESTree (e.g. `/body/3/declarations/0/init`,
+        empty for the whole Program). Nodes more than `max_depth` levels below it come back as stubs
+        `{"type", "start", "end", "truncated": true, "pointer"}`, whose `pointer` fetches them next.
+        Handles expire after a period without access, or when newer ones push them out of the store.
+        """
+        if max_depth < 0 or max_depth > 100:
+            raise HTTPException(status_code=400, detail="max_depth must be between 0 and 100")
+        try:
+            service_request = JS__AST__Node__Request(handle=handle, pointer=pointer, max_depth=max_depth)
+
+            response = self.ast_service.fetch_node(service_request)
+
+            if not response.success:
+                raise HTTPException(status_code=404, detail=str(response.error))
+
+            return {
+                "success" : response.success,
+                "handle"  : response.handle ,
+                "pointer" : response.pointer,
+                "node"    : response.node
+            }
+
+        except HTTPException:
+            raise
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Node fetch failed: {str(e)}")
+
+    def reparse(self, request: Schema__AST__Reparse__Request                         # Apply text edits to a stored AST, re-parsing only what they touch
+                ):
+        """
+        Update an AST kept server side (see `parse` with `return_handle: true`) after edits to its source
+
+        Only the top-level statements that overlap the edits (plus one neighbour on each side) are parsed
+        again; every other statement is reused, with its offsets and locations moved by the edit. The
+        handle then points at the new tree and source. The response is a statement diff against the
+        previous `Program.body`: remove `delete_count` statements at `start_index`, insert `statements`,
+        and shift later positions by `offset_delta` / `line_delta`; or the whole Program with
+        `return_ast: true`. Edits touching a directive prologue, trees parsed without `ranges`, and
+        regions that do not parse on their own fall back to a full parse (`full_reparse: true`). Edits are
+        offsets into the handle's current source, so when another reparse of the same handle lands first the
+        request is rejected with 409 and the tree is left as that reparse made it.
+
+        Example request:
+        ```json
+        {
+          "handle": "3f2a...",
+          "edits" : [{"start": 10, "end": 11, "text": "2"}]
+        }
+        ```
+        """
+        try:
+            service_request = JS__AST__Reparse__Request(
+                handle     = request.handle                                                                         ,
+                edits      = [JS__AST__Text__Edit(start=edit.start, end=edit.end, text=edit.text) for edit in request.edits],
+                return_ast = request.return_ast
+            )
+
+            response = self.ast_service.reparse(service_request)
+
+            if response.handle is None:
+                raise HTTPException(status_code=404, detail=str(response.error))
+            if response.conflict:
+                raise HTTPException(status_code=409, detail=str(response.error))
+            if not response.success:
+                raise HTTPException(status_code=400, detail=str(response.error))
+
+            return {
+                "success"         : response.success        ,
+                "handle"          : response.handle         ,
+                "ast"             : response.ast            ,
+                "diff"            : response.diff           ,
+                "full_reparse"    : response.full_reparse   ,
+                "reparse_time_ms" : response.reparse_time_ms
+            }
+
+        except HTTPException:
+            raise
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Reparse failed: {str(e)}")
+
+    def diff(self, request: Schema__AST__Diff__Request                               # Structural diff of two versions of a script
+             ):
+        """
+        Compare two versions of a script structurally, returning a compact edit script
+
+        Both sources are parsed in parallel (or taken from handles kept by `parse` with
+        `return_handle: true`) and matched GumTree style: identical subtrees first (tallest first,
+        by merkle hash), then containers sharing most of their matched descendants. Positions, `raw`
+        and comments are ignored as in the roundtrip comparison, so formatting-only changes give no
+        edits. Each edit is one of:
+
+        - `{"op": "update", "path", "new_path", "type", "changes": {attribute: [before, after]}}`
+        - `{"op": "move"  , "path", "new_path", "type"}`
+        - `{"op": "insert", "new_path", "type", "node"}`
+        - `{"op": "delete", "path", "type"}`
+
+        `path` is a JSON pointer into the previous tree and `new_path` one into the new tree.
+
+        Example request:
+        ```json
+        {
+          "code_before": "const x = 1; f(x);",
+          "code_after" : "const x = 2;\nf(x, y);"
+        }
+        ```
+        """
+        try:
+            service_request = JS__AST__Diff__Request(
+                code_before   = Safe_Str__Javascript(request.code_before) if request.code_before is not None else None,
+                code_after    = Safe_Str__Javascript(request.code_after ) if request.code_after  is not None else None,
+                handle_before = request.handle_before                                                                ,
+                handle_after  = request.handle_after                                                                 ,
+                options       = self._parser_options(request.options)
+            )
+
+            response = self.ast_service.diff(service_request)
+
+            if not response.success:
+                raise HTTPException(status_code=400, detail=str(response.error))
+
+            return {
+                "success"      : response.success     ,
+                "edits"        : response.edits       ,
+                "edit_count"   : response.edit_count  ,
+                "diff_time_ms" : response.diff_time_ms
+            }
+
+        except HTTPException:
+            raise
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Diff failed: {str(e)}")
+
+    def transform(self, request: Schema__AST__Transform__Request                     # parse -> built-in transforms -> generate, server side
+                  ):
+        """
+        Run built-in AST transforms and return only the resulting code
+
+        Parsing, every step and generation happen in one parser process, so the AST never crosses the
+        network. Steps run in order, one tree walk each:
+
+        - `strip_console` - drop `console.*` call statements (other uses become `void 0`); `params.methods` limits it to e.g. `["log", "debug"]`
+        - `strip_debugger` - drop `debugger;` statements
+        - `rename` - `params.map` of `{old: new}` identifier names, renaming every variable with that name (not property keys, labels or import/export names)
+        - `define` - `params.map` of `{"process.env.NODE_ENV": "production"}`, replacing global names or member chains with constants
+        - `remove_dead_branches` - keep only the taken branch of `if`, `?:`, `&&`, `||` and `??` on constant tests, and drop `while (false)`
+        - `mangle` - short names for local variables, parameters and functions (top level names and scopes using `eval`/`with` are kept)
+
+        Example request:
+        ```json
+        {
+          "code": "if (process.env.NODE_ENV !== 'production') { console.log('dev'); } run();",
+          "steps": [{"name": "define", "params": {"map": {"process.env.NODE_ENV": "production"}}},
+                    {"name": "remove_dead_branches"}]
+        }
+        ```
+        """
+        try:
+            service_request = JS__AST__Transform__Request(
+                code              = Safe_Str__Javascript(request.code)                                         ,
+                steps             = [JS__AST__Transform__Step(name=step.name, params=step.params) for step in request.steps],
+                parser_options    = self._parser_options(request.parser_options)                               ,
+                generator_options = self._generator_options(request.generator_options)
+            )
+
+            response = self.ast_service.transform(service_request)
+
+            if not response.success:
+                raise HTTPException(status_code=400, detail=str(response.error))
+
+            return {
+                "success"           : response.success                                   ,
+                "code"              : str(response.code) if response.code else ""        ,
+                "source_map"        : response.source_map                                ,
+                "steps"             : response.steps                                     ,
+                "transform_time_ms" : response.transform_time_ms
+            }
+
+        except HTTPException:
+            raise
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Transform failed: {str(e)}")
+
+    def minify(self, request: Schema__AST__Minify__Request                           # transforms -> mangle -> compact generate, with size stats
+               ):
+        """
+        Minify JavaScript and report how much smaller it got
+
+        Runs any requested transform steps, then `mangle` (unless `mangle` is false) and a compact generate, all in
+        one parser process. The response carries UTF-8 byte counts and gzip sizes for input and output.
+
+        Example request:
+        ```json
+        {
+          "code": "function add(first, second) { console.log(first); return first + second; }",
+          "steps": [{"name": "strip_console"}]
+        }
+        ```
+        """
+        try:
+            service_request = JS__AST__Minify__Request(
+                code           = Safe_Str__Javascript(request.code)                                         ,
+                mangle         = request.mangle                                                             ,
+                steps          = [JS__AST__Transform__Step(name=step.name, params=step.params) for step in request.steps],
+                parser_options = self._parser_options(request.parser_options)                               ,
+                source_map     = request.source_map
+            )
+
+            response = self.ast_service.minify(service_request)
+
+            if not response.success:
+                raise HTTPException(status_code=400, detail=str(response.error))
+
+            return {
+                "success"           : response.success                                   ,
+                "code"              : str(response.code) if response.code else ""        ,
+                "source_map"        : response.source_map                                ,
+                "steps"             : response.steps                                     ,
+                "input_bytes"       : int(response.input_bytes      )                    ,
+                "output_bytes"      : int(response.output_bytes     )                    ,
+                "input_gzip_bytes"  : int(response.input_gzip_bytes )                    ,
+                "output_gzip_bytes" : int(response.output_gzip_bytes)                    ,
+                "ratio"             : response.ratio                                     ,
+                "minify_time_ms"    : response.minify_time_ms
+            }
+
+        except HTTPException:
+            raise
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Minify failed: {str(e)}")
+
+    def parse_bundle(self, request: Schema__AST__Parse__Bundle__Request              # Parse a webpack/esbuild bundle module by module, in parallel
+                     ):
+        """
+        Parse a webpack or esbuild bundle by splitting it at its module boundaries
+
+        The module map (webpack `__webpack_modules__`, chunk `push([[ids], {...}])` or bootstrap
+        `(function(modules){...})([...])`, and esbuild `__commonJS` / `__esm` wrappers) is found with a
+        lexical scan, and every module function is parsed on its own, spread across `processes` Deno
+        processes. The results are stitched back into one Program AST whose positions are those of the
+        whole bundle, or, with `"stitch": false`, returned per module next to the runtime (where each
+        module is a `0` placeholder).
+
+        Sources with no recognised module map (e.g. rollup's scope-hoisted output) are parsed as one
+        program, and `bundle_format` is then `null`.
+
+        Example request:
+        ```json
+        {
+          "code": "var __webpack_modules__ = ({ 1: (m) => { m.exports = 1; }, 2: (m) => { m.exports = 2; } });",
+          "processes": 2
+        }
+        ```
+        """
+        try:
+            service_request = JS__AST__Parse__Bundle__Request(
+                code          = Safe_Str__Javascript__Bundle(request.code),
+                options       = self._parser_options(request.options)     ,
+                processes     = request.processes                         ,
+                stitch        = request.stitch                            ,
+                return_handle = request.return_handle
+            )
+
+            response = self.ast_service.parse_bundle(service_request)
+
+            if not response.success:
+                raise HTTPException(status_code=400, detail=str(response.error))
+
+            return {
+                "success"       : response.success      ,
+                "bundle_format" : response.bundle_format,
+                "ast"           : response.ast          ,
+                "modules"       : response.modules      ,
+                "module_count"  : response.module_count ,
+                "handle"        : response.handle       ,
+                "parse_time_ms" : response.parse_time_ms
+            }
+
+        except HTTPException:
+            raise
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Bundle parse failed: {str(e)}")
+
+    def outline(self, request: Schema__AST__Outline__Request                         # Top-level declarations, imports and exports only
+                ):
+        """
+        Outline a JavaScript file: imports, exports and top-level declarations with their ranges
+
+        Functions, classes (with their members) and variables are listed without their bodies, and
+        CommonJS `require(...)` / `module.exports` are picked up too. The outline is built inside the
+        parser process, so function bodies are never serialised.
+
+        Example request:
+        ```json
+        {
+          "code": "import {a} from 'a';\nexport function f(x) { return a(x); }"
+        }
+        ```
+        """
+        try:
+            service_request = JS__AST__Parse__Request(
+                code    = Safe_Str__Javascript(request.code)      ,
+                options = self._parser_options(request.options)
+            )
+
+            response = self.ast_service.outline(service_request)
+
+            if not response.success:
+                raise HTTPException(status_code=400, detail=str(response.error))
+
+            return {
+                "success"         : response.success        ,
+                "imports"         : response.imports        ,
+                "exports"         : response.exports        ,
+                "declarations"    : response.declarations   ,
+                "outline_time_ms" : response.outline_time_ms
+            }
+
+        except HTTPException:
+            raise
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Outline failed: {str(e)}")
+
+    def _parser_options(self, options: Optional[Schema__AST__Parser__Options]        # Convert API parser options to service options
+                        ) -> Optional[JS__AST__Parser__Options]:
+        if options is None:
+            return None
+        return JS__AST__Parser__Options(ecma_version = Safe_Str__ECMAVersion(options.ecma_version),
+                                        source_type  = Safe_Str__SourceType (options.source_type ),
+                                        jsx          = options.jsx                                ,
+                                        typescript   = options.typescript                         ,
+                                        next         = options.next                               ,
+                                        locations    = options.locations                          ,
+                                        ranges       = options.ranges                             ,
+                                        raw          = options.raw                                ,
+                                        tokens       = options.tokens                             ,
+                                        comments     = options.comments                           ,
+                                        tolerant     = options.tolerant                           )
+
+    def _generator_options(self, options: Optional[Schema__AST__Generator__Options]  # Convert API generator options to service options
+                           ) -> Optional[JS__AST__Generator__Options]:
+        if options is None:
+            return None
+        return JS__AST__Generator__Options(indent            = Safe_Str__Code__Formatting(options.indent      ),
+                                           line_end          = Safe_Str__Code__Formatting(options.line_end    ),
+                                           start_indent      = Safe_Str__Code__Formatting(options.start_indent),
+                                           comments          = options.comments                               ,
+                                           source_map        = options.source_map                             ,
+                                           source_map_inline = options.source_map_inline                      ,
+                                           source_file       = options.source_file                            ,
+                                           compact           = options.compact                                )
+
+    def _ndjson(self, lines):                                                        # Terminate each streamed line with a newline
+        for line in lines:
+            yield line + '\n'
+
     def setup_routes(self):                                                          # Configure FastAPI routes
-        self.add_route_post(self.parse    )
-        self.add_route_post(self.generate )
-        self.add_route_post(self.roundtrip)
-        self.add_route_get (self.health   )
\ No newline at end of file
+        self.add_route_post(self.parse       )
+        self.add_route_post(self.generate    )
+        self.add_route_post(self.roundtrip   )
+        self.add_route_post(self.query       )
+        self.add_route_post(self.parse_batch )
+        self.add_route_post(self.parse_stream)
+        self.add_route_post(self.parse_bundle)
+        self.add_route_post(self.tokenize    )
+        self.add_route_post(self.to_graph    )
+        self.add_route_get (self.node__handle)
+        self.add_route_post(self.reparse     )
+        self.add_route_post(self.diff        )
+        self.add_route_post(self.transform   )
+        self.add_route_post(self.minify      )
+        self.add_route_post(self.outline     )
+        self.add_route_get (self.health      )
\ No newline at end of file
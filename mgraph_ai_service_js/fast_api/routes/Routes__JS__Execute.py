@@ -1,5 +1,7 @@
-from typing                                                 import Optional, Dict, Any
+from typing                                                 import Optional, Dict, Any, List
+import json
 from fastapi                                                import HTTPException
+from fastapi.responses                                      import StreamingResponse
 from pydantic                                               import BaseModel, Field
 from osbot_fast_api.api.routes.Fast_API__Routes             import Fast_API__Routes
 from osbot_utils.decorators.methods.cache_on_self           import cache_on_self
@@ -7,6 +9,8 @@ from mgraph_ai_service_js.service.deno.Deno__JS__Execution  import Deno__JS__Exe
 from mgraph_ai_service_js.service.deno.Deno__JS__Execution  import JS__Execution__Config
 from mgraph_ai_service_js.service.deno.Deno__JS__Execution  import JS__Execution__Permissions
 from mgraph_ai_service_js.service.deno.Deno__JS__Execution  import JS__Execution__Request
+from mgraph_ai_service_js.service.deno.Deno__JS__Functions  import Deno__JS__Functions, JS__Map__Request
+from mgraph_ai_service_js.service.deno.Deno__JS__Functions  import JS__Pipeline__Request, JS__Pipeline__Step
 
 # API Schema Models (for FastAPI/Pydantic compatibility)
 class Schema__JS__Permissions(BaseModel):
@@ -61,8 +65,99 @@ class Schema__JS__Validate__Response(BaseModel):
     error : Optional[str]  = Field(None, description="Validation error message")
 
 
+class Schema__JS__Map__Request(BaseModel):
+    """API request schema for running one function body over many inputs"""
+    code        : str                           = Field(..., description="Function body receiving INPUT, called once per input", min_length=1, max_length=1048576)
+    inputs      : List[Any]                     = Field(..., description="Inputs, each passed as INPUT", max_length=100000)
+    config      : Optional[Schema__JS__Config]  = Field(None, description="Execution configuration (max_execution_time_ms bounds each chunk)")
+    parallelism : Optional[int]                 = Field(None, ge=1, le=256, description="Workers used at once (default and max: the worker pool size)")
+    chunk_size  : Optional[int]                 = Field(None, ge=1, le=100000, description="Inputs sent to a worker per round trip (default: 4 chunks per worker)")
+    reduce_code : Optional[str]                 = Field(None, description="Function body receiving INPUT = the results in order (null for failed items)", min_length=1, max_length=1048576)
+
+
+class Schema__JS__Map__Item(BaseModel):
+    success : bool          = Field(..., description="This input's call succeeded")
+    result  : Any           = Field(None, description="Returned value (JSON)")
+    error   : Optional[str] = Field(None, description="Error output")
+    output  : Optional[str] = Field(None, description="Console output")
+
+
+class Schema__JS__Map__Response(BaseModel):
+    """API response schema for map execution"""
+    success           : bool                        = Field(..., description="Every item and the reduce step succeeded")
+    results           : List[Schema__JS__Map__Item] = Field(..., description="One result per input, in order")
+    errors            : int                         = Field(..., description="Failed items")
+    reduced           : Any                         = Field(None, description="Value returned by reduce_code")
+    reduce_error      : Optional[str]               = Field(None, description="Error of the reduce step")
+    chunks            : int
+    parallelism       : int
+    execution_time_ms : int
+    deno_version      : str
+
+
+class Schema__JS__Pipeline__Step(BaseModel):
+    code   : str                           = Field(..., description="Function body receiving INPUT = the previous step's result", min_length=1, max_length=1048576)
+    config : Optional[Schema__JS__Config]  = Field(None, description="Step configuration (defaults to the pipeline's)")
+
+
+class Schema__JS__Pipeline__Request(BaseModel):
+    """API request schema for a multi-step pipeline"""
+    steps      : List[Schema__JS__Pipeline__Step] = Field(..., description="Steps, run in order", min_length=1, max_length=64)
+    input_data : Optional[Dict[str, Any]]         = Field(None, description="INPUT of the first step")
+    config     : Optional[Schema__JS__Config]     = Field(None, description="Configuration of steps without their own")
+
+
+class Schema__JS__Pipeline__Step__Result(BaseModel):
+    step              : int
+    success           : bool
+    execution_time_ms : float         = Field(..., description="Time spent in the step's code")
+    error             : Optional[str] = None
+    output            : Optional[str] = Field(None, description="Console output")
+
+
+class Schema__JS__Pipeline__Response(BaseModel):
+    """API response schema for a multi-step pipeline"""
+    success           : bool
+    result            : Any                                        = Field(None, description="Value returned by the last step (JSON)")
+    error             : Optional[str]                              = None
+    failed_step       : Optional[int]                              = Field(None, description="Index of the step that failed")
+    steps             : List[Schema__JS__Pipeline__Step__Result]   = Field(..., description="Steps that ran, with their timings")
+    execution_time_ms : int
+    deno_version      : str
+
+
+def execution_config(config: Optional[Schema__JS__Config]                         # Convert the API config to the Type_Safe execution config
+                     ) -> Optional[JS__Execution__Config]:
+    if config is None:
+        return None
+    permissions = None
+    if config.permissions:
+        permissions = JS__Execution__Permissions(
+            allow_read   = config.permissions.allow_read  ,
+            allow_write  = config.permissions.allow_write ,
+            allow_net    = config.permissions.allow_net   ,
+            allow_env    = config.permissions.allow_env   ,
+            allow_run    = config.permissions.allow_run   ,
+            allow_sys    = config.permissions.allow_sys   ,
+            allow_ffi    = config.permissions.allow_ffi   ,
+            allow_hrtime = config.permissions.allow_hrtime,
+            prompt       = config.permissions.prompt
+        )
+    return JS__Execution__Config(
+        max_execution_time_ms = config.max_execution_time_ms,
+        max_memory_mb         = config.max_memory_mb        ,
+        max_output_size       = config.max_output_size      ,
+        permissions           = permissions                 ,
+        capture_stderr        = config.capture_stderr       ,
+        json_output           = config.json_output
+    )
+
+
 TAG__ROUTES_JS_EXECUTE = 'js-execute'
 ROUTES_PATHS__JS_EXECUTE = [f'/{TAG__ROUTES_JS_EXECUTE}/execute'  ,
+                            f'/{TAG__ROUTES_JS_EXECUTE}/execute-stream',
+                            f'/{TAG__ROUTES_JS_EXECUTE}/map'      ,
+                            f'/{TAG__ROUTES_JS_EXECUTE}/pipeline' ,
                             f'/{TAG__ROUTES_JS_EXECUTE}/validate' ,
                             f'/{TAG__ROUTES_JS_EXECUTE}/health'   ]
 
@@ -70,12 +165,14 @@ ROUTES_PATHS__JS_EXECUTE = [f'/{TAG__ROUTES_JS_EXECUTE}/execute'  ,
 class Routes__JS__Execute(Fast_API__Routes):        # FastAPI routes for JavaScript execution service
     tag              : str                   = TAG__ROUTES_JS_EXECUTE
     deno_js_executor : Deno__JS__Execution
+    js_functions     : Deno__JS__Functions
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         with self.deno_js_executor as _:
             _.setup()
             _.install()
+        self.js_functions.deno_executor = self.deno_js_executor
 
     @cache_on_self
     def setup_executor(self) -> Deno__JS__Execution:                             # Initialize Deno executor
@@ -128,38 +225,7 @@ Example with simple js:
             if not self.deno_js_executor:
                 self.deno_js_executor = self.setup_executor()
 
-            # Convert API schema to Type_Safe models
-            permissions = None
-            if request.config and request.config.permissions:
-                permissions = JS__Execution__Permissions(
-                    allow_read   = request.config.permissions.allow_read  ,
-                    allow_write  = request.config.permissions.allow_write ,
-                    allow_net    = request.config.permissions.allow_net   ,
-                    allow_env    = request.config.permissions.allow_env   ,
-                    allow_run    = request.config.permissions.allow_run   ,
-                    allow_sys    = request.config.permissions.allow_sys   ,
-                    allow_ffi    = request.config.permissions.allow_ffi   ,
-                    allow_hrtime = request.config.permissions.allow_hrtime,
-                    prompt       = request.config.permissions.prompt
-                )
-
-            config = None
-            if request.config:
-                config = JS__Execution__Config(
-                    max_execution_time_ms = request.config.max_execution_time_ms,
-                    max_memory_mb        = request.config.max_memory_mb        ,
-                    max_output_size      = request.config.max_output_size      ,
-                    permissions          = permissions                         ,
-                    capture_stderr       = request.config.capture_stderr       ,
-                    json_output         = request.config.json_output
-                )
-
-            # Create execution request
-            exec_request = JS__Execution__Request(
-                code       = request.code      ,
-                config     = config            ,
-                input_data = request.input_data
-            )
+            exec_request = self._execution_request(request)
 
             # Execute the code
             result = self.deno_js_executor.execute_js(exec_request)
@@ -180,6 +246,86 @@ Example with simple js:
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Execution failed: {str(e)}")
 
+    def execute_stream(self, request: Schema__JS__Execute__Request               # Execute JavaScript code, streaming its output
+                      ):
+        """Execute JavaScript code, streaming its output as NDJSON while it runs
+
+Each printed line is sent as soon as it is written as `{"event": "output", "line": "..."}`,
+followed by one `{"event": "end", "success": ..., "error": ..., "execution_time_ms": ..., "truncated": ...}`
+line. Accepts the same request as `/js-execute/execute`.
+        """
+        try:
+            if not self.deno_js_executor:
+                self.deno_js_executor = self.setup_executor()
+            exec_request = self._execution_request(request)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        events = self.deno_js_executor.execute_js__stream(exec_request)
+        return StreamingResponse((json.dumps(event) + '\n' for event in events),
+                                 media_type = 'application/x-ndjson')
+
+    def map(self, request: Schema__JS__Map__Request                              # Run one function body over many inputs, across workers
+           ) -> Schema__JS__Map__Response:
+        """Run one function body over an array of inputs, in parallel across the warm worker pool
+
+The inputs are split into chunks (`chunk_size`, default 4 per worker). Each chunk goes to a pooled worker in one
+round trip, and at most `parallelism` workers run at once. The code is compiled once per worker. Results come back
+in input order, each with its own `success`/`error`. A failed item does not stop the others. A chunk that exceeds
+`max_execution_time_ms` fails as a whole. With `reduce_code`, the results array is passed as `INPUT` to one more
+call, and what it returns is `reduced`.
+
+Example:
+```json
+{
+  "code": "return INPUT.price * INPUT.quantity",
+  "inputs": [{"price": 2, "quantity": 3}, {"price": 5, "quantity": 1}],
+  "reduce_code": "return INPUT.reduce((total, value) => total + (value ?? 0), 0)"
+}
+```
+        """
+        try:
+            result = self.js_functions.map(JS__Map__Request(code        = request.code                    ,
+                                                            inputs      = request.inputs                  ,
+                                                            config      = execution_config(request.config),
+                                                            parallelism = request.parallelism             ,
+                                                            chunk_size  = request.chunk_size              ,
+                                                            reduce_code = request.reduce_code             ))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Map execution failed: {str(e)}")
+        return Schema__JS__Map__Response(deno_version=f'v{DENO__VERSION__COMPATIBLE_WITH_LAMBDA}', **result.json())
+
+    def pipeline(self, request: Schema__JS__Pipeline__Request                    # Run steps in order, each step's output the next step's INPUT
+                ) -> Schema__JS__Pipeline__Response:
+        """Run an ordered list of steps server side, passing each step's JSON result as the next step's `INPUT`
+
+Consecutive steps with the same permissions and memory limit run in one warm worker, in one round trip. The value
+is passed on as JSON, so only JSON data crosses steps. A step that throws or writes to stderr stops the pipeline,
+and `failed_step` says which one. Each step is stopped at its own `max_execution_time_ms`.
+
+Example:
+```json
+{
+  "steps": [{"code": "return INPUT.text.split(' ')"},
+            {"code": "return INPUT.map(word => word.length)"},
+            {"code": "return Math.max(...INPUT)"}],
+  "input_data": {"text": "multi step pipelines"}
+}
+```
+        """
+        try:
+            steps  = [JS__Pipeline__Step(code=step.code, config=execution_config(step.config)) for step in request.steps]
+            result = self.js_functions.pipeline(JS__Pipeline__Request(steps      = steps                           ,
+                                                                      input_data = request.input_data              ,
+                                                                      config     = execution_config(request.config)))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Pipeline execution failed: {str(e)}")
+        return Schema__JS__Pipeline__Response(deno_version=f'v{DENO__VERSION__COMPATIBLE_WITH_LAMBDA}', **result.json())
+
     def validate(self, request: Schema__JS__Validate__Request                    # Validate JavaScript syntax
                 ) -> Schema__JS__Validate__Response:
         """Validate JavaScript code syntax without executing it"""
@@ -238,7 +384,16 @@ Example with simple js:
                 "error"   : str(e)
             }
 
+    def _execution_request(self, request: Schema__JS__Execute__Request            # Convert API request to the Type_Safe execution request
+                           ) -> JS__Execution__Request:
+        return JS__Execution__Request(code       = request.code                    ,
+                                      config     = execution_config(request.config),
+                                      input_data = request.input_data              )
+
     def setup_routes(self):                                                       # Configure FastAPI routes
-        self.add_route_post(self.execute )
-        self.add_route_post(self.validate)
-        self.add_route_get (self.health  )
\ No newline at end of file
+        self.add_route_post(self.execute       )
+        self.add_route_post(self.execute_stream)
+        self.add_route_post(self.map           )
+        self.add_route_post(self.pipeline      )
+        self.add_route_post(self.validate      )
+        self.add_route_get (self.health        )
\ No newline at end of file
@@ -0,0 +1,121 @@
+from typing                                                     import Optional, Dict, Any
+from fastapi                                                    import HTTPException
+from pydantic                                                   import BaseModel, Field
+from osbot_fast_api.api.decorators.route_path                   import route_path
+from osbot_fast_api.api.routes.Fast_API__Routes                 import Fast_API__Routes
+from mgraph_ai_service_js.fast_api.routes.Routes__JS__Execute   import Schema__JS__Config, Schema__JS__Execute__Response, execution_config
+from mgraph_ai_service_js.service.deno.Deno__JS__Functions      import Deno__JS__Functions
+
+
+class Schema__Function__Register__Request(BaseModel):
+    """API request schema for registering a stored script"""
+    function_id : str                           = Field(..., description="Id to invoke the function by", pattern=r'^[A-Za-z0-9_.-]{1,64}$')
+    code        : str                           = Field(..., description="JavaScript function body, receiving INPUT", min_length=1, max_length=1048576)
+    config      : Optional[Schema__JS__Config]  = Field(None, description="Execution configuration used by every invocation")
+
+
+class Schema__Function__Invoke__Request(BaseModel):
+    """API request schema for invoking a stored script"""
+    input_data : Optional[Dict[str, Any]] = Field(None, description="Data to pass to the function as INPUT")
+
+
+TAG__ROUTES_JS_FUNCTIONS = 'js-functions'
+ROUTES_PATHS__JS_FUNCTIONS = [f'/{TAG__ROUTES_JS_FUNCTIONS}/register'                   ,
+                              f'/{TAG__ROUTES_JS_FUNCTIONS}/{{function_id}}/invoke'     ,
+                              f'/{TAG__ROUTES_JS_FUNCTIONS}/list'                       ,
+                              f'/{TAG__ROUTES_JS_FUNCTIONS}/info/{{function_id}}'       ,
+                              f'/{TAG__ROUTES_JS_FUNCTIONS}/delete/{{function_id}}'     ,
+                              f'/{TAG__ROUTES_JS_FUNCTIONS}/pool'                       ]
+
+
+class Routes__JS__Functions(Fast_API__Routes):                                    # Stored scripts: register once, invoke by id against warm workers
+    tag          : str                 = TAG__ROUTES_JS_FUNCTIONS
+    js_functions : Deno__JS__Functions
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        with self.js_functions.deno_executor as _:
+            _.setup()
+
+    def register(self, request: Schema__Function__Register__Request               # Store a script under an id
+                 ) -> dict:
+        """
+        Register a script (with its config and permissions) under an id
+
+        The code is compiled once per pooled worker (a long-lived Deno process per permission and memory profile)
+        and kept warm there, so `/js-functions/{function_id}/invoke` only sends the input. Each function runs in its
+        own isolate (a Web Worker) inside the worker, so functions share no globals, and timers still pending when a
+        call returns are cleared, their output dropped. Registering an existing id replaces its code and config.
+        A script that does not compile is rejected with 400.
+
+        Example request:
+        ```json
+        {
+          "function_id": "add",
+          "code": "return INPUT.a + INPUT.b",
+          "config": {"json_output": true}
+        }
+        ```
+        """
+        try:
+            return self.js_functions.register(request.function_id, request.code, execution_config(request.config)).info()
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Function registration failed: {str(e)}")
+
+    @route_path('/{function_id}/invoke')
+    def invoke(self, function_id : str,                                           # Run a stored script on new input
+                     request     : Schema__Function__Invoke__Request
+               ) -> Schema__JS__Execute__Response:
+        """Invoke a registered function with only its input data, in a warm worker (same response as `/js-execute/execute`)"""
+        try:
+            result = self.js_functions.invoke(function_id, request.input_data)
+        except KeyError:
+            raise HTTPException(status_code=404, detail=f"Unknown function id: {function_id}")
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Function invocation failed: {str(e)}")
+        return Schema__JS__Execute__Response(success           = result.success          ,
+                                             output            = result.output           ,
+                                             error             = result.error            ,
+                                             execution_time_ms = result.execution_time_ms,
+                                             memory_used_mb    = result.memory_used_mb   ,
+                                             truncated         = result.truncated        ,
+                                             deno_version      = result.deno_version     )
+
+    def list(self) -> dict:                                                       # Registered functions
+        """List the registered functions with their invocation counts and average time"""
+        return {'functions': self.js_functions.list()}
+
+    def info__function_id(self, function_id: str) -> dict:                        # One registered function
+        """Get a registered function's config and invocation stats"""
+        function = self.js_functions.functions.get(function_id)
+        if function is None:
+            raise HTTPException(status_code=404, detail=f"Unknown function id: {function_id}")
+        return function.info()
+
+    def delete__function_id(self, function_id: str) -> dict:                      # Unregister a function
+        """Remove a registered function, dropping its compiled code from the workers"""
+        if not self.js_functions.delete(function_id):
+            raise HTTPException(status_code=404, detail=f"Unknown function id: {function_id}")
+        return {'deleted': function_id}
+
+    def pool(self) -> dict:                                                       # Warm worker pool stats
+        """
+        Get the state of the worker pool (`DENO_WORKER_POOL_SIZE` workers at most, default the CPU count)
+
+        A worker is recycled after `DENO_WORKER_MAX_EXECUTIONS` calls (default 10000), once its heap is over
+        `DENO_WORKER_HEAP_WATERMARK_PERCENT` of its `max_memory_mb` (default 75), after `DENO_WORKER_MAX_AGE_S`
+        (default 900), after any call past its timeout (that call's isolate is ended at once, and a worker that
+        stops answering is killed), or when it exits. The replacement starts in the background with the same
+        functions compiled, and the old worker keeps serving until then. `recycles` counts recycled workers by reason.
+        """
+        return self.js_functions.worker_pool.stats()
+
+    def setup_routes(self):                                                       # Configure FastAPI routes
+        self.add_route_post  (self.register         )
+        self.add_route_post  (self.invoke           )
+        self.add_route_get   (self.list             )
+        self.add_route_get   (self.info__function_id)
+        self.add_route_delete(self.delete__function_id)
+        self.add_route_get   (self.pool             )
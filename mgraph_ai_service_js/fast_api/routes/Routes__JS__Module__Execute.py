@@ -8,6 +8,8 @@ from mgraph_ai_service_js.service.deno.Deno__JS__Module__Execution   import Deno
 from mgraph_ai_service_js.service.deno.Deno__JS__Module__Execution   import JS__Module__Execution__Config
 from mgraph_ai_service_js.service.deno.Deno__JS__Module__Execution   import JS__Module__Execution__Request
 from mgraph_ai_service_js.service.deno.Deno__JS__Module__Execution   import DEFAULT_ALLOWED_IMPORT_HOSTS
+from mgraph_ai_service_js.service.deno.Deno__Module__Prefetch        import Deno__Module__Prefetch, JS__Module__Prefetch__Request
+from mgraph_ai_service_js.service.deno.Deno__Module__Prefetch        import PREFETCH__MAX_MODULES, PREFETCH__TIMEOUT_MS
 
 
 # API Schema Models (simplified to match the new model)
@@ -20,6 +22,11 @@ class Schema__Module__Config(BaseModel):
     allow_url_imports    : bool                     = Field(True, description="Allow URL imports")
     allowed_import_hosts : Optional[List[str]]      = Field(None, description="Whitelist of import hosts")
     cache_imports        : bool                     = Field(True, description="Use Deno's cache for imports")
+    import_map           : Optional[Dict]           = Field(None, description='Import map, e.g. {"imports": {"lodash": "https://esm.sh/lodash@4.17.21"}}')
+    import_map_hash      : Optional[str]            = Field(None, description="Hash of an import map sent before (returned as import_map_hash)")
+    lockfile             : Optional[Dict]           = Field(None, description="deno.lock document the imports are verified against (frozen)")
+    lockfile_hash        : Optional[str]            = Field(None, description="Hash of a lockfile sent before (returned as lockfile_hash)")
+    on_open_circuit      : str                      = Field('cached_only', pattern='^(cached_only|fail_fast)$', description="When an import host's circuit is open: run with --cached-only, or fail fast")
     # File system permissions (optional)
     allow_read           : Optional[List[str]]      = Field(None, description="Paths allowed for reading")
     allow_write          : Optional[List[str]]      = Field(None, description="Paths allowed for writing")
@@ -39,6 +46,8 @@ class Schema__Module__Execute__Response(BaseModel):
     execution_time_ms  : int                       = Field(..., description="Execution duration in milliseconds")
     truncated          : bool                      = Field(False, description="Output was truncated")
     deno_version       : str                       = Field(..., description="Deno runtime version")
+    import_map_hash    : Optional[str]             = Field(None, description="Hash to send instead of the import map next time")
+    lockfile_hash      : Optional[str]             = Field(None, description="Hash to send instead of the lockfile next time")
 
 
 class Schema__Module__Info__Response(BaseModel):
@@ -48,22 +57,46 @@ class Schema__Module__Info__Response(BaseModel):
     examples            : Dict[str, str]           = Field(..., description="Example code snippets")
 
 
+class Schema__Module__Prefetch__Request(BaseModel):
+    """API request schema for warming the module cache"""
+    modules              : List[str]                = Field(..., description="Module urls, jsr:/npm: specifiers or import map names", min_length=1, max_length=PREFETCH__MAX_MODULES)
+    import_map           : Optional[Dict]           = Field(None, description='Import map, e.g. {"imports": {"lodash": "https://esm.sh/lodash@4.17.21"}}')
+    allowed_import_hosts : Optional[List[str]]      = Field(None, description="Whitelist of import hosts")
+    reload               : bool                     = Field(False, description="Fetch again even when already cached")
+    background           : bool                     = Field(False, description="Return at once; poll /js-module/prefetch/{prefetch_id} for the result")
+    timeout_ms           : int                      = Field(PREFETCH__TIMEOUT_MS, ge=1000, le=300000, description="Timeout per module in milliseconds")
+
+
+class Schema__Module__Mirror__Export__Request(BaseModel):
+    """API request schema for copying cached modules into the local mirror"""
+    modules              : Optional[List[str]]      = Field(None, description="Module urls whose cached import graphs are exported (default: every cached module)", max_length=PREFETCH__MAX_MODULES)
+
+
 TAG__ROUTES_JS_MODULE = 'js-module'
 ROUTES_PATHS__JS_MODULE = [f'/{TAG__ROUTES_JS_MODULE}/execute',
                            f'/{TAG__ROUTES_JS_MODULE}/info'   ,
-                           f'/{TAG__ROUTES_JS_MODULE}/health' ]
+                           f'/{TAG__ROUTES_JS_MODULE}/health' ,
+                           f'/{TAG__ROUTES_JS_MODULE}/cache'  ,
+                           f'/{TAG__ROUTES_JS_MODULE}/prefetch',
+                           f'/{TAG__ROUTES_JS_MODULE}/prefetch/{{prefetch_id}}',
+                           f'/{TAG__ROUTES_JS_MODULE}/mirror'       ,
+                           f'/{TAG__ROUTES_JS_MODULE}/mirror-fill'  ,
+                           f'/{TAG__ROUTES_JS_MODULE}/mirror-export',
+                           f'/{TAG__ROUTES_JS_MODULE}/circuits'     ]
 
 
 class Routes__JS__Module__Execute(Fast_API__Routes):
     """FastAPI routes for JavaScript module execution service"""
     tag                    : str                        = TAG__ROUTES_JS_MODULE
     deno_module_executor   : Deno__JS__Module__Execution
+    module_prefetch        : Deno__Module__Prefetch
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         with self.deno_module_executor as _:
             _.setup()
             _.install()
+        self.module_prefetch.module_executor = self.deno_module_executor
 
     @cache_on_self
     def setup_executor(self) -> Deno__JS__Module__Execution:                      # Initialize module executor
@@ -104,6 +137,18 @@ Example with URL import:
 }
 ```
 
+Pinning versions with an import map and a lockfile (stored by content hash; later requests can send
+`import_map_hash` / `lockfile_hash` from the response instead of the documents):
+```javascript
+{
+  "code": "import _ from 'lodash'; console.log(_.sum([1, 2, 3]));",
+  "config": {
+    "import_map": {"imports": {"lodash": "https://esm.sh/lodash@4.17.21"}},
+    "lockfile"  : {"version": "4", "remote": {"https://esm.sh/lodash@4.17.21": "<sha256>"}}
+  }
+}
+```
+
 Example with Deno std library:
 ```javascript
 import { assertEquals } from 'https://deno.land/std@0.208.0/testing/asserts.ts';
@@ -148,7 +193,12 @@ console.log(users[0].name);
                     capture_stderr       = request.config.capture_stderr,
                     allow_url_imports    = request.config.allow_url_imports,
                     allowed_import_hosts = request.config.allowed_import_hosts,
-                    cache_imports        = request.config.cache_imports
+                    cache_imports        = request.config.cache_imports,
+                    import_map           = request.config.import_map,
+                    import_map_hash      = request.config.import_map_hash,
+                    lockfile             = request.config.lockfile,
+                    lockfile_hash        = request.config.lockfile_hash,
+                    on_open_circuit      = request.config.on_open_circuit
                 )
 
             # Create execution request
@@ -167,7 +217,9 @@ console.log(users[0].name);
                 error             = result.error,
                 execution_time_ms = result.execution_time_ms,
                 truncated         = result.truncated,
-                deno_version      = result.deno_version
+                deno_version      = result.deno_version,
+                import_map_hash   = config.import_map_hash if config else None,
+                lockfile_hash     = config.lockfile_hash   if config else None
             )
 
         except ValueError as e:
@@ -191,6 +243,8 @@ console.log(users[0].name);
                 "top_level_await" : True,   # Async at module level
                 "deno_std"        : True,   # Access to Deno standard library
                 "file_system"     : True,   # With proper permissions
+                "import_maps"     : True,   # config.import_map / import_map_hash
+                "lockfiles"       : True,   # config.lockfile / lockfile_hash (frozen)
                 "jsx"             : False,  # Requires .jsx/.tsx extension (not implemented)
             },
             examples = {
@@ -271,7 +325,112 @@ console.log('Data written to /tmp/output.json');"""
                 "module_support"  : False
             }
 
+    def cache(self) -> dict:                                                      # Module cache (DENO_DIR) stats
+        """
+        Get the state of the Deno module cache
+
+        Returns the size of DENO_DIR, the bytes of its remote modules against their cap (`DENO_CACHE_MAX_SIZE_MB`),
+        how many remote modules are cached and pinned, the import hit rate since start-up, and how many modules were
+        evicted (least recently used first).
+        `bundles` covers the pre-bundled import sets: scripts importing the same remote urls three times get one
+        bundled file for them, which later runs load instead. `supported` is false when the Deno binary has no
+        `deno bundle` (it needs 2.4+) or the service is offline: nothing is counted or built then.
+        """
+        stats            = self.deno_module_executor.module_cache.stats()
+        stats['bundles'] = self.deno_module_executor.module_bundles.stats()
+        return stats
+
+    def prefetch(self, request: Schema__Module__Prefetch__Request                 # Warm the module cache with `deno cache`
+                 ) -> dict:
+        """
+        Download and compile modules ahead of the requests that import them
+
+        Each module is fetched with `deno cache` into the shared module cache. Later `/js-module/execute` runs that
+        import them skip the fetch and compile, so that cost stays out of their `max_execution_time_ms` budget.
+        Bare names are resolved with `import_map`. The result lists each module's fetch time and error, plus
+        the cache size afterwards. With `background: true` the call returns at once, with `status: "running"`
+        and a `prefetch_id` to poll at `/js-module/prefetch/{prefetch_id}`.
+
+        Example request:
+        ```json
+        {
+          "modules": ["https://esm.sh/lodash@4.17.21", "date-fns"],
+          "import_map": {"imports": {"date-fns": "https://esm.sh/date-fns@3.6.0"}}
+        }
+        ```
+        """
+        try:
+            result = self.module_prefetch.prefetch(JS__Module__Prefetch__Request(modules              = request.modules             ,
+                                                                                 import_map           = request.import_map          ,
+                                                                                 allowed_import_hosts = request.allowed_import_hosts,
+                                                                                 reload               = request.reload              ,
+                                                                                 background           = request.background          ,
+                                                                                 timeout_ms           = request.timeout_ms          ))
+            return result.json()
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Module prefetch failed: {str(e)}")
+
+    def prefetch__prefetch_id(self, prefetch_id: str) -> dict:                    # Result of a background prefetch
+        """Get the progress or result of a prefetch started with `background: true`"""
+        result = self.module_prefetch.status(prefetch_id)
+        if result is None:
+            raise HTTPException(status_code=404, detail=f"Unknown prefetch id: {prefetch_id}")
+        return result.json()
+
+    def mirror(self) -> dict:                                                     # Local module mirror stats
+        """
+        Get the state of the local module mirror
+
+        The mirror is a content-addressed folder (`DENO_MODULE_MIRROR_DIR`, default /tmp/deno_mirror) holding
+        module sources by sha256 plus an index of the urls (esm.sh, deno.land, ...) they were fetched from. Before
+        each run, the modules a script imports are restored from it into the Deno module cache, so they load from
+        local disk with the same urls. With `DENO_MODULE_MIRROR_OFFLINE=1` runs use `--cached-only` and never
+        touch the network.
+        """
+        return self.deno_module_executor.module_mirror.stats()
+
+    def mirror_fill(self) -> dict:                                                # Restore every mirrored module into the cache
+        """Write every module in the mirror that is not in the Deno module cache yet (e.g. after a cold start)"""
+        try:
+            return self.deno_module_executor.module_mirror.fill()
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    def mirror_export(self, request: Schema__Module__Mirror__Export__Request      # Copy cached modules into the mirror
+                      ) -> dict:
+        """
+        Copy modules from the Deno module cache into the mirror folder
+
+        Run it where the CDNs are reachable (after `/js-module/prefetch`), then ship the folder as an offline
+        bundle: point `DENO_MODULE_MIRROR_DIR` at it wherever the network is slow or missing.
+        """
+        try:
+            return self.deno_module_executor.module_mirror.export(request.modules)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    def circuits(self) -> dict:                                                   # Per-host circuit breaker state
+        """
+        Get the health of the import hosts
+
+        A host's circuit opens after 3 runs in a row that had to download modules from it and failed to: Deno could
+        not load a module (no answer, or a 5xx), or the run timed out or took over 10s with the module still uncached.
+        While it is open, runs importing uncached modules from it use `--cached-only` against the module cache
+        (or fail at once with `"on_open_circuit": "fail_fast"`), instead of waiting for `max_execution_time_ms`.
+        After a cool-down one run probes the host again: success closes the circuit, failure doubles the cool-down.
+        """
+        return self.deno_module_executor.module_circuits.stats()
+
     def setup_routes(self):                                                       # Configure FastAPI routes
         self.add_route_post(self.execute)
         self.add_route_get (self.info)
-        self.add_route_get (self.health)
\ No newline at end of file
+        self.add_route_get (self.health)
+        self.add_route_get (self.cache)
+        self.add_route_post(self.prefetch)
+        self.add_route_get (self.prefetch__prefetch_id)
+        self.add_route_get (self.mirror)
+        self.add_route_post(self.mirror_fill)
+        self.add_route_post(self.mirror_export)
+        self.add_route_get (self.circuits)
\ No newline at end of file
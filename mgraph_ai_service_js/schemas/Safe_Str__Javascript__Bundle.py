@@ -0,0 +1,5 @@
+from mgraph_ai_service_js.schemas.Safe_Str__Javascript  import Safe_Str__Javascript
+
+class Safe_Str__Javascript__Bundle(Safe_Str__Javascript):   # JavaScript code for whole bundles, same sanitising with a larger size cap
+
+    max_length        : int                = 10485760  # 10MB max bundle size (same cap as url-to-ast downloads)
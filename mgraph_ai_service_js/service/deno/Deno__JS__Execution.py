@@ -1,5 +1,7 @@
+import subprocess
+import threading
 from pathlib                                                    import Path
-from typing                                                     import Optional, Dict, Any, List
+from typing                                                     import Optional, Dict, Any, List, Iterator
 from osbot_utils.decorators.methods.cache_on_self               import cache_on_self
 from osbot_utils.testing.Temp_File                              import Temp_File
 from osbot_utils.type_safe.Type_Safe                            import Type_Safe
@@ -235,6 +237,77 @@ class Deno__JS__Execution(Type_Safe):                           # Secure JavaScr
                                          deno_version      = f'v{DENO__VERSION__COMPATIBLE_WITH_LAMBDA}')
 
 
+    def stream_process(self, params  : List[str]                ,                   # Run Deno, yielding stdout lines as they are written
+                             timeout : float                    ,
+                             env     : Optional[Dict[str, str]] = None
+                       ) -> Iterator[str]:
+        process       = subprocess.Popen([str(self.file_path__deno())] + params,
+                                         stdout = subprocess.PIPE                ,
+                                         stderr = subprocess.PIPE                ,
+                                         text   = True                           ,
+                                         env    = env                            )
+        stderr_lines  = []
+        stderr_reader = threading.Thread(target=lambda: stderr_lines.extend(process.stderr), daemon=True)       # drain stderr so the pipe never blocks stdout
+        timer         = threading.Timer(timeout, process.kill)
+        stderr_reader.start()
+        timer.start()
+        try:
+            for line in process.stdout:
+                yield line.rstrip('\n')
+            process.wait()
+            stderr_reader.join()
+        finally:
+            timed_out = not timer.is_alive() and process.returncode not in (0, None)
+            timer.cancel()
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+            process.stdout.close()
+        stderr = ''.join(stderr_lines).strip()
+        if timed_out:
+            raise TimeoutError(f"Execution timeout exceeded ({timeout}s)")
+        if stderr:
+            raise RuntimeError(stderr)
+
+    def execute_js__stream(self, request: JS__Execution__Request                  # Execute JavaScript, yielding output events as lines are printed
+                           ) -> Iterator[Dict[str, Any]]:
+        import time
+        config         = request.config or JS__Execution__Config()
+        wrapper_script = self._create_wrapper_script(request.code                ,
+                                                     request.input_data          ,
+                                                     config.max_execution_time_ms,
+                                                     config.json_output          )
+        start_time     = time.time()
+        output_size    = 0
+        truncated      = False
+        error          = None
+
+        with Temp_File(contents=wrapper_script, extension='.js', return_file_path=True) as script_file:
+            params = ["run", "--quiet"]
+            params.extend(self.build_permission_flags(config.permissions))
+            params.append(f"--v8-flags=--max-old-space-size={config.max_memory_mb}")
+            params.append(script_file)
+
+            lines = self.stream_process(params, timeout=config.max_execution_time_ms / 1000.0)
+            try:
+                for line in lines:
+                    output_size += len(line) + 1
+                    if output_size > config.max_output_size:
+                        truncated = True
+                        break
+                    yield {'event': 'output', 'line': line}
+            except Exception as exception:
+                error = str(exception)
+            finally:
+                lines.close()                                                       # stops (and kills) the process when the output was truncated
+
+        yield {'event'             : 'end'                                     ,
+               'success'           : error is None                             ,
+               'error'             : error                                     ,
+               'execution_time_ms' : int((time.time() - start_time) * 1000)    ,
+               'truncated'         : truncated                                 ,
+               'deno_version'      : f'v{DENO__VERSION__COMPATIBLE_WITH_LAMBDA}'}
+
     def _create_wrapper_script(self, user_code          : str  ,                  # Create sandboxed wrapper script
                                      input_data         : Optional[Dict[str, Any]],
                                      max_execution_time : int  ,
@@ -0,0 +1,339 @@
+import hashlib
+import json
+import math
+import queue
+import re
+import threading
+import time
+from concurrent.futures                                         import ThreadPoolExecutor
+from typing                                                     import Any, Dict, List, Optional
+from osbot_utils.type_safe.Type_Safe                            import Type_Safe
+from mgraph_ai_service_js.schemas.Safe_Str__Javascript          import Safe_Str__Javascript
+from mgraph_ai_service_js.service.deno.Deno__JS__Execution      import Deno__JS__Execution, JS__Execution__Config, JS__Execution__Result
+from mgraph_ai_service_js.service.deno.Deno__Worker             import Deno__Worker, worker_execution_result
+from mgraph_ai_service_js.service.deno.Deno__Worker__Pool       import Deno__Worker__Pool, deno_worker_pool
+
+DENO_JS_FUNCTIONS__MAX          = 1024                                            # registered functions per process
+DENO_JS_MAP__MAX_INPUTS         = 100000
+DENO_JS_MAP__CHUNKS_PER_WORKER  = 4                                               # default chunk size: enough chunks to balance uneven items
+DENO_JS_PIPELINE__MAX_STEPS     = 64
+REGEX__FUNCTION_ID              = re.compile(r'^[A-Za-z0-9_.-]{1,64}$')
+
+
+class JS__Function(Type_Safe):                                                    # A registered script: compiled once per worker, invoked by id with only its input
+    function_id   : str
+    code          : Safe_Str__Javascript
+    config        : JS__Execution__Config
+    code_hash     : str                                                           # with the id, names the compiled function inside the workers
+    created_at    : float
+    invocations   : int
+    errors        : int
+    total_time_ms : int
+
+    def worker_name(self) -> str:                                                 # Per id, so ids with the same code still get an isolate each
+        return f'{self.function_id}:{self.code_hash}'
+
+    def info(self) -> Dict[str, Any]:
+        return {'function_id'   : self.function_id                                                          ,
+                'code_hash'     : self.code_hash                                                            ,
+                'code_size'     : len(self.code)                                                            ,
+                'config'        : self.config.json()                                                        ,
+                'created_at'    : self.created_at                                                           ,
+                'invocations'   : self.invocations                                                          ,
+                'errors'        : self.errors                                                               ,
+                'avg_time_ms'   : round(self.total_time_ms / self.invocations, 2) if self.invocations else 0}
+
+
+class JS__Map__Request(Type_Safe):                                                # One function body run over many inputs
+    code        : Safe_Str__Javascript                                            # function body receiving INPUT, called once per input
+    inputs      : list
+    config      : Optional[JS__Execution__Config] = None                          # max_execution_time_ms bounds each chunk
+    parallelism : Optional[int]                   = None                          # workers used at once (default and max: the pool size)
+    chunk_size  : Optional[int]                   = None                          # inputs sent to a worker per round trip
+    reduce_code : Optional[Safe_Str__Javascript]  = None                          # function body receiving INPUT = the results, in order (null for failed items)
+
+
+class JS__Map__Result(Type_Safe):
+    success           : bool                                                      # every item and the reduce step succeeded
+    results           : list                                                      # per input, in order: {success, result, error, output}
+    errors            : int                                                       # failed items
+    reduced           : Optional[Any] = None
+    reduce_error      : Optional[str] = None
+    chunks            : int
+    parallelism       : int
+    execution_time_ms : int
+
+
+class JS__Pipeline__Step(Type_Safe):
+    code   : Safe_Str__Javascript                                                 # function body receiving INPUT = the previous step's result
+    config : Optional[JS__Execution__Config] = None                               # defaults to the pipeline's config
+
+
+class JS__Pipeline__Request(Type_Safe):                                           # Steps run in order, each step's JSON result the next step's INPUT
+    steps      : List[JS__Pipeline__Step]
+    input_data : Optional[Dict[str, Any]]        = None                           # INPUT of the first step
+    config     : Optional[JS__Execution__Config] = None
+
+
+class JS__Pipeline__Result(Type_Safe):
+    success           : bool
+    result            : Optional[Any] = None                                      # returned by the last step
+    error             : Optional[str] = None
+    failed_step       : Optional[int] = None
+    steps             : list                                                      # per step run: {step, success, execution_time_ms, error, output}
+    execution_time_ms : int
+
+
+class Deno__JS__Functions(Type_Safe):                                             # Registry of stored scripts, run in warm pooled workers
+    deno_executor : Deno__JS__Execution
+    worker_pool   : Deno__Worker__Pool = None                                     # defaults to the process-wide pool
+    functions     : dict                                                          # function_id -> JS__Function
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        if self.worker_pool is None:
+            self.worker_pool = deno_worker_pool
+        self.lock = threading.Lock()
+
+    def register(self, function_id : str,                                         # Store a script under an id, compiling it in a worker (ValueError when it does not compile)
+                       code        : str,
+                       config      : Optional[JS__Execution__Config] = None
+                 ) -> JS__Function:
+        if not REGEX__FUNCTION_ID.match(function_id or ''):
+            raise ValueError(f"invalid function id: {function_id} (1-64 of A-Z a-z 0-9 _ . -)")
+        config   = config or JS__Execution__Config()
+        function = JS__Function(function_id = function_id                                    ,
+                                code        = code                                           ,
+                                config      = config                                         ,
+                                code_hash   = hashlib.sha256(str(code).encode()).hexdigest() ,
+                                created_at  = time.time()                                    )
+        name     = function.worker_name()
+        replaces = name in self.worker_pool.registered                            # same id, same code: the compiled function stays
+        self.worker_pool.register(name, str(function.code))                       # before compiling, so the worker keeps it
+        try:
+            self.compile(name, str(function.code), config, f"function {function_id}")
+        except Exception:
+            if not replaces:
+                self.worker_pool.unregister(name)
+            raise
+        with self.lock:
+            full     = function_id not in self.functions and len(self.functions) >= DENO_JS_FUNCTIONS__MAX
+            previous = None if full else self.functions.get(function_id)
+            if not full:
+                self.functions[function_id] = function
+        if full:
+            self.worker_pool.unregister(name)
+            raise ValueError(f"too many functions registered (max {DENO_JS_FUNCTIONS__MAX}), delete some first")
+        if previous and previous.worker_name() != name:                          # the replaced code is dropped from the workers
+            self.worker_pool.unregister(previous.worker_name())
+        return function
+
+    def invoke(self, function_id : str,                                           # Run a registered function on input_data (KeyError when the id is unknown)
+                     input_data  : Optional[Dict[str, Any]] = None
+               ) -> JS__Execution__Result:
+        function = self.functions[function_id]
+        result   = self.run(str(function.code), function.worker_name(), input_data, function.config)
+        with self.lock:
+            function.invocations   += 1
+            function.errors        += 0 if result.success else 1
+            function.total_time_ms += result.execution_time_ms
+        return result
+
+    def run(self, code       : str,                                               # Run code in a warm worker of its profile, compiling it there on first use
+                  name       : str,
+                  input_data : Optional[Dict[str, Any]],
+                  config     : JS__Execution__Config
+            ) -> JS__Execution__Result:
+        timeout    = config.max_execution_time_ms / 1000.0
+        start_time = time.time()
+        try:
+            with self.worker_pool.worker(self.deno_path(), self.worker_flags(config), timeout) as worker:
+                reply = worker.define(name, code, timeout)
+                if reply['ok']:
+                    reply = worker.invoke(name, input_data or {}, config.json_output, max(0, timeout - (time.time() - start_time)))
+        except (TimeoutError, RuntimeError) as error:                             # timed out or the worker died: it has left the pool
+            reply = {'ok': False, 'error': str(error)}
+        return JS__Execution__Result(execution_time_ms = int((time.time() - start_time) * 1000),
+                                     **worker_execution_result(reply, config.max_output_size, config.capture_stderr))
+
+    def map(self, request: JS__Map__Request                                       # Run code over every input, chunks spread across pooled workers
+            ) -> JS__Map__Result:
+        start_time  = time.time()
+        config      = request.config or JS__Execution__Config()
+        inputs      = list(request.inputs)
+        if len(inputs) > DENO_JS_MAP__MAX_INPUTS:
+            raise ValueError(f"too many inputs: {len(inputs)} (max {DENO_JS_MAP__MAX_INPUTS})")
+        parallelism = max(1, min(request.parallelism or self.worker_pool.max_workers, self.worker_pool.max_workers))
+        chunk_size  = request.chunk_size or max(1, math.ceil(len(inputs) / (parallelism * DENO_JS_MAP__CHUNKS_PER_WORKER)))
+        chunks      = [inputs[index:index + chunk_size] for index in range(0, len(inputs), chunk_size)]
+        results     = self.map_chunks(self.code_name('map', str(request.code)), str(request.code), chunks, parallelism, config, "map code")
+        errors      = sum(1 for item in results if not item['success'])
+        reduced = reduce_error = None
+        if request.reduce_code:
+            reduce_code = str(request.reduce_code)
+            item        = self.map_chunks(self.code_name('reduce', reduce_code), reduce_code, [[[item['result'] for item in results]]], 1, config, "reduce code")[0]
+            reduced, reduce_error = item['result'], item['error']
+        return JS__Map__Result(success           = errors == 0 and reduce_error is None   ,
+                               results           = results                                ,
+                               errors            = errors                                 ,
+                               reduced           = reduced                                ,
+                               reduce_error      = reduce_error                           ,
+                               chunks            = len(chunks)                            ,
+                               parallelism       = min(parallelism, len(chunks) or 1)     ,
+                               execution_time_ms = int((time.time() - start_time) * 1000))
+
+    def map_chunks(self, name        : str,                                       # Run chunks on up to parallelism workers, each taking chunks until none is left
+                         code        : str,
+                         chunks      : List[List[Any]],
+                         parallelism : int,
+                         config      : JS__Execution__Config,
+                         subject     : str
+                   ) -> List[Dict[str, Any]]:
+        pending = queue.Queue()
+        for index, chunk in enumerate(chunks):
+            pending.put((index, chunk))
+        results = [None] * len(chunks)
+        with ThreadPoolExecutor(max_workers=parallelism) as executor:
+            for future in [executor.submit(self.map_worker, name, code, pending, results, config, subject) for _ in range(min(parallelism, len(chunks)))]:
+                future.result()                                                   # ValueError when the code does not compile
+        return [item for chunk_results in results for item in chunk_results]
+
+    def map_worker(self, name    : str,                                           # One worker's share of the chunks; the one-off code is forgotten after
+                         code    : str,
+                         pending : queue.Queue,
+                         results : List[Any],
+                         config  : JS__Execution__Config,
+                         subject : str):
+        timeout = config.max_execution_time_ms / 1000.0
+        while not pending.empty():
+            with self.worker_pool.worker(self.deno_path(), self.worker_flags(config), timeout) as worker:
+                try:
+                    reply = worker.define(name, code, timeout)
+                    if not reply['ok']:
+                        raise ValueError(f"{subject} does not compile: {reply['error']}")
+                    while worker.is_alive():                                      # a worker that died takes no more chunks: the next one does
+                        try:
+                            index, chunk = pending.get_nowait()
+                        except queue.Empty:
+                            break
+                        results[index] = self.map_chunk(worker, name, chunk, timeout, config.max_output_size)
+                finally:
+                    worker.forget([name], timeout)
+
+    def map_chunk(self, worker          : Deno__Worker,                           # Items of one chunk, in one round trip (each fails alike when the worker does)
+                        name            : str,
+                        chunk           : List[Any],
+                        timeout         : float,
+                        max_output_size : int
+                  ) -> List[Dict[str, Any]]:
+        try:
+            reply = worker.map(name, chunk, timeout)
+        except (TimeoutError, RuntimeError) as error:
+            reply = {'ok': False, 'error': str(error)}
+        if not reply['ok']:
+            return [{'success': False, 'result': None, 'error': reply['error'], 'output': None} for _ in chunk]
+        return [self.map_item(item, max_output_size) for item in reply['items']]
+
+    def map_item(self, item            : Dict[str, Any],
+                       max_output_size : int
+                 ) -> Dict[str, Any]:
+        stderr = '\n'.join(item['stderr'] + ([item['error']] if item.get('error') else []))
+        result = None
+        if item.get('json') is not None:
+            if len(item['json']) > max_output_size:
+                stderr = stderr or f"result exceeds max_output_size ({len(item['json'])} > {max_output_size} bytes)"
+            else:
+                result = json.loads(item['json'])
+        return {'success' : item['ok'] and not stderr              ,
+                'result'  : result                                 ,
+                'error'   : stderr or None                         ,
+                'output'  : '\n'.join(item['stdout']) or None      }
+
+    def pipeline(self, request: JS__Pipeline__Request                             # Run steps in the same worker, passing each JSON result on as the next INPUT
+                 ) -> JS__Pipeline__Result:
+        start_time = time.time()
+        if not 0 < len(request.steps) <= DENO_JS_PIPELINE__MAX_STEPS:
+            raise ValueError(f"a pipeline needs 1 to {DENO_JS_PIPELINE__MAX_STEPS} steps")
+        codes   = [str(step.code) for step in request.steps]
+        configs = [step.config or request.config or JS__Execution__Config() for step in request.steps]
+        names   = [self.code_name('step', code) for code in codes]
+        segments = []                                                             # consecutive steps sharing a worker profile run in one worker
+        for index, config in enumerate(configs):
+            if segments and self.worker_flags(configs[segments[-1][0]]) == self.worker_flags(config):
+                segments[-1].append(index)
+            else:
+                segments.append([index])
+        value, steps, error, failed_step = request.input_data or {}, [], None, None
+        for number, segment in enumerate(segments):
+            config   = configs[segment[0]]
+            timeouts = [configs[index].max_execution_time_ms / 1000.0 for index in segment]    # each step ends at its own budget
+            timeout  = sum(timeouts)
+            compiled = range(len(codes)) if number == 0 else segment              # the first worker compiles every step, so none runs when one does not compile
+            try:
+                with self.worker_pool.worker(self.deno_path(), self.worker_flags(config), timeout) as worker:
+                    try:
+                        for index in compiled:
+                            define = worker.define(names[index], codes[index], timeout)
+                            if not define['ok']:
+                                raise ValueError(f"step {index} does not compile: {define['error']}")
+                        reply = worker.pipeline([names[index] for index in segment], value, timeouts)
+                    finally:
+                        worker.forget([names[index] for index in compiled], timeout)          # one-off code, not kept in the worker
+            except (TimeoutError, RuntimeError) as exception:
+                error, failed_step = f"{exception} (steps {segment[0]}-{segment[-1]})", segment[0]
+                break
+            for index, step in zip(segment, reply['steps']):
+                stderr = '\n'.join(step['stderr'] + ([step['error']] if step.get('error') else []))
+                steps.append({'step'              : index                                    ,
+                              'success'           : step['ok'] and not stderr                ,
+                              'execution_time_ms' : round(step['ms'], 2)                     ,
+                              'error'             : stderr or None                           ,
+                              'output'            : '\n'.join(step['stdout']) or None        })
+                if stderr:
+                    error, failed_step = stderr, index
+            if error:
+                break
+            value = json.loads(reply['json'])
+        result = None
+        if error is None:
+            result_size = len(json.dumps(value))
+            if result_size > configs[-1].max_output_size:
+                error, failed_step = f"result exceeds max_output_size ({result_size} > {configs[-1].max_output_size} bytes)", len(configs) - 1
+            else:
+                result = value
+        return JS__Pipeline__Result(success           = error is None                          ,
+                                    result            = result                                 ,
+                                    error             = error                                  ,
+                                    failed_step       = failed_step                            ,
+                                    steps             = steps                                  ,
+                                    execution_time_ms = int((time.time() - start_time) * 1000))
+
+    def compile(self, name    : str,                                              # Compile code in a worker of its profile; ValueError when it does not compile
+                      code    : str,
+                      config  : JS__Execution__Config,
+                      subject : str):
+        timeout = config.max_execution_time_ms / 1000.0
+        with self.worker_pool.worker(self.deno_path(), self.worker_flags(config), timeout) as worker:
+            reply = worker.define(name, code, timeout)
+        if not reply['ok']:
+            raise ValueError(f"{subject} does not compile: {reply['error']}")
+
+    def code_name(self, kind: str, code: str) -> str:                             # Name of ad-hoc code inside the workers
+        return f"{kind}_{hashlib.sha256(code.encode()).hexdigest()}"
+
+    def delete(self, function_id: str) -> bool:                                  # Unregister a function, dropping its code from the workers
+        with self.lock:
+            function = self.functions.pop(function_id, None)
+        if function is None:
+            return False
+        self.worker_pool.unregister(function.worker_name())
+        return True
+
+    def list(self) -> List[Dict[str, Any]]:
+        return [function.info() for function in list(self.functions.values())]
+
+    def worker_flags(self, config: JS__Execution__Config) -> List[str]:           # The flags a worker runs with: its permissions and memory limit
+        return self.deno_executor.build_permission_flags(config.permissions) + [f"--v8-flags=--max-old-space-size={config.max_memory_mb}"]
+
+    def deno_path(self) -> str:
+        return str(self.deno_executor.file_path__deno())
@@ -1,10 +1,19 @@
-from typing                                                     import Optional, Dict, List
+import subprocess
+import time
+from typing                                                     import Any, Optional, Dict, List, Iterator
 from osbot_utils.testing.Temp_File                              import Temp_File
 from osbot_utils.utils.Process                                  import exec_process
 from mgraph_ai_service_js.service.deno.Deno__JS__Execution      import Deno__JS__Execution, DENO__VERSION__COMPATIBLE_WITH_LAMBDA
 from mgraph_ai_service_js.service.deno.Deno__JS__Execution      import JS__Execution__Config
 from mgraph_ai_service_js.service.deno.Deno__JS__Execution      import JS__Execution__Request
 from mgraph_ai_service_js.service.deno.Deno__JS__Execution      import JS__Execution__Result
+from mgraph_ai_service_js.service.deno.Deno__Module__Cache      import Deno__Module__Cache, deno_module_cache
+from mgraph_ai_service_js.service.deno.Deno__Module__Artifacts  import Deno__Module__Artifacts, deno_module_artifacts
+from mgraph_ai_service_js.service.deno.Deno__Module__Artifacts  import DENO_ARTIFACT__IMPORT_MAP, DENO_ARTIFACT__LOCKFILE
+from mgraph_ai_service_js.service.deno.Deno__Module__Bundles    import Deno__Module__Bundles, deno_module_bundles
+from mgraph_ai_service_js.service.deno.Deno__Module__Mirror     import Deno__Module__Mirror, deno_module_mirror
+from mgraph_ai_service_js.service.deno.Deno__Module__Circuits   import Deno__Module__Circuits, deno_module_circuits
+from mgraph_ai_service_js.service.deno.Deno__Module__Circuits   import CIRCUIT__CACHED_ONLY, CIRCUIT__FAIL_FAST, CIRCUIT__MODES
 
 
 # Supported CDN providers for npm packages
@@ -31,6 +40,11 @@ class JS__Module__Execution__Config(JS__Execution__Config):
     allow_url_imports   : bool                           = True          # Allow URL imports
     allowed_import_hosts: Optional[List[str]]            = None          # Whitelist of import hosts
     cache_imports       : bool                           = True          # Use Deno's cache for imports
+    import_map          : Optional[Dict[str, Any]]       = None          # {"imports": {"lodash": "https://esm.sh/lodash@4.17.21"}}
+    import_map_hash     : Optional[str]                  = None          # content hash of an import map sent before (set after a run)
+    lockfile            : Optional[Dict[str, Any]]       = None          # deno.lock document the imports must match (--frozen)
+    lockfile_hash       : Optional[str]                  = None          # content hash of a lockfile sent before (set after a run)
+    on_open_circuit     : str                            = CIRCUIT__CACHED_ONLY  # when an import host is down: cached_only (--cached-only) | fail_fast
 
 
 class JS__Module__Execution__Request(JS__Execution__Request):             # Extended request model for JavaScript module execution"""
@@ -39,6 +53,29 @@ class JS__Module__Execution__Request(JS__Execution__Request):             # Exte
 
 class Deno__JS__Module__Execution(Deno__JS__Execution):
     """Extended JavaScript execution service with module/import support"""
+    module_cache     : Deno__Module__Cache     = None                              # defaults to the process-wide cache
+    module_artifacts : Deno__Module__Artifacts = None                              # defaults to the process-wide import map / lockfile store
+    module_bundles   : Deno__Module__Bundles   = None                              # defaults to the process-wide bundles of recurring import sets
+    module_mirror    : Deno__Module__Mirror    = None                              # defaults to the process-wide local module mirror
+    module_circuits  : Deno__Module__Circuits  = None                              # defaults to the process-wide per-host circuit breaker
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        if self.module_cache is None:
+            self.module_cache = deno_module_cache
+        if self.module_artifacts is None:
+            self.module_artifacts = deno_module_artifacts
+        if self.module_bundles is None:
+            self.module_bundles = deno_module_bundles
+        if self.module_mirror is None:
+            self.module_mirror = deno_module_mirror
+        if self.module_circuits is None:
+            self.module_circuits = deno_module_circuits
+
+    def setup(self) -> 'Deno__JS__Module__Execution':                             # Initialize Deno runtime, and check once whether import sets can be bundled
+        super().setup()
+        self.module_bundles.setup(str(self.file_path__deno()), offline=self.module_mirror.offline)
+        return self
 
     def build_module_permission_flags(self, config: JS__Module__Execution__Config,
                                         imports: Optional[Dict[str, str]] = None
@@ -80,32 +117,142 @@ class Deno__JS__Module__Execution(Deno__JS__Execution):
         return flags
 
 
+    def build_module_run_params(self, config            : JS__Module__Execution__Config,  # Build 'deno run' params for a module script
+                                      script_file       : str,
+                                      bundle_import_map : Optional[str] = None,
+                                      cached_only       : bool          = False
+                                ) -> List[str]:
+        params = ["run", "--quiet"]
+        params.extend(self.build_module_permission_flags(config))
+        params.extend(self.build_module_artifact_flags(config))
+        if bundle_import_map:
+            params.append(f"--import-map={bundle_import_map}")
+        if cached_only or self.module_mirror.offline:
+            params.append("--cached-only")                                        # modules come from the cache / mirror only
+        params.append(f"--v8-flags=--max-old-space-size={config.max_memory_mb}")
+        params.append(script_file)
+        return params
+
+    def build_module_artifact_flags(self, config: JS__Module__Execution__Config  # --import-map / --lock for the config's import map and lockfile
+                                    ) -> List[str]:
+        flags = []
+        if config.import_map is not None:                                          # store it (once per content) and hand the hash back for later requests
+            config.import_map_hash = self.module_artifacts.put(DENO_ARTIFACT__IMPORT_MAP, config.import_map)
+        if config.import_map_hash:
+            flags.append(f"--import-map={self.module_artifacts.path(DENO_ARTIFACT__IMPORT_MAP, config.import_map_hash)}")
+        if config.lockfile is not None:
+            config.lockfile_hash = self.module_artifacts.put(DENO_ARTIFACT__LOCKFILE, config.lockfile)
+        if config.lockfile_hash:
+            flags.append(f"--lock={self.module_artifacts.path(DENO_ARTIFACT__LOCKFILE, config.lockfile_hash)}")
+            flags.append("--frozen")                                               # verify against it, never rewrite the shared stored file
+        return flags
+
+    def module_imports(self, config: JS__Module__Execution__Config               # The config's import map entries, used to resolve bare specifiers
+                       ) -> Dict[str, str]:
+        if config.import_map is not None:
+            self.module_artifacts.validate(DENO_ARTIFACT__IMPORT_MAP, config.import_map)
+            return config.import_map.get('imports', {})
+        if config.import_map_hash:
+            return self.module_artifacts.get(DENO_ARTIFACT__IMPORT_MAP, config.import_map_hash).get('imports', {})
+        return {}
+
+    def module_env(self) -> Dict[str, str]:                                       # Environment for module execution
+        return self.module_cache.env()                                            # DENO_DIR under /tmp for Lambda compatibility
+
+    def module_cache_before_run(self, code    : str,                              # Record the run's imports in the cache stats, returning the urls Deno will download
+                                      imports : Optional[Dict[str, str]] = None,
+                                      reload  : bool                     = False
+                                ) -> List[str]:
+        urls     = self.module_cache.module_urls(code, imports)
+        self.module_mirror.restore(urls)                                          # mirrored modules are on disk before Deno looks for them
+        fetching = list(urls) if reload else self.module_cache.missing(urls)
+        self.module_cache.record_access(urls)
+        return fetching
+
+    def module_circuit(self, fetching : List[str],                                # Hosts with an open circuit this run would download from (ValueError on a bad mode)
+                             config   : JS__Module__Execution__Config
+                       ) -> List[str]:
+        if config.on_open_circuit not in CIRCUIT__MODES:
+            raise ValueError(f"on_open_circuit must be one of {', '.join(CIRCUIT__MODES)}")
+        if not config.allow_url_imports:                                          # nothing is downloaded, so no host can hold the run up
+            return []
+        return self.module_circuits.open_hosts(fetching)
+
+    def module_bundle(self, code   : str,                                        # Import map of a pre-bundled import set for this code, or None
+                            config : JS__Module__Execution__Config
+                      ) -> Optional[str]:
+        if (config.import_map is not None or config.import_map_hash or                 # user import maps and lockfiles take precedence
+            config.lockfile   is not None or config.lockfile_hash   or
+            not config.cache_imports or not config.allow_url_imports):
+            return None
+        return self.module_bundles.use(self.module_cache.module_urls(code)                           ,
+                                       config.allowed_import_hosts or DEFAULT_ALLOWED_IMPORT_HOSTS   ,
+                                       str(self.file_path__deno())                                   )
+
+    def module_cache_after_run(self, fetching    : List[str],                     # Report downloads to the circuit breaker; new modules may have pushed the cache over its cap
+                                     duration_ms : int,
+                                     error       : Optional[str] = None,
+                                     timed_out   : bool          = False,
+                                     cached_only : bool          = False):
+        if fetching and not cached_only and not self.module_mirror.offline:
+            self.module_circuits.record(fetching, duration_ms, error, timed_out, missing=self.module_cache.missing(fetching))
+        if fetching:
+            self.module_cache.enforce()
+
+    def execute_module_js__stream(self, request: JS__Module__Execution__Request  # Execute module code, yielding stdout lines as they are written
+                                  ) -> Iterator[str]:
+        config     = request.config or JS__Module__Execution__Config()
+        fetching   = self.module_cache_before_run(request.code, self.module_imports(config), reload=not config.cache_imports)
+        open_hosts = self.module_circuit(fetching, config)
+        if open_hosts and config.on_open_circuit == CIRCUIT__FAIL_FAST:
+            raise RuntimeError(self.module_circuits.describe(open_hosts))
+        bundle     = self.module_bundle(request.code, config)
+
+        start_time = time.time()
+        error      = None
+        timed_out  = False
+        try:
+            with Temp_File(contents=request.code, extension='.ts', return_file_path=True) as script_file:
+                params = self.build_module_run_params(config, script_file, bundle, cached_only=bool(open_hosts))
+                yield from self.stream_process(params                                          ,
+                                               timeout = config.max_execution_time_ms / 1000.0,
+                                               env     = self.module_env()                    )
+        except TimeoutError:
+            timed_out = True
+            raise
+        except RuntimeError as exception:
+            error = str(exception)
+            if open_hosts:
+                raise RuntimeError(f"{error}\n({self.module_circuits.describe(open_hosts)}, ran with --cached-only)") from exception
+            raise
+        finally:
+            self.module_cache_after_run(fetching, int((time.time() - start_time) * 1000), error, timed_out, cached_only=bool(open_hosts))
+
     def execute_module_js(self, request: JS__Module__Execution__Request) -> JS__Execution__Result:
         config = request.config or JS__Module__Execution__Config()
 
         # Just use the code as provided
         code_to_execute = request.code
+        fetching        = self.module_cache_before_run(code_to_execute, self.module_imports(config), reload=not config.cache_imports)
+        open_hosts      = self.module_circuit(fetching, config)
+        if open_hosts and config.on_open_circuit == CIRCUIT__FAIL_FAST:         # fail at once instead of waiting on a host that is down
+            return JS__Execution__Result(success           = False                                        ,
+                                         error             = self.module_circuits.describe(open_hosts)    ,
+                                         execution_time_ms = 0                                            ,
+                                         deno_version      = f'v{DENO__VERSION__COMPATIBLE_WITH_LAMBDA}'  )
+        bundle          = self.module_bundle(code_to_execute, config)
 
         # Write code to temp file and execute directly
         with Temp_File(contents=code_to_execute, extension='.ts', return_file_path=True) as script_file:
-            params = ["run", "--quiet"]
-            params.extend(self.build_module_permission_flags(config))
-            params.append(f"--v8-flags=--max-old-space-size={config.max_memory_mb}")
-            params.append(script_file)
+            params = self.build_module_run_params(config, script_file, bundle, cached_only=bool(open_hosts))
 
-            import time
-            import os
             start_time = time.time()
 
-            # Set Deno cache directory to /tmp for Lambda compatibility
-            env = os.environ.copy()
-            env['DENO_DIR'] = '/tmp/deno_cache'
-
             result = exec_process(
                 self.file_path__deno(),
                 params,
                 timeout=config.max_execution_time_ms / 1000.0,
-                env=env  # Pass the environment with DENO_DIR set
+                env=self.module_env()  # Pass the environment with DENO_DIR set
             )
 
             execution_time_ms = int((time.time() - start_time) * 1000)
@@ -115,6 +262,11 @@ class Deno__JS__Module__Execution(Deno__JS__Execution):
             stderr = result.get('stderr', '').strip()
 
             success = result.get('status') == 'ok' and not stderr
+            self.module_cache_after_run(fetching, execution_time_ms, stderr or None,
+                                        timed_out   = isinstance(result.get('error'), subprocess.TimeoutExpired),
+                                        cached_only = bool(open_hosts)                                          )
+            if stderr and open_hosts:
+                stderr = f"{stderr}\n({self.module_circuits.describe(open_hosts)}, ran with --cached-only)"
 
             return JS__Execution__Result(
                 success           = success,
@@ -123,4 +275,4 @@ class Deno__JS__Module__Execution(Deno__JS__Execution):
                 execution_time_ms = execution_time_ms,
                 truncated         = len(stdout) > config.max_output_size,
                 deno_version      = f'v{DENO__VERSION__COMPATIBLE_WITH_LAMBDA}'
-        )
\ No newline at end of file
+        )
@@ -0,0 +1,102 @@
+import hashlib
+import json
+import os
+import re
+import secrets
+import threading
+from typing                                                     import Any, Dict, Optional
+from osbot_utils.type_safe.Type_Safe                            import Type_Safe
+
+DENO_ARTIFACTS__DIR         = '/tmp/deno_artifacts'                               # next to DENO_DIR, so the cache size cap does not count them
+DENO_ARTIFACTS__MAX_FILES   = 256                                                 # per kind, least recently used go first
+DENO_ARTIFACT__IMPORT_MAP   = 'import_map'
+DENO_ARTIFACT__LOCKFILE     = 'lockfile'
+DENO_ARTIFACT__KINDS        = (DENO_ARTIFACT__IMPORT_MAP, DENO_ARTIFACT__LOCKFILE)
+IMPORT_MAP__TARGET_SCHEMES  = ('https://', 'http://', 'jsr:', 'npm:')
+REGEX__CONTENT_HASH         = re.compile(r'^[0-9a-f]{64}$')
+
+
+def resolve_import_map(specifier : str,                                           # Import map resolution: exact key, then the longest "prefix/" key
+                       imports   : Dict[str, str]
+                       ) -> Optional[str]:
+    if specifier in imports:
+        return imports[specifier]
+    prefixes = [key for key in imports if key.endswith('/') and specifier.startswith(key)]
+    if prefixes:
+        key = max(prefixes, key=len)
+        return imports[key] + specifier[len(key):]
+    if specifier.startswith(IMPORT_MAP__TARGET_SCHEMES):
+        return specifier
+    return None
+
+
+class Deno__Module__Artifacts(Type_Safe):                                         # Import maps and lockfiles stored by content hash, passed to Deno as files
+    folder : str = DENO_ARTIFACTS__DIR
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.lock = threading.Lock()
+
+    def put(self, kind    : str,                                                  # Store (or reuse) a document and return its content hash
+                  content : Dict[str, Any]
+            ) -> str:
+        self.validate(kind, content)
+        data         = json.dumps(content, sort_keys=True, separators=(',', ':')).encode()
+        content_hash = hashlib.sha256(data).hexdigest()
+        path         = self._path(kind, content_hash)
+        with self.lock:
+            if os.path.isfile(path):
+                os.utime(path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                temp = f'{path}.{secrets.token_hex(4)}.tmp'                        # unique: other processes sharing the folder write their own
+                with open(temp, 'wb') as file:                                    # concurrent writers never expose a half-written file
+                    file.write(data)
+                os.replace(temp, path)
+                self._evict(kind)
+        return content_hash
+
+    def path(self, kind         : str,                                            # File of a stored document, ValueError when the hash is unknown
+                   content_hash : str
+             ) -> str:
+        if kind not in DENO_ARTIFACT__KINDS or not REGEX__CONTENT_HASH.match(content_hash or ''):
+            raise ValueError(f"invalid {kind} hash: {content_hash}")
+        path = self._path(kind, content_hash)
+        if not os.path.isfile(path):
+            raise ValueError(f"unknown {kind} hash: {content_hash} (send the {kind} itself once)")
+        os.utime(path)
+        return path
+
+    def get(self, kind         : str,
+                  content_hash : str
+            ) -> Dict[str, Any]:
+        with open(self.path(kind, content_hash)) as file:
+            return json.load(file)
+
+    def validate(self, kind    : str,                                             # ValueError unless content has the shape Deno expects
+                       content : Dict[str, Any]):
+        if kind not in DENO_ARTIFACT__KINDS:
+            raise ValueError(f"unknown artifact kind: {kind}")
+        if type(content) is not dict:
+            raise ValueError(f"{kind} must be a JSON object")
+        if kind == DENO_ARTIFACT__IMPORT_MAP:
+            if not set(content) <= {'imports', 'scopes'}:
+                raise ValueError("import_map may only have 'imports' and 'scopes'")
+            maps = [content.get('imports', {})] + list((content.get('scopes') or {}).values())
+            for mapping in maps:
+                if type(mapping) is not dict or not all(type(value) is str and value.startswith(IMPORT_MAP__TARGET_SCHEMES) for value in mapping.values()):
+                    raise ValueError("import_map entries must map specifiers to absolute urls or jsr:/npm: specifiers")
+        elif type(content.get('version')) is not str:
+            raise ValueError("lockfile must be a deno.lock document with a 'version'")
+
+    def _path(self, kind: str, content_hash: str) -> str:
+        return os.path.join(self.folder, kind, f'{content_hash}.json')
+
+    def _evict(self, kind: str):                                                  # Keep at most DENO_ARTIFACTS__MAX_FILES per kind (caller holds the lock)
+        folder = os.path.join(self.folder, kind)
+        files  = sorted((entry for entry in os.scandir(folder) if entry.name.endswith('.json')), key=lambda entry: entry.stat().st_mtime)
+        for entry in files[:max(0, len(files) - DENO_ARTIFACTS__MAX_FILES)]:
+            os.remove(entry.path)
+
+
+deno_module_artifacts = Deno__Module__Artifacts()                                 # shared by every executor, so a hash works on any request
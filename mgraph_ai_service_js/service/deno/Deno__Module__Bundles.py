@@ -0,0 +1,213 @@
+import hashlib
+import json
+import os
+import secrets
+import shutil
+import threading
+import time
+from typing                                                     import Any, Dict, List, Optional
+from osbot_utils.type_safe.Type_Safe                            import Type_Safe
+from osbot_utils.utils.Process                                  import exec_process
+from mgraph_ai_service_js.service.deno.Deno__Module__Cache      import Deno__Module__Cache, deno_module_cache, REGEX__ANSI_ESCAPE
+
+DENO_BUNDLES__DIR             = '/tmp/deno_bundles'
+DENO_BUNDLES__MAX_SIZE_MB     = int(os.getenv('DENO_BUNDLES_MAX_SIZE_MB', '64'))
+DENO_BUNDLES__MIN_RUNS        = 3                                                 # runs of the same import set before it is bundled
+DENO_BUNDLES__MIN_GRAPH       = 4                                                 # cached modules in the graph; smaller graphs load fast enough
+DENO_BUNDLES__MAX_ENTRIES     = 16                                                # remote urls imported by one script
+DENO_BUNDLES__MAX_TRACKED     = 1024                                              # import sets counted in memory, oldest dropped
+DENO_BUNDLES__TIMEOUT_MS      = 120000                                            # deno bundle + export probe
+DENO_BUNDLE__FILE             = 'bundle.js'
+DENO_BUNDLE__IMPORT_MAP       = 'import_map.json'
+DENO_BUNDLE__MANIFEST         = 'manifest.json'
+DENO_BUNDLE__EXPORTS_PROBE    = """import * as bundle from "./bundle.js";
+console.log(JSON.stringify(Object.fromEntries(Object.entries(bundle).map(([name, module]) => [name, Object.keys(module)]))));
+"""
+
+
+class Deno__Module__Bundles(Type_Safe):                                           # Recurring import sets pre-bundled into one file, reused through an import map
+    folder         : str  = DENO_BUNDLES__DIR
+    max_size_bytes : int  = DENO_BUNDLES__MAX_SIZE_MB * 1024 * 1024
+    min_runs       : int  = DENO_BUNDLES__MIN_RUNS
+    min_graph      : int  = DENO_BUNDLES__MIN_GRAPH
+    module_cache   : Deno__Module__Cache = None                                   # defaults to the process-wide cache
+    supported      : Optional[bool]                                               # does the Deno binary have `deno bundle` (2.4+)? checked once by setup(), None before
+    runs           : dict                                                         # import set key -> runs seen, oldest first
+    building       : dict                                                         # import set key -> start time
+    failed         : dict                                                         # import set key -> error, not retried
+    hits           : int
+    builds         : int
+    evictions      : int
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        if self.module_cache is None:
+            self.module_cache = deno_module_cache
+        self.lock = threading.Lock()
+
+    def setup(self, deno_path : str,                                              # Check once whether bundles can be built; use() does nothing when they cannot
+                    offline   : bool = False
+              ) -> 'Deno__Module__Bundles':
+        if self.supported is None:                                                # deno bundle fetches esbuild from npm, so never offline
+            self.supported = not offline and self.is_supported(deno_path)
+        return self
+
+    def key(self, urls: List[str]) -> str:                                        # An import set is the script's remote entry urls, in any order
+        return hashlib.sha256('\n'.join(sorted(set(urls))).encode()).hexdigest()
+
+    def use(self, urls          : List[str],                                      # Import map of the set's bundle, or None (counting the run, maybe starting a build)
+                  allowed_hosts : List[str],
+                  deno_path     : str
+            ) -> Optional[str]:
+        if not self.supported or not urls or len(urls) > DENO_BUNDLES__MAX_ENTRIES:
+            return None
+        key        = self.key(urls)
+        import_map = self.lookup(key)
+        if import_map:
+            return import_map
+        with self.lock:
+            if key in self.failed or key in self.building:
+                return None
+            runs = self.runs.pop(key, 0) + 1
+            self.runs[key] = runs
+            while len(self.runs) > DENO_BUNDLES__MAX_TRACKED:
+                del self.runs[next(iter(self.runs))]
+            if runs < self.min_runs:
+                return None
+            self.building[key] = time.time()
+        threading.Thread(target=self.build, args=(key, sorted(set(urls)), allowed_hosts, deno_path), daemon=True).start()
+        return None                                                               # this run loads modules as usual; later ones use the bundle
+
+    def lookup(self, key: str) -> Optional[str]:                                  # Import map of a bundle still matching the cached graph it was built from
+        folder = os.path.join(self.folder, key)
+        try:
+            with open(os.path.join(folder, DENO_BUNDLE__MANIFEST)) as file:
+                manifest = json.load(file)
+        except (OSError, ValueError):
+            return None
+        for url, mtime in manifest['graph'].items():                              # a re-downloaded or evicted module means a different graph
+            try:
+                if os.stat(self.module_cache.file_path(url)).st_mtime != mtime:
+                    raise OSError
+            except OSError:
+                self.remove(key)
+                return None
+        os.utime(os.path.join(folder, DENO_BUNDLE__MANIFEST))                     # mtime of the manifest is the LRU clock
+        with self.lock:
+            self.hits += 1
+        return os.path.join(folder, DENO_BUNDLE__IMPORT_MAP)
+
+    def build(self, key           : str,                                          # Bundle an import set: deno bundle, export probe, facades and import map
+                    urls          : List[str],
+                    allowed_hosts : List[str],
+                    deno_path     : str):
+        folder = os.path.join(self.folder, f'{key}.{secrets.token_hex(4)}.tmp')
+        try:
+            graph = self.module_cache.graph(urls)
+            if not set(urls) <= set(graph) or len(graph) < self.min_graph:
+                raise ValueError(f"import graph not cached or too small ({len(graph)} modules)")
+            graph_mtimes = {url: os.stat(self.module_cache.file_path(url)).st_mtime for url in graph}
+            os.makedirs(folder)
+            with open(os.path.join(folder, 'entry.js'), 'w') as file:
+                file.write(''.join(f'export * as m{index} from {json.dumps(url)};\n' for index, url in enumerate(urls)))
+            self._deno(deno_path, ['bundle', '--quiet', f"--allow-import={','.join(allowed_hosts)}", '-o', DENO_BUNDLE__FILE, 'entry.js'], folder)
+            with open(os.path.join(folder, 'probe.js'), 'w') as file:
+                file.write(DENO_BUNDLE__EXPORTS_PROBE)
+            exports = json.loads(self._deno(deno_path, ['run', '--quiet', 'probe.js'], folder).splitlines()[-1])
+            self.write_facades(folder, urls, [exports[f'm{index}'] for index in range(len(urls))])
+            with open(os.path.join(folder, DENO_BUNDLE__MANIFEST), 'w') as file:
+                json.dump({'urls'         : urls                                                         ,
+                           'graph'        : graph_mtimes                                                 ,
+                           'graph_hash'   : hashlib.sha256('\n'.join(sorted(graph)).encode()).hexdigest(),
+                           'bundle_bytes' : os.path.getsize(os.path.join(folder, DENO_BUNDLE__FILE))     ,
+                           'created_at'   : time.time()                                                  }, file)
+            self.remove(key)
+            os.rename(folder, os.path.join(self.folder, key))
+            with self.lock:
+                self.builds += 1
+            self.enforce()
+        except Exception as error:
+            with self.lock:
+                self.failed[key] = str(error)
+                while len(self.failed) > DENO_BUNDLES__MAX_TRACKED:
+                    del self.failed[next(iter(self.failed))]
+        finally:
+            shutil.rmtree(folder, ignore_errors=True)
+            with self.lock:
+                self.building.pop(key, None)
+                self.runs.pop(key, None)
+
+    def write_facades(self, folder  : str,                                        # One module per url re-exporting its part of the bundle, mapped in by an import map
+                            urls    : List[str],
+                            exports : List[List[str]]):
+        imports = {}
+        for index, (url, names) in enumerate(zip(urls, exports)):
+            lines = [f'import {{ m{index} as module }} from "./{DENO_BUNDLE__FILE}";']
+            for position, name in enumerate(names):                              # string export names cover "default" and non-identifiers alike
+                lines.append(f'const e{position} = module[{json.dumps(name)}]; export {{ e{position} as {json.dumps(name)} }};')
+            with open(os.path.join(folder, f'facade_{index}.js'), 'w') as file:
+                file.write('\n'.join(lines) + '\n')
+            imports[url] = f'./facade_{index}.js'                                 # relative to the import map file
+        with open(os.path.join(folder, DENO_BUNDLE__IMPORT_MAP), 'w') as file:
+            json.dump({'imports': imports}, file)
+
+    def is_supported(self, deno_path: str) -> bool:                               # Does this Deno binary have `deno bundle`?
+        process = exec_process(deno_path, ['bundle', '--help'], timeout=30)
+        return 'Output a single JavaScript file' in (process.get('stdout') or '')
+
+    def entries(self) -> List[Dict[str, Any]]:                                    # Built bundles, least recently used first
+        entries = []
+        if not os.path.isdir(self.folder):
+            return entries
+        for entry in os.scandir(self.folder):
+            manifest = os.path.join(entry.path, DENO_BUNDLE__MANIFEST)
+            if not entry.is_dir() or not os.path.isfile(manifest):
+                continue
+            size = sum(os.path.getsize(os.path.join(entry.path, name)) for name in os.listdir(entry.path))
+            entries.append({'key': entry.name, 'size': size, 'used_at': os.stat(manifest).st_mtime})
+        entries.sort(key=lambda entry: entry['used_at'])
+        return entries
+
+    def enforce(self) -> int:                                                     # Remove least recently used bundles while over the cap
+        entries = self.entries()
+        total   = sum(entry['size'] for entry in entries)
+        evicted = 0
+        for entry in entries:
+            if total <= self.max_size_bytes:
+                break
+            self.remove(entry['key'])
+            total   -= entry['size']
+            evicted += 1
+        with self.lock:
+            self.evictions += evicted
+        return evicted
+
+    def remove(self, key: str):
+        shutil.rmtree(os.path.join(self.folder, key), ignore_errors=True)
+
+    def stats(self) -> Dict[str, Any]:
+        entries = self.entries()
+        return {'supported'  : self.supported                              ,
+                'bundles'    : len(entries)                                ,
+                'size_bytes' : sum(entry['size'] for entry in entries)     ,
+                'hits'       : self.hits                                   ,
+                'builds'     : self.builds                                 ,
+                'building'   : len(self.building)                          ,
+                'failed'     : len(self.failed)                            ,
+                'evictions'  : self.evictions                              ,
+                'min_runs'   : self.min_runs                               }
+
+    def _deno(self, deno_path : str,                                             # Run deno in folder, returning stdout; ValueError with its error otherwise
+                    params    : List[str],
+                    folder    : str
+              ) -> str:
+        process = exec_process(deno_path, params, cwd     = folder                           ,
+                                                  timeout = DENO_BUNDLES__TIMEOUT_MS / 1000.0,
+                                                  env     = self.module_cache.env()          )
+        stderr = REGEX__ANSI_ESCAPE.sub('', process.get('stderr') or '').strip()
+        if process.get('status') != 'ok' or stderr:
+            raise ValueError(f"deno {params[0]} failed: {stderr.splitlines()[0] if stderr else process.get('error')}")
+        return process.get('stdout') or ''
+
+
+deno_module_bundles = Deno__Module__Bundles()                                     # shared by every executor
@@ -0,0 +1,260 @@
+import hashlib
+import json
+import os
+import re
+import secrets
+import threading
+import time
+from typing                                                     import Any, Dict, List, Optional
+from urllib.parse                                               import urljoin, urlsplit
+from osbot_utils.type_safe.Type_Safe                            import Type_Safe
+from mgraph_ai_service_js.service.deno.Deno__Module__Artifacts  import resolve_import_map
+
+DENO_CACHE__DIR             = '/tmp/deno_cache'                                   # /tmp is the only writable folder on Lambda
+DENO_CACHE__MAX_SIZE_MB     = int(os.getenv('DENO_CACHE_MAX_SIZE_MB', '256'))     # cap on the remote modules, the only part of DENO_DIR that is evicted
+DENO_CACHE__LOW_WATER       = 0.8                                                 # evict down to this share of the cap, so not every run evicts
+DENO_CACHE__PINNED_PREFIXES = ['https://esm.sh/meriyah@'      ,                   # the AST toolchain is never evicted
+                               'https://esm.sh/astring@'      ,
+                               'https://esm.sh/esquery@'      ,
+                               'https://esm.sh/source-map-js@']
+DENO_CACHE__REMOTE_FOLDER   = 'remote'                                            # Deno 2 layout: remote/<scheme>/<host>[_PORT<n>]/<sha256(path?query)>
+DENO_CACHE__DEFAULT_PORTS   = {'http': 80, 'https': 443}                          # urls normalise these away before hashing
+DENO_CACHE__METADATA_MARKER = b'\n// denoCacheMetadata='                          # Deno 2 appends the headers and url to each cached module
+DENO_CACHE__METADATA_BYTES  = 65536                                               # tail read when looking for the metadata
+DENO_CACHE__MAX_TOUCHED     = 256                                                 # modules refreshed per run (entry points plus their cached imports)
+REGEX__ANSI_ESCAPE          = re.compile(r'\x1b\[[0-9;]*m')                        # colours in deno's stderr
+REGEX__MODULE_SPECIFIER     = re.compile(r'''(?:\bfrom\s*|\bimport\s*\(?\s*)(["'])([^"'\n]+)\1''')
+
+
+class Deno__Module__Cache(Type_Safe):                                             # Size-capped DENO_DIR with LRU eviction of remote modules
+    deno_dir        : str  = DENO_CACHE__DIR
+    max_size_bytes  : int  = DENO_CACHE__MAX_SIZE_MB * 1024 * 1024
+    pinned_prefixes : list = None                                                 # defaults to DENO_CACHE__PINNED_PREFIXES
+    hits            : int
+    misses          : int
+    evictions       : int
+    evicted_bytes   : int
+    urls            : dict                                                        # file path -> (mtime, url), so metadata is read once per file
+    links_by_path   : dict                                                        # file path -> (mtime, links), so a module is scanned once per download
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        if self.pinned_prefixes is None:
+            self.pinned_prefixes = list(DENO_CACHE__PINNED_PREFIXES)
+        self.lock = threading.Lock()
+
+    def env(self) -> Dict[str, str]:                                              # Environment for Deno runs using this cache
+        env = os.environ.copy()
+        env['DENO_DIR'] = self.deno_dir
+        return env
+
+    def module_urls(self, code    : str,                                         # Remote modules a script imports directly (bare names through imports)
+                          imports : Optional[Dict[str, str]] = None
+                    ) -> List[str]:
+        urls = []
+        for match in REGEX__MODULE_SPECIFIER.finditer(code):
+            specifier = match.group(2)
+            url       = resolve_import_map(specifier, imports or {}) or ''
+            if url.startswith(('https://', 'http://')) and url not in urls:
+                urls.append(url)
+        return urls
+
+    def file_path(self, url: str) -> Optional[str]:                               # Where Deno keeps a remote module (None for non-http urls)
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            return None
+        port = parts.port if parts.port not in (None, DENO_CACHE__DEFAULT_PORTS[parts.scheme]) else None
+        host = parts.hostname + (f'_PORT{port}' if port else '')
+        path = parts.path + (f'?{parts.query}' if parts.query else '')
+        return os.path.join(self.deno_dir, DENO_CACHE__REMOTE_FOLDER, parts.scheme, host, hashlib.sha256(path.encode()).hexdigest())
+
+    def is_pinned(self, url: str) -> bool:
+        return any(url.startswith(prefix) for prefix in self.pinned_prefixes)
+
+    def record_access(self, urls: List[str]) -> int:                              # Count hits/misses for a run's imports and refresh their access times; returns misses
+        misses = len(self.missing(urls))
+        hits   = len(urls) - misses
+        self.touch(urls)
+        with self.lock:
+            self.hits   += hits
+            self.misses += misses
+        return misses
+
+    def missing(self, urls: List[str]) -> List[str]:                              # The urls Deno would have to download
+        return [url for url in urls if not os.path.isfile(self.file_path(url) or '')]
+
+    def touch(self, urls: List[str]):                                             # Mark modules and the cached modules they import as just used
+        now = time.time()
+        for url in self.graph(urls):
+            path = self.file_path(url)
+            try:
+                os.utime(path, (now, os.stat(path).st_mtime))                     # atime is the LRU clock; mtime stays the download time
+            except OSError:
+                pass
+
+    def graph(self, urls: List[str]) -> List[str]:                                # Cached modules reachable from urls through redirects and imports
+        pending = list(reversed(urls))
+        seen    = set()
+        graph   = []
+        while pending and len(seen) < DENO_CACHE__MAX_TOUCHED:
+            url  = pending.pop()
+            path = self.file_path(url)
+            if url in seen or path is None:
+                continue
+            seen.add(url)
+            links = self._links(url, path)
+            if links is None:
+                continue
+            graph.append(url)
+            pending.extend(reversed(links))
+        return graph
+
+    def links(self, url     : str,                                               # Urls a module leads to: its redirect target and static imports
+                    source  : bytes,
+                    headers : Dict[str, str]
+              ) -> List[str]:
+        links = [urljoin(url, headers['location'])] if headers.get('location') else []
+        for match in REGEX__MODULE_SPECIFIER.finditer(source.decode('utf-8', 'replace')):
+            specifier = match.group(2)
+            if specifier.startswith(('https://', 'http://', '/', './', '../')):
+                links.append(urljoin(url, specifier))
+        return links
+
+    def read(self, url: str) -> Optional[tuple]:                                  # (source, headers) of a cached module, None when not cached
+        try:
+            with open(self.file_path(url), 'rb') as file:
+                source, metadata = self._split_metadata(file.read())
+        except (OSError, TypeError):
+            return None
+        return source, metadata.get('headers', {})
+
+    def write(self, url     : str,                                               # Store a module the way Deno would after downloading it
+                    source  : bytes,
+                    headers : Dict[str, str]
+              ) -> str:
+        path     = self.file_path(url)
+        metadata = json.dumps({'headers': headers, 'url': url, 'time': int(time.time())})
+        temp     = f'{path}.{secrets.token_hex(4)}.tmp'                         # unique: concurrent restores of one module each write their own
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(temp, 'wb') as file:
+            file.write(source + DENO_CACHE__METADATA_MARKER + metadata.encode())
+        os.replace(temp, path)
+        return path
+
+    def entries(self) -> List[Dict[str, Any]]:                                    # Cached remote modules, least recently used first
+        entries = []
+        remote  = os.path.join(self.deno_dir, DENO_CACHE__REMOTE_FOLDER)
+        for folder, _, files in os.walk(remote):
+            for name in files:
+                if name.endswith('.tmp'):                                         # a write in progress
+                    continue
+                path = os.path.join(folder, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                url = self._url(path, stat)
+                entries.append({'url'         : url                                 ,
+                                'path'        : path                                ,
+                                'size'        : stat.st_size                        ,
+                                'accessed_at' : max(stat.st_atime, stat.st_mtime)   ,
+                                'pinned'      : bool(url) and self.is_pinned(url)   })
+        entries.sort(key=lambda entry: entry['accessed_at'])
+        return entries
+
+    def size_bytes(self) -> int:                                                  # Everything under DENO_DIR (modules, emit and analysis caches)
+        total = 0
+        for folder, _, files in os.walk(self.deno_dir):
+            for name in files:
+                try:
+                    total += os.stat(os.path.join(folder, name)).st_size
+                except OSError:
+                    pass
+        return total
+
+    def enforce(self) -> int:                                                     # Evict unpinned modules, oldest access first, once they are over the cap; returns how many
+        with self.lock:
+            entries = self.entries()                                              # the cap is on what eviction can free, so gen/ and the sqlite caches never force it
+            total   = sum(entry['size'] for entry in entries)
+            if total <= self.max_size_bytes:
+                return 0
+            target  = self.max_size_bytes * DENO_CACHE__LOW_WATER
+            evicted = 0
+            for entry in entries:
+                if total <= target:
+                    break
+                if entry['pinned']:
+                    continue
+                try:
+                    os.remove(entry['path'])
+                except OSError:
+                    continue
+                self.urls.pop(entry['path'], None)
+                self.links_by_path.pop(entry['path'], None)
+                total              -= entry['size']
+                self.evicted_bytes += entry['size']
+                evicted            += 1
+            self.evictions += evicted
+            return evicted
+
+    def stats(self) -> Dict[str, Any]:
+        entries  = self.entries()
+        requests = self.hits + self.misses
+        return {'deno_dir'        : self.deno_dir                                           ,
+                'size_bytes'      : self.size_bytes()                                       ,
+                'max_size_bytes'  : self.max_size_bytes                                     ,
+                'modules'         : len(entries)                                            ,
+                'modules_bytes'   : sum(entry['size'] for entry in entries)                 ,
+                'pinned_modules'  : sum(1 for entry in entries if entry['pinned'])          ,
+                'pinned_prefixes' : list(self.pinned_prefixes)                              ,
+                'hits'            : self.hits                                               ,
+                'misses'          : self.misses                                             ,
+                'hit_rate'        : round(self.hits / requests, 4) if requests else None   ,
+                'evictions'       : self.evictions                                          ,
+                'evicted_bytes'   : self.evicted_bytes                                      }
+
+    def _url(self, path: str, stat: os.stat_result) -> Optional[str]:             # Module url from the metadata Deno stores with it
+        cached = self.urls.get(path)
+        if cached and cached[0] == stat.st_mtime:
+            return cached[1]
+        try:
+            with open(path, 'rb') as file:
+                file.seek(max(0, stat.st_size - DENO_CACHE__METADATA_BYTES))
+                _, metadata = self._split_metadata(file.read())
+            os.utime(path, (stat.st_atime, stat.st_mtime))                        # reading it here is not a use, keep its place in the LRU order
+        except OSError:
+            return None
+        url = metadata.get('url')
+        self.urls[path] = (stat.st_mtime, url)
+        return url
+
+    def _links(self, url: str, path: str) -> Optional[List[str]]:                 # links() of a cached module, None when not cached
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            return None
+        cached = self.links_by_path.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        try:
+            with open(path, 'rb') as file:
+                content = file.read()
+        except OSError:
+            return None
+        source, metadata = self._split_metadata(content)
+        links            = self.links(url, source, metadata.get('headers', {}))
+        self.links_by_path[path] = (mtime, links)
+        return links
+
+    def _split_metadata(self, content: bytes) -> tuple:                           # (module source, metadata dict) of a cached file
+        index = content.rfind(DENO_CACHE__METADATA_MARKER)
+        if index == -1:
+            return content, {}
+        try:
+            metadata = json.loads(content[index + len(DENO_CACHE__METADATA_MARKER):])
+        except ValueError:
+            metadata = {}
+        return content[:index], metadata if isinstance(metadata, dict) else {}
+
+
+deno_module_cache = Deno__Module__Cache()                                         # shared by every executor, so stats and the cap cover the whole process
@@ -0,0 +1,130 @@
+import math
+import re
+import threading
+import time
+from typing                                                     import Any, Dict, List, Optional
+from urllib.parse                                               import urlsplit
+from osbot_utils.type_safe.Type_Safe                            import Type_Safe
+from mgraph_ai_service_js.service.deno.Deno__Module__Cache      import REGEX__ANSI_ESCAPE
+
+CIRCUIT__FAILURE_THRESHOLD  = 3                                                   # failed or slow downloads in a row before a host's circuit opens
+CIRCUIT__SLOW_MS            = 10000                                               # a run downloading from a host for longer counts as a failure
+CIRCUIT__OPEN_SECONDS       = 30                                                  # first cool-down, doubled after each failed probe
+CIRCUIT__MAX_OPEN_SECONDS   = 600
+CIRCUIT__CLOSED             = 'closed'
+CIRCUIT__OPEN               = 'open'
+CIRCUIT__HALF_OPEN          = 'half_open'                                         # cool-down over, one probe run allowed through
+CIRCUIT__CACHED_ONLY        = 'cached_only'                                       # open circuit: run with --cached-only against DENO_DIR
+CIRCUIT__FAIL_FAST          = 'fail_fast'                                         # open circuit: do not run at all
+CIRCUIT__MODES              = (CIRCUIT__CACHED_ONLY, CIRCUIT__FAIL_FAST)
+CIRCUIT__DESCRIBE_CHARS     = 120                                                 # of each host's last error, in the message added to a run's stderr
+REGEX__ERROR_URL            = re.compile(r'''https?://[^\s"'`<>)\]]+''')
+REGEX__NETWORK_ERROR        = re.compile(r"^error: (?:Uncaught \(in promise\) TypeError: )?Import '([^']+)' failed(?:\.$|: 5\d\d\b)|"      # deno's own module load failures:
+                                         r"^error: (?!Uncaught).*(?:error sending request|status code:? 5\d\d\b)", re.MULTILINE)   # no answer or a 5xx (a 404 is an answer)
+
+
+class Deno__Module__Circuits(Type_Safe):                                          # Per-host circuit breaker for remote module downloads
+    failure_threshold : int   = CIRCUIT__FAILURE_THRESHOLD
+    slow_ms           : int   = CIRCUIT__SLOW_MS
+    open_seconds      : int   = CIRCUIT__OPEN_SECONDS
+    max_open_seconds  : int   = CIRCUIT__MAX_OPEN_SECONDS
+    hosts             : dict                                                      # host -> {state, failures, open_until, open_seconds, trips, last_error}
+    short_circuited   : int                                                       # runs that met an open circuit
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.lock = threading.Lock()
+
+    def open_hosts(self, urls: List[str]) -> List[str]:                           # Hosts of urls whose circuit is open (a cooled-down one lets this run probe it)
+        now         = time.time()
+        open_hosts  = []
+        with self.lock:
+            for host in dict.fromkeys(self.host(url) for url in urls):
+                circuit = self.hosts.get(host)
+                if circuit is None or circuit['state'] == CIRCUIT__CLOSED:
+                    continue
+                if now >= circuit['open_until'] + (circuit['open_seconds'] if circuit['state'] == CIRCUIT__HALF_OPEN else 0):
+                    circuit['state'] = CIRCUIT__HALF_OPEN                         # this caller is the probe (again, if the last one never reported back)
+                    continue
+                open_hosts.append(host)
+            if open_hosts:
+                self.short_circuited += 1
+        return open_hosts
+
+    def record(self, urls        : List[str],                                     # Outcome of a run that downloaded urls: failures open circuits, successes close them
+                     duration_ms : int,
+                     error       : Optional[str]       = None,
+                     timed_out   : bool                = False,
+                     missing     : Optional[List[str]] = None):                   # urls still not cached after the run (None: all of them)
+        fetched = list(dict.fromkeys(self.host(url) for url in urls))
+        waiting = fetched if missing is None else list(dict.fromkeys(self.host(url) for url in missing))   # a slow run is only the hosts' fault if it was still downloading
+        failed  = {}
+        text    = REGEX__ANSI_ESCAPE.sub('', error or '')
+        match   = REGEX__NETWORK_ERROR.search(text)
+        if match:
+            line   = text[match.start():].splitlines()[0].strip()[:300]
+            named  = [self.host(url) for url in ([match.group(1)] if match.group(1) else REGEX__ERROR_URL.findall(line))]   # imported directly or not
+            failed = {host: line for host in named or fetched}
+        elif timed_out:
+            failed = {host: 'timed out while downloading modules' for host in waiting}
+        elif duration_ms > self.slow_ms:
+            failed = {host: f'downloads took {duration_ms}ms' for host in waiting}
+        with self.lock:
+            for host in fetched + [host for host in failed if host not in fetched]:
+                if host in failed:
+                    self._failure(host, failed[host])
+                elif host in self.hosts:
+                    self._success(host)
+
+    def host(self, url: str) -> str:
+        return urlsplit(url).netloc
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        with self.lock:
+            hosts = {host: {'state'        : circuit['state']                                            ,
+                            'failures'     : circuit['failures']                                         ,
+                            'trips'        : circuit['trips']                                            ,
+                            'retry_in_s'   : max(0, round(circuit['open_until'] - now, 1)) if circuit['state'] == CIRCUIT__OPEN else 0,
+                            'last_error'   : circuit['last_error']                                       }
+                     for host, circuit in self.hosts.items()}
+        return {'hosts'             : hosts                  ,
+                'open'              : sorted(host for host, circuit in hosts.items() if circuit['state'] != CIRCUIT__CLOSED),
+                'short_circuited'   : self.short_circuited   ,
+                'failure_threshold' : self.failure_threshold ,
+                'slow_ms'           : self.slow_ms           }
+
+    def describe(self, hosts: List[str]) -> str:                                  # Error message for runs that met open circuits
+        with self.lock:
+            details = [f"{host} (retry in {max(0, math.ceil(self.hosts[host]['open_until'] - time.time()))}s, last error: {self.short_error(self.hosts[host]['last_error'])})"
+                       for host in hosts if host in self.hosts]
+        return f"circuit open for {', '.join(details)}"
+
+    def reset(self):                                                              # Close every circuit and forget the hosts (tests, or after an outage is known to be over)
+        with self.lock:
+            self.hosts.clear()
+            self.short_circuited = 0
+
+    def short_error(self, error: Optional[str]) -> Optional[str]:
+        if error and len(error) > CIRCUIT__DESCRIBE_CHARS:
+            return error[:CIRCUIT__DESCRIBE_CHARS - 3] + '...'
+        return error
+
+    def _failure(self, host: str, error: str):                                   # caller holds the lock
+        circuit = self.hosts.setdefault(host, {'state': CIRCUIT__CLOSED, 'failures': 0, 'open_until': 0, 'open_seconds': self.open_seconds, 'trips': 0, 'last_error': None})
+        circuit['failures']  += 1
+        circuit['last_error'] = error
+        if circuit['state'] == CIRCUIT__HALF_OPEN:                                # failed probe: open again, for longer
+            circuit['open_seconds'] = min(circuit['open_seconds'] * 2, self.max_open_seconds)
+        elif circuit['state'] == CIRCUIT__OPEN or circuit['failures'] < self.failure_threshold:
+            return
+        circuit['state']       = CIRCUIT__OPEN
+        circuit['open_until']  = time.time() + circuit['open_seconds']
+        circuit['trips']      += 1
+
+    def _success(self, host: str):                                                # caller holds the lock
+        circuit = self.hosts[host]
+        circuit.update(state=CIRCUIT__CLOSED, failures=0, open_seconds=self.open_seconds)
+
+
+deno_module_circuits = Deno__Module__Circuits()                                   # shared by every executor, so one outage is learnt once
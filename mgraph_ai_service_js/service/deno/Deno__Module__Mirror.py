@@ -0,0 +1,143 @@
+import hashlib
+import json
+import os
+import secrets
+import threading
+from typing                                                     import Any, Dict, List, Optional
+from osbot_utils.type_safe.Type_Safe                            import Type_Safe
+from mgraph_ai_service_js.service.deno.Deno__Module__Cache      import Deno__Module__Cache, deno_module_cache
+
+DENO_MIRROR__DIR            = os.getenv('DENO_MODULE_MIRROR_DIR', '/tmp/deno_mirror')   # point at an offline bundle directory to serve modules from it
+DENO_MIRROR__OFFLINE        = os.getenv('DENO_MODULE_MIRROR_OFFLINE', '') == '1'         # runs use --cached-only: no network, mirror misses fail fast
+DENO_MIRROR__INDEX          = 'index.json'                                        # {"version": 1, "modules": {url: {"sha256": ..., "headers": {...}}}}
+DENO_MIRROR__OBJECTS        = 'objects'                                           # objects/<sha256>: module sources, stored once however many urls share them
+DENO_MIRROR__VERSION        = 1
+DENO_MIRROR__KEPT_HEADERS   = ('content-type', 'location', 'x-typescript-types', 'x-deno-warning')  # the headers Deno reads back; dates and servers vary per fetch
+
+
+class Deno__Module__Mirror(Type_Safe):                                            # Local content-addressed module store, restored into the Deno module cache
+    mirror_dir   : str  = DENO_MIRROR__DIR
+    offline      : bool = DENO_MIRROR__OFFLINE
+    module_cache : Deno__Module__Cache = None                                     # defaults to the process-wide cache
+    modules      : dict                                                           # url -> {sha256, headers}, loaded from the index
+    index_mtime  : float
+    closures     : dict                                                           # url -> mirrored urls it leads to (itself included)
+    restored     : int                                                            # modules written into the cache from the mirror
+    missing      : int                                                            # run imports the mirror did not have
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        if self.module_cache is None:
+            self.module_cache = deno_module_cache
+        self.lock = threading.Lock()
+
+    def restore(self, urls: List[str]) -> int:                                    # Write the mirrored modules these urls need into the cache, unless already there; returns how many
+        if not urls or not self.load():
+            return 0
+        written = 0
+        for url in urls:
+            if url not in self.modules:
+                with self.lock:
+                    self.missing += 1
+                continue
+            for module_url in self.closure(url):
+                if not os.path.isfile(self.module_cache.file_path(module_url)):
+                    self._restore_module(module_url)
+                    written += 1
+        return written
+
+    def fill(self) -> Dict[str, Any]:                                             # Restore every mirrored module missing from the cache
+        written = self.restore(list(self.modules) if self.load() else [])
+        self.module_cache.enforce()
+        return {'modules': len(self.modules), 'written': written, 'cache_size_bytes': self.module_cache.size_bytes()}
+
+    def export(self, urls: Optional[List[str]] = None) -> Dict[str, Any]:         # Copy cached modules (all, or the graphs of urls) into the mirror
+        cached = self.module_cache.graph(urls) if urls else [entry['url'] for entry in self.module_cache.entries() if entry['url']]
+        added  = 0
+        with self.lock:
+            self.load()
+            for url in cached:
+                module = self.module_cache.read(url)
+                if module is None:
+                    continue
+                source, headers = module
+                content_hash    = hashlib.sha256(source).hexdigest()
+                headers         = {name: value for name, value in headers.items() if name in DENO_MIRROR__KEPT_HEADERS}
+                object_path     = self._object_path(content_hash)
+                if not os.path.isfile(object_path):
+                    self._write(object_path, source)
+                if self.modules.get(url) != {'sha256': content_hash, 'headers': headers}:
+                    self.modules[url] = {'sha256': content_hash, 'headers': headers}
+                    added += 1
+            self._write(os.path.join(self.mirror_dir, DENO_MIRROR__INDEX),
+                        json.dumps({'version': DENO_MIRROR__VERSION, 'modules': self.modules}, sort_keys=True, indent=1).encode())
+            self.index_mtime = os.stat(os.path.join(self.mirror_dir, DENO_MIRROR__INDEX)).st_mtime
+            self.closures    = {}
+        return {'modules': len(self.modules), 'added': added, 'mirror_dir': self.mirror_dir}
+
+    def load(self) -> bool:                                                       # (Re)read the index when it changed; False when there is no mirror
+        index_path = os.path.join(self.mirror_dir, DENO_MIRROR__INDEX)
+        try:
+            mtime = os.stat(index_path).st_mtime
+        except OSError:
+            return False
+        if mtime != self.index_mtime:
+            with open(index_path) as file:
+                index = json.load(file)
+            if index.get('version') != DENO_MIRROR__VERSION:
+                raise ValueError(f"unsupported module mirror version in {index_path}: {index.get('version')}")
+            self.modules     = index['modules']
+            self.index_mtime = mtime
+            self.closures    = {}
+        return True
+
+    def closure(self, url: str) -> List[str]:                                     # The url plus every mirrored module reachable from it
+        if self.load() and url not in self.closures:
+            pending, seen = [url], []
+            while pending:
+                module_url = pending.pop()
+                if module_url in seen or module_url not in self.modules:
+                    continue
+                seen.append(module_url)
+                entry = self.modules[module_url]
+                pending.extend(self.module_cache.links(module_url, self._read_object(entry['sha256']), entry['headers']))
+            self.closures[url] = seen
+        return self.closures.get(url, [])
+
+    def stats(self) -> Dict[str, Any]:
+        available = self.load()
+        objects   = os.path.join(self.mirror_dir, DENO_MIRROR__OBJECTS)
+        return {'mirror_dir'   : self.mirror_dir                                                                          ,
+                'available'    : available                                                                                ,
+                'offline'      : self.offline                                                                             ,
+                'modules'      : len(self.modules) if available else 0                                                    ,
+                'objects'      : len(os.listdir(objects)) if os.path.isdir(objects) else 0                                ,
+                'hosts'        : sorted({url.split('/')[2] for url in self.modules}) if available else []                 ,
+                'restored'     : self.restored                                                                            ,
+                'missing'      : self.missing                                                                             }
+
+    def _restore_module(self, url: str):
+        entry  = self.modules[url]
+        source = self._read_object(entry['sha256'])
+        if hashlib.sha256(source).hexdigest() != entry['sha256']:                 # never hand Deno a corrupted module
+            raise ValueError(f"module mirror object for {url} does not match its hash")
+        self.module_cache.write(url, source, entry['headers'])
+        with self.lock:
+            self.restored += 1
+
+    def _read_object(self, content_hash: str) -> bytes:
+        with open(self._object_path(content_hash), 'rb') as file:
+            return file.read()
+
+    def _object_path(self, content_hash: str) -> str:
+        return os.path.join(self.mirror_dir, DENO_MIRROR__OBJECTS, content_hash)
+
+    def _write(self, path: str, data: bytes):
+        temp = f'{path}.{secrets.token_hex(4)}.tmp'                               # unique: concurrent writers of one path each write their own
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(temp, 'wb') as file:
+            file.write(data)
+        os.replace(temp, path)
+
+
+deno_module_mirror = Deno__Module__Mirror()                                       # shared by every executor
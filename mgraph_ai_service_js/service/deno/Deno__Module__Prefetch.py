@@ -0,0 +1,155 @@
+import json
+import os
+import secrets
+import tempfile
+import threading
+import time
+from concurrent.futures                                         import ThreadPoolExecutor
+from typing                                                     import Any, Dict, List, Optional
+from urllib.parse                                               import urlsplit
+from osbot_utils.type_safe.Type_Safe                            import Type_Safe
+from osbot_utils.utils.Process                                  import exec_process
+from mgraph_ai_service_js.service.deno.Deno__JS__Module__Execution  import Deno__JS__Module__Execution, DEFAULT_ALLOWED_IMPORT_HOSTS
+from mgraph_ai_service_js.service.deno.Deno__Module__Artifacts      import DENO_ARTIFACT__IMPORT_MAP, resolve_import_map
+from mgraph_ai_service_js.service.deno.Deno__Module__Cache          import REGEX__ANSI_ESCAPE
+
+PREFETCH__MAX_MODULES      = 64
+PREFETCH__MAX_PROCESSES    = 4                                                    # `deno cache` runs at once
+PREFETCH__MAX_JOBS         = 32                                                   # background results kept for /prefetch/{prefetch_id}
+PREFETCH__TIMEOUT_MS       = 60000                                                # per module
+PREFETCH__STATUS__RUNNING  = 'running'
+PREFETCH__STATUS__DONE     = 'done'
+
+
+class JS__Module__Prefetch__Request(Type_Safe):                                   # Modules to download and compile ahead of the requests that import them
+    modules              : List[str]                                              # urls, jsr:/npm: specifiers, or bare names mapped by import_map
+    import_map           : Optional[Dict[str, Any]]                               # {"imports": {"lodash": "https://esm.sh/lodash@4.17.21"}}
+    allowed_import_hosts : Optional[List[str]]                                    # defaults to DEFAULT_ALLOWED_IMPORT_HOSTS
+    reload               : bool = False                                           # fetch again even when cached
+    background           : bool = False                                           # return at once with a prefetch_id to poll
+    timeout_ms           : int  = PREFETCH__TIMEOUT_MS
+
+
+class JS__Module__Prefetch__Result(Type_Safe):                                    # Per-module timing and failures of one prefetch
+    prefetch_id      : str
+    status           : str                                                        # running | done
+    modules          : List[Dict[str, Any]]                                       # {specifier, url, success, cached, fetch_time_ms, error}
+    failed           : int
+    cache_size_bytes : int
+    total_time_ms    : int
+
+
+class Deno__Module__Prefetch(Type_Safe):                                          # Warms the Deno module cache with `deno cache`
+    module_executor : Deno__JS__Module__Execution
+    jobs            : dict                                                        # prefetch_id -> JS__Module__Prefetch__Result, oldest first
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.lock = threading.Lock()
+
+    def prefetch(self, request: JS__Module__Prefetch__Request                     # Cache the modules now, or in a background thread when request.background
+                 ) -> JS__Module__Prefetch__Result:
+        plan   = self.plan(request)
+        result = JS__Module__Prefetch__Result(prefetch_id = secrets.token_hex(8)     ,
+                                              status      = PREFETCH__STATUS__RUNNING,
+                                              modules     = [dict(item) for item in plan])
+        self._store(result)
+        if request.background:
+            threading.Thread(target=self._run, args=(request, result), daemon=True).start()
+            return result
+        self._run(request, result)
+        return result
+
+    def status(self, prefetch_id: str) -> Optional[JS__Module__Prefetch__Result]:
+        with self.lock:
+            return self.jobs.get(prefetch_id)
+
+    def plan(self, request: JS__Module__Prefetch__Request                         # {specifier, url} per module, raising ValueError for what cannot be fetched
+             ) -> List[Dict[str, Any]]:
+        if not request.modules:
+            raise ValueError("at least one module is required")
+        if len(request.modules) > PREFETCH__MAX_MODULES:
+            raise ValueError(f"at most {PREFETCH__MAX_MODULES} modules can be prefetched at once")
+        imports       = self._import_map_imports(request.import_map)
+        allowed_hosts = request.allowed_import_hosts or DEFAULT_ALLOWED_IMPORT_HOSTS
+        plan          = []
+        for specifier in dict.fromkeys(request.modules):
+            url = self.resolve(specifier, imports)
+            if url is None:
+                raise ValueError(f"'{specifier}' is not a url, jsr:/npm: specifier or import map entry")
+            host = urlsplit(url).netloc if url.startswith(('https://', 'http://')) else None
+            if host is not None and host not in allowed_hosts:
+                raise ValueError(f"'{specifier}' is not on an allowed import host ({', '.join(allowed_hosts)})")
+            plan.append({'specifier': specifier, 'url': url, 'success': False, 'cached': False, 'fetch_time_ms': 0, 'error': None})
+        return plan
+
+    def resolve(self, specifier : str,                                            # Import map resolution (exact keys, then the longest "prefix/" key)
+                      imports   : Dict[str, str]
+                ) -> Optional[str]:
+        return resolve_import_map(specifier, imports)
+
+    def _import_map_imports(self, import_map: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        if not import_map:
+            return {}
+        self.module_executor.module_artifacts.validate(DENO_ARTIFACT__IMPORT_MAP, import_map)
+        return import_map.get('imports', {})
+
+    def _run(self, request : JS__Module__Prefetch__Request,
+                   result  : JS__Module__Prefetch__Result):
+        start_time   = time.time()
+        module_cache = self.module_executor.module_cache
+        try:
+            self.module_executor.module_mirror.restore([item['url'] for item in result.modules])    # mirrored modules need no download
+            with tempfile.TemporaryDirectory() as folder:
+                import_map_file = None
+                if request.import_map:                                            # the same stored file module runs use, so its hash works there too
+                    module_artifacts = self.module_executor.module_artifacts
+                    import_map_hash  = module_artifacts.put (DENO_ARTIFACT__IMPORT_MAP, request.import_map)
+                    import_map_file  = module_artifacts.path(DENO_ARTIFACT__IMPORT_MAP, import_map_hash   )
+                with ThreadPoolExecutor(max_workers=PREFETCH__MAX_PROCESSES) as pool:
+                    list(pool.map(lambda item: self._cache_module(request, item, folder, import_map_file), result.modules))
+            module_cache.touch([item['url'] for item in result.modules if item['success']])
+            module_cache.enforce()
+        finally:
+            result.failed           = sum(1 for item in result.modules if not item['success'])
+            result.cache_size_bytes = module_cache.size_bytes()
+            result.total_time_ms    = int((time.time() - start_time) * 1000)
+            result.status           = PREFETCH__STATUS__DONE
+
+    def _cache_module(self, request         : JS__Module__Prefetch__Request,     # `deno cache` one module, filling in its timing and outcome
+                            item            : Dict[str, Any],
+                            folder          : str,
+                            import_map_file : Optional[str]):
+        module_cache = self.module_executor.module_cache
+        cache_path   = module_cache.file_path(item['url'])
+        was_cached   = cache_path is not None and os.path.isfile(cache_path)
+        entry_file   = os.path.join(folder, f'entry_{secrets.token_hex(4)}.js')   # bare specifiers only resolve from a module using the import map
+        with open(entry_file, 'w') as file:
+            file.write(f'import {json.dumps(item["specifier"])};\n')
+        params = ['cache', '--quiet', f"--allow-import={','.join(request.allowed_import_hosts or DEFAULT_ALLOWED_IMPORT_HOSTS)}"]
+        if import_map_file:
+            params.append(f'--import-map={import_map_file}')
+        if request.reload:
+            params.append('--reload')
+        params.append(entry_file)
+
+        start_time = time.time()
+        process    = exec_process(str(self.module_executor.file_path__deno()), params,
+                                  timeout = request.timeout_ms / 1000.0         ,
+                                  env     = module_cache.env()                  )
+        stderr     = REGEX__ANSI_ESCAPE.sub('', process.get('stderr') or '').strip()
+        error      = stderr.splitlines()[0] if stderr else None
+        if process.get('status') != 'ok':
+            error = f"deno cache did not finish: {process.get('error')}"
+        elif error is None and cache_path is not None and not os.path.isfile(cache_path):
+            error = f"{item['url']} was not cached (not found?)"                   # deno cache exits cleanly when the entry module 404s
+        item['success']       = error is None
+        item['cached']        = was_cached and not request.reload
+        item['fetch_time_ms'] = int((time.time() - start_time) * 1000)
+        item['error']         = error
+
+    def _store(self, result: JS__Module__Prefetch__Result):
+        with self.lock:
+            self.jobs[result.prefetch_id] = result
+            while len(self.jobs) > PREFETCH__MAX_JOBS:
+                del self.jobs[next(iter(self.jobs))]
@@ -0,0 +1,356 @@
+import hashlib
+import json
+import os
+import queue
+import secrets
+import subprocess
+import threading
+import time
+from typing                                                     import Any, Dict, List
+from osbot_utils.type_safe.Type_Safe                            import Type_Safe
+from mgraph_ai_service_js.service.deno.Deno__Module__Cache      import REGEX__ANSI_ESCAPE
+
+DENO_WORKER__DIR            = '/tmp/deno_workers'
+DENO_WORKER__STDERR_LINES   = 50                                                  # first lines kept to explain why a worker died
+DENO_WORKER__MAX_ISOLATES   = 16                                                  # functions with a live isolate per worker (~12MB each), the least recently used is stopped
+DENO_WORKER__GRACE_S        = 5                                                   # on top of a call's own timeout before the whole worker is killed
+DENO_WORKER__ISOLATE_SCRIPT = r"""// One function's isolate: compiles the function once, then runs one call at a time
+const AsyncFunction = (async function () {}).constructor;
+const setTimer      = setTimeout, setRepeat = setInterval, clearTimer = clearTimeout;
+const timers        = new Set();                                                  // started by the running call, cleared when it returns
+const channel       = new MessageChannel();
+let   fn            = null;
+let   capture       = null;                                                       // console output of the running call, output between calls is dropped
+
+const format = (args) => args.map(arg => typeof arg === 'string' ? arg : Deno.inspect(arg)).join(' ');
+for (const name of ['log', 'info', 'debug', 'trace']) console[name] = (...args) => capture?.stdout.push(format(args));
+for (const name of ['error', 'warn'])                  console[name] = (...args) => capture?.stderr.push(format(args));
+globalThis.setTimeout    = (handler, ...rest) => { const id = setTimer((...args) => { timers.delete(id); handler(...args); }, ...rest); timers.add(id); return id; };
+globalThis.setInterval   = (...args) => { const id = setRepeat(...args); timers.add(id); return id; };
+globalThis.clearTimeout  = globalThis.clearInterval = (id) => { timers.delete(id); clearTimer(id); };
+Deno.exit                = () => { throw new Error('Deno.exit() is not available to functions'); };
+for (const type of ['error', 'unhandledrejection']) {                             // fail the running call, and never reach (or kill) the worker
+    globalThis.addEventListener(type, (event) => {
+        event.preventDefault();
+        capture?.stderr.push(`Uncaught ${event.error ?? event.reason ?? event.message}`);
+    });
+}
+
+async function call(input, json_output) {
+    capture     = {stdout: [], stderr: []};
+    const reply = {ok: true, stdout: capture.stdout, stderr: capture.stderr};
+    try {
+        globalThis.INPUT = input;
+        const result     = await fn(input);
+        if (result !== undefined) reply.result = json_output ? JSON.stringify(result) : format([result]);
+    } catch (error) {
+        Object.assign(reply, {ok: false, error: `Execution error: ${error?.message ?? error}`});
+    }
+    for (const id of timers) clearTimer(id);
+    timers.clear();
+    for (let turn = 0; turn < 2; turn++) {                                        // unhandled rejections of the call surface within two turns of the event loop
+        await new Promise(resolve => { channel.port1.onmessage = resolve; channel.port2.postMessage(null); });
+    }
+    capture = null;
+    return reply;
+}
+
+self.onmessage = async ({data: message}) => {
+    let reply = {ok: true};
+    if (message.op === 'define') {
+        try {
+            fn = new AsyncFunction('INPUT', message.code);                        // syntax errors surface here
+        } catch (error) {
+            reply = {ok: false, error: `Execution error: ${error?.message ?? error}`};
+        }
+    }
+    if (message.op === 'invoke') reply = await call(message.input, message.json_output);
+    if (message.op === 'map') {                                                   // one call per input, each with its own outcome and console output
+        const items = [];
+        for (const input of message.inputs) {
+            const {result, ...item} = await call(input, true);
+            items.push({...item, json: result ?? null});
+        }
+        reply = {ok: true, items};
+    }
+    self.postMessage({...reply, heap_used: Deno.memoryUsage().heapUsed});
+};
+"""
+DENO_WORKER__SCRIPT         = r"""// Long-lived worker: reads one JSON request per stdin line, writes one JSON reply per call.
+// No user code runs here: each function runs in its own Web Worker, so functions share no globals, timers or output
+const ISOLATE_URL  = 'data:application/javascript;base64,' + btoa(__ISOLATE_SCRIPT__);
+const encoder      = new TextEncoder();
+const decoder      = new TextDecoder();
+const write        = Deno.stdout.writeSync.bind(Deno.stdout);
+const functions    = new Map();                                                   // name -> {code, isolate, settle}, least recently used first
+
+function send(reply) {                                                            // leading newline: a stray partial line from user code cannot glue onto a reply
+    const bytes = encoder.encode('\n' + JSON.stringify(reply) + '\n');
+    for (let offset = 0; offset < bytes.length;) offset += write(bytes.subarray(offset));
+}
+
+function stop(entry) {                                                            // end a function's isolate (its code is kept): returns the pending call's settle
+    const settle = entry.settle;
+    entry.isolate?.terminate();
+    entry.isolate = entry.settle = null;
+    return settle;
+}
+
+function post(entry, message, timeout_ms) {                                       // a call past its timeout ends the isolate, and whatever it left running
+    return new Promise(resolve => {
+        const timer  = setTimeout(() => stop(entry)?.({ok: false, error: 'Execution timeout exceeded', timed_out: true}), timeout_ms);
+        entry.settle = (reply) => { clearTimeout(timer); resolve(reply); };
+        entry.isolate.postMessage(message);
+    });
+}
+
+async function run(name, message, timeout_ms) {                                   // call a function, starting its isolate (and compiling it there) first when needed
+    const entry = functions.get(name);
+    if (!entry) return {ok: false, error: `Execution error: function ${name} is not defined in this worker`};
+    functions.delete(name);
+    functions.set(name, entry);
+    if (!entry.isolate) {
+        const running = [...functions.values()].filter(other => other.isolate);
+        if (running.length >= __MAX_ISOLATES__) stop(running[0]);
+        const isolate     = entry.isolate = new Worker(ISOLATE_URL, {type: 'module'});
+        isolate.onmessage = ({data}) => { if (entry.isolate === isolate) { const settle = entry.settle; entry.settle = null; settle?.(data); } };
+        isolate.onerror   = (event) => { event.preventDefault(); if (entry.isolate === isolate) stop(entry)?.({ok: false, error: `Execution error: ${event.message}`}); };
+        const start       = performance.now();
+        const reply       = await post(entry, {op: 'define', code: entry.code}, timeout_ms);
+        if (!reply.ok || !message) {
+            if (!reply.ok) stop(entry);
+            return reply;
+        }
+        timeout_ms = Math.max(1, timeout_ms - (performance.now() - start));
+    }
+    return message ? post(entry, message, timeout_ms) : {ok: true};
+}
+
+async function handle(request) {
+    if (request.op === 'define') {
+        if (functions.has(request.name)) stop(functions.get(request.name));
+        functions.set(request.name, {code: request.code, isolate: null, settle: null});
+        const reply = await run(request.name, null, request.timeout_ms);
+        if (!reply.ok) functions.delete(request.name);
+        return reply;
+    }
+    if (request.op === 'invoke') return run(request.name, {op: 'invoke', input: request.input, json_output: request.json_output}, request.timeout_ms);
+    if (request.op === 'map')    return run(request.name, {op: 'map', inputs: request.inputs}, request.timeout_ms);
+    if (request.op === 'pipeline') {                                              // steps in order, each one's JSON result the next one's INPUT
+        const steps = [];
+        let   value = request.input, heap_used = 0;
+        for (const [index, name] of request.names.entries()) {
+            const start = performance.now();
+            const reply = await run(name, {op: 'invoke', input: value, json_output: true}, request.timeouts_ms[index]);
+            steps.push({ok: reply.ok, error: reply.error, ms: performance.now() - start, stdout: reply.stdout ?? [], stderr: reply.stderr ?? [], timed_out: reply.timed_out ?? false});
+            heap_used = reply.heap_used ?? heap_used;
+            if (!reply.ok || reply.stderr?.length) break;                         // a failed step (or one writing to stderr) ends the pipeline
+            value = JSON.parse(reply.result ?? 'null');                           // passed on as JSON, like between processes
+        }
+        return {ok: true, steps, json: JSON.stringify(value), heap_used};
+    }
+    if (request.op === 'forget') {
+        for (const name of request.names) {
+            if (functions.has(name)) stop(functions.get(name));
+            functions.delete(name);
+        }
+        return {ok: true};
+    }
+    throw new Error(`unknown op: ${request.op}`);
+}
+
+let buffer = '';
+for await (const chunk of Deno.stdin.readable) {
+    buffer += decoder.decode(chunk, {stream: true});
+    let end;
+    while ((end = buffer.indexOf('\n')) >= 0) {
+        const line = buffer.slice(0, end);
+        buffer     = buffer.slice(end + 1);
+        if (!line) continue;
+        const request = JSON.parse(line);
+        let   reply;
+        try {
+            reply = await handle(request);
+        } catch (error) {
+            reply = {ok: false, error: `Execution error: ${error?.message ?? error}`};
+        }
+        send({stdout: [], stderr: [], heap_used: 0, ...reply, id: request.id});
+    }
+}
+""".replace('__ISOLATE_SCRIPT__', json.dumps(DENO_WORKER__ISOLATE_SCRIPT)).replace('__MAX_ISOLATES__', str(DENO_WORKER__MAX_ISOLATES))
+
+
+def deno_worker_script() -> str:                                                  # Path of the worker script, written once per content
+    path = os.path.join(DENO_WORKER__DIR, f'worker_{hashlib.sha256(DENO_WORKER__SCRIPT.encode()).hexdigest()[:16]}.js')
+    if not os.path.isfile(path):
+        os.makedirs(DENO_WORKER__DIR, exist_ok=True)
+        temp = f'{path}.{secrets.token_hex(4)}.tmp'                               # workers starting together each write their own
+        with open(temp, 'w') as file:
+            file.write(DENO_WORKER__SCRIPT)
+        os.replace(temp, path)
+    return path
+
+
+class Deno__Worker(Type_Safe):                                                    # One long-lived Deno process keeping compiled functions warm, each in its own isolate, one call at a time
+    deno_path      : str
+    flags          : list                                                         # permission and memory flags: the profile the worker serves
+    functions      : dict                                                         # function name -> code, compiled in this worker
+    executions     : int
+    heap_used      : int                                                          # V8 heap after the last call, in bytes
+    started_at     : float
+    last_used      : float
+    timed_out      : bool                                                         # a call ran past its timeout (its isolate ended, or the worker killed)
+    recycle_reason : str                                                          # set by the pool once a replacement is warming
+    replaced       : bool                                                         # the replacement is warm: retire on release
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.process = None
+        self.replies = queue.Queue()
+        self.stderr  = []
+
+    def start(self) -> 'Deno__Worker':
+        self.process    = subprocess.Popen([self.deno_path, 'run', '--quiet'] + self.flags + [deno_worker_script()],
+                                           stdin    = subprocess.PIPE ,
+                                           stdout   = subprocess.PIPE ,
+                                           stderr   = subprocess.PIPE ,
+                                           text     = True            ,
+                                           encoding = 'utf-8'         )
+        self.started_at = time.time()
+        self.last_used  = self.started_at
+        threading.Thread(target=self._read_stdout, daemon=True).start()
+        threading.Thread(target=self._read_stderr, daemon=True).start()
+        return self
+
+    def define(self, name    : str,                                              # Compile code as an async function of INPUT, in its own isolate (no-op when already compiled)
+                     code    : str,
+                     timeout : float
+               ) -> Dict[str, Any]:
+        if self.functions.get(name) == code:
+            return {'ok': True}
+        reply = self.call({'op': 'define', 'name': name, 'code': code}, timeout)
+        if reply['ok']:
+            self.functions[name] = code
+        return reply
+
+    def invoke(self, name        : str,
+                     input_data  : Any,
+                     json_output : bool,
+                     timeout     : float
+               ) -> Dict[str, Any]:
+        reply = self.call({'op': 'invoke', 'name': name, 'input': input_data, 'json_output': json_output}, timeout)
+        self.executions += 1
+        return reply
+
+    def map(self, name    : str,                                                 # Call a function once per input, in order, in one round trip
+                  inputs  : List[Any],
+                  timeout : float
+            ) -> Dict[str, Any]:
+        reply = self.call({'op': 'map', 'name': name, 'inputs': inputs}, timeout)
+        self.executions += len(inputs)
+        return reply
+
+    def pipeline(self, names      : List[str],                                   # Call functions in order, each one's result the next one's input, in one round trip
+                       input_data : Any,
+                       timeouts   : List[float]                                  # per step
+                 ) -> Dict[str, Any]:
+        reply = self.call({'op': 'pipeline', 'names': names, 'input': input_data, 'timeouts_ms': [int(timeout * 1000) for timeout in timeouts]}, sum(timeouts))
+        self.executions += len(reply.get('steps', []))
+        return reply
+
+    def forget(self, names   : List[str],                                        # Drop compiled functions, ending their isolates
+                     timeout : float):
+        for name in names:
+            self.functions.pop(name, None)
+        if names and self.is_alive():
+            self.call({'op': 'forget', 'names': names}, timeout)
+
+    def call(self, request : Dict[str, Any],                                      # Send a request and wait for its reply; the worker ends a call past timeout, past the grace it is killed
+                   timeout : float
+             ) -> Dict[str, Any]:
+        request_id = secrets.token_hex(8)                                         # unguessable, so output written by user code never passes for a reply
+        request    = dict(request, id=request_id, timeout_ms=max(1, int(timeout * 1000)))
+        try:
+            self.process.stdin.write(json.dumps(request) + '\n')
+            self.process.stdin.flush()
+        except (OSError, ValueError):
+            raise RuntimeError(self.exit_error())
+        deadline = time.time() + timeout + DENO_WORKER__GRACE_S
+        try:
+            while True:
+                try:
+                    reply = self.replies.get(timeout=max(0, deadline - time.time()))
+                except queue.Empty:
+                    self.timed_out = True
+                    self.stop()
+                    raise TimeoutError("Execution timeout exceeded")
+                if reply is None:
+                    raise RuntimeError(self.exit_error())
+                if reply.get('id') == request_id:
+                    self.heap_used = reply.get('heap_used') or 0
+                    if reply.get('timed_out') or any(step.get('timed_out') for step in reply.get('steps', [])):
+                        self.timed_out = True                                     # the pool recycles the worker for it
+                    return reply
+        finally:
+            self.last_used = time.time()
+
+    def max_memory_mb(self) -> int:                                               # The profile's heap limit, 0 when not set
+        for flag in self.flags:
+            if flag.startswith('--v8-flags=--max-old-space-size='):
+                return int(flag.rsplit('=', 1)[1])
+        return 0
+
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.kill()
+            self.process.wait()
+
+    def exit_error(self) -> str:
+        self.stop()
+        details = REGEX__ANSI_ESCAPE.sub('', ' '.join(self.stderr[:3]))
+        if any('out of memory' in line for line in self.stderr):
+            details = 'JavaScript heap out of memory, max_memory_mb exceeded'
+        return f"Execution error: worker process exited{f' ({details[:500]})' if details else ''}"
+
+    def stats(self) -> Dict[str, Any]:
+        return {'executions' : self.executions                            ,
+                'functions'  : len(self.functions)                        ,
+                'heap_mb'    : round(self.heap_used / (1024 * 1024), 1)   ,
+                'age_s'      : round(time.time() - self.started_at, 1)    ,
+                'alive'      : self.is_alive()                            }
+
+    def _read_stdout(self):
+        for line in self.process.stdout:
+            if line.strip():
+                try:
+                    self.replies.put(json.loads(line))
+                except ValueError:
+                    pass                                                          # raw writes by user code
+        self.replies.put(None)
+
+    def _read_stderr(self):
+        for line in self.process.stderr:                                          # drained so the pipe never blocks the worker
+            if line.strip() and len(self.stderr) < DENO_WORKER__STDERR_LINES:
+                self.stderr.append(line.strip())
+
+
+def worker_execution_result(reply           : Dict[str, Any],                     # Output, error and limits of a reply, as execute_js reports them
+                            max_output_size : int,
+                            capture_stderr  : bool
+                            ) -> Dict[str, Any]:
+    stdout    = '\n'.join(reply.get('stdout', []) + ([reply['result']] if reply.get('result') is not None else [])).strip()
+    stderr    = '\n'.join(reply.get('stderr', []) + ([reply['error']] if reply.get('error') else [])).strip()
+    truncated = len(stdout) > max_output_size
+    if truncated:
+        stdout = stdout[:max_output_size]
+    output = stdout
+    if capture_stderr and stderr:
+        output = f"{output}\n--- STDERR ---\n{stderr}"
+    return {'success'        : reply.get('ok', False) and not stderr                                           ,
+            'output'         : output                                                                         ,
+            'error'          : stderr or None                                                                 ,
+            'memory_used_mb' : round(reply['heap_used'] / (1024 * 1024), 2) if reply.get('heap_used') else None,
+            'truncated'      : truncated                                                                      }
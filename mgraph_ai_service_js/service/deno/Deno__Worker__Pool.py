@@ -0,0 +1,203 @@
+import os
+import threading
+import time
+from contextlib                                                 import contextmanager
+from typing                                                     import Any, Dict, Iterator, List, Optional
+from osbot_utils.type_safe.Type_Safe                            import Type_Safe
+from mgraph_ai_service_js.service.deno.Deno__Worker             import Deno__Worker
+
+DENO_WORKER_POOL__SIZE              = int(os.getenv('DENO_WORKER_POOL_SIZE', str(max(2, os.cpu_count() or 1))))
+DENO_WORKER_POOL__MAX_EXECUTIONS    = int(os.getenv('DENO_WORKER_MAX_EXECUTIONS', '10000'))            # calls before a worker is recycled
+DENO_WORKER_POOL__HEAP_PERCENT      = int(os.getenv('DENO_WORKER_HEAP_WATERMARK_PERCENT', '75'))       # of the profile's max_memory_mb
+DENO_WORKER_POOL__MAX_AGE_S         = int(os.getenv('DENO_WORKER_MAX_AGE_S', '900'))
+DENO_WORKER_POOL__WARM_TIMEOUT_S    = 30                                          # per function recompiled in a replacement
+RECYCLE__EXECUTIONS                 = 'executions'
+RECYCLE__HEAP                       = 'heap'
+RECYCLE__AGE                        = 'age'
+RECYCLE__TIMEOUT                    = 'timeout'                                   # any call past its timeout
+RECYCLE__EXITED                     = 'exited'                                    # crashed or out of memory
+
+
+class Deno__Worker__Pool(Type_Safe):                                              # Warm Deno workers shared by every request, one profile (flags) per worker
+    max_workers    : int = DENO_WORKER_POOL__SIZE
+    max_executions : int = DENO_WORKER_POOL__MAX_EXECUTIONS
+    heap_percent   : int = DENO_WORKER_POOL__HEAP_PERCENT
+    max_age_s      : int = DENO_WORKER_POOL__MAX_AGE_S
+    workers        : list                                                         # every live worker, busy, idle or warming
+    idle           : list                                                         # workers ready for a call, least recently used first
+    warming        : int                                                          # replacements starting in the background
+    started        : int
+    retired        : int
+    waits          : int                                                          # acquisitions that had to wait for a busy worker
+    recycles       : dict                                                         # recycle reason -> workers recycled for it
+    registered     : dict                                                         # function name -> code of the functions kept warm, everything else is one-off
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.condition = threading.Condition()
+
+    @contextmanager
+    def worker(self, deno_path : str,                                             # Hold an idle worker of this profile for a sequence of calls
+                     flags     : List[str],
+                     timeout   : float
+               ) -> Iterator[Deno__Worker]:
+        worker = self.acquire(deno_path, flags, timeout)
+        try:
+            yield worker
+        finally:
+            self.release(worker)
+
+    def acquire(self, deno_path : str,
+                      flags     : List[str],
+                      timeout   : float
+                ) -> Deno__Worker:
+        deadline = time.time() + timeout
+        with self.condition:
+            while True:
+                for worker in [worker for worker in self.idle if not worker.is_alive()]:   # died while idle (e.g. killed from outside)
+                    self.idle.remove(worker)
+                    self._retire(worker, RECYCLE__EXITED)
+                worker = self._idle_worker(deno_path, flags)
+                if worker:
+                    stale = [name for name, code in worker.functions.items() if self.registered.get(name) != code]
+                    break
+                if len(self.workers) >= self.max_workers and self.idle:           # make room: retire the least recently used worker of another profile
+                    self._retire(self.idle.pop(0))
+                if len(self.workers) < self.max_workers:
+                    worker = Deno__Worker(deno_path=deno_path, flags=list(flags))
+                    self.workers.append(worker)
+                    self.started += 1
+                    stale  = None
+                    break
+                self.waits += 1
+                if not self.condition.wait(max(0, deadline - time.time())) and time.time() >= deadline:
+                    raise TimeoutError(f"no free worker in the pool after {timeout}s ({self.max_workers} workers busy)")
+        try:
+            if stale is None:
+                return worker.start()
+            worker.forget(stale, DENO_WORKER_POOL__WARM_TIMEOUT_S)                # deleted, replaced or one-off code a previous holder left compiled
+            return worker
+        except Exception:
+            self.release(worker)
+            raise
+
+    def register(self, name : str,                                                # Keep a function compiled in the workers that have it, and in their replacements
+                       code : str):
+        with self.condition:
+            self.registered[name] = code
+
+    def unregister(self, name: str):                                              # Idle workers drop it now, busy ones when next acquired
+        with self.condition:
+            self.registered.pop(name, None)
+            holders = [worker for worker in self.idle if name in worker.functions]
+            for worker in holders:
+                self.idle.remove(worker)
+        for worker in holders:
+            try:
+                worker.forget([name], DENO_WORKER_POOL__WARM_TIMEOUT_S)
+            except (TimeoutError, RuntimeError):
+                pass                                                              # died: release() retires it
+            finally:
+                self.release(worker)
+
+    def release(self, worker: Deno__Worker):                                      # Back to the idle list, recycled when the policy says so
+        with self.condition:
+            if not worker.is_alive():                                             # timed out or died
+                if worker in self.workers:
+                    self._retire(worker, RECYCLE__TIMEOUT if worker.timed_out else RECYCLE__EXITED)
+                    if not worker.recycle_reason:                                 # unless a replacement is already warming
+                        self._replace(worker)
+            elif worker.replaced:                                                 # its replacement got warm while it was busy
+                self._retire(worker, worker.recycle_reason)
+            else:
+                if not worker.recycle_reason:
+                    worker.recycle_reason = self.recycle_reason(worker) or ''
+                    if worker.recycle_reason:                                     # keeps serving until the replacement is warm
+                        self._replace(worker)
+                self.idle.append(worker)
+            self.condition.notify_all()
+
+    def recycle_reason(self, worker: Deno__Worker) -> Optional[str]:              # Why a live worker is due for recycling, None when it is not
+        if worker.timed_out:                                                      # a call's isolate was ended: replace the worker too
+            return RECYCLE__TIMEOUT
+        if worker.executions >= self.max_executions:
+            return RECYCLE__EXECUTIONS
+        if worker.max_memory_mb() and worker.heap_used > worker.max_memory_mb() * 1024 * 1024 * self.heap_percent / 100:
+            return RECYCLE__HEAP
+        if time.time() - worker.started_at >= self.max_age_s:
+            return RECYCLE__AGE
+        return None
+
+    def stop(self):                                                               # Stop the idle workers (busy ones stop when released dead, or at exit)
+        with self.condition:
+            while self.idle:
+                self._retire(self.idle.pop())
+
+    def stats(self) -> Dict[str, Any]:
+        with self.condition:
+            return {'max_workers' : self.max_workers                                          ,
+                    'workers'     : len(self.workers)                                         ,
+                    'idle'        : len(self.idle)                                            ,
+                    'warming'     : self.warming                                              ,
+                    'retiring'    : sum(1 for worker in self.workers if worker.recycle_reason),
+                    'started'     : self.started                                              ,
+                    'retired'     : self.retired                                              ,
+                    'waits'       : self.waits                                                ,
+                    'profiles'    : len({tuple(worker.flags) for worker in self.workers})     ,
+                    'executions'  : sum(worker.executions for worker in self.workers)         ,
+                    'recycles'    : dict(self.recycles)                                       ,
+                    'policy'      : {'max_executions' : self.max_executions,
+                                     'heap_percent'   : self.heap_percent  ,
+                                     'max_age_s'      : self.max_age_s     }                  ,
+                    'worker_stats': [worker.stats() for worker in self.workers]               }
+
+    def _idle_worker(self, deno_path : str,                                       # Most recently used idle worker of the profile (its functions are the warmest), caller holds the lock
+                           flags     : List[str]
+                     ) -> Optional[Deno__Worker]:
+        for worker in reversed(self.idle):
+            if worker.deno_path == deno_path and worker.flags == flags:
+                self.idle.remove(worker)
+                return worker
+        return None
+
+    def _replace(self, worker: Deno__Worker):                                     # Start a replacement with worker's registered functions in the background (caller holds the lock)
+        replacement = Deno__Worker(deno_path=worker.deno_path, flags=list(worker.flags))
+        self.workers.append(replacement)                                          # holds a slot while warming (one over max_workers while the old one serves)
+        self.warming += 1
+        self.started += 1
+        threading.Thread(target=self._warm, args=(worker, replacement), daemon=True).start()
+
+    def _warm(self, worker      : Deno__Worker,
+                    replacement : Deno__Worker):
+        try:
+            replacement.start()
+            with self.condition:
+                functions = [(name, code) for name, code in worker.functions.items() if self.registered.get(name) == code]
+            for name, code in functions:                                          # recompiled now, so no request pays for it (one-off code is left behind)
+                replacement.define(name, code, DENO_WORKER_POOL__WARM_TIMEOUT_S)
+        except Exception:
+            replacement.stop()
+        with self.condition:
+            self.warming -= 1
+            if replacement.is_alive():
+                self.idle.append(replacement)
+            elif replacement in self.workers:
+                self.workers.remove(replacement)
+            if worker.recycle_reason and worker in self.workers:
+                worker.replaced = True
+                if worker in self.idle:                                           # idle: retire it now, busy: release() does
+                    self.idle.remove(worker)
+                    self._retire(worker, worker.recycle_reason)
+            self.condition.notify_all()
+
+    def _retire(self, worker : Deno__Worker,                                      # caller holds the lock
+                      reason : Optional[str] = None):
+        worker.stop()
+        if worker in self.workers:
+            self.workers.remove(worker)
+            self.retired += 1
+            if reason:
+                self.recycles[reason] = self.recycles.get(reason, 0) + 1
+
+
+deno_worker_pool = Deno__Worker__Pool()                                           # shared by every executor, so warm workers serve any request
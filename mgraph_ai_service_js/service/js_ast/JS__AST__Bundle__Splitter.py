@@ -0,0 +1,291 @@
+import re
+from bisect                                                                 import bisect_right
+from typing                                                                 import Any, Dict, List, Optional
+from osbot_utils.type_safe.Type_Safe                                        import Type_Safe
+
+BUNDLE__FORMAT__WEBPACK  = 'webpack'
+BUNDLE__FORMAT__ESBUILD  = 'esbuild'
+BUNDLE__TEMPLATE_MARKER  = -1                                                        # bracket stack entry for an open ${ ... } template expression
+BUNDLE__BRACKETS         = {')': '(', ']': '[', '}': '{'}
+BUNDLE__REGEX_KEYWORDS   = frozenset(('return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void',
+                                      'throw', 'case', 'do', 'else', 'yield', 'await'))
+
+REGEX__SCAN__TOKEN          = re.compile(r'''[(){}\[\]]|"(?:[^"\\\n\r]|\\[\s\S])*"|'(?:[^'\\\n\r]|\\[\s\S])*'|[`/"']''')          # bracket, whole string, or a char that needs a closer look
+REGEX__SCAN__TEMPLATE_CHARS = re.compile(r'(?:[^`\\$]|\\[\s\S]|\$(?!\{))*')
+REGEX__SCAN__REGEX_LITERAL  = re.compile(r'/(?:[^/\\\[\n\r]|\\.|\[(?:[^\]\\\n\r]|\\.)*\])+/[A-Za-z]*')
+REGEX__SCAN__SKIP           = re.compile(r'(?:\s+|//[^\n]*|/\*[\s\S]*?\*/)*')
+REGEX__SCAN__LINE_BREAK     = re.compile(r'\r\n?|[\n\u2028\u2029]')
+REGEX__SCAN__LINE_BREAK_SPLIT = re.compile(r'(\r\n?|[\n\u2028\u2029])')
+REGEX__SCAN__ASTRAL         = re.compile('[\U00010000-\U0010FFFF]')                   # two UTF-16 code units each in JavaScript offsets
+
+REGEX__ENTRY__KEY           = re.compile(r'"(?:[^"\\\n\r]|\\.)*"|\'(?:[^\'\\\n\r]|\\.)*\'|\d[\w.]*|[A-Za-z_$][\w$]*')
+REGEX__ENTRY__FUNCTION      = re.compile(r'(?:async\s+)?function\b\s*\*?\s*[\w$]*\s*(\()')
+REGEX__ENTRY__ARROW_PARAM   = re.compile(r'(?:async\s+)?[A-Za-z_$][\w$]*\s*=>\s*(\{)')
+REGEX__ENTRY__ASYNC_ARROW   = re.compile(r'async\s*(\()')
+
+REGEX__BUNDLE__CONTAINERS   = [(BUNDLE__FORMAT__WEBPACK, 2, re.compile(r'__webpack_modules__\s*=\s*\(?\s*([\[{])')),         # webpack 5 runtime
+                               (BUNDLE__FORMAT__WEBPACK, 2, re.compile(r'\.push\(\s*\[\s*\[[^\[\]]*\]\s*,\s*([\[{])')),      # webpack chunk files
+                               (BUNDLE__FORMAT__WEBPACK, 2, re.compile(r'\}\s*\)?\s*\(\s*([\[{])')),                         # webpack 4 bootstrap(modules)
+                               (BUNDLE__FORMAT__ESBUILD, 1, re.compile(r'\b__(?:commonJS|esm)\(\s*(\{)'))]                   # esbuild lazy module wrappers
+
+
+class JS__AST__Bundle__Split(Type_Safe):                                             # A bundle cut into module sources plus the surrounding runtime
+    bundle_format : Optional[str]                                                    # webpack | esbuild, None when no module map was found
+    modules       : list                                                             # {id, start, end, is_method, offset, end_offset, line, column, end_line, end_column}
+    skeleton      : str                                                              # the bundle with every module replaced by a same-length placeholder
+
+
+class JS__AST__Bundle__Splitter(Type_Safe):                                          # Finds webpack/esbuild module wrappers without parsing the whole bundle
+
+    def split(self, code: str) -> JS__AST__Bundle__Split:                            # Module sources of a bundle (no modules when the format is not recognised)
+        try:
+            pairs = self.bracket_pairs(code)
+        except ValueError:
+            return JS__AST__Bundle__Split(skeleton=code)
+        bundle_format, modules = self.find_modules(code, pairs)
+        if not modules:
+            return JS__AST__Bundle__Split(skeleton=code)
+        self._set_positions(code, modules)
+        return JS__AST__Bundle__Split(bundle_format = bundle_format                  ,
+                                      modules       = modules                        ,
+                                      skeleton      = self.skeleton(code, modules))
+
+    def module_source(self, code  : str,                                             # Module source wrapped so it parses as one expression statement
+                            module: Dict[str, Any]
+                      ) -> str:
+        text = code[module['start']:module['end']]
+        return '({' + text + '})' if module['is_method'] else '(' + text + ')'
+
+    def module_prefix(self, module: Dict[str, Any]) -> int:                         # characters module_source adds before the module text
+        return 2 if module['is_method'] else 1
+
+    def bracket_pairs(self, code: str) -> Dict[int, int]:                            # open -> close index of every (, [ and { outside strings, comments and regexes
+        pairs    = {}
+        stack    = []
+        push     = stack.append
+        pop      = stack.pop
+        index    = 0
+        finditer = REGEX__SCAN__TOKEN.finditer
+        while index is not None:                                                     # strings are consumed by the regex, the rest restarts the scan
+            resume = None
+            for match in finditer(code, index):
+                start = match.start()
+                char  = code[start]
+                if char in '([{':
+                    push(start)
+                elif char in ')]}':
+                    if not stack:
+                        raise ValueError(f"unbalanced '{char}' at {start}")
+                    open_index = pop()
+                    if open_index == BUNDLE__TEMPLATE_MARKER:                         # end of a ${ ... } expression, back into template text
+                        if char != '}':
+                            raise ValueError(f"unbalanced '{char}' at {start}")
+                        resume = self._skip_template(code, start + 1, stack)
+                        break
+                    if code[open_index] != BUNDLE__BRACKETS[char]:
+                        raise ValueError(f"unbalanced '{char}' at {start}")
+                    pairs[open_index] = start
+                elif char == '`':
+                    resume = self._skip_template(code, start + 1, stack)
+                    break
+                elif char == '/':
+                    resume = self._skip_slash(code, start)
+                    break
+                elif match.end() == start + 1:
+                    raise ValueError(f"unterminated string at {start}")
+            index = resume
+        if stack:
+            raise ValueError("unclosed brackets")
+        return pairs
+
+    def find_modules(self, code  : str,                                              # (format, modules) of the module maps in a bundle
+                           pairs : Dict[int, int]
+                     ):
+        candidates = []
+        for bundle_format, min_entries, regex in REGEX__BUNDLE__CONTAINERS:
+            for match in regex.finditer(code):
+                candidates.append((match.start(1), bundle_format, min_entries))
+        candidates.sort()
+
+        modules, formats, covered_until = [], [], -1
+        for open_index, bundle_format, min_entries in candidates:
+            if open_index <= covered_until or open_index not in pairs:               # nested in a module already taken, or inside a string/comment
+                continue
+            entries = self._container_entries(code, pairs, open_index)
+            if entries is None or len(entries) < min_entries:
+                continue
+            modules.extend(entries)
+            formats.append(bundle_format)
+            covered_until = pairs[open_index]
+        bundle_format = max(set(formats), key=formats.count) if formats else None
+        return bundle_format, modules
+
+    def skeleton(self, code   : str,                                                 # Bundle with modules swapped for placeholders that keep every offset and line
+                       modules: List[Dict[str, Any]]
+                 ) -> str:
+        parts, index = [], 0
+        for module in modules:
+            filler = self._filler(code[module['start']:module['end']])
+            head   = '_:0' if module['is_method'] else '0'                           # a property or a numeric literal in the skeleton
+            parts.append(code[index:module['start']])
+            parts.append(head + filler[len(head):])
+            index = module['end']
+        parts.append(code[index:])
+        return ''.join(parts)
+
+    def _filler(self, text: str) -> str:                                             # Spaces of the same UTF-16 length as text, keeping its line breaks
+        parts = REGEX__SCAN__LINE_BREAK_SPLIT.split(text)
+        for index in range(0, len(parts), 2):
+            part         = parts[index]
+            length       = len(part) if part.isascii() else len(part) + len(REGEX__SCAN__ASTRAL.findall(part))
+            parts[index] = ' ' * length
+        return ''.join(parts)
+
+    def _container_entries(self, code       : str,                                   # Modules of an object/array literal, None unless every entry is a function
+                                 pairs      : Dict[int, int],
+                                 open_index : int
+                           ) -> Optional[List[Dict[str, Any]]]:
+        close    = pairs[open_index]
+        is_array = code[open_index] == '['
+        skip     = REGEX__SCAN__SKIP.match
+        index    = skip(code, open_index + 1).end()
+        entries  = []
+        position = 0
+        while index < close:
+            if is_array:
+                if code[index] == ',':                                               # hole in a webpack 4 module array
+                    position += 1
+                    index     = skip(code, index + 1).end()
+                    continue
+                module_id, is_method, start = str(position), False, index
+            else:
+                key = REGEX__ENTRY__KEY.match(code, index)
+                if key is None:
+                    return None
+                module_id = key.group(0).strip('\'"')
+                index     = skip(code, key.end()).end()
+                if code[index] == ':':
+                    is_method, start = False, skip(code, index + 1).end()
+                elif code[index] == '(':
+                    is_method, start = True, key.start()
+                else:
+                    return None
+            end = self._method_end(code, pairs, index) if is_method else self._function_end(code, pairs, start)
+            if end is None or end > close:
+                return None
+            head = code[start:start + (3 if is_method else 1)]
+            if REGEX__SCAN__LINE_BREAK.search(head):                                 # no room for the placeholder on the first line
+                return None
+            entries.append({'id': module_id, 'start': start, 'end': end, 'is_method': is_method})
+            index = skip(code, end).end()
+            if code[index] == ',':
+                index = skip(code, index + 1).end()
+            elif index != close:
+                return None
+            position += 1
+        return entries
+
+    def _function_end(self, code  : str,                                             # End of a function expression starting at index (None if it is not one)
+                            pairs : Dict[int, int],
+                            index : int
+                      ) -> Optional[int]:
+        skip     = REGEX__SCAN__SKIP.match
+        function = REGEX__ENTRY__FUNCTION.match(code, index)
+        if function:
+            params_close = pairs.get(function.start(1))
+            if params_close is None:
+                return None
+            return self._block_end(code, pairs, skip(code, params_close + 1).end())
+        arrow = REGEX__ENTRY__ARROW_PARAM.match(code, index)
+        if arrow:
+            return self._block_end(code, pairs, arrow.start(1))
+        async_arrow = REGEX__ENTRY__ASYNC_ARROW.match(code, index)
+        paren       = async_arrow.start(1) if async_arrow else index
+        if code[paren:paren + 1] != '(' or paren not in pairs:
+            return None
+        paren_close = pairs[paren]
+        after       = skip(code, paren_close + 1).end()
+        if code.startswith('=>', after):                                             # (module, exports) => { ... }
+            return self._block_end(code, pairs, skip(code, after + 2).end())
+        if async_arrow:
+            return None
+        inner     = skip(code, paren + 1).end()                                      # ((module) => { ... }) / (function () { ... })
+        inner_end = self._function_end(code, pairs, inner)
+        if inner_end is None or skip(code, inner_end).end() != paren_close:
+            return None
+        return paren_close + 1
+
+    def _method_end(self, code  : str,                                               # End of a "key"(params) { ... } method entry, index at its (
+                          pairs : Dict[int, int],
+                          index : int
+                    ) -> Optional[int]:
+        params_close = pairs.get(index)
+        if params_close is None:
+            return None
+        return self._block_end(code, pairs, REGEX__SCAN__SKIP.match(code, params_close + 1).end())
+
+    def _block_end(self, code: str, pairs: Dict[int, int], index: int) -> Optional[int]:
+        if code[index:index + 1] != '{' or index not in pairs:
+            return None
+        return pairs[index] + 1
+
+    def _skip_template(self, code  : str,                                            # Skip template text, pushing a marker when a ${ expression opens
+                             index : int,
+                             stack : list
+                       ) -> int:
+        end = REGEX__SCAN__TEMPLATE_CHARS.match(code, index).end()
+        if end >= len(code):
+            raise ValueError(f"unterminated template at {index}")
+        if code[end] == '`':
+            return end + 1
+        stack.append(BUNDLE__TEMPLATE_MARKER)
+        return end + 2
+
+    def _skip_slash(self, code: str, index: int) -> int:                             # Skip a comment or regex literal, or step over a division
+        next_char = code[index + 1:index + 2]
+        if next_char == '/':
+            end = code.find('\n', index)
+            return len(code) if end == -1 else end
+        if next_char == '*':
+            end = code.find('*/', index + 2)
+            if end == -1:
+                raise ValueError(f"unterminated comment at {index}")
+            return end + 2
+        if self._regex_allowed(code, index):
+            regex = REGEX__SCAN__REGEX_LITERAL.match(code, index)
+            if regex:
+                return regex.end()
+        return index + 1
+
+    def _regex_allowed(self, code: str, index: int) -> bool:                         # Can a / at index start a regex literal (rather than divide)?
+        previous = index - 1
+        while previous >= 0 and code[previous] in ' \t\r\n':
+            previous -= 1
+        if previous < 0:
+            return True
+        char = code[previous]
+        if char in ')]':
+            return False
+        if char.isalnum() or char in '_$':
+            word_start = previous
+            while word_start > 0 and (code[word_start - 1].isalnum() or code[word_start - 1] in '_$'):
+                word_start -= 1
+            return code[word_start:previous + 1] in BUNDLE__REGEX_KEYWORDS
+        return True                                                                  # operators, punctuation and } (block ends are the common case)
+
+    def _set_positions(self, code: str, modules: List[Dict[str, Any]]):             # Fill in JavaScript offsets, lines and columns for each module start
+        line_starts = [0] + [match.end() for match in REGEX__SCAN__LINE_BREAK.finditer(code)]
+        astrals     = [match.start() for match in REGEX__SCAN__ASTRAL.finditer(code)]
+
+        def utf16(index):
+            return index + bisect_right(astrals, index - 1) if astrals else index
+
+        for module in modules:
+            line                 = bisect_right(line_starts, module['start'])
+            end_line             = bisect_right(line_starts, module['end'  ])
+            module['offset'    ] = utf16(module['start'])
+            module['end_offset'] = utf16(module['end'  ])
+            module['line'      ] = line
+            module['column'    ] = module['offset'    ] - utf16(line_starts[line     - 1])
+            module['end_line'  ] = end_line
+            module['end_column'] = module['end_offset'] - utf16(line_starts[end_line - 1])
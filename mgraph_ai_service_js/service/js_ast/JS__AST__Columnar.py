@@ -0,0 +1,279 @@
+import copy
+from array                                                                  import array
+from collections                                                            import Counter
+from typing                                                                 import Any, Dict, List, Optional
+from osbot_utils.type_safe.Type_Safe                                        import Type_Safe
+
+COLUMNAR__TYPECODE    = 'i'                                                          # 32-bit signed columns, -1 means "none"
+COLUMNAR__NONE        = -1
+COLUMNAR__MAX_OFFSET  = 2 ** 31 - 1
+
+KIND__ATTR  = 0                                                                      # value kept in the values pool
+KIND__NODE  = 1                                                                      # single child node
+KIND__LIST  = 2                                                                      # list of child nodes (None items become holes)
+KIND__TYPE  = 3                                                                      # rebuilt from type_ids
+KIND__START = 4                                                                      # rebuilt from starts
+KIND__END   = 5                                                                      # rebuilt from ends
+KIND__RANGE = 6                                                                      # rebuilt as [start, end]
+KIND__LOC   = 7                                                                      # rebuilt from the four loc columns
+
+
+class JS__AST__Columnar(Type_Safe):                                                  # ESTree flattened into parallel arrays, one row per node in pre-order
+    strings        : list                                                            # interned node types and keys
+    shapes         : list                                                            # interned ((key_id, kind), ...) per distinct key layout
+    values         : list                                                            # interned attribute values (names, operators, literals, ...)
+    type_ids       : array = None                                                    # index into strings, -1 for a hole in a node list
+    parents        : array = None
+    first_children : array = None
+    next_siblings  : array = None
+    key_ids        : array = None                                                    # key under which the node sits in its parent
+    list_indexes   : array = None                                                    # position in the parent's list, -1 when not in a list
+    subtree_ends   : array = None                                                    # descendants of i are rows i+1 .. subtree_ends[i]-1
+    depths         : array = None
+    starts         : array = None
+    ends           : array = None
+    loc_start_lines: array = None
+    loc_start_cols : array = None
+    loc_end_lines  : array = None
+    loc_end_cols   : array = None
+    shape_ids      : array = None
+    attr_offsets   : array = None                                                    # first entry in attr_values for the node
+    attr_values    : array = None                                                    # index into values, in shape order
+
+    def load_estree(self, ast: Dict[str, Any]                                        # Flatten an ESTree dict (iteratively, so depth is not limited)
+                    ) -> 'JS__AST__Columnar':
+        if not self._is_node(ast):
+            raise ValueError("ESTree root must be a dict with a string 'type'")
+
+        strings, string_ids = [], {}
+        shapes , shape_ids  = [], {}
+        values , value_ids  = [], {}
+
+        def string_id(text):
+            text_id = string_ids.get(text)
+            if text_id is None:
+                text_id = string_ids[text] = len(strings)
+                strings.append(text)
+            return text_id
+
+        def value_id(value):
+            key = (type(value), value) if isinstance(value, (str, int, float, bool, type(None))) else None
+            if key is not None:
+                existing = value_ids.get(key)
+                if existing is not None:
+                    return existing
+                value_ids[key] = len(values)
+            values.append(value)
+            return len(values) - 1
+
+        columns = [array(COLUMNAR__TYPECODE) for _ in range(18)]
+        (type_ids, parents, first_children, next_siblings, key_ids, list_indexes, subtree_ends, depths, starts, ends,
+         loc_start_lines, loc_start_cols, loc_end_lines, loc_end_cols, node_shape_ids, attr_offsets, attr_values, last_children) = columns
+
+        stack = [(ast, COLUMNAR__NONE, COLUMNAR__NONE, COLUMNAR__NONE, 0)]
+        while stack:
+            node, parent, key_id, list_index, depth = stack.pop()
+            index = len(type_ids)
+            parents      .append(parent    )
+            key_ids      .append(key_id    )
+            list_indexes .append(list_index)
+            depths       .append(depth     )
+            first_children.append(COLUMNAR__NONE)
+            next_siblings .append(COLUMNAR__NONE)
+            last_children .append(COLUMNAR__NONE)
+            subtree_ends  .append(index + 1)
+            attr_offsets  .append(len(attr_values))
+            if parent != COLUMNAR__NONE:
+                if first_children[parent] == COLUMNAR__NONE:
+                    first_children[parent] = index
+                else:
+                    next_siblings[last_children[parent]] = index
+                last_children[parent] = index
+
+            if node is None:                                                         # hole, e.g. [ , x] or a null list entry
+                for column in (type_ids, starts, ends, loc_start_lines, loc_start_cols, loc_end_lines, loc_end_cols, node_shape_ids):
+                    column.append(COLUMNAR__NONE)
+                continue
+
+            start    = node.get('start')
+            end      = node.get('end'  )
+            start    = start if type(start) is int and 0 <= start <= COLUMNAR__MAX_OFFSET else None
+            end      = end   if type(end  ) is int and 0 <= end   <= COLUMNAR__MAX_OFFSET else None
+            loc_cols = self._loc_columns(node.get('loc'))
+            type_id  = string_ids.get(node['type'])
+            type_ids.append(string_id(node['type']) if type_id is None else type_id)
+            starts  .append(COLUMNAR__NONE if start is None else start)
+            ends    .append(COLUMNAR__NONE if end   is None else end  )
+            if loc_cols is None:
+                loc_cols = (COLUMNAR__NONE,) * 4
+            loc_start_lines.append(loc_cols[0])
+            loc_start_cols .append(loc_cols[1])
+            loc_end_lines  .append(loc_cols[2])
+            loc_end_cols   .append(loc_cols[3])
+
+            shape    = []
+            children = []
+            for key, value in node.items():
+                field_id   = string_ids.get(key)
+                if field_id is None:
+                    field_id = string_id(key)
+                value_type = type(value)
+                if   key == 'type'                                          : kind = KIND__TYPE
+                elif key == 'start' and start is not None                   : kind = KIND__START
+                elif key == 'end'   and end   is not None                   : kind = KIND__END
+                elif key == 'range' and value_type is list and start is not None and end is not None and \
+                     len(value) == 2 and value[0] == start and value[1] == end and type(value[0]) is int and type(value[1]) is int:
+                    kind = KIND__RANGE
+                elif key == 'loc'   and loc_cols[0] != COLUMNAR__NONE           : kind = KIND__LOC
+                elif value_type is dict and type(value.get('type')) is str:
+                    kind = KIND__NODE
+                    children.append((value, field_id, COLUMNAR__NONE))
+                elif value_type is list and self._is_node_list(value):
+                    kind = KIND__LIST
+                    children.extend((item, field_id, item_index) for item_index, item in enumerate(value))
+                else:
+                    kind = KIND__ATTR
+                    attr_values.append(value_id(value))
+                shape.append((field_id, kind))
+
+            shape = tuple(shape)
+            shape_id = shape_ids.get(shape)
+            if shape_id is None:
+                shape_id = shape_ids[shape] = len(shapes)
+                shapes.append(shape)
+            node_shape_ids.append(shape_id)
+
+            for child, child_key, child_index in reversed(children):                 # reversed so rows come out in source order
+                stack.append((child, index, child_key, child_index, depth + 1))
+
+        attr_offsets.append(len(attr_values))                                        # sentinel, so node i's attrs end at attr_offsets[i+1]
+        for index in range(len(type_ids) - 1, 0, -1):                                # children come after parents, so walk backwards
+            parent = parents[index]
+            if subtree_ends[index] > subtree_ends[parent]:
+                subtree_ends[parent] = subtree_ends[index]
+
+        self.strings         = strings
+        self.shapes          = shapes
+        self.values          = values
+        self.type_ids        = type_ids
+        self.parents         = parents
+        self.first_children  = first_children
+        self.next_siblings   = next_siblings
+        self.key_ids         = key_ids
+        self.list_indexes    = list_indexes
+        self.subtree_ends    = subtree_ends
+        self.depths          = depths
+        self.starts          = starts
+        self.ends            = ends
+        self.loc_start_lines = loc_start_lines
+        self.loc_start_cols  = loc_start_cols
+        self.loc_end_lines   = loc_end_lines
+        self.loc_end_cols    = loc_end_cols
+        self.shape_ids       = node_shape_ids
+        self.attr_offsets    = attr_offsets
+        self.attr_values     = attr_values
+        return self
+
+    def to_estree(self, index: int = 0                                               # Rebuild the ESTree dict rooted at a row (lossless, key order included)
+                  ) -> Optional[Dict[str, Any]]:
+        strings, values, type_ids = self.strings, self.values, self.type_ids
+        built = []
+        for row in range(index, self.subtree_ends[index]):
+            type_id = type_ids[row]
+            if type_id == COLUMNAR__NONE:
+                node = None
+            else:
+                node        = {}
+                attr_offset = self.attr_offsets[row]
+                for key_id, kind in self.shapes[self.shape_ids[row]]:
+                    key = strings[key_id]
+                    if   kind == KIND__ATTR :
+                        value        = values[self.attr_values[attr_offset]]
+                        attr_offset += 1
+                        node[key]    = copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+                    elif kind == KIND__TYPE : node[key] = strings[type_id]
+                    elif kind == KIND__START: node[key] = self.starts[row]
+                    elif kind == KIND__END  : node[key] = self.ends  [row]
+                    elif kind == KIND__RANGE: node[key] = [self.starts[row], self.ends[row]]
+                    elif kind == KIND__LOC  : node[key] = {'start': {'line': self.loc_start_lines[row], 'column': self.loc_start_cols[row]},
+                                                           'end'  : {'line': self.loc_end_lines  [row], 'column': self.loc_end_cols  [row]}}
+                    elif kind == KIND__NODE : node[key] = None                       # filled in when the child row is reached
+                    elif kind == KIND__LIST : node[key] = []
+            built.append(node)
+            if row != index:
+                parent_node = built[self.parents[row] - index]
+                key         = strings[self.key_ids[row]]
+                if self.list_indexes[row] == COLUMNAR__NONE:
+                    parent_node[key] = node
+                else:
+                    parent_node[key].append(node)
+        return built[0]
+
+    def node_count(self) -> int:
+        return len(self.type_ids) if self.type_ids is not None else 0
+
+    def node_type(self, index: int) -> Optional[str]:                                # None for holes
+        type_id = self.type_ids[index]
+        return None if type_id == COLUMNAR__NONE else self.strings[type_id]
+
+    def type_id(self, node_type: str) -> int:                                        # -1 when the type does not occur in the tree
+        try:
+            return self.strings.index(node_type)
+        except ValueError:
+            return COLUMNAR__NONE
+
+    def children(self, index: int) -> List[int]:
+        result = []
+        child  = self.first_children[index]
+        while child != COLUMNAR__NONE:
+            result.append(child)
+            child = self.next_siblings[child]
+        return result
+
+    def count_by_type(self) -> Dict[str, int]:
+        counts = Counter(self.type_ids)
+        counts.pop(COLUMNAR__NONE, None)
+        return {self.strings[type_id]: count for type_id, count in counts.most_common()}
+
+    def find_by_type(self, node_type: str) -> List[int]:
+        return self.find_descendants(0, node_type, include_self=True)
+
+    def find_descendants(self, index        : int                                    # Rows under index, optionally of one node type
+                             , node_type    : Optional[str] = None
+                             , include_self : bool          = False
+                         ) -> List[int]:
+        first = index if include_self else index + 1
+        last  = self.subtree_ends[index]
+        if node_type is None:
+            return [row for row in range(first, last) if self.type_ids[row] != COLUMNAR__NONE]
+        type_id = self.type_id(node_type)
+        if type_id == COLUMNAR__NONE:
+            return []
+        type_ids = self.type_ids[first:last]
+        return [first + offset for offset, row_type_id in enumerate(type_ids) if row_type_id == type_id]
+
+    def depth_histogram(self) -> Dict[int, int]:
+        return dict(sorted(Counter(self.depths).items()))
+
+    def _is_node(self, value: Any) -> bool:
+        return type(value) is dict and type(value.get('type')) is str
+
+    def _is_node_list(self, value: Any) -> bool:
+        if type(value) is not list or not value:
+            return False
+        for item in value:
+            if item is not None and (type(item) is not dict or type(item.get('type')) is not str):
+                return False
+        return True
+
+    def _loc_columns(self, loc: Any):                                                # (start line, start col, end line, end col) for a plain meriyah loc
+        if type(loc) is not dict or list(loc) != ['start', 'end']:
+            return None
+        start, end = loc['start'], loc['end']
+        if type(start) is not dict or type(end) is not dict or list(start) != ['line', 'column'] or list(end) != ['line', 'column']:
+            return None
+        columns = (start['line'], start['column'], end['line'], end['column'])
+        for value in columns:
+            if type(value) is not int or not 0 <= value <= COLUMNAR__MAX_OFFSET:
+                return None
+        return columns
@@ -0,0 +1,103 @@
+import hashlib
+import json
+from typing                                                                 import Any, Dict, Optional
+from osbot_utils.type_safe.Type_Safe                                        import Type_Safe
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas           import JS__AST__Compare__Result
+
+AST__COMPARE__IGNORED_KEYS = frozenset({'loc', 'range', 'start', 'end', 'raw', 'leadingComments', 'trailingComments'})
+AST__HASH__DIGEST_SIZE     = 16
+AST__COMPARE__MISSING      = object()                                                # stands in for a key only one tree has
+
+
+def json_pointer(path) -> str:                                                       # Build a JSON pointer from a (parent_path, key) chain
+    keys = []
+    while path:
+        path, key = path
+        keys.append(str(key).replace('~', '~0').replace('/', '~1'))
+    return ''.join('/' + key for key in reversed(keys))
+
+
+class JS__AST__Compare(Type_Safe):                                                   # Structural ESTree comparison, ignoring formatting-only keys
+
+    def compare(self, ast1: Any,                                                     # Walk both trees in lock-step, stopping at the first difference
+                      ast2: Any
+                ) -> JS__AST__Compare__Result:
+        diff_path = self.first_difference(ast1, ast2)
+        return JS__AST__Compare__Result(is_equal  = diff_path is None,
+                                        diff_path = diff_path        )
+
+    def is_equal(self, ast1: Any,                                                    # True when both trees are equal once ignored keys are skipped
+                       ast2: Any
+                 ) -> bool:
+        return self.first_difference(ast1, ast2) is None
+
+    def first_difference(self, ast1: Any,                                            # JSON pointer of the first difference, or None when equal
+                               ast2: Any
+                         ) -> Optional[str]:
+        stack = [(ast1, ast2, None)]
+        while stack:
+            value1, value2, path = stack.pop()
+            if type(value1) is not type(value2):                                     # also keeps True != 1 and 1 != 1.0, as JSON does
+                return json_pointer(path)
+            if isinstance(value1, dict):
+                children = []
+                for key, child1 in value1.items():
+                    if key not in AST__COMPARE__IGNORED_KEYS:                        # a key missing on one side fails the type check once popped
+                        children.append((child1, value2.get(key, AST__COMPARE__MISSING), (path, key)))
+                for key in value2:
+                    if key not in AST__COMPARE__IGNORED_KEYS and key not in value1:
+                        children.append((AST__COMPARE__MISSING, value2[key], (path, key)))
+                        break
+                stack.extend(reversed(children))                                     # pushed in reverse so earlier keys are checked first
+            elif isinstance(value1, list):
+                if len(value1) != len(value2):
+                    return json_pointer(path)
+                for index in range(len(value1) - 1, -1, -1):                         # pushed in reverse so earlier items are checked first
+                    stack.append((value1[index], value2[index], (path, index)))
+            elif value1 != value2:
+                return json_pointer(path)
+        return None
+
+    def merkle_hash(self, ast: Any) -> str:                                          # Hash of the normalised tree, for comparing against cached ASTs
+        return self.merkle_hashes(ast).get(id(ast)) or self._hash_scalar(ast)
+
+    def matches_hash(self, ast       : Any,                                          # Compare a tree against a previously computed merkle hash
+                           ast_hash  : str
+                     ) -> bool:
+        return self.merkle_hash(ast) == ast_hash
+
+    def merkle_hashes(self, ast: Any                                                 # Merkle hash of every dict/list in the tree, keyed by id()
+                      ) -> Dict[int, str]:
+        hashes = {}
+        stack  = [(ast, False)]
+        while stack:
+            value, children_done = stack.pop()
+            if isinstance(value, dict):
+                if children_done:
+                    parts = sorted(f'{key}={self._child_hash(child, hashes)}' for key, child in value.items()
+                                   if key not in AST__COMPARE__IGNORED_KEYS)
+                    hashes[id(value)] = self._digest('{' + ','.join(parts))
+                else:
+                    stack.append((value, True))
+                    stack.extend((child, False) for key, child in value.items()
+                                 if key not in AST__COMPARE__IGNORED_KEYS and isinstance(child, (dict, list)))
+            elif isinstance(value, list):
+                if children_done:
+                    hashes[id(value)] = self._digest('[' + ','.join(self._child_hash(child, hashes) for child in value))
+                else:
+                    stack.append((value, True))
+                    stack.extend((child, False) for child in value if isinstance(child, (dict, list)))
+        return hashes
+
+    def _child_hash(self, value  : Any,
+                          hashes : Dict[int, str]
+                    ) -> str:
+        if isinstance(value, (dict, list)):
+            return hashes[id(value)]
+        return self._hash_scalar(value)
+
+    def _hash_scalar(self, value: Any) -> str:
+        return self._digest(f'{type(value).__name__}:{json.dumps(value)}')
+
+    def _digest(self, text: str) -> str:
+        return hashlib.blake2b(text.encode(), digest_size=AST__HASH__DIGEST_SIZE).hexdigest()
@@ -0,0 +1,267 @@
+from bisect                                                                 import bisect_left
+from typing                                                                 import Any, Dict, List
+from osbot_utils.type_safe.Type_Safe                                        import Type_Safe
+from mgraph_ai_service_js.service.js_ast.JS__AST__Compare                   import JS__AST__Compare, AST__COMPARE__IGNORED_KEYS
+
+AST__DIFF__MIN_HEIGHT = 2                                                            # identical subtrees shorter than this are only matched through their parents
+AST__DIFF__MIN_DICE   = 0.5                                                          # share of matched descendants for two containers to be matched
+
+
+class JS__AST__Diff__Tree(Type_Safe):                                                # One ESTree flattened in pre-order (descendants of i are i+1 .. i+size[i])
+    node     : list
+    path     : list                                                                  # JSON pointer of each node
+    parent   : list                                                                  # index of the parent node, -1 for the root
+    field    : list                                                                  # key holding the node in its parent
+    children : list
+    hash     : list                                                                  # merkle hash of the normalised subtree
+    label    : list                                                                  # the node's own (non-child) attributes, type included
+    height   : list
+    size     : list
+
+
+class JS__AST__Diff(Type_Safe):                                                      # GumTree-style structural diff of two ESTrees, as an edit script
+    ast_compare : JS__AST__Compare
+
+    def diff(self, ast_before : Dict[str, Any],                                      # Edit script turning ast_before into ast_after
+                   ast_after  : Dict[str, Any]
+             ) -> List[Dict[str, Any]]:
+        before, after = self.flatten(ast_before), self.flatten(ast_after)
+        mapping       = self.match(before, after)
+        return self.edit_script(before, after, mapping)
+
+    def flatten(self, ast: Dict[str, Any]) -> JS__AST__Diff__Tree:
+        hashes = self.ast_compare.merkle_hashes(ast)
+        tree   = JS__AST__Diff__Tree()
+        stack  = [(ast, '', -1, None)]
+        while stack:
+            node, path, parent, field = stack.pop()
+            index = len(tree.node)
+            tree.node    .append(node  )
+            tree.path    .append(path  )
+            tree.parent  .append(parent)
+            tree.field   .append(field )
+            tree.children.append([]    )
+            tree.hash    .append(hashes.get(id(node)))
+            tree.label   .append(self.attributes(node))
+            if parent >= 0:
+                tree.children[parent].append(index)
+            pending = []
+            for key, value in node.items():
+                if key in AST__COMPARE__IGNORED_KEYS:
+                    continue
+                if self._is_node(value):
+                    pending.append((value, f'{path}/{key}', index, key))
+                elif type(value) is list:
+                    pending.extend((item, f'{path}/{key}/{position}', index, key)
+                                   for position, item in enumerate(value) if self._is_node(item))
+            stack.extend(reversed(pending))
+        count       = len(tree.node)
+        tree.height = [1] * count
+        tree.size   = [0] * count
+        for index in range(count - 1, 0, -1):                                        # children always come after their parent
+            parent = tree.parent[index]
+            tree.size  [parent] += tree.size[index] + 1
+            tree.height[parent]  = max(tree.height[parent], tree.height[index] + 1)
+        return tree
+
+    def attributes(self, node: Dict[str, Any]) -> Dict[str, Any]:                   # A node's own values: names, operators, literal values, flags
+        return {key: value for key, value in node.items()
+                if key not in AST__COMPARE__IGNORED_KEYS and value is not None
+                and type(value) is not list and not self._is_node(value)}
+
+    def match(self, before : JS__AST__Diff__Tree,                                    # before index -> after index (-1 when unmatched)
+                    after  : JS__AST__Diff__Tree
+              ) -> List[int]:
+        mapping_1 = [-1] * len(before.node)
+        mapping_2 = [-1] * len(after .node)
+        self._match__top_down (before, after, mapping_1, mapping_2)
+        self._match__bottom_up(before, after, mapping_1, mapping_2)
+        return mapping_1
+
+    def edit_script(self, before    : JS__AST__Diff__Tree,                           # delete / update / move / insert, paths in their own tree
+                          after     : JS__AST__Diff__Tree,
+                          mapping_1 : List[int]
+                    ) -> List[Dict[str, Any]]:
+        mapping_2 = [-1] * len(after.node)
+        for index, partner in enumerate(mapping_1):
+            if partner >= 0:
+                mapping_2[partner] = index
+        deletes, updates, moves, inserts = [], [], [], []
+        for index, partner in enumerate(mapping_1):
+            parent = before.parent[index]
+            if partner < 0:
+                if parent < 0 or mapping_1[parent] >= 0:                             # only the top of a deleted subtree
+                    deletes.append({'op': 'delete', 'path': before.path[index], 'type': before.node[index].get('type')})
+                continue
+            changes = self._changes(before.label[index], after.label[partner])
+            if changes:
+                updates.append({'op'      : 'update'                          ,
+                                'path'    : before.path[index]                ,
+                                'new_path': after .path[partner]              ,
+                                'type'    : after .node[partner].get('type')  ,
+                                'changes' : changes                           })
+            if parent >= 0 and (mapping_1[parent] != after.parent[partner] or before.field[index] != after.field[partner]):
+                moves.append(self._move(before, after, index, partner))
+        for index, partner in enumerate(mapping_1):                                  # children kept under the same parent but reordered
+            if partner >= 0:
+                moves.extend(self._move(before, after, child, mapping_1[child]) for child in self._reordered(before, after, index, partner, mapping_1))
+        for index, partner in enumerate(mapping_2):
+            parent = after.parent[index]
+            if partner < 0 and (parent < 0 or mapping_2[parent] >= 0):
+                inserts.append({'op': 'insert', 'new_path': after.path[index], 'type': after.node[index].get('type'), 'node': after.node[index]})
+        return deletes + updates + moves + inserts
+
+    def _match__top_down(self, before    : JS__AST__Diff__Tree,                      # Identical subtrees, tallest first
+                               after     : JS__AST__Diff__Tree,
+                               mapping_1 : List[int],
+                               mapping_2 : List[int]
+                         ):
+        heights_1, heights_2 = self._by_height(before), self._by_height(after)
+        for height in range(max(heights_1, default=0), AST__DIFF__MIN_HEIGHT - 1, -1):
+            by_hash = {}
+            for index in heights_2.get(height, []):
+                if mapping_2[index] < 0:
+                    by_hash.setdefault(after.hash[index], []).append(index)
+            for index in heights_1.get(height, []):
+                candidates = by_hash.get(before.hash[index]) if mapping_1[index] < 0 else None
+                if not candidates:
+                    continue
+                parent_partner = mapping_1[before.parent[index]] if before.parent[index] >= 0 else -1
+                chosen         = next((candidate for candidate in candidates                  # same (already matched) parent first, then document order
+                                       if parent_partner >= 0 and after.parent[candidate] == parent_partner), candidates[0])
+                candidates.remove(chosen)
+                self._match__subtree(before, after, index, chosen, mapping_1, mapping_2)
+
+    def _match__bottom_up(self, before    : JS__AST__Diff__Tree,                     # Containers sharing most of their matched descendants
+                                after     : JS__AST__Diff__Tree,
+                                mapping_1 : List[int],
+                                mapping_2 : List[int]
+                          ):
+        for index in range(len(before.node) - 1, -1, -1):                            # post-order: children before parents
+            if mapping_1[index] >= 0:
+                continue
+            node_type = before.node[index].get('type')
+            if index == 0:
+                if after.node and after.node[0].get('type') == node_type and mapping_2[0] < 0:
+                    self._match__recover(before, after, 0, 0, mapping_1, mapping_2)
+                continue
+            last       = index + before.size[index]
+            candidates = []
+            seen       = set()
+            for descendant in range(index + 1, last + 1):
+                ancestor = after.parent[mapping_1[descendant]] if mapping_1[descendant] >= 0 else -1
+                while ancestor >= 0 and ancestor not in seen:
+                    seen.add(ancestor)
+                    if mapping_2[ancestor] < 0 and after.node[ancestor].get('type') == node_type:
+                        candidates.append(ancestor)
+                    ancestor = after.parent[ancestor]
+            best, best_dice = -1, AST__DIFF__MIN_DICE
+            for candidate in candidates:
+                candidate_last = candidate + after.size[candidate]
+                common         = sum(1 for descendant in range(index + 1, last + 1)
+                                     if candidate < mapping_1[descendant] <= candidate_last)
+                dice           = 2 * common / (before.size[index] + after.size[candidate])
+                if dice >= best_dice:
+                    best, best_dice = candidate, dice
+            if best >= 0:
+                self._match__recover(before, after, index, best, mapping_1, mapping_2)
+
+    def _match__recover(self, before    : JS__AST__Diff__Tree,                       # Match a pair, then their still unmatched children (same hash, else same type and key)
+                              after     : JS__AST__Diff__Tree,
+                              index     : int,
+                              partner   : int,
+                              mapping_1 : List[int],
+                              mapping_2 : List[int]
+                        ):
+        mapping_1[index], mapping_2[partner] = partner, index
+        stack = [(index, partner)]
+        while stack:
+            index, partner = stack.pop()
+            unmatched_2    = [child for child in after.children[partner] if mapping_2[child] < 0]
+            unmatched_1    = [child for child in before.children[index ] if mapping_1[child] < 0]
+            for child in list(unmatched_1):
+                other = next((other for other in unmatched_2 if after.hash[other] == before.hash[child]), -1)
+                if other >= 0:
+                    unmatched_2.remove(other)
+                    unmatched_1.remove(child)
+                    self._match__subtree(before, after, child, other, mapping_1, mapping_2)
+            for child in unmatched_1:
+                child_type = before.node[child].get('type')
+                other      = next((other for other in unmatched_2
+                                   if after.field[other] == before.field[child] and after.node[other].get('type') == child_type), -1)
+                if other >= 0:
+                    unmatched_2.remove(other)
+                    mapping_1[child], mapping_2[other] = other, child
+                    stack.append((child, other))
+
+    def _match__subtree(self, before    : JS__AST__Diff__Tree,                       # Map two identical subtrees node by node
+                              after     : JS__AST__Diff__Tree,
+                              index     : int,
+                              partner   : int,
+                              mapping_1 : List[int],
+                              mapping_2 : List[int]
+                        ):
+        offset = partner - index                                                     # same shape, so pre-order positions line up
+        for position in range(index, index + before.size[index] + 1):
+            mapping_1[position], mapping_2[position + offset] = position + offset, position
+
+    def _by_height(self, tree: JS__AST__Diff__Tree) -> Dict[int, List[int]]:
+        heights = {}
+        for index, height in enumerate(tree.height):
+            heights.setdefault(height, []).append(index)
+        return heights
+
+    def _reordered(self, before    : JS__AST__Diff__Tree,                            # Children that moved within the same list (outside the longest kept order)
+                         after     : JS__AST__Diff__Tree,
+                         index     : int,
+                         partner   : int,
+                         mapping_1 : List[int]
+                   ) -> List[int]:
+        moved = []
+        by_field = {}
+        for child in before.children[index]:
+            other = mapping_1[child]
+            if other >= 0 and after.parent[other] == partner and after.field[other] == before.field[child]:
+                by_field.setdefault(before.field[child], []).append(child)
+        for children in by_field.values():
+            if len(children) > 1:
+                moved.extend(self._outside_longest_order(children, [mapping_1[child] for child in children]))
+        return moved
+
+    def _outside_longest_order(self, items  : List[int],                             # items whose targets are not on the longest increasing run
+                                     targets: List[int]
+                               ) -> List[int]:
+        tails, tail_items, previous = [], [], [-1] * len(items)
+        for position, target in enumerate(targets):
+            slot = bisect_left(tails, target)
+            if slot:
+                previous[position] = tail_items[slot - 1]
+            if slot == len(tails):
+                tails.append(target); tail_items.append(position)
+            else:
+                tails[slot] = target; tail_items[slot] = position
+        kept     = set()
+        position = tail_items[-1] if tail_items else -1
+        while position >= 0:
+            kept.add(position)
+            position = previous[position]
+        return [item for position, item in enumerate(items) if position not in kept]
+
+    def _move(self, before  : JS__AST__Diff__Tree,
+                    after   : JS__AST__Diff__Tree,
+                    index   : int,
+                    partner : int
+              ) -> Dict[str, Any]:
+        return {'op': 'move', 'path': before.path[index], 'new_path': after.path[partner], 'type': after.node[partner].get('type')}
+
+    def _changes(self, attributes_1 : Dict[str, Any],                                # {attribute: [before, after]} for the attributes that differ
+                       attributes_2 : Dict[str, Any]
+                 ) -> Dict[str, List[Any]]:
+        if attributes_1 == attributes_2 and all(type(value) is type(attributes_2[key]) for key, value in attributes_1.items()):
+            return {}
+        return {key: [attributes_1.get(key), attributes_2.get(key)]
+                for key in list(attributes_1) + [key for key in attributes_2 if key not in attributes_1]
+                if attributes_1.get(key) != attributes_2.get(key) or type(attributes_1.get(key)) is not type(attributes_2.get(key))}
+
+    def _is_node(self, value: Any) -> bool:
+        return type(value) is dict and type(value.get('type')) is str
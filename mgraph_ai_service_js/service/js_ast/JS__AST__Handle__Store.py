@@ -0,0 +1,152 @@
+import secrets
+import threading
+import time
+from typing                                                                 import Any, Dict, Optional
+from osbot_utils.type_safe.Type_Safe                                        import Type_Safe
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas           import JS__AST__Parser__Options
+
+HANDLE_STORE__MAX_ENTRIES  = 64                                                      # parsed trees kept at once (least recently used go first)
+HANDLE_STORE__MAX_BYTES    = 16 * 1024 * 1024                                        # summed source length of the kept trees (a tree takes tens of times its source)
+HANDLE_STORE__TTL_SECONDS  = 900                                                     # idle time before a handle expires
+HANDLE_STORE__TOKEN_BYTES  = 16
+
+
+class JS__AST__Handle__Entry(Type_Safe):                                             # One parsed tree kept server side
+    handle      : str
+    ast         : dict
+    code        : str
+    options     : Optional[JS__AST__Parser__Options]
+    created_at  : float
+    accessed_at : float
+    version     : int                                                                # bumped by every update, so a reparse can tell it raced another
+
+
+class JS__AST__Handle__Store(Type_Safe):                                             # Bounded LRU + TTL store of parsed ASTs, addressed by opaque handles
+    max_entries : int   = HANDLE_STORE__MAX_ENTRIES
+    max_bytes   : int   = HANDLE_STORE__MAX_BYTES
+    ttl_seconds : int   = HANDLE_STORE__TTL_SECONDS
+    entries     : dict                                                               # handle -> JS__AST__Handle__Entry, oldest access first
+    size_bytes  : int                                                                # summed source length of the entries
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.lock = threading.Lock()
+
+    def add(self, ast     : Dict[str, Any],                                          # Keep a tree and return its handle
+                  code    : str,
+                  options : Optional[JS__AST__Parser__Options] = None
+            ) -> str:
+        now    = time.time()
+        handle = secrets.token_hex(HANDLE_STORE__TOKEN_BYTES)
+        entry  = JS__AST__Handle__Entry(handle=handle, ast=ast, code=code, options=options, created_at=now, accessed_at=now)
+        with self.lock:
+            self._evict(now)
+            self.entries[handle] = entry
+            self.size_bytes     += len(code)
+            self._enforce(handle)
+        return handle
+
+    def get(self, handle: str                                                        # The entry for a handle (refreshing its LRU position), None when unknown or expired
+            ) -> Optional[JS__AST__Handle__Entry]:
+        now = time.time()
+        with self.lock:
+            self._evict(now)
+            entry = self.entries.pop(handle, None)
+            if entry is None:
+                return None
+            entry.accessed_at     = now
+            self.entries[handle] = entry
+            return entry
+
+    def update(self, handle  : str,                                                  # Swap in a newer tree and source for a handle (False when unknown, or updated since version)
+                     version : int,
+                     ast     : Dict[str, Any],
+                     code    : str
+               ) -> bool:
+        with self.lock:
+            entry = self.entries.get(handle)
+            if entry is None or entry.version != version:
+                return False
+            self.size_bytes     += len(code) - len(entry.code)
+            del self.entries[handle]                                                 # back in as the most recently used
+            self.entries[handle] = JS__AST__Handle__Entry(handle      = handle           ,   # a new entry: holders of the old one keep a consistent tree and source
+                                                          ast         = ast              ,
+                                                          code        = code             ,
+                                                          options     = entry.options    ,
+                                                          created_at  = entry.created_at ,
+                                                          accessed_at = time.time()      ,
+                                                          version     = version + 1      )
+            self._enforce(handle)                                                    # the edit may have grown it past max_bytes
+            return True
+
+    def remove(self, handle: str) -> bool:
+        with self.lock:
+            return self._remove(handle)
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            self._evict(time.time())
+            return {'entries'     : len(self.entries),
+                    'max_entries' : self.max_entries  ,
+                    'size_bytes'  : self.size_bytes   ,
+                    'max_bytes'   : self.max_bytes    ,
+                    'ttl_seconds' : self.ttl_seconds  }
+
+    def _evict(self, now: float):                                                    # Drop expired entries (caller holds the lock)
+        expired_before = now - self.ttl_seconds
+        while self.entries:
+            oldest = next(iter(self.entries.values()))
+            if oldest.accessed_at > expired_before:
+                break
+            self._remove(oldest.handle)
+
+    def _enforce(self, keep: str):                                                   # Drop least recently used entries until under max_entries and max_bytes (caller holds the lock)
+        for handle in list(self.entries):
+            if len(self.entries) <= self.max_entries and self.size_bytes <= self.max_bytes:
+                break
+            if handle != keep:                                                       # never the tree just written, even when it alone is over max_bytes
+                self._remove(handle)
+
+    def _remove(self, handle: str) -> bool:                                          # caller holds the lock
+        entry = self.entries.pop(handle, None)
+        if entry is None:
+            return False
+        self.size_bytes -= len(entry.code)
+        return True
+
+
+def resolve_json_pointer(document: Any, pointer: str) -> Any:                        # RFC 6901 lookup, raises KeyError when the pointer does not resolve
+    if pointer == '':
+        return document
+    if not pointer.startswith('/'):
+        raise KeyError(f"JSON pointer must start with '/': {pointer}")
+    value = document
+    for token in pointer[1:].split('/'):
+        token = token.replace('~1', '/').replace('~0', '~')
+        if isinstance(value, dict) and token in value:
+            value = value[token]
+        elif isinstance(value, list) and token.isdigit() and int(token) < len(value):
+            value = value[int(token)]
+        else:
+            raise KeyError(f"JSON pointer does not resolve: {pointer}")
+    return value
+
+
+def limit_ast_depth(value: Any, max_depth: int, pointer: str = '') -> Any:          # Copy of a subtree with nodes deeper than max_depth replaced by stubs
+    if isinstance(value, dict):
+        if isinstance(value.get('type'), str):
+            if max_depth < 0:
+                stub = {'type': value['type'], 'truncated': True, 'pointer': pointer}
+                for key in ('start', 'end'):
+                    if key in value:
+                        stub[key] = value[key]
+                return stub
+            max_depth -= 1
+        return {key: limit_ast_depth(item, max_depth, f"{pointer}/{key.replace('~', '~0').replace('/', '~1')}")
+                for key, item in value.items()}
+    if isinstance(value, list):
+        return [limit_ast_depth(item, max_depth, f'{pointer}/{index}') for index, item in enumerate(value)]
+    return value
+
+
+js_ast__handle_store = JS__AST__Handle__Store()                                      # shared by every route, so handles work across endpoints
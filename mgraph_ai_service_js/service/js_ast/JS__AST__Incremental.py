@@ -0,0 +1,183 @@
+import re
+from bisect                                                                 import bisect_left
+from typing                                                                 import Any, Dict, List, Optional
+from osbot_utils.type_safe.Type_Safe                                        import Type_Safe
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas           import JS__AST__Text__Edit
+
+REGEX__INCREMENTAL__ASTRAL = re.compile('[\U00010000-\U0010FFFF]')                   # two UTF-16 code units each in JavaScript offsets
+INCREMENTAL__LINE_BREAKS   = ('\n', '\r', '\u2028', '\u2029')
+INCREMENTAL__OFFSET_KEYS   = ('start', 'end')                                        # with 'range' and 'loc', moved by the shift itself, not walked into
+
+
+class JS__AST__Reparse__Plan(Type_Safe):                                             # Which top-level statements an edit re-parses, and how the rest moves
+    code         : str                                                               # source after the edits
+    first_index  : int                                                               # Program.body[first_index .. last_index] is replaced
+    last_index   : int
+    region_start : int                                                               # Python indexes of the re-parsed region in the new source
+    region_end   : int
+    start_offset : int                                                               # region start in AST coordinates (UTF-16 offset, line, column)
+    start_line   : int
+    start_column : int
+    end_offset   : int                                                               # region end in the new source (UTF-16 offset)
+    offset_delta : int                                                               # how far everything after the region moves
+    line_delta   : int
+    column_line  : int                                                               # old line the region ended on, where columns move too
+    column_delta : int
+    closing_type : str                                                               # the untouched statement that ends the region, which must parse the same again
+    closing_size : int
+
+
+class JS__AST__Incremental(Type_Safe):                                               # Text edits applied to a parsed Program, re-parsing only the statements they touch
+
+    def apply_edits(self, code : str,                                                # New source, with edit offsets in UTF-16 code units (as in the AST)
+                          edits: List[JS__AST__Text__Edit]
+                    ) -> str:
+        to_index = self._index_converter(code)
+        previous = 0
+        parts    = []
+        for edit in sorted(edits, key=lambda edit: (int(edit.start), int(edit.end))):
+            start, end = to_index(int(edit.start)), to_index(int(edit.end))
+            if end < start or end > len(code):
+                raise ValueError(f"edit {int(edit.start)}..{int(edit.end)} is outside the source")
+            if start < previous:
+                raise ValueError(f"edit {int(edit.start)}..{int(edit.end)} overlaps a previous edit")
+            parts.append(code[previous:start])
+            parts.append(edit.text)
+            previous = end
+        parts.append(code[previous:])
+        return ''.join(parts)
+
+    def plan(self, ast  : Dict[str, Any],                                            # Region to re-parse, None when only a full parse is safe
+                   code : str,
+                   edits: List[JS__AST__Text__Edit]
+             ) -> Optional[JS__AST__Reparse__Plan]:
+        body = ast.get('body') if type(ast) is dict else None
+        if not body or not edits or not all(type(node.get('start')) is int and type(node.get('end')) is int for node in body):
+            return None
+        new_code   = self.apply_edits(code, edits)
+        edit_start = min(int(edit.start) for edit in edits)
+        edit_end   = max(int(edit.end  ) for edit in edits)
+        last       = len(body) - 1
+        first_hit  = next((index for index, node in enumerate(body) if node['end'] >= edit_start), len(body))
+        last_hit   = next((index for index in range(last, -1, -1) if body[index]['start'] <= edit_end), -1)
+        first      = max(0   , first_hit - 1)                                         # one untouched neighbour each side keeps ASI and
+        last_index = min(last, last_hit  + 1)                                         # statement merging decisions inside the region
+        if first == 0 and any('directive' in node for node in body[:last_index + 1]):
+            return None                                                              # a changed prologue can flip strict mode for the whole file
+
+        to_index         = self._index_converter(code)
+        region_start     = 0         if first      == 0    else to_index(body[first]['start'])
+        old_region_end   = len(code) if last_index == last else to_index(body[last_index]['end'])
+        length_delta     = len(new_code) - len(code)
+        region_end       = old_region_end + length_delta
+        old_region       = code    [region_start:old_region_end]
+        new_region       = new_code[region_start:region_end    ]
+        start_line       = self._line_count(code[:region_start]) + 1
+        start_offset     = self.utf16_length(code[:region_start])
+        return JS__AST__Reparse__Plan(code         = new_code                                                        ,
+                                      first_index  = first                                                           ,
+                                      last_index   = last_index                                                      ,
+                                      region_start = region_start                                                    ,
+                                      region_end   = region_end                                                      ,
+                                      start_offset = start_offset                                                    ,
+                                      start_line   = start_line                                                      ,
+                                      start_column = self._utf16_column(code, region_start)                          ,
+                                      end_offset   = start_offset + self.utf16_length(new_region)                   ,
+                                      offset_delta = self.utf16_length(new_region) - self.utf16_length(old_region) ,
+                                      line_delta   = self._line_count(new_region) - self._line_count(old_region)     ,
+                                      column_line  = start_line + self._line_count(old_region)                       ,
+                                      column_delta = self._utf16_column(new_code, region_end) - self._utf16_column(code, old_region_end),
+                                      closing_type = body[last_index]['type']                                        ,
+                                      closing_size = body[last_index]['end'] - body[last_index]['start']            )
+
+    def region_fits(self, plan   : JS__AST__Reparse__Plan,                          # Can the region's parse replace its statements without touching the rest?
+                          region : Dict[str, Any]
+                    ) -> bool:
+        statements = region.get('body') or []
+        if any('directive' in statement for statement in statements):                # a new prologue can change how the rest of the file parses, and
+            return False                                                             # mid-file, a leading string statement is not a directive at all
+        if plan.region_end == len(plan.code):
+            return True
+        closing = statements[-1] if statements else {}                               # when the closing statement is unchanged, so is how the
+        return (closing.get('type')                    == plan.closing_type and     # statement after the region was told apart from it
+                closing.get('end')                     == plan.end_offset   and
+                closing.get('end', 0) - closing.get('start', 0) == plan.closing_size)
+
+    def apply(self, ast    : Dict[str, Any],                                         # Splice the re-parsed region's statements into a new Program, shifting what follows
+                    plan   : JS__AST__Reparse__Plan,
+                    region : Dict[str, Any]
+              ) -> Dict[str, Any]:
+        body        = ast['body']
+        reaches_end = plan.last_index == len(body) - 1
+        after       = self.shift_positions(body[plan.last_index + 1:], plan)         # ast stays as it was (readers may hold it): statements before the region are shared
+        new_ast     = dict(ast, body=body[:plan.first_index] + (region.get('body') or []) + after)
+        if reaches_end:                                                              # the region's Program already ends where the file does
+            end_source, offset_delta, line_delta = region, 0, 0
+        else:
+            end_source, offset_delta, line_delta = ast, plan.offset_delta, plan.line_delta
+        if type(end_source.get('end')) is int:                                       # the Program starts before the region, so only its end moves
+            new_ast['end'] = end_source['end'] + offset_delta
+        if type(end_source.get('range')) is list and len(end_source['range']) == 2 and type(ast.get('range')) is list:
+            new_ast['range'] = [ast['range'][0], end_source['range'][1] + offset_delta]
+        loc_end = end_source['loc'].get('end') if type(end_source.get('loc')) is dict else None
+        if type(loc_end) is dict and type(loc_end.get('line')) is int and type(ast.get('loc')) is dict:
+            column = loc_end['column'] + (plan.column_delta if not reaches_end and loc_end['line'] == plan.column_line else 0)
+            new_ast['loc'] = dict(ast['loc'], end={'line': loc_end['line'] + line_delta, 'column': column})
+        return new_ast
+
+    def shift_positions(self, nodes : List[Any],                                     # Copies of the nodes after the edited region with their offsets and locations moved
+                              plan  : JS__AST__Reparse__Plan                         # (nodes are left as they were; values without positions are shared)
+                        ) -> List[Any]:
+        offset_delta, line_delta = plan.offset_delta, plan.line_delta
+        column_line , column_delta = plan.column_line, plan.column_delta
+
+        def moved(loc):                                                              # the loc itself when neither of its points moves
+            points = {}
+            for side in ('start', 'end'):
+                point = loc.get(side)
+                if type(point) is dict and type(point.get('line')) is int and (line_delta or point['line'] == column_line):
+                    points[side] = dict(point, line   = point['line'] + line_delta,
+                                               column = point['column'] + (column_delta if point['line'] == column_line else 0))
+            return dict(loc, **points) if points else loc
+
+        shifted = list(nodes)
+        stack   = [(shifted, index) for index, item in enumerate(shifted) if type(item) in (dict, list)]   # (new container, key) of values still to copy in
+        while stack:
+            parent, key = stack.pop()
+            value       = parent[key]
+            if type(value) is list:
+                value = parent[key] = list(value)
+                stack.extend((value, index) for index, item in enumerate(value) if type(item) in (dict, list))
+                continue
+            node = parent[key] = {}
+            for child_key, child in value.items():
+                child_type = type(child)
+                if child_key in INCREMENTAL__OFFSET_KEYS and child_type is int:
+                    child = child + offset_delta
+                elif child_key == 'range' and child_type is list and len(child) == 2:
+                    child = [child[0] + offset_delta, child[1] + offset_delta]
+                elif child_key == 'loc' and child_type is dict:
+                    child = moved(child)
+                elif child_type is dict or child_type is list:
+                    stack.append((node, child_key))
+                node[child_key] = child
+        return shifted
+
+    def _index_converter(self, code: str):                                           # UTF-16 offset -> Python index for this source
+        if code.isascii():
+            return lambda offset: offset
+        astral_offsets = [match.start() + position for position, match in enumerate(REGEX__INCREMENTAL__ASTRAL.finditer(code))]
+        return lambda offset: offset - bisect_left(astral_offsets, offset)
+
+    def utf16_length(self, text: str) -> int:
+        if text.isascii():
+            return len(text)
+        return len(text) + len(REGEX__INCREMENTAL__ASTRAL.findall(text))
+
+    def _utf16_column(self, code: str, index: int) -> int:                           # Column of index, in UTF-16 code units
+        line_start = max(code.rfind(line_break, 0, index) for line_break in INCREMENTAL__LINE_BREAKS) + 1
+        return self.utf16_length(code[line_start:index])
+
+    def _line_count(self, text: str) -> int:                                         # line breaks in text (\r\n counts once)
+        return (text.count('\n') + text.count('\r') - text.count('\r\n') +
+                text.count('\u2028') + text.count('\u2029'))
@@ -0,0 +1,65 @@
+import gzip
+from typing                                                                 import Any, Dict, List
+from osbot_utils.type_safe.Type_Safe                                        import Type_Safe
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas           import JS__AST__Minify__Request
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas           import JS__AST__Transform__Step
+
+MINIFY__GZIP_LEVEL          = 9
+
+JS__AST__COMPACT__SCRIPT    = r"""
+const COMPACT_WORD_END   = /[\p{ID_Continue}$\u200c\u200d]$/u;
+const COMPACT_WORD_START = /^[\p{ID_Continue}$\u200c\u200d\\]/u;                  // an escape such as \u0061 starts an identifier too
+
+function compactSpace(before, after) {                                             // does dropping the space between two tokens change the code?
+    const last = before[before.length - 1], first = after[0];
+    if (COMPACT_WORD_END.test(before) && COMPACT_WORD_START.test(after)) return true;  // return x, a in b, /re/g in c
+    if ((last === '+' || last === '-') && first === last) return true;             // a + +b, a - --b
+    if (last === '/' && (first === '/' || first === '*')) return true;             // a / /re/ would open a comment
+    if (last === '<' && first === '!') return true;                                // <!-- is a comment in scripts
+    return first === '.' && /^\d[\d_]*$/.test(before);                             // 1 .toString()
+}
+
+function compactCode(code, isModule) {                                             // re-tokenize generated code and keep only the spaces tokens need
+    const starts = [], ends = [];
+    try {
+        parseTokens(code, { module: isModule, next: true, globalReturn: !isModule,
+                            onToken: (token, start, end) => { starts.push(start); ends.push(end); } });
+    } catch (error) {
+        return code;                                                               // leave code the tokenizer cannot read as astring wrote it
+    }
+    let compact = '', previous = '', position = 0;
+    for (let i = 0; i < starts.length; i++) {
+        const gap  = code.slice(position, starts[i]);
+        const text = code.slice(starts[i], ends[i]);
+        if (/\S/.test(gap)) { compact += gap; previous = gap; }                    // text not reported as a token (template tails) stays as is
+        else if (previous && compactSpace(previous, text)) compact += ' ';
+        compact  += text;
+        previous  = text;
+        position  = ends[i];
+    }
+    return compact + code.slice(position).trim();
+}
+"""
+
+
+class JS__AST__Minify(Type_Safe):                                                    # Minify = transforms + mangle + compact generation, plus size stats
+
+    def steps(self, request: JS__AST__Minify__Request                                # Requested steps, with mangle last so it sees the final names
+              ) -> List[JS__AST__Transform__Step]:
+        steps = [step for step in request.steps if step.name != 'mangle']
+        if request.mangle:
+            steps.append(JS__AST__Transform__Step(name='mangle'))
+        return steps
+
+    def size_stats(self, source : str,                                               # UTF-8 and gzip byte counts before and after
+                         output : str
+                   ) -> Dict[str, Any]:
+        source_bytes = source.encode('utf-8')
+        output_bytes = output.encode('utf-8')
+        input_gzip   = len(gzip.compress(source_bytes, compresslevel=MINIFY__GZIP_LEVEL, mtime=0))
+        output_gzip  = len(gzip.compress(output_bytes, compresslevel=MINIFY__GZIP_LEVEL, mtime=0))
+        return {'input_bytes'       : len(source_bytes)                                        ,
+                'output_bytes'      : len(output_bytes)                                        ,
+                'input_gzip_bytes'  : input_gzip                                               ,
+                'output_gzip_bytes' : output_gzip                                              ,
+                'ratio'             : round(len(output_bytes) / len(source_bytes), 4) if source_bytes else 1.0}
@@ -1,20 +1,54 @@
 import json
+import queue
+import re
+import threading
 import time
-from typing                                                                 import Optional, Dict, Any
+from typing                                                                 import Optional, Dict, Any, List, Iterator
 from osbot_utils.type_safe.Type_Safe                                        import Type_Safe
 from osbot_utils.type_safe.primitives.safe_uint.Safe_UInt                   import Safe_UInt
 from mgraph_ai_service_js.service.deno.Deno__JS__Module__Execution          import Deno__JS__Module__Execution
 from mgraph_ai_service_js.service.deno.Deno__JS__Module__Execution          import JS__Module__Execution__Config
 from mgraph_ai_service_js.service.deno.Deno__JS__Module__Execution          import JS__Module__Execution__Request
 from mgraph_ai_service_js.service.deno.Deno__JS__Execution                  import JS__Execution__Permissions
+from mgraph_ai_service_js.service.deno.Deno__JS__Execution                  import JS__Execution__Result
+from mgraph_ai_service_js.schemas.Safe_Str__Javascript__Bundle              import Safe_Str__Javascript__Bundle
+from mgraph_ai_service_js.service.js_ast.JS__AST__Bundle__Splitter          import JS__AST__Bundle__Splitter, JS__AST__Bundle__Split
+from mgraph_ai_service_js.service.js_ast.JS__AST__Compare                   import JS__AST__Compare
+from mgraph_ai_service_js.service.js_ast.JS__AST__Diff                      import JS__AST__Diff
+from mgraph_ai_service_js.service.js_ast.JS__AST__Transforms                import JS__AST__Transforms, JS__AST__TRANSFORMS__SCRIPT
+from mgraph_ai_service_js.service.js_ast.JS__AST__Minify                    import JS__AST__Minify, JS__AST__COMPACT__SCRIPT
+from mgraph_ai_service_js.service.js_ast.JS__AST__Handle__Store             import JS__AST__Handle__Store, js_ast__handle_store
+from mgraph_ai_service_js.service.js_ast.JS__AST__Handle__Store             import resolve_json_pointer, limit_ast_depth
+from mgraph_ai_service_js.service.js_ast.JS__AST__Incremental               import JS__AST__Incremental, JS__AST__Reparse__Plan
 from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas           import JS__AST__Parser__Options
 from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas           import JS__AST__Generator__Options
 from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas           import JS__AST__Parse__Request
 from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas           import JS__AST__Parse__Response
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas           import JS__AST__Tokenize__Response
 from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas           import JS__AST__Generate__Request
 from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas           import JS__AST__Generate__Response
 from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas           import JS__AST__Roundtrip__Request
 from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas           import JS__AST__Roundtrip__Response
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas           import JS__AST__Query__Request
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas           import JS__AST__Query__Response
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas           import JS__AST__Parse__Batch__Request
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas           import JS__AST__Parse__Batch__Item
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas           import JS__AST__Parse__Stream__Request
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas           import JS__AST__Parse__Bundle__Request
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas           import JS__AST__Parse__Bundle__Response
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas           import JS__AST__Graph__Request
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas           import JS__AST__Graph__Response
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas           import JS__AST__Node__Request
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas           import JS__AST__Node__Response
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas           import JS__AST__Outline__Response
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas           import JS__AST__Reparse__Request
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas           import JS__AST__Reparse__Response
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas           import JS__AST__Diff__Request
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas           import JS__AST__Diff__Response
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas           import JS__AST__Transform__Request
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas           import JS__AST__Transform__Response
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas           import JS__AST__Minify__Request
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas           import JS__AST__Minify__Response
 from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas           import JS__AST__Location
 from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas           import Safe_Str__Javascript
 from osbot_utils.type_safe.primitives.safe_str.Safe_Str                     import Safe_Str
@@ -23,13 +57,36 @@ from osbot_utils.type_safe.primitives.safe_int.Safe_Int                     impo
 
 MERIYAH_VERSION = '4.3.9'
 ASTRING_VERSION = '1.8.6'
+ESQUERY_VERSION = '1.6.0'
+SOURCE_MAP_VERSION = '1.2.1'                                                         # source-map-js, synchronous pure-JS encoder
+
+BATCH__MAX_EXECUTION_TIME_MS = 60000
+BATCH__MAX_PROCESSES         = 8
+BUNDLE__RUNTIME_ID           = 'runtime'                                             # batch id of the bundle with its modules swapped for placeholders
+BUNDLE__POSITION_KEYS        = ('start', 'end', 'range')
+REPARSE__REGION_ID           = 'region'
+REGEX__BATCH_LINE_ID         = re.compile(r'^\{"id":("(?:[^"\\]|\\.)*")')
+
+
+
+def safe_error(error: Optional[str]) -> Safe_Str:                                   # Error text for a response, cut to what Safe_Str holds (deno's stderr can be longer)
+    return Safe_Str(str(error or '')[:Safe_Str.max_length])
 
 
 class JS__AST__Roundtrip(Type_Safe):                                                 # JavaScript AST parsing and generation service
     module_executor: Deno__JS__Module__Execution
+    ast_compare    : JS__AST__Compare
+    ast_diff       : JS__AST__Diff
+    ast_transforms : JS__AST__Transforms
+    ast_minify     : JS__AST__Minify
+    bundle_splitter: JS__AST__Bundle__Splitter
+    ast_incremental: JS__AST__Incremental
+    handle_store   : JS__AST__Handle__Store = None                                  # defaults to the process-wide store
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
+        if self.handle_store is None:
+            self.handle_store = js_ast__handle_store
         with self.module_executor as _:
             _.setup()
             _.install()
@@ -42,43 +99,214 @@ class JS__AST__Roundtrip(Type_Safe):
 
         parse_script = self._create_parse_script(request.code, options)
 
-        exec_request = JS__Module__Execution__Request(
-            code   = parse_script,
-            config = self._create_execution_config()
-        )
-
-        result        = self.module_executor.execute_module_js(exec_request)
+        result        = self._execute_script(parse_script)
         parse_time_ms = Safe_Int(int((time.time() - start_time) * 1000))
 
         if result.success:
             try:
                 parsed_result = json.loads(result.output)
                 if parsed_result.get('success'):
+                    ast    = parsed_result.get('ast')
+                    handle = None
+                    if request.return_handle:
+                        handle = self.handle_store.add(ast, str(request.code), options)
+                        ast    = None
                     return JS__AST__Parse__Response(
                         success       = True                         ,
-                        ast           = parsed_result.get('ast')     ,
+                        ast           = ast                          ,
+                        tokens        = parsed_result.get('tokens')  ,
+                        handle        = handle                       ,
                         parse_time_ms = parse_time_ms
                     )
                 else:
                     return JS__AST__Parse__Response(
                         success        = False                             ,
-                        error          = Safe_Str(parsed_result.get('error')),
+                        error          = safe_error(parsed_result.get('error')),
                         error_location = self._parse_error_location(parsed_result.get('location')),
                         parse_time_ms  = parse_time_ms
                     )
             except json.JSONDecodeError as e:
                 return JS__AST__Parse__Response(
                     success       = False                                           ,
-                    error         = Safe_Str(f"Failed to decode parser output: {e}"),
+                    error         = safe_error(f"Failed to decode parser output: {e}"),
                     parse_time_ms = parse_time_ms
                 )
         else:
             return JS__AST__Parse__Response(
                 success       = False                                        ,
-                error         = Safe_Str(result.error or "Parser execution failed"),
+                error         = safe_error(result.error or "Parser execution failed"),
                 parse_time_ms = parse_time_ms
             )
 
+    def tokenize(self, request: JS__AST__Parse__Request                              # Tokens-only parse, skipping AST serialisation
+                 ) -> JS__AST__Tokenize__Response:
+
+        start_time      = time.time()
+        options         = request.options or JS__AST__Parser__Options()
+        tokenize_script = self._create_parse_script(request.code, options, include_ast=False)
+
+        result           = self._execute_script(tokenize_script)
+        tokenize_time_ms = Safe_Int(int((time.time() - start_time) * 1000))
+
+        if not result.success:
+            return JS__AST__Tokenize__Response(success          = False                                              ,
+                                               error            = safe_error(result.error or "Tokenizer execution failed"),
+                                               tokenize_time_ms = tokenize_time_ms                                   )
+        try:
+            parsed_result = json.loads(result.output)
+        except json.JSONDecodeError as e:
+            return JS__AST__Tokenize__Response(success          = False                                              ,
+                                               error            = safe_error(f"Failed to decode tokenizer output: {e}"),
+                                               tokenize_time_ms = tokenize_time_ms                                   )
+        if not parsed_result.get('success'):
+            return JS__AST__Tokenize__Response(success          = False                                                      ,
+                                               error            = safe_error(parsed_result.get('error'))                    ,
+                                               error_location   = self._parse_error_location(parsed_result.get('location')),
+                                               tokenize_time_ms = tokenize_time_ms                                           )
+        tokens = parsed_result.get('tokens')
+        return JS__AST__Tokenize__Response(success          = True                         ,
+                                           tokens           = tokens                       ,
+                                           token_count      = Safe_UInt(len(tokens['type_ids'])),
+                                           tokenize_time_ms = tokenize_time_ms             )
+
+    def fetch_node(self, request: JS__AST__Node__Request                             # Fetch a depth-limited subtree of a stored AST by JSON pointer
+                   ) -> JS__AST__Node__Response:
+        entry = self.handle_store.get(request.handle)
+        if entry is None:
+            return JS__AST__Node__Response(success = False                                        ,
+                                           handle  = request.handle                               ,
+                                           error   = safe_error(f"Unknown or expired handle: {request.handle}"))
+        try:
+            node = resolve_json_pointer(entry.ast, request.pointer)
+        except KeyError as error:
+            return JS__AST__Node__Response(success = False          ,
+                                           handle  = request.handle ,
+                                           pointer = request.pointer,
+                                           error   = safe_error(error.args[0]))
+        return JS__AST__Node__Response(success = True                                                    ,
+                                       handle  = request.handle                                          ,
+                                       pointer = request.pointer                                         ,
+                                       node    = limit_ast_depth(node, int(request.max_depth), request.pointer))
+
+    def reparse(self, request: JS__AST__Reparse__Request                             # Apply text edits to a stored AST, re-parsing only the top-level statements they touch
+                ) -> JS__AST__Reparse__Response:
+        start_time = time.time()
+        entry      = self.handle_store.get(request.handle)
+        if entry is None:
+            return JS__AST__Reparse__Response(success = False                                        ,
+                                              error   = safe_error(f"Unknown or expired handle: {request.handle}"))
+        options    = entry.options or JS__AST__Parser__Options()
+        old_body   = entry.ast.get('body') or []
+        plan       = self.ast_incremental.plan(entry.ast, entry.code, request.edits) if options.ranges else None
+        region     = self._reparse__region(plan, options) if plan else None
+        if region is not None:
+            ast  = self.ast_incremental.apply(entry.ast, plan, region)
+            code = plan.code
+            diff = {'start_index' : plan.first_index                        ,
+                    'delete_count': plan.last_index - plan.first_index + 1  ,
+                    'statements'  : region.get('body') or []                ,
+                    'offset_delta': plan.offset_delta                       ,
+                    'line_delta'  : plan.line_delta                         ,
+                    'start'       : plan.start_offset                       ,
+                    'end'         : plan.end_offset                         }
+        else:                                                                        # no safe region, or the region did not parse on its own
+            code           = plan.code if plan else self.ast_incremental.apply_edits(entry.code, request.edits)
+            parse_response = self.parse_to_ast(JS__AST__Parse__Request(code=Safe_Str__Javascript__Bundle(code), options=options))
+            if not parse_response.success:                                           # the handle keeps the last tree that parsed
+                return JS__AST__Reparse__Response(success         = False                                             ,
+                                                  handle          = request.handle                                    ,
+                                                  full_reparse    = True                                              ,
+                                                  error           = parse_response.error                              ,
+                                                  error_location  = parse_response.error_location                     ,
+                                                  reparse_time_ms = Safe_Int(int((time.time() - start_time) * 1000)) )
+            ast  = parse_response.ast
+            diff = {'start_index' : 0                                         ,
+                    'delete_count': len(old_body)                             ,
+                    'statements'  : ast.get('body') or []                     ,
+                    'offset_delta': 0                                         ,
+                    'line_delta'  : 0                                         ,
+                    'start'       : 0                                         ,
+                    'end'         : self.ast_incremental.utf16_length(code)   }
+        if not self.handle_store.update(request.handle, entry.version, ast, code):   # another reparse got there first: these edits were made against its old source
+            if self.handle_store.get(request.handle) is None:
+                return JS__AST__Reparse__Response(success = False                                        ,
+                                                  error   = safe_error(f"Unknown or expired handle: {request.handle}"))
+            return JS__AST__Reparse__Response(success         = False                                                                          ,
+                                              handle          = request.handle                                                                 ,
+                                              conflict        = True                                                                           ,
+                                              error           = safe_error(f"Handle {request.handle} was updated by another reparse, retry the edits"),
+                                              reparse_time_ms = Safe_Int(int((time.time() - start_time) * 1000))                              )
+        return JS__AST__Reparse__Response(success         = True                                              ,
+                                          handle          = request.handle                                    ,
+                                          ast             = ast  if request.return_ast else None              ,
+                                          diff            = None if request.return_ast else diff              ,
+                                          full_reparse    = region is None                                    ,
+                                          reparse_time_ms = Safe_Int(int((time.time() - start_time) * 1000)) )
+
+    def diff(self, request: JS__AST__Diff__Request                                   # Structural edit script between two versions, both parsed in parallel
+             ) -> JS__AST__Diff__Response:
+        start_time = time.time()
+        options    = request.options or JS__AST__Parser__Options()
+        asts       = {}
+        items      = []
+        for side, code, handle in (('before', request.code_before, request.handle_before),
+                                   ('after' , request.code_after , request.handle_after )):
+            if handle:
+                entry = self.handle_store.get(handle)
+                if entry is None:
+                    return JS__AST__Diff__Response(success      = False                                              ,
+                                                   error        = safe_error(f"Unknown or expired handle: {handle}"),
+                                                   diff_time_ms = Safe_Int(int((time.time() - start_time) * 1000)))
+                asts[side] = entry.ast
+            elif code is not None:
+                items.append(JS__AST__Parse__Batch__Item(id=side, code=code, options=options))
+            else:
+                raise ValueError(f"either code_{side} or handle_{side} is required")
+        if items:
+            for result in self.parse_batch(JS__AST__Parse__Batch__Request(items=items, processes=len(items))):
+                if not result.get('success'):
+                    return JS__AST__Diff__Response(success        = False                                                          ,
+                                                   error          = safe_error(f"{result.get('id')}: {result.get('error')}")      ,
+                                                   error_location = self._parse_error_location(result.get('location'))           ,
+                                                   diff_time_ms   = Safe_Int(int((time.time() - start_time) * 1000))             )
+                asts[result['id']] = result['ast']
+
+        edits = self.ast_diff.diff(asts['before'], asts['after'])
+        return JS__AST__Diff__Response(success      = True                                              ,
+                                       edits        = edits                                             ,
+                                       edit_count   = Safe_UInt(len(edits))                             ,
+                                       diff_time_ms = Safe_Int(int((time.time() - start_time) * 1000)))
+
+    def outline(self, request: JS__AST__Parse__Request                               # Top-level declarations, imports and exports, extracted inside Deno
+                ) -> JS__AST__Outline__Response:
+        start_time     = time.time()
+        options        = request.options or JS__AST__Parser__Options()
+        outline_script = self._create_outline_script(request.code, options)
+
+        result          = self._execute_script(outline_script)
+        outline_time_ms = Safe_Int(int((time.time() - start_time) * 1000))
+
+        if not result.success:
+            return JS__AST__Outline__Response(success         = False                                           ,
+                                              error           = safe_error(result.error or "Outline execution failed"),
+                                              outline_time_ms = outline_time_ms                                 )
+        try:
+            parsed_result = json.loads(result.output)
+        except json.JSONDecodeError as e:
+            return JS__AST__Outline__Response(success         = False                                           ,
+                                              error           = safe_error(f"Failed to decode outline output: {e}"),
+                                              outline_time_ms = outline_time_ms                                 )
+        if not parsed_result.get('success'):
+            return JS__AST__Outline__Response(success         = False                                                      ,
+                                              error           = safe_error(parsed_result.get('error'))                    ,
+                                              error_location  = self._parse_error_location(parsed_result.get('location')),
+                                              outline_time_ms = outline_time_ms                                            )
+        return JS__AST__Outline__Response(success         = True                          ,
+                                          imports         = parsed_result['imports'     ] ,
+                                          exports         = parsed_result['exports'     ] ,
+                                          declarations    = parsed_result['declarations'] ,
+                                          outline_time_ms = outline_time_ms               )
+
     def generate_from_ast(self, request: JS__AST__Generate__Request                  # Generate JavaScript from AST
                           ) -> JS__AST__Generate__Response:
 
@@ -87,12 +315,7 @@ class JS__AST__Roundtrip(Type_Safe):
 
         generate_script = self._create_generate_script(request.ast, options)
 
-        exec_request = JS__Module__Execution__Request(
-            code   = generate_script,
-            config = self._create_execution_config()
-        )
-
-        result             = self.module_executor.execute_module_js(exec_request)
+        result             = self._execute_script(generate_script)
         generation_time_ms = Safe_Int(int((time.time() - start_time) * 1000))
 
         if result.success:
@@ -102,27 +325,86 @@ class JS__AST__Roundtrip(Type_Safe):
                     return JS__AST__Generate__Response(
                         success            = True                                             ,
                         code               = Safe_Str__Javascript(generated_result.get('code')),
+                        source_map         = generated_result.get('source_map')        ,
                         generation_time_ms = generation_time_ms
                     )
                 else:
                     return JS__AST__Generate__Response(
                         success            = False                               ,
-                        error              = Safe_Str(generated_result.get('error')),
+                        error              = safe_error(generated_result.get('error')),
                         generation_time_ms = generation_time_ms
                     )
             except json.JSONDecodeError as e:
                 return JS__AST__Generate__Response(
                     success            = False                                            ,
-                    error              = Safe_Str(f"Failed to decode generator output: {e}"),
+                    error              = safe_error(f"Failed to decode generator output: {e}"),
                     generation_time_ms = generation_time_ms
                 )
         else:
             return JS__AST__Generate__Response(
                 success            = False                                          ,
-                error              = Safe_Str(result.error or "Generator execution failed"),
+                error              = safe_error(result.error or "Generator execution failed"),
                 generation_time_ms = generation_time_ms
             )
 
+    def transform(self, request: JS__AST__Transform__Request                         # parse -> built-in transforms -> generate, returning only the code
+                  ) -> JS__AST__Transform__Response:
+        start_time        = time.time()
+        steps             = self.ast_transforms.validate(request.steps)
+        parser_options    = request.parser_options    or JS__AST__Parser__Options()
+        generator_options = request.generator_options or JS__AST__Generator__Options()
+        transform_script  = self._create_transform_script(request.code, steps, parser_options, generator_options)
+
+        result            = self._execute_script(transform_script)
+        transform_time_ms = Safe_Int(int((time.time() - start_time) * 1000))
+
+        if not result.success:
+            return JS__AST__Transform__Response(success           = False                                            ,
+                                                error             = safe_error(result.error or "Transform execution failed"),
+                                                transform_time_ms = transform_time_ms                                )
+        try:
+            transformed = json.loads(result.output)
+        except json.JSONDecodeError as e:
+            return JS__AST__Transform__Response(success           = False                                            ,
+                                                error             = safe_error(f"Failed to decode transform output: {e}"),
+                                                transform_time_ms = transform_time_ms                                )
+        if not transformed.get('success'):
+            return JS__AST__Transform__Response(success           = False                                                    ,
+                                                error             = safe_error(transformed.get('error'))                    ,
+                                                error_location    = self._parse_error_location(transformed.get('location')),
+                                                transform_time_ms = transform_time_ms                                        )
+        return JS__AST__Transform__Response(success           = True                                         ,
+                                            code              = Safe_Str__Javascript(transformed.get('code')),
+                                            source_map        = transformed.get('source_map')                ,
+                                            steps             = transformed.get('steps')                     ,
+                                            transform_time_ms = transform_time_ms                            )
+
+    def minify(self, request: JS__AST__Minify__Request                               # transforms -> mangle -> compact generate, with output size stats
+               ) -> JS__AST__Minify__Response:
+        start_time        = time.time()
+        generator_options = JS__AST__Generator__Options(comments=False, compact=True, source_map=request.source_map)
+        transformed       = self.transform(JS__AST__Transform__Request(code              = request.code                    ,
+                                                                       steps             = self.ast_minify.steps(request)  ,
+                                                                       parser_options    = request.parser_options          ,
+                                                                       generator_options = generator_options               ))
+        minify_time_ms    = Safe_Int(int((time.time() - start_time) * 1000))
+        if not transformed.success:
+            return JS__AST__Minify__Response(success        = False                     ,
+                                             error          = transformed.error         ,
+                                             error_location = transformed.error_location,
+                                             minify_time_ms = minify_time_ms            )
+        stats = self.ast_minify.size_stats(str(request.code), str(transformed.code))
+        return JS__AST__Minify__Response(success           = True                                ,
+                                         code              = transformed.code                    ,
+                                         source_map        = transformed.source_map              ,
+                                         steps             = transformed.steps                   ,
+                                         input_bytes       = Safe_UInt(stats['input_bytes'      ]),
+                                         output_bytes      = Safe_UInt(stats['output_bytes'     ]),
+                                         input_gzip_bytes  = Safe_UInt(stats['input_gzip_bytes' ]),
+                                         output_gzip_bytes = Safe_UInt(stats['output_gzip_bytes']),
+                                         ratio             = stats['ratio']                      ,
+                                         minify_time_ms    = minify_time_ms                      )
+
     def validate_roundtrip(self, request: JS__AST__Roundtrip__Request                # Validate parse -> generate -> parse
                            ) -> JS__AST__Roundtrip__Response:
 
@@ -139,7 +421,7 @@ class JS__AST__Roundtrip(Type_Safe):
             return JS__AST__Roundtrip__Response(
                 success       = False                                              ,
                 is_valid      = False                                              ,
-                error         = Safe_Str(f"Initial parse failed: {parse_response.error}"),
+                error         = safe_error(f"Initial parse failed: {parse_response.error}"),
                 parse_time_ms = parse_response.parse_time_ms                       ,
                 total_time_ms = Safe_Int(int((time.time() - total_start) * 1000))
             )
@@ -158,7 +440,7 @@ class JS__AST__Roundtrip(Type_Safe):
                 success          = False                                                ,
                 is_valid         = False                                                ,
                 original_ast     = original_ast                                         ,
-                error            = Safe_Str(f"Generation failed: {generate_response.error}"),
+                error            = safe_error(f"Generation failed: {generate_response.error}"),
                 parse_time_ms    = parse_response.parse_time_ms                         ,
                 generate_time_ms = generate_response.generation_time_ms                 ,
                 total_time_ms    = Safe_Int(int((time.time() - total_start) * 1000))
@@ -179,29 +461,336 @@ class JS__AST__Roundtrip(Type_Safe):
                 is_valid         = False                                                  ,
                 original_ast     = original_ast                                           ,
                 generated_code   = generated_code                                         ,
-                error            = Safe_Str(f"Re-parse failed: {reparse_response.error}") ,
+                error            = safe_error(f"Re-parse failed: {reparse_response.error}") ,
                 parse_time_ms    = Safe_Int(parse_response.parse_time_ms + reparse_response.parse_time_ms),
                 generate_time_ms = generate_response.generation_time_ms                   ,
                 total_time_ms    = Safe_Int(int((time.time() - total_start) * 1000))
             )
 
         regenerated_ast = reparse_response.ast
-        is_valid        = self._compare_asts(original_ast, regenerated_ast)
+        compare_result  = self.ast_compare.compare(original_ast, regenerated_ast)
 
         return JS__AST__Roundtrip__Response(
             success          = True                                                           ,
-            is_valid         = is_valid                                                       ,
+            is_valid         = compare_result.is_equal                                        ,
             original_ast     = original_ast                                                   ,
             generated_code   = generated_code                                                 ,
             regenerated_ast  = regenerated_ast                                                ,
+            diff_path        = compare_result.diff_path                                       ,
             parse_time_ms    = Safe_Int(parse_response.parse_time_ms + reparse_response.parse_time_ms),
             generate_time_ms = generate_response.generation_time_ms                           ,
             total_time_ms    = Safe_Int(int((time.time() - total_start) * 1000))
         )
 
-    def _create_execution_config(self) -> JS__Module__Execution__Config:             # Create standard execution config
+    def query_ast(self, request: JS__AST__Query__Request                             # Run ESQuery selectors against the parsed AST
+                  ) -> JS__AST__Query__Response:
+
+        start_time   = time.time()
+        options      = request.options or JS__AST__Parser__Options()
+        ast          = None
+        if request.handle:                                                           # a stored tree is queried as is, the source is not sent or parsed again
+            entry = self.handle_store.get(request.handle)
+            if entry is None:
+                return JS__AST__Query__Response(success       = False                                                      ,
+                                                error         = safe_error(f"Unknown or expired handle: {request.handle}"),
+                                                query_time_ms = Safe_Int(int((time.time() - start_time) * 1000))          )
+            ast = entry.ast
+        elif request.code is None:
+            raise ValueError("either code or handle is required")
+        query_script = self._create_query_script(request.code, options, request.selectors,
+                                                 request.include_ancestors, int(request.max_matches), ast)
+
+        result        = self._execute_script(query_script)
+        query_time_ms = Safe_Int(int((time.time() - start_time) * 1000))
+
+        if result.success:
+            try:
+                query_result = json.loads(result.output)
+                if query_result.get('success'):
+                    return JS__AST__Query__Response(
+                        success       = True                          ,
+                        results       = query_result.get('results')   ,
+                        query_time_ms = query_time_ms
+                    )
+                else:
+                    return JS__AST__Query__Response(
+                        success        = False                                   ,
+                        error          = safe_error(query_result.get('error'))   ,
+                        error_location = self._parse_error_location(query_result.get('location')),
+                        query_time_ms  = query_time_ms
+                    )
+            except json.JSONDecodeError as e:
+                return JS__AST__Query__Response(
+                    success       = False                                          ,
+                    error         = safe_error(f"Failed to decode query output: {e}"),
+                    query_time_ms = query_time_ms
+                )
+        else:
+            return JS__AST__Query__Response(
+                success       = False                                        ,
+                error         = safe_error(result.error or "Query execution failed"),
+                query_time_ms = query_time_ms
+            )
+
+    def parse_to_ast__stream(self, request: JS__AST__Parse__Stream__Request          # Parse JavaScript, streaming Program.body statements as they are serialised
+                             ) -> Iterator[str]:
+        options       = request.options or JS__AST__Parser__Options()
+        output_format = str(request.format)
+        stream_script = self._create_parse_stream_script(request.code, options, output_format)
+        exec_request  = JS__Module__Execution__Request(
+            code   = stream_script,
+            config = self._create_execution_config(max_execution_time_ms=BATCH__MAX_EXECUTION_TIME_MS)
+        )
+        started = False
+        try:
+            for line in self.module_executor.execute_module_js__stream(exec_request):
+                started = True
+                yield line
+        except Exception as exception:
+            if output_format == 'ndjson':
+                yield json.dumps({'event': 'error', 'error': str(exception)})
+            elif not started:                                                        # a partially streamed JSON document can only be left truncated
+                yield json.dumps({'success': False, 'error': str(exception)})
+
+    def parse_batch(self, request: JS__AST__Parse__Batch__Request                    # Parse many sources, yielding one result dict per item as it completes
+                    ) -> Iterator[Dict[str, Any]]:
+        for line in self.parse_batch__ndjson(request):
+            yield json.loads(line)
+
+    def parse_batch__ndjson(self, request: JS__AST__Parse__Batch__Request            # Parse many sources, yielding one NDJSON line per item as it completes
+                            ) -> Iterator[str]:
+        processes = max(1, min(int(request.processes), BATCH__MAX_PROCESSES, len(request.items)))
+        chunks    = [request.items[index::processes] for index in range(processes)]
+        if processes == 1:
+            yield from self._parse_batch__chunk(chunks[0])
+            return
+
+        lines    = queue.Queue()
+        finished = object()
+
+        def parse_chunk(chunk):
+            try:
+                for chunk_line in self._parse_batch__chunk(chunk):
+                    lines.put(chunk_line)
+            finally:
+                lines.put(finished)
+
+        for chunk in chunks:
+            threading.Thread(target=parse_chunk, args=(chunk,), daemon=True).start()
+
+        remaining = processes
+        while remaining:
+            line = lines.get()
+            if line is finished:
+                remaining -= 1
+            else:
+                yield line
+
+    def parse_bundle(self, request: JS__AST__Parse__Bundle__Request                  # Parse a webpack/esbuild bundle module by module across Deno processes
+                     ) -> JS__AST__Parse__Bundle__Response:
+        start_time = time.time()
+        options    = request.options or JS__AST__Parser__Options()
+        code       = str(request.code)
+        split      = self.bundle_splitter.split(code)
+        if not split.modules:                                                        # not a recognised bundle (e.g. rollup's scope-hoisted output)
+            return self._parse_bundle__whole(request, options, start_time)
+
+        runtime_options = JS__AST__Parser__Options(**{**options.json(), 'ranges': True})    # placeholders are found by offset
+        items           = [JS__AST__Parse__Batch__Item(id      = BUNDLE__RUNTIME_ID                           ,
+                                                       code    = Safe_Str__Javascript__Bundle(split.skeleton) ,
+                                                       options = runtime_options                              )]
+        for index, module in enumerate(split.modules):
+            prefix = self.bundle_splitter.module_prefix(module)
+            source = self.bundle_splitter.module_source(code, module)
+            items.append(JS__AST__Parse__Batch__Item(id           = str(index)                          ,
+                                                     code         = Safe_Str__Javascript__Bundle(source),
+                                                     options      = options                             ,
+                                                     start_offset = module['offset'] - prefix           ,
+                                                     start_line   = module['line'  ]                    ,
+                                                     start_column = module['column'] - prefix           ))
+        batch_request = JS__AST__Parse__Batch__Request(items=items, processes=request.processes)
+        results       = {result.get('id'): result for result in self.parse_batch(batch_request)}
+
+        runtime = results.get(BUNDLE__RUNTIME_ID) or {}
+        modules = [self._bundle__module_result(module, results.get(str(index)) or {}) for index, module in enumerate(split.modules)]
+        if request.stitch and (not runtime.get('success') or not all(module['success'] for module in modules)):
+            return self._parse_bundle__whole(request, options, start_time)          # let the monolithic parse report the real error
+        if not runtime.get('success'):
+            return JS__AST__Parse__Bundle__Response(success       = False                                               ,
+                                                    bundle_format = split.bundle_format                                 ,
+                                                    error         = safe_error(runtime.get('error') or "Bundle runtime parse failed"),
+                                                    parse_time_ms = Safe_Int(int((time.time() - start_time) * 1000))   )
+
+        ast = runtime.get('ast')
+        if request.stitch:
+            ast     = self._bundle__stitch(ast, split, [module['ast'] for module in modules], keep_ranges=options.ranges)
+            modules = None
+        elif not options.ranges:
+            self._bundle__stitch(ast, split, [], keep_ranges=False)
+        handle = None
+        if request.return_handle and request.stitch:
+            handle = self.handle_store.add(ast, code, options)
+            ast    = None
+        return JS__AST__Parse__Bundle__Response(success       = True                                              ,
+                                                bundle_format = split.bundle_format                               ,
+                                                ast           = ast                                               ,
+                                                modules       = modules                                           ,
+                                                module_count  = len(split.modules)                                ,
+                                                handle        = handle                                            ,
+                                                parse_time_ms = Safe_Int(int((time.time() - start_time) * 1000)))
+
+    def ast_to_graph(self, request: JS__AST__Graph__Request                          # Build a node/edge graph while Deno streams the AST walk
+                     ) -> JS__AST__Graph__Response:
+        start_time   = time.time()
+        options      = request.options or JS__AST__Parser__Options()
+        graph_script = self._create_graph_script(request.code, options, request.include_positions)
+        exec_request = JS__Module__Execution__Request(
+            code   = graph_script,
+            config = self._create_execution_config(max_execution_time_ms=BATCH__MAX_EXECUTION_TIME_MS)
+        )
+        node_types, edge_types, nodes, edges = [], [], [], []
+        error, error_location, completed     = None, None, False
+        try:
+            for line in self.module_executor.execute_module_js__stream(exec_request):     # the ESTree itself never reaches Python
+                record = json.loads(line)
+                kind   = record[0]
+                if   kind == 'n': nodes     .append(record[1:])
+                elif kind == 'e': edges     .append(record[1:])
+                elif kind == 't': node_types.append(record[1] )
+                elif kind == 'k': edge_types.append(record[1] )
+                elif kind == 'end':
+                    completed = True
+                elif kind == 'error':
+                    error, error_location = record[1], self._parse_error_location(record[2])
+        except Exception as exception:
+            error = str(exception)
+        graph_time_ms = Safe_Int(int((time.time() - start_time) * 1000))
+
+        if error or not completed:
+            return JS__AST__Graph__Response(success        = False                                    ,
+                                            error          = safe_error(error or "Graph output was truncated"),
+                                            error_location = error_location                           ,
+                                            graph_time_ms  = graph_time_ms                            )
+        return JS__AST__Graph__Response(success       = True         ,
+                                        node_types    = node_types   ,
+                                        edge_types    = edge_types   ,
+                                        nodes         = nodes        ,
+                                        edges         = edges        ,
+                                        graph_time_ms = graph_time_ms)
+
+    def _parse_batch__chunk(self, items: List[JS__AST__Parse__Batch__Item]           # Parse a chunk of items inside a single Deno process
+                            ) -> Iterator[str]:
+        pending      = {item.id for item in items}
+        batch_script = self._create_parse_batch_script(items)
+        exec_request = JS__Module__Execution__Request(
+            code   = batch_script,
+            config = self._create_execution_config(max_execution_time_ms=BATCH__MAX_EXECUTION_TIME_MS)
+        )
+        error = "Batch parser execution failed"
+        try:
+            for line in self.module_executor.execute_module_js__stream(exec_request):
+                item_id = REGEX__BATCH_LINE_ID.match(line)                           # read the id without decoding the whole AST
+                if item_id:
+                    pending.discard(json.loads(item_id.group(1)))
+                    yield line
+        except Exception as exception:
+            error = str(exception)
+        for item_id in pending:                                                      # items the process never reached
+            yield json.dumps({'id': item_id, 'success': False, 'error': error})
+
+    def _parse_bundle__whole(self, request    : JS__AST__Parse__Bundle__Request,    # Fallback: parse the bundle as one program in one process
+                                   options    : JS__AST__Parser__Options       ,
+                                   start_time : float
+                             ) -> JS__AST__Parse__Bundle__Response:
+        parse_request  = JS__AST__Parse__Request(code=request.code, options=options, return_handle=request.return_handle)
+        parse_response = self.parse_to_ast(parse_request)
+        return JS__AST__Parse__Bundle__Response(success        = parse_response.success                             ,
+                                                ast            = parse_response.ast                                 ,
+                                                handle         = parse_response.handle                              ,
+                                                error          = parse_response.error                               ,
+                                                error_location = parse_response.error_location                      ,
+                                                parse_time_ms  = Safe_Int(int((time.time() - start_time) * 1000))  )
+
+    def _reparse__region(self, plan    : JS__AST__Reparse__Plan,                   # Program parsed from the edited region (in file positions), None when a full parse is needed
+                               options : JS__AST__Parser__Options
+                         ) -> Optional[Dict[str, Any]]:
+        item   = JS__AST__Parse__Batch__Item(id           = REPARSE__REGION_ID                                                  ,
+                                             code         = Safe_Str__Javascript__Bundle(plan.code[plan.region_start:plan.region_end]),
+                                             options      = options                                                             ,
+                                             start_offset = plan.start_offset                                                   ,
+                                             start_line   = plan.start_line                                                     ,
+                                             start_column = plan.start_column                                                   )
+        result = next(self.parse_batch(JS__AST__Parse__Batch__Request(items=[item])), {})
+        if not result.get('success'):
+            return None
+        region = result['ast']
+        if not self.ast_incremental.region_fits(plan, region):
+            return None
+        return region
+
+    def _bundle__module_result(self, module : Dict[str, Any],                        # Per module result, with the function node taken out of its wrapper
+                                     result : Dict[str, Any]
+                               ) -> Dict[str, Any]:
+        module_result = {'id'   : module['id'        ],
+                         'start': module['offset'    ],
+                         'end'  : module['end_offset']}
+        try:
+            expression = result['ast']['body'][0]['expression'] if result.get('success') else None
+        except (KeyError, IndexError, TypeError):
+            expression = None
+        if expression is None:
+            module_result.update(success=False, error=result.get('error') or "Module was not parsed")
+        else:
+            module_result.update(success=True, ast=expression['properties'][0] if module['is_method'] else expression)
+        return module_result
+
+    def _bundle__stitch(self, ast         : Dict[str, Any],                          # Swap the runtime's placeholders for the module nodes (in place)
+                              split       : JS__AST__Bundle__Split,
+                              nodes       : List[Dict[str, Any]],
+                              keep_ranges : bool
+                        ) -> Dict[str, Any]:
+        placeholders = {module['offset']: ('Property' if module['is_method'] else 'Literal', module, node)
+                        for module, node in zip(split.modules, nodes)}
+        if not keep_ranges:
+            for key in BUNDLE__POSITION_KEYS:
+                ast.pop(key, None)
+        stack = [ast]
+        while stack:
+            value    = stack.pop()
+            children = value.items() if type(value) is dict else enumerate(value)
+            for key, child in children:
+                if type(child) is dict:
+                    start       = child.get('start')
+                    placeholder = placeholders.get(start) if type(start) is int else None
+                    if placeholder is not None and placeholder[0] == child.get('type'):
+                        _, module, node = placeholder
+                        value[key]      = node                                       # module nodes already carry bundle positions
+                        if key == 'value' and value.get('type') == 'Property':       # the property ended with its 1 character placeholder
+                            self._bundle__set_end(value, module, keep_ranges)
+                        continue
+                    if not keep_ranges:
+                        for position_key in BUNDLE__POSITION_KEYS:
+                            child.pop(position_key, None)
+                    stack.append(child)
+                elif type(child) is list:
+                    stack.append(child)
+        return ast
+
+    def _bundle__set_end(self, node        : Dict[str, Any],                         # Move a node's end to where a module ends
+                               module      : Dict[str, Any],
+                               keep_ranges : bool
+                         ):
+        if keep_ranges:
+            node['end'] = module['end_offset']
+            if type(node.get('range')) is list:
+                node['range'][1] = module['end_offset']
+        if type(node.get('loc')) is dict:
+            node['loc']['end'] = {'line': module['end_line'], 'column': module['end_column']}
+
+    def _create_execution_config(self, max_execution_time_ms: int = 10000            # Create standard execution config
+                                 ) -> JS__Module__Execution__Config:
         return JS__Module__Execution__Config(
-            max_execution_time_ms = 10000                                  ,
+            max_execution_time_ms = max_execution_time_ms                  ,
             max_memory_mb         = 512                                    ,
             allow_url_imports     = True                                   ,
             allowed_import_hosts  = ["esm.sh"]                             ,
@@ -209,11 +798,16 @@ class JS__AST__Roundtrip(Type_Safe):
             permissions           = JS__Execution__Permissions()
         )
 
-    def _create_parse_script(self, code    : Safe_Str__Javascript,                   # Create Meriyah parser script
-                                   options : JS__AST__Parser__Options
-                             ) -> str:
+    def _execute_script(self, script: str                                            # Run a generated script in a Deno module process
+                        ) -> JS__Execution__Result:
+        exec_request = JS__Module__Execution__Request(
+            code   = script,
+            config = self._create_execution_config()
+        )
+        return self.module_executor.execute_module_js(exec_request)
 
-        escaped_code   = json.dumps(str(code))
+    def _meriyah_options(self, options: JS__AST__Parser__Options                     # Map parser options to Meriyah options
+                         ) -> Dict[str, Any]:
         parser_options = {
             "module"        : str(options.source_type) == "module",
             "next"          : options.next                        ,
@@ -228,19 +822,112 @@ class JS__AST__Roundtrip(Type_Safe):
         if options.jsx:
             parser_options["jsx"] = True
 
+        return parser_options
+
+    def _create_parse_script(self, code        : Safe_Str__Javascript,               # Create Meriyah parser script
+                                   options     : JS__AST__Parser__Options,
+                                   include_ast : bool = True
+                             ) -> str:
+
+        escaped_code   = json.dumps(str(code))
+        parser_options = self._meriyah_options(options)
+        collect_tokens = options.tokens or not include_ast
+
         return f"""
 import {{ parse }} from 'https://esm.sh/meriyah@{MERIYAH_VERSION}';
 
 const code = {escaped_code};
 const options = {json.dumps(parser_options)};
+const collectTokens = {json.dumps(collect_tokens)};
+const includeAst    = {json.dumps(include_ast)};
+
+const tokenTypes = [], tokenTypeIds = {{}}, typeIds = [], starts = [], ends = [];
+if (collectTokens) {{
+    options.onToken = (token, start, end) => {{
+        let typeId = tokenTypeIds[token];
+        if (typeId === undefined) {{
+            typeId = tokenTypeIds[token] = tokenTypes.length;
+            tokenTypes.push(token);
+        }}
+        typeIds.push(typeId);
+        starts.push(start);
+        ends.push(end);
+    }};
+}}
 
 try {{
     const ast = parse(code, options);
-    const cleanAst = JSON.parse(JSON.stringify(ast));
-    
+    const result = {{ success: true }};
+    if (includeAst) {{
+        result.ast = JSON.parse(JSON.stringify(ast));
+    }}
+    if (collectTokens) {{
+        result.tokens = {{ types: tokenTypes, type_ids: typeIds, starts: starts, ends: ends }};
+    }}
+    console.log(JSON.stringify(result));
+}} catch (error) {{
+    console.log(JSON.stringify({{
+        success: false,
+        error: error.message,
+        location: error.loc || null
+    }}));
+}}
+"""
+
+    def _create_query_script(self, code              : Optional[Safe_Str__Javascript],  # Create Meriyah + ESQuery script (no Meriyah when the AST is given)
+                                   options           : JS__AST__Parser__Options      ,
+                                   selectors         : List[str]                     ,
+                                   include_ancestors : bool                          ,
+                                   max_matches       : int                           ,
+                                   ast               : Optional[Dict[str, Any]]      = None
+                             ) -> str:
+
+        escaped_code   = json.dumps(str(code or ''))
+        parser_options = self._meriyah_options(options)
+        parser_import  = f"import {{ parse }} from 'https://esm.sh/meriyah@{MERIYAH_VERSION}';" if ast is None else ''
+        source_ast     = 'parse(code, options)' if ast is None else json.dumps(ast)
+
+        return f"""
+{parser_import}
+import esquery   from 'https://esm.sh/esquery@{ESQUERY_VERSION}';
+
+const code             = {escaped_code};
+const options          = {json.dumps(parser_options)};
+const selectors        = {json.dumps(selectors)};
+const includeAncestors = {json.dumps(include_ancestors)};
+const maxMatches       = {max_matches};
+
+const summarise = (node) => {{
+    const summary = {{ type: node.type, start: node.start ?? null, end: node.end ?? null }};
+    const name    = node.id?.name ?? node.key?.name ?? node.name;
+    if (typeof name === 'string') summary.name = name;
+    return summary;
+}};
+
+try {{
+    const ast     = {source_ast};
+    const results = [];
+    for (const selector of selectors) {{
+        let parsedSelector;
+        try {{
+            parsedSelector = esquery.parse(selector);
+        }} catch (error) {{
+            throw new Error(`Invalid selector '${{selector}}': ${{error.message}}`);
+        }}
+        const matches = [];
+        let   truncated = false;
+        esquery.traverse(ast, parsedSelector, (node, parent, ancestry) => {{
+            if (matches.length >= maxMatches) {{ truncated = true; return; }}
+            const match = {{ node }};
+            if (includeAncestors) match.ancestors = ancestry.map(summarise);
+            matches.push(match);
+        }});
+        results.push({{ selector, matches, truncated }});
+    }}
+
     console.log(JSON.stringify({{
         success: true,
-        ast: cleanAst
+        results: results
     }}));
 }} catch (error) {{
     console.log(JSON.stringify({{
@@ -249,35 +936,351 @@ try {{
         location: error.loc || null
     }}));
 }}
+"""
+
+    def _create_parse_batch_script(self, items: List[JS__AST__Parse__Batch__Item]    # Create Meriyah script that parses items one by one
+                                   ) -> str:
+        batch_items = [{"id"      : item.id                                                              ,
+                        "code"    : str(item.code)                                                       ,
+                        "options" : self._meriyah_options(item.options or JS__AST__Parser__Options()),
+                        "base"    : [item.start_offset, item.start_line, item.start_column]            }
+                       for item in items]
+
+        return f"""
+import {{ parse }} from 'https://esm.sh/meriyah@{MERIYAH_VERSION}';
+
+const items = {json.dumps(batch_items)};
+
+function shiftPositions(ast, [offset, line, column]) {{                             // move positions from item-relative to file-relative
+    if (offset === 0 && line === 1 && column === 0) return;
+    const stack = [ast];
+    while (stack.length) {{
+        const node = stack.pop();
+        if (typeof node.start === 'number') node.start += offset;
+        if (typeof node.end   === 'number') node.end   += offset;
+        if (Array.isArray(node.range)) {{ node.range[0] += offset; node.range[1] += offset; }}
+        if (node.loc && typeof node.loc === 'object') {{
+            for (const point of [node.loc.start, node.loc.end]) {{
+                if (!point) continue;
+                if (point.line === 1) point.column += column;
+                point.line += line - 1;
+            }}
+        }}
+        for (const key in node) {{
+            const value = node[key];
+            if (key !== 'loc' && key !== 'range' && value !== null && typeof value === 'object') stack.push(value);
+        }}
+    }}
+}}
+
+for (const item of items) {{
+    const start = performance.now();
+    try {{
+        const ast = parse(item.code, item.options);
+        shiftPositions(ast, item.base);
+        console.log(JSON.stringify({{
+            id           : item.id,
+            success      : true,
+            ast          : ast,
+            parse_time_ms: Math.round(performance.now() - start)
+        }}));
+    }} catch (error) {{
+        console.log(JSON.stringify({{
+            id           : item.id,
+            success      : false,
+            error        : error.message,
+            location     : error.loc || null,
+            parse_time_ms: Math.round(performance.now() - start)
+        }}));
+    }}
+}}
+"""
+
+    def _create_parse_stream_script(self, code          : Safe_Str__Javascript,      # Create Meriyah script that prints the AST statement by statement
+                                          options       : JS__AST__Parser__Options,
+                                          output_format : str
+                                    ) -> str:
+
+        escaped_code   = json.dumps(str(code))
+        parser_options = self._meriyah_options(options)
+
+        return f"""
+import {{ parse }} from 'https://esm.sh/meriyah@{MERIYAH_VERSION}';
+
+const code    = {escaped_code};
+const options = {json.dumps(parser_options)};
+const format  = {json.dumps(output_format)};
+const start   = performance.now();
+
+let ast;
+try {{
+    ast = parse(code, options);
+}} catch (error) {{
+    console.log(format === 'ndjson' ? JSON.stringify({{ event: 'error', error: error.message, location: error.loc || null }})
+                                    : JSON.stringify({{ success: false, error: error.message, location: error.loc || null }}));
+    Deno.exit(0);
+}}
+
+const {{ body, ...program }} = ast;
+
+if (format === 'ndjson') {{
+    console.log(JSON.stringify({{ event: 'program', node: program }}));
+    body.forEach((node, index) => {{
+        console.log(JSON.stringify({{ event: 'statement', index, node }}));
+        body[index] = null;                                                          // let already streamed statements be collected
+    }});
+    console.log(JSON.stringify({{ event: 'end', statements: body.length, parse_time_ms: Math.round(performance.now() - start) }}));
+}} else {{
+    const header = JSON.stringify(program);
+    console.log(header.slice(0, -1) + (header.length > 2 ? ',' : '') + '"body":[');
+    body.forEach((node, index) => {{
+        console.log(JSON.stringify(node) + (index < body.length - 1 ? ',' : ''));
+        body[index] = null;
+    }});
+    console.log(']}}');
+}}
+"""
+
+    def _create_graph_script(self, code              : Safe_Str__Javascript,          # Create Meriyah script that walks the AST printing node/edge records
+                                   options           : JS__AST__Parser__Options,
+                                   include_positions : bool
+                             ) -> str:
+
+        escaped_code   = json.dumps(str(code))
+        parser_options = self._meriyah_options(options)
+        if not include_positions:                                                    # pruned positions are never computed either
+            parser_options.update(loc=False, ranges=False)
+
+        return f"""
+import {{ parse }} from 'https://esm.sh/meriyah@{MERIYAH_VERSION}';
+
+const code    = {escaped_code};
+const options = {json.dumps(parser_options)};
+const withPositions = {json.dumps(include_positions)};
+const start   = performance.now();
+
+let ast;
+try {{
+    ast = parse(code, options);
+}} catch (error) {{
+    console.log(JSON.stringify(['error', error.message, error.loc || null]));
+    Deno.exit(0);
+}}
+
+const SKIPPED  = new Set(['type', 'start', 'end', 'range', 'loc']);
+const isNode   = (value) => value !== null && typeof value === 'object' && typeof value.type === 'string';
+const typeIds  = new Map();
+const keyIds   = new Map();
+let   lines    = [];
+const emit     = (record) => {{
+    lines.push(JSON.stringify(record));
+    if (lines.length >= 1000) {{
+        console.log(lines.join('\\n'));
+        lines = [];
+    }}
+}};
+const intern   = (ids, kind, name) => {{
+    let id = ids.get(name);
+    if (id === undefined) {{
+        id = ids.size;
+        ids.set(name, id);
+        emit([kind, name]);
+    }}
+    return id;
+}};
+
+let   nextId = 0;
+const stack  = [[ast, -1, -1, -1]];
+while (stack.length) {{
+    const [node, parent, keyId, listIndex] = stack.pop();
+    const id       = nextId++;
+    const typeId   = intern(typeIds, 't', node.type);
+    const children = [];
+    let   attrs    = null;
+    for (const key of Object.keys(node)) {{
+        if (SKIPPED.has(key)) continue;
+        const value = node[key];
+        if (isNode(value)) {{
+            children.push([value, intern(keyIds, 'k', key), -1]);
+        }} else if (Array.isArray(value) && value.some(isNode)) {{
+            const childKeyId = intern(keyIds, 'k', key);
+            value.forEach((item, index) => {{ if (isNode(item)) children.push([item, childKeyId, index]); }});
+        }} else {{
+            (attrs ??= {{}})[key] = typeof value === 'bigint' ? String(value) : value;
+        }}
+    }}
+    const record = ['n', typeId, attrs];
+    if (withPositions && typeof node.start === 'number') {{
+        record.push(node.start, node.end);
+        if (node.loc) record.push(node.loc.start.line, node.loc.start.column, node.loc.end.line, node.loc.end.column);
+    }}
+    emit(record);
+    if (parent !== -1) emit(['e', parent, id, keyId, listIndex]);
+    for (let index = children.length - 1; index >= 0; index--) {{               // reversed so ids follow source order
+        const [child, childKeyId, childIndex] = children[index];
+        stack.push([child, id, childKeyId, childIndex]);
+    }}
+}}
+emit(['end', Math.round(performance.now() - start)]);
+console.log(lines.join('\\n'));
+"""
+
+    def _create_outline_script(self, code    : Safe_Str__Javascript,                 # Create Meriyah script that prints only the file outline
+                                     options : JS__AST__Parser__Options
+                               ) -> str:
+
+        escaped_code   = json.dumps(str(code))
+        parser_options = self._meriyah_options(options)
+        parser_options.update(ranges=True, raw=False)                                # outline entries only need offsets
+
+        return f"""
+import {{ parse }} from 'https://esm.sh/meriyah@{MERIYAH_VERSION}';
+
+const code    = {escaped_code};
+const options = {json.dumps(parser_options)};
+
+const span = (node) => {{
+    const result = {{ start: node.start, end: node.end }};
+    if (node.loc) result.line = node.loc.start.line;
+    return result;
+}};
+const moduleName = (node) => node.type === 'Identifier' ? node.name : String(node.value);          // export {{ a as "b c" }}
+const keyName    = (key, computed) => computed                           ? null
+                                    : key.type === 'PrivateIdentifier'   ? '#' + key.name
+                                    : key.type === 'Identifier'          ? key.name
+                                    : key.type === 'Literal'             ? String(key.value) : null;
+const patternNames = (pattern, names = []) => {{
+    if (!pattern) return names;
+    switch (pattern.type) {{
+        case 'Identifier'       : names.push(pattern.name); break;
+        case 'ObjectPattern'    : pattern.properties.forEach(property => patternNames(property.type === 'RestElement' ? property.argument : property.value, names)); break;
+        case 'ArrayPattern'     : pattern.elements.forEach(element => patternNames(element, names)); break;
+        case 'RestElement'      : patternNames(pattern.argument, names); break;
+        case 'AssignmentPattern': patternNames(pattern.left, names); break;
+    }}
+    return names;
+}};
+const requireSource = (init) => init && init.type === 'CallExpression' && init.callee.type === 'Identifier' && init.callee.name === 'require' &&
+                                init.arguments.length === 1 && init.arguments[0].type === 'Literal' && typeof init.arguments[0].value === 'string'
+                                ? init.arguments[0].value : null;
+
+const imports = [], exports = [], declarations = [];
+
+const addDeclaration = (node, exported) => {{
+    switch (node.type) {{
+        case 'FunctionDeclaration':
+        case 'FunctionExpression':
+        case 'ArrowFunctionExpression':
+            declarations.push({{ kind: 'function', name: node.id ? node.id.name : null, async: node.async, generator: !!node.generator,
+                                 params: node.params.length, exported, ...span(node) }});
+            return node.id ? [node.id.name] : [];
+        case 'ClassDeclaration':
+        case 'ClassExpression':
+            declarations.push({{ kind: 'class', name: node.id ? node.id.name : null, exported, ...span(node),
+                                 super_class: node.superClass ? (node.superClass.type === 'Identifier' ? node.superClass.name : node.superClass.type) : null,
+                                 members: node.body.body.map(member => ({{
+                                     kind  : member.type === 'MethodDefinition' ? member.kind : member.type === 'StaticBlock' ? 'static_block' : 'property',
+                                     name  : member.key ? keyName(member.key, member.computed) : null,
+                                     static: !!member.static,
+                                     ...span(member) }})) }});
+            return node.id ? [node.id.name] : [];
+        case 'VariableDeclaration':
+            return node.declarations.flatMap(declarator => {{
+                const names  = patternNames(declarator.id);
+                const source = requireSource(declarator.init);
+                if (source !== null) {{
+                    imports.push({{ source, specifiers: names.map(local => ({{ kind: 'require', local, imported: null }})), ...span(declarator) }});
+                }}
+                declarations.push({{ kind: 'variable', declaration_kind: node.kind, names, exported,
+                                     value_type: declarator.init ? declarator.init.type : null, ...span(declarator) }});
+                return names;
+            }});
+    }}
+    return [];
+}};
+
+const commonJsExport = (expression) => {{                                            // module.exports = ..., exports.x = ..., module.exports.x = ...
+    if (expression.type !== 'AssignmentExpression' || expression.left.type !== 'MemberExpression') return null;
+    const left    = expression.left;
+    const isModuleExports = (node) => node.type === 'MemberExpression' && !node.computed && node.object.type === 'Identifier' &&
+                                      node.object.name === 'module' && node.property.name === 'exports';
+    if (isModuleExports(left)) return 'default';
+    if (!left.computed && (isModuleExports(left.object) || (left.object.type === 'Identifier' && left.object.name === 'exports'))) {{
+        return left.property.name;
+    }}
+    return null;
+}};
+
+let ast;
+try {{
+    ast = parse(code, options);
+}} catch (error) {{
+    console.log(JSON.stringify({{ success: false, error: error.message, location: error.loc || null }}));
+    Deno.exit(0);
+}}
+
+for (const node of ast.body) {{
+    switch (node.type) {{
+        case 'ImportDeclaration':
+            imports.push({{ source: node.source.value, ...span(node),
+                            specifiers: node.specifiers.map(specifier => ({{
+                                kind    : specifier.type === 'ImportDefaultSpecifier' ? 'default' : specifier.type === 'ImportNamespaceSpecifier' ? 'namespace' : 'named',
+                                local   : specifier.local.name,
+                                imported: specifier.imported ? moduleName(specifier.imported) : null }})) }});
+            break;
+        case 'ExportNamedDeclaration':
+            if (node.declaration) {{
+                exports.push({{ kind: 'named', names: addDeclaration(node.declaration, true), source: null, ...span(node) }});
+            }} else {{
+                exports.push({{ kind: 'named', source: node.source ? node.source.value : null, ...span(node),
+                                specifiers: node.specifiers.map(specifier => ({{ local   : moduleName(specifier.local),
+                                                                                  exported: moduleName(specifier.exported) }})) }});
+            }}
+            break;
+        case 'ExportDefaultDeclaration': {{
+            const names = addDeclaration(node.declaration, true);
+            exports.push({{ kind: 'default', declaration_type: node.declaration.type, ...span(node),
+                            name: names[0] ?? (node.declaration.type === 'Identifier' ? node.declaration.name : null) }});
+            break;
+        }}
+        case 'ExportAllDeclaration':
+            exports.push({{ kind: 'all', source: node.source.value, exported: node.exported ? moduleName(node.exported) : null, ...span(node) }});
+            break;
+        case 'ExpressionStatement': {{
+            const name = commonJsExport(node.expression);
+            if (name !== null) exports.push({{ kind: 'commonjs', name, value_type: node.expression.right.type, ...span(node) }});
+            break;
+        }}
+        default:
+            addDeclaration(node, false);
+    }}
+}}
+
+console.log(JSON.stringify({{ success: true, imports, exports, declarations }}));
 """
 
     def _create_generate_script(self, ast     : Dict[str, Any],                      # Create Astring generator script
                                       options : JS__AST__Generator__Options
                                 ) -> str:
 
-        escaped_ast        = json.dumps(ast)
-        generator_options  = {
-            "indent"              : str(options.indent)     ,
-            "lineEnd"             : str(options.line_end)   ,
-            "startingIndentLevel" : 0
-        }
-
-        if options.comments:
-            generator_options["comments"] = True
+        escaped_ast = json.dumps(ast)
+        generator   = self._generator_script_parts(options)
 
         return f"""
 import {{ generate }} from 'https://esm.sh/astring@{ASTRING_VERSION}';
+{generator['import']}
 
 const ast = {escaped_ast};
-const options = {json.dumps(generator_options)};
+const options = {generator['options']};
+{generator['setup']}
 
 try {{
-    const code = generate(ast, options);
-    
-    console.log(JSON.stringify({{
-        success: true,
-        code: code
-    }}));
+    let code = generate(ast, options);
+    const result = {{ success: true }};
+    {generator['output']}
+    result.code = code;
+
+    console.log(JSON.stringify(result));
 }} catch (error) {{
     console.log(JSON.stringify({{
         success: false,
@@ -286,26 +1289,88 @@ try {{
 }}
 """
 
-    def _compare_asts(self, ast1: Dict[str, Any],                                    # Compare ASTs for semantic equivalence
-                           ast2: Dict[str, Any]
-                      ) -> bool:
+    def _create_transform_script(self, code              : Safe_Str__Javascript,      # Create Meriyah + transforms + Astring script (one process, no AST leaves it)
+                                       steps             : List[Dict[str, Any]],
+                                       parser_options    : JS__AST__Parser__Options,
+                                       generator_options : JS__AST__Generator__Options
+                                 ) -> str:
+        generator = self._generator_script_parts(generator_options)
 
-        def normalize_ast(node):
-            if isinstance(node, dict):
-                normalized = {}
-                for key, value in node.items():
-                    if key not in ['loc', 'range', 'start', 'end', 'raw', 'leadingComments', 'trailingComments']:
-                        normalized[key] = normalize_ast(value)
-                return normalized
-            elif isinstance(node, list):
-                return [normalize_ast(item) for item in node]
-            else:
-                return node
+        return f"""
+import {{ parse }} from 'https://esm.sh/meriyah@{MERIYAH_VERSION}';
+import {{ generate }} from 'https://esm.sh/astring@{ASTRING_VERSION}';
+{generator['import']}
+{JS__AST__TRANSFORMS__SCRIPT}
+const source = {json.dumps(str(code))};
+const steps = {json.dumps(steps)};
+const options = {generator['options']};
+{generator['setup']}
+
+let ast;
+try {{
+    ast = parse(source, {json.dumps(self._meriyah_options(parser_options))});
+}} catch (error) {{
+    console.log(JSON.stringify({{ success: false, error: error.message, location: error.loc || null }}));
+    Deno.exit(0);
+}}
+try {{
+    const stats = runTransforms(ast, steps);
+    let code = generate(ast, options);
+    const result = {{ success: true, steps: stats }};
+    {generator['output']}
+    result.code = code;
+
+    console.log(JSON.stringify(result));
+}} catch (error) {{
+    console.log(JSON.stringify({{ success: false, error: error.message }}));
+}}
+"""
 
-        normalized_ast1 = normalize_ast(ast1)
-        normalized_ast2 = normalize_ast(ast2)
+    def _generator_script_parts(self, options: JS__AST__Generator__Options           # Astring options plus the import/setup/output snippets for source maps and compact output
+                                ) -> Dict[str, str]:
+        generator_options  = {
+            "indent"              : str(options.indent)     ,
+            "lineEnd"             : str(options.line_end)   ,
+            "startingIndentLevel" : 0
+        }
 
-        return json.dumps(normalized_ast1, sort_keys=True) == json.dumps(normalized_ast2, sort_keys=True)
+        if options.comments and not options.compact:
+            generator_options["comments"] = True
+
+        script_import = ''
+        script_setup  = ''
+        script_output = ''
+        if options.compact:                                                          # astring drops indentation and line breaks itself
+            generator_options["indent" ] = ''
+            generator_options["lineEnd"] = ''
+            if not options.source_map:                                               # the optional spaces go too, unless mappings must stay exact
+                script_import = f"import {{ parse as parseTokens }} from 'https://esm.sh/meriyah@{MERIYAH_VERSION}';"
+                script_setup  = JS__AST__COMPACT__SCRIPT
+                script_output = """
+    code = compactCode(code, ast.sourceType === 'module');"""
+        if options.source_map:                                                       # astring records mappings while writing, in the same pass
+            script_import = f"import {{ SourceMapGenerator }} from 'https://esm.sh/source-map-js@{SOURCE_MAP_VERSION}';"
+            script_setup  = f"options.sourceMap = new SourceMapGenerator({{ file: {json.dumps(options.source_file)} }});"
+            if options.source_map_inline:
+                script_output = """
+    const mapBytes = new TextEncoder().encode(options.sourceMap.toString());
+    let mapBinary = '';
+    for (let i = 0; i < mapBytes.length; i += 0x8000) {
+        mapBinary += String.fromCharCode(...mapBytes.subarray(i, i + 0x8000));
+    }
+    code += '\\n//# sourceMappingURL=data:application/json;charset=utf-8;base64,' + btoa(mapBinary);"""
+            else:
+                script_output = """
+    result.source_map = options.sourceMap.toJSON();"""
+        return {'import' : script_import            ,
+                'options': json.dumps(generator_options),
+                'setup'  : script_setup             ,
+                'output' : script_output            }
+
+    def _compare_asts(self, ast1: Dict[str, Any],                                    # Compare ASTs for semantic equivalence
+                           ast2: Dict[str, Any]
+                      ) -> bool:
+        return self.ast_compare.is_equal(ast1, ast2)
 
     def _parse_error_location(self, location: Optional[Dict]                         # Parse error location from response
                           ) -> Optional[JS__AST__Location]:
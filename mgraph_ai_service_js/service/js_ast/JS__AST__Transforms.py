@@ -0,0 +1,480 @@
+import re
+from typing                                                                 import Any, Dict, List
+from osbot_utils.type_safe.Type_Safe                                        import Type_Safe
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas           import JS__AST__Transform__Step
+
+TRANSFORM__STEPS            = ('strip_console', 'strip_debugger', 'rename', 'define', 'remove_dead_branches', 'mangle')
+TRANSFORM__MAP_STEPS        = ('rename', 'define')                                    # steps configured with params.map
+TRANSFORM__MAX_STEPS        = 32
+REGEX__TRANSFORM__NAME      = re.compile(r'^[A-Za-z_$][\w$]*$')
+REGEX__TRANSFORM__DOTTED    = re.compile(r'^[A-Za-z_$][\w$]*(\.[A-Za-z_$][\w$]*)*$')
+
+JS__AST__TRANSFORMS__SCRIPT = """
+const REMOVE = Symbol('remove');                                                  // statement dropped from its list (or left as ';')
+const UNKNOWN = Symbol('unknown');                                                 // expression value not known at build time
+
+function walk(node, parent, key, visitor) {                                        // enter (pre-order, may replace and skip children), then leave
+    if (visitor.enter) {
+        const replaced = visitor.enter(node, parent, key);
+        if (replaced !== undefined) return replaced;
+    }
+    for (const childKey of Object.keys(node)) {
+        if (childKey === 'loc' || childKey === 'range') continue;
+        const value = node[childKey];
+        if (Array.isArray(value)) {
+            const items = [];
+            for (const item of value) {
+                const result = item && typeof item.type === 'string' ? walk(item, node, childKey, visitor) : item;
+                if (result !== REMOVE) items.push(result);
+            }
+            node[childKey] = items;
+        } else if (value && typeof value.type === 'string') {
+            const result = walk(value, node, childKey, visitor);
+            node[childKey] = result === REMOVE ? { type: 'EmptyStatement' } : result;
+        }
+    }
+    if (visitor.leave) {
+        const replaced = visitor.leave(node, parent, key);
+        if (replaced !== undefined) return replaced;
+    }
+    return node;
+}
+
+function isReference(parent, key) {                                                // an Identifier that names a variable (not a key, label or external name)
+    if (!parent) return true;
+    switch (parent.type) {
+        case 'MemberExpression'  : return key !== 'property' || parent.computed;
+        case 'Property'          :
+        case 'PropertyDefinition':
+        case 'MethodDefinition'  : return key !== 'key' || parent.computed;
+        case 'LabeledStatement'  :
+        case 'BreakStatement'    :
+        case 'ContinueStatement' : return false;
+        case 'ImportSpecifier'   : return key !== 'imported';
+        case 'ExportSpecifier'   : return key !== 'exported';
+        case 'MetaProperty'      : return false;
+    }
+    return true;
+}
+
+function isBinding(parent, key) {                                                  // declared or assigned here, so never replaced by a constant
+    if (!parent) return false;
+    switch (parent.type) {
+        case 'VariableDeclarator'     : return key === 'id';
+        case 'FunctionDeclaration'    :
+        case 'FunctionExpression'     :
+        case 'ArrowFunctionExpression': return key === 'id' || key === 'params';
+        case 'ClassDeclaration'       :
+        case 'ClassExpression'        : return key === 'id';
+        case 'AssignmentExpression'   :
+        case 'AssignmentPattern'      :
+        case 'ForInStatement'         :
+        case 'ForOfStatement'         : return key === 'left';
+        case 'UpdateExpression'       : return true;
+        case 'CatchClause'            : return key === 'param';
+    }
+    return parent.type.startsWith('Import');
+}
+
+function dottedName(node) {                                                        // 'process.env.NODE_ENV' for a plain member chain, else null
+    if (node.type === 'Identifier') return node.name;
+    if (node.type !== 'MemberExpression' || node.computed || node.property.type !== 'Identifier') return null;
+    const object = dottedName(node.object);
+    return object === null ? null : object + '.' + node.property.name;
+}
+
+function literal(value) {
+    if (value === undefined) return { type: 'UnaryExpression', operator: 'void', prefix: true, argument: { type: 'Literal', value: 0, raw: '0' } };
+    return { type: 'Literal', value: value, raw: JSON.stringify(value) };
+}
+
+function evaluate(node) {                                                          // value of a constant expression, UNKNOWN otherwise
+    switch (node.type) {
+        case 'Literal':
+            return node.regex || node.bigint !== undefined ? UNKNOWN : node.value;
+        case 'UnaryExpression': {
+            const value = evaluate(node.argument);
+            if (node.operator === 'void') return value === UNKNOWN ? UNKNOWN : undefined;
+            if (value === UNKNOWN) return UNKNOWN;
+            switch (node.operator) {
+                case '!': return !value;
+                case '-': return typeof value === 'number' ? -value : UNKNOWN;
+                case '+': return typeof value === 'number' ? value  : UNKNOWN;
+                case 'typeof': return typeof value;
+            }
+            return UNKNOWN;
+        }
+        case 'BinaryExpression': {
+            const left = evaluate(node.left), right = evaluate(node.right);
+            if (left === UNKNOWN || right === UNKNOWN) return UNKNOWN;
+            switch (node.operator) {
+                case '===': return left === right;
+                case '!==': return left !== right;
+                case '==' : return left == right;
+                case '!=' : return left != right;
+            }
+            return UNKNOWN;
+        }
+        case 'LogicalExpression': {
+            const left = evaluate(node.left);
+            if (left === UNKNOWN) return UNKNOWN;
+            if (node.operator === '&&') return left ? evaluate(node.right) : left;
+            if (node.operator === '||') return left ? left : evaluate(node.right);
+            return left === null || left === undefined ? evaluate(node.right) : left;
+        }
+    }
+    return UNKNOWN;
+}
+
+function patternNames(pattern, names) {                                            // names bound by a declaration's id (an Identifier or a destructuring pattern)
+    if (!pattern) return names;
+    switch (pattern.type) {
+        case 'Identifier'       : names.push(pattern.name); break;
+        case 'ObjectPattern'    : for (const property of pattern.properties) patternNames(property.type === 'RestElement' ? property.argument : property.value, names); break;
+        case 'ArrayPattern'     : for (const element of pattern.elements) patternNames(element, names); break;
+        case 'RestElement'      : patternNames(pattern.argument, names); break;
+        case 'AssignmentPattern': patternNames(pattern.left, names); break;
+    }
+    return names;
+}
+
+function hoistedNames(node, strict, names = []) {                                 // var names a statement declares for its whole function (and block functions, in sloppy code)
+    if (!node || typeof node.type !== 'string') return names;
+    if (node.type === 'FunctionDeclaration') {
+        if (!strict && node.id) names.push(node.id.name);
+        return names;
+    }
+    if (node.type.includes('Function') || node.type.includes('Class')) return names;   // their own scope
+    if (node.type === 'VariableDeclaration' && node.kind === 'var') {
+        for (const declarator of node.declarations) patternNames(declarator.id, names);
+    }
+    for (const key of Object.keys(node)) {
+        if (key === 'loc' || key === 'range') continue;
+        const value = node[key];
+        for (const child of Array.isArray(value) ? value : [value]) {
+            if (child && typeof child === 'object') hoistedNames(child, strict, names);
+        }
+    }
+    return names;
+}
+
+function keepHoisted(kept, dropped, strict) {                                     // a dropped branch still declares its hoisted names (as undefined), like terser and esbuild keep them
+    const names = [...new Set(hoistedNames(dropped, strict))];
+    if (!names.length) return kept;
+    const declaration = { type: 'VariableDeclaration', kind: 'var',
+                          declarations: names.map(name => ({ type: 'VariableDeclarator', id: { type: 'Identifier', name }, init: null })) };
+    return kept === REMOVE ? declaration : { type: 'BlockStatement', body: [kept, declaration] };
+}
+
+const MANGLE_RESERVED = new Set(('break case catch class const continue debugger default delete do else enum export extends false finally for ' +
+                                 'function if import in instanceof new null return super switch this throw true try typeof var void while with ' +
+                                 'yield let static implements interface package private protected public await arguments eval undefined NaN Infinity').split(' '));
+const MANGLE_FIRST = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ$_';
+const MANGLE_REST  = MANGLE_FIRST + '0123456789';
+
+function mangledName(index) {                                                      // a .. _, then aa, ba, ..
+    let name = MANGLE_FIRST[index % MANGLE_FIRST.length];
+    index = Math.floor(index / MANGLE_FIRST.length);
+    while (index > 0) {
+        index--;
+        name += MANGLE_REST[index % MANGLE_REST.length];
+        index = Math.floor(index / MANGLE_REST.length);
+    }
+    return name;
+}
+
+const isFunctionNode = node => node.type === 'FunctionDeclaration' || node.type === 'FunctionExpression' || node.type === 'ArrowFunctionExpression';
+
+function mangle(program) {                                                         // shorten every local binding, scope by scope; returns the renamed count
+    const isModule = program.sourceType === 'module';
+    const scopes = [], occurrences = [], shorthands = [], declaredAt = new Map(), globals = new Map();
+
+    const newScope = (parent, isFunction) => {
+        const scope = { parent, isFunction, bindings: new Map(), through: new Set(), fixedNames: new Set(), unsafe: false };
+        scopes.push(scope);
+        return scope;
+    };
+    const functionScope = scope => { while (!scope.isFunction) scope = scope.parent; return scope; };
+    const declare = (scope, name) => {
+        let binding = scope.bindings.get(name);
+        if (!binding) {
+            binding = { name, fixed: scope.parent === null, newName: null };      // top level names can be globals or exports
+            scope.bindings.set(name, binding);
+        }
+        return binding;
+    };
+    const declarePattern = (pattern, scope) => {
+        if (!pattern) return;
+        switch (pattern.type) {
+            case 'Identifier'       : declaredAt.set(pattern, declare(scope, pattern.name)); break;
+            case 'ObjectPattern'    : for (const property of pattern.properties) declarePattern(property.type === 'RestElement' ? property.argument : property.value, scope); break;
+            case 'ArrayPattern'     : for (const element of pattern.elements) declarePattern(element, scope); break;
+            case 'RestElement'      : declarePattern(pattern.argument, scope); break;
+            case 'AssignmentPattern': declarePattern(pattern.left, scope); break;
+        }
+    };
+    const markUnsafe = scope => { for (; scope; scope = scope.parent) scope.unsafe = true; };   // eval / with can see every enclosing name
+
+    function visit(node, parent, key, scope) {
+        let inner = scope;
+        switch (node.type) {
+            case 'Program':
+                inner = newScope(null, true);
+                break;
+            case 'VariableDeclaration': {
+                const target = node.kind === 'var' ? functionScope(scope) : scope;
+                for (const declarator of node.declarations) declarePattern(declarator.id, target);
+                break;
+            }
+            case 'FunctionDeclaration':
+            case 'FunctionExpression':
+            case 'ArrowFunctionExpression':
+                if (node.type === 'FunctionDeclaration' && node.id) {
+                    const binding = declare(scope, node.id.name);
+                    declaredAt.set(node.id, binding);
+                    if (!scope.isFunction && !isModule) {                          // sloppy block functions also write a var (Annex B), keep both names
+                        binding.fixed = true;
+                        declare(functionScope(scope), node.id.name).fixed = true;
+                    }
+                }
+                inner = newScope(scope, true);
+                if (node.type === 'FunctionExpression' && node.id) declarePattern(node.id, inner);
+                for (const param of node.params) declarePattern(param, inner);
+                break;
+            case 'ClassDeclaration':
+                if (node.id) declarePattern(node.id, scope);
+                break;
+            case 'ClassExpression':
+                if (node.id) { inner = newScope(scope, false); declarePattern(node.id, inner); }
+                break;
+            case 'BlockStatement':                                                 // function and catch bodies share the scope of their parent
+                if (!(parent && key === 'body' && (isFunctionNode(parent) || parent.type === 'CatchClause'))) inner = newScope(scope, false);
+                break;
+            case 'StaticBlock':
+                inner = newScope(scope, true);
+                break;
+            case 'CatchClause':
+                inner = newScope(scope, false);
+                declarePattern(node.param, inner);
+                break;
+            case 'ForStatement':
+            case 'ForInStatement':
+            case 'ForOfStatement':
+            case 'SwitchStatement':
+                inner = newScope(scope, false);
+                break;
+            case 'WithStatement':
+                markUnsafe(scope);
+                break;
+            case 'CallExpression':
+                if (node.callee.type === 'Identifier' && node.callee.name === 'eval') markUnsafe(scope);
+                break;
+            case 'Property':
+                if (node.shorthand) shorthands.push(node);
+                break;
+            case 'Identifier':
+                if (isReference(parent, key)) occurrences.push({ node, scope });
+                break;
+            case 'JSXIdentifier':                                                  // <Component />, not <div /> or attribute names
+                if ((key === 'name' && (parent.type === 'JSXOpeningElement' || parent.type === 'JSXClosingElement') && !/^[a-z]/.test(node.name)) ||
+                    (key === 'object' && parent.type === 'JSXMemberExpression' && node.name !== 'this')) occurrences.push({ node, scope });
+                break;
+        }
+        for (const childKey of Object.keys(node)) {
+            if (childKey === 'loc' || childKey === 'range') continue;
+            const outer = (childKey === 'id' && node.type === 'FunctionDeclaration') || (childKey === 'discriminant' && node.type === 'SwitchStatement');
+            const value = node[childKey];
+            if (Array.isArray(value)) {
+                for (const item of value) if (item && typeof item.type === 'string') visit(item, node, childKey, outer ? scope : inner);
+            } else if (value && typeof value.type === 'string') {
+                visit(value, node, childKey, outer ? scope : inner);
+            }
+        }
+    }
+    visit(program, null, null, null);
+
+    for (const occurrence of occurrences) {                                        // resolve each name, recording it on every scope it passes through
+        const name = occurrence.node.name;
+        let scope = occurrence.scope;
+        while (scope && !scope.bindings.has(name)) scope = scope.parent;
+        let binding = scope && scope.bindings.get(name);
+        if (!binding) {
+            binding = globals.get(name) || { name, fixed: true, newName: null };
+            globals.set(name, binding);
+        }
+        const declared = declaredAt.get(occurrence.node);
+        if (declared && declared !== binding) declared.fixed = binding.fixed = true;   // e.g. `var e` inside `catch (e)` writes the catch parameter
+        occurrence.binding = binding;
+        for (let through = occurrence.scope; through !== scope; through = through.parent) through.through.add(binding);
+    }
+    for (let index = scopes.length - 1; index >= 0; index--) {                     // children come after their parents, so this runs bottom-up
+        const scope = scopes[index];
+        for (const binding of scope.bindings.values()) {
+            if (scope.unsafe) binding.fixed = true;
+            if (binding.fixed) scope.fixedNames.add(binding.name);
+        }
+        if (scope.parent) for (const name of scope.fixedNames) scope.parent.fixedNames.add(name);
+    }
+
+    let renamed = 0;
+    for (const scope of scopes) {                                                  // top-down: outer names are final before inner scopes pick theirs
+        const avoid = new Set(scope.fixedNames);
+        for (const binding of scope.through) avoid.add(binding.newName || binding.name);
+        let index = 0;
+        for (const binding of scope.bindings.values()) {
+            if (binding.fixed) continue;
+            let name;
+            do { name = mangledName(index++); } while (avoid.has(name) || MANGLE_RESERVED.has(name));
+            binding.newName = name;
+            if (name !== binding.name) renamed++;
+        }
+    }
+
+    for (const property of shorthands) {                                           // {a} keeps its key: {a: b}
+        const target = property.value.type === 'AssignmentPattern' ? property.value.left : property.value;
+        if (target.type === 'Identifier' && target.name === property.key.name) property.key = { ...property.key };
+    }
+    for (const { node, binding } of occurrences) {
+        if (binding.newName) node.name = binding.newName;
+    }
+    for (const property of shorthands) {
+        const target = property.value.type === 'AssignmentPattern' ? property.value.left : property.value;
+        if (target.type === 'Identifier' && target.name !== property.key.name) property.shorthand = false;
+    }
+    return renamed;
+}
+
+const TRANSFORMS = {
+    strip_console(params, stats) {                                                 // console.* calls: statements removed, expressions become void 0
+        const methods = Array.isArray(params.methods) ? new Set(params.methods) : null;
+        const isConsoleCall = node => node.type === 'CallExpression' && node.callee.type === 'MemberExpression' &&
+                                      !node.callee.computed && node.callee.object.type === 'Identifier' &&
+                                      node.callee.object.name === 'console' && (!methods || methods.has(node.callee.property.name));
+        return { enter(node) {
+            if (node.type === 'ExpressionStatement' && isConsoleCall(node.expression)) { stats.changes++; return REMOVE; }
+            if (isConsoleCall(node)) { stats.changes++; return literal(undefined); }
+        } };
+    },
+    strip_debugger(params, stats) {
+        return { enter(node) {
+            if (node.type === 'DebuggerStatement') { stats.changes++; return REMOVE; }
+        } };
+    },
+    rename(params, stats) {                                                        // every variable with that name, in any scope
+        const names = params.map;
+        const renamed = name => Object.prototype.hasOwnProperty.call(names, name);
+        return { enter(node, parent, key) {
+            if (node.type === 'Property' && node.shorthand && node.key.type === 'Identifier' && renamed(node.key.name)) {
+                node.key = { ...node.key }; node.shorthand = false;                // {a} keeps its key: {a: b}
+            }
+            if ((node.type === 'ImportSpecifier' || node.type === 'ExportSpecifier') && node.local.type === 'Identifier' && renamed(node.local.name)) {
+                const external = node.type === 'ImportSpecifier' ? 'imported' : 'exported';
+                if (node[external] === node.local || node[external].name === node.local.name) node[external] = { ...node[external] };
+            }
+            if (node.type === 'Identifier' && renamed(node.name) && isReference(parent, key)) {
+                stats.changes++;
+                return { ...node, name: names[node.name] };
+            }
+        } };
+    },
+    define(params, stats) {                                                        // global names / member chains replaced by constants
+        const values = params.map;
+        return { enter(node, parent, key) {
+            if (isBinding(parent, key)) return node;                               // skips whole patterns, e.g. const {DEBUG} = x
+            if (node.type !== 'Identifier' && node.type !== 'MemberExpression') return;
+            if (!isReference(parent, key)) return;
+            const name = dottedName(node);
+            if (name !== null && Object.prototype.hasOwnProperty.call(values, name)) {
+                stats.changes++;
+                return literal(values[name]);
+            }
+        } };
+    },
+    remove_dead_branches(params, stats) {                                          // if / ?: / && / || / ?? / while on constant tests
+        let strict = false;                                                        // block functions are block scoped: not hoisted
+        return { enter(node) {
+            if (node.type === 'Program') {
+                strict = node.sourceType === 'module' || node.body.some(statement => statement.directive === 'use strict');
+            }
+        }, leave(node) {
+            switch (node.type) {
+                case 'IfStatement': {
+                    const test = evaluate(node.test);
+                    if (test === UNKNOWN) return;
+                    stats.changes++;
+                    return test ? keepHoisted(node.consequent, node.alternate, strict) : keepHoisted(node.alternate || REMOVE, node.consequent, strict);
+                }
+                case 'ConditionalExpression': {
+                    const test = evaluate(node.test);
+                    if (test === UNKNOWN) return;
+                    stats.changes++;
+                    return test ? node.consequent : node.alternate;
+                }
+                case 'LogicalExpression': {
+                    const left = evaluate(node.left);
+                    if (left === UNKNOWN) return;
+                    stats.changes++;
+                    const keepLeft = node.operator === '&&' ? !left : node.operator === '||' ? !!left : left !== null && left !== undefined;
+                    return keepLeft ? node.left : node.right;
+                }
+                case 'WhileStatement': {
+                    const test = evaluate(node.test);
+                    if (test === UNKNOWN || test) return;
+                    stats.changes++;
+                    return keepHoisted(REMOVE, node.body, strict);
+                }
+            }
+        } };
+    },
+    mangle(params, stats) {                                                        // short names for local bindings (top level names are kept)
+        return { enter(node) {
+            if (node.type === 'Program') { stats.changes += mangle(node); return node; }
+        } };
+    },
+};
+
+function runTransforms(ast, steps) {                                               // apply the steps in order, one walk each
+    const stats = [];
+    for (const step of steps) {
+        const stepStats = { name: step.name, changes: 0 };
+        const result = walk(ast, null, null, TRANSFORMS[step.name](step.params || {}, stepStats));
+        if (result !== ast) throw new Error(`transform ${step.name} replaced the Program`);
+        stats.push(stepStats);
+    }
+    return stats;
+}
+"""
+
+
+class JS__AST__Transforms(Type_Safe):                                                # Built-in transform steps, run inside the parser process
+
+    def validate(self, steps: List[JS__AST__Transform__Step]                         # Steps as sent to the script, raising ValueError on unknown names or bad params
+                 ) -> List[Dict[str, Any]]:
+        if len(steps) > TRANSFORM__MAX_STEPS:
+            raise ValueError(f"at most {TRANSFORM__MAX_STEPS} transform steps are allowed")
+        validated = []
+        for step in steps:
+            if step.name not in TRANSFORM__STEPS:
+                raise ValueError(f"unknown transform '{step.name}', expected one of: {', '.join(TRANSFORM__STEPS)}")
+            params = dict(step.params or {})
+            if step.name in TRANSFORM__MAP_STEPS:
+                self._validate_map(step.name, params.get('map'))
+            if step.name == 'strip_console' and params.get('methods') is not None:
+                methods = params['methods']
+                if type(methods) is not list or not all(type(method) is str for method in methods):
+                    raise ValueError("strip_console: params.methods must be a list of method names")
+            validated.append({'name': step.name, 'params': params})
+        return validated
+
+    def _validate_map(self, name: str, mapping: Any):
+        if type(mapping) is not dict or not mapping:
+            raise ValueError(f"{name}: params.map must be a non-empty object")
+        for key, value in mapping.items():
+            if name == 'rename':
+                if not REGEX__TRANSFORM__NAME.match(key) or type(value) is not str or not REGEX__TRANSFORM__NAME.match(value):
+                    raise ValueError(f"rename: '{key}' -> '{value}' must map an identifier to an identifier")
+            else:
+                if not REGEX__TRANSFORM__DOTTED.match(key):
+                    raise ValueError(f"define: '{key}' must be an identifier or a dotted member chain")
+                if value is not None and type(value) not in (str, int, float, bool):
+                    raise ValueError(f"define: the value for '{key}' must be a string, number, boolean or null")
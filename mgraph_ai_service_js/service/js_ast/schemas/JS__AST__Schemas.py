@@ -7,6 +7,7 @@ from osbot_utils.type_safe.primitives.safe_int.Safe_Int                 import S
 from osbot_utils.type_safe.primitives.safe_uint.Safe_UInt import Safe_UInt
 
 from mgraph_ai_service_js.schemas.Safe_Str__Javascript                  import Safe_Str__Javascript
+from mgraph_ai_service_js.schemas.Safe_Str__Javascript__Bundle          import Safe_Str__Javascript__Bundle
 
 
 class Safe_Str__ECMAVersion(Safe_Str):
@@ -21,6 +22,12 @@ class Safe_Str__SourceType(Safe_Str):
     regex_mode        = Enum__Safe_Str__Regex_Mode.MATCH                        # Use MATCH mode for validation
     strict_validation = True                                                    # Raise error on invalid input
 
+class Safe_Str__Stream_Format(Safe_Str):                                             # Streaming response format
+    max_length        = 10
+    regex             = re.compile(r'^(ndjson|json)$')                              # NDJSON events or one chunked JSON document
+    regex_mode        = Enum__Safe_Str__Regex_Mode.MATCH                        # Use MATCH mode for validation
+    strict_validation = True                                                    # Raise error on invalid input
+
 
 class Safe_Str__NodeType(Safe_Str):                                                  # ESTree node type identifier
     max_length = 50
@@ -43,7 +50,7 @@ class JS__AST__Parser__Options(Type_Safe):
     locations    : bool                  = True
     ranges       : bool                  = True
     raw          : bool                  = True
-    tokens       : bool                  = False
+    tokens       : bool                  = False                                       # also return the columnar token stream
     comments     : bool                  = True
     tolerant     : bool                  = False
 
@@ -53,7 +60,10 @@ class JS__AST__Generator__Options(Type_Safe):
     line_end     : Safe_Str__Code__Formatting  = Safe_Str__Code__Formatting("\n")
     start_indent : Safe_Str__Code__Formatting  = Safe_Str__Code__Formatting("")
     comments     : bool                        = True
-    source_map   : bool                        = False
+    source_map        : bool                   = False                                # build a source map while generating
+    source_map_inline : bool                   = False                                # append the map to code as a data: URL instead of returning it
+    source_file       : str                    = 'input.js'                           # 'sources' entry the map points back to
+    compact           : bool                   = False                                # no indentation, line breaks, comments or optional spaces
 
 
 class JS__AST__Location(Type_Safe):                                                  # Source location information
@@ -70,18 +80,30 @@ class JS__AST__Node(Type_Safe):
 
 
 class JS__AST__Parse__Request(Type_Safe):                                            # Parse request schema
-    code    : Safe_Str__Javascript
-    options : Optional[JS__AST__Parser__Options]
+    code          : Safe_Str__Javascript
+    options       : Optional[JS__AST__Parser__Options]
+    return_handle : bool = False                                                      # keep the AST server side and return a handle instead
 
 
 class JS__AST__Parse__Response(Type_Safe):                                           # Parse response schema
     success         : bool
     ast             : Optional[Dict[str, Any]]
+    tokens          : Optional[Dict[str, List]]                                       # {types, type_ids, starts, ends} when options.tokens is set
+    handle          : Optional[str]                                                   # set (and ast left empty) when return_handle was requested
     error           : Optional[Safe_Str]
     error_location  : Optional[JS__AST__Location]
     parse_time_ms   : Safe_Int = Safe_Int(0)
 
 
+class JS__AST__Tokenize__Response(Type_Safe):                                        # Tokens-only response schema
+    success          : bool
+    tokens           : Optional[Dict[str, List]]                                      # token i is types[type_ids[i]] spanning starts[i]..ends[i]
+    token_count      : Safe_UInt = Safe_UInt(0)
+    error            : Optional[Safe_Str]
+    error_location   : Optional[JS__AST__Location]
+    tokenize_time_ms : Safe_Int  = Safe_Int(0)
+
+
 class JS__AST__Generate__Request(Type_Safe):                                         # Generate request schema
     ast     : Dict[str, Any]
     options : Optional[JS__AST__Generator__Options]
@@ -90,6 +112,7 @@ class JS__AST__Generate__Request(Type_Safe):
 class JS__AST__Generate__Response(Type_Safe):                                        # Generate response schema
     success           : bool
     code              : Optional[Safe_Str__Javascript]
+    source_map        : Optional[Dict[str, Any]]                                      # source map v3, unless inlined into code
     error             : Optional[Safe_Str]
     generation_time_ms: Safe_Int = Safe_Int(0)
 
@@ -106,7 +129,196 @@ class JS__AST__Roundtrip__Response(Type_Safe):
     original_ast     : Optional[Dict[str, Any]]
     generated_code   : Optional[Safe_Str__Javascript]
     regenerated_ast  : Optional[Dict[str, Any]]
+    diff_path        : Optional[str]                                                  # JSON pointer of the first AST difference
     error            : Optional[Safe_Str]
     parse_time_ms    : Safe_Int                   = Safe_Int(0)
     generate_time_ms : Safe_Int                   = Safe_Int(0)
-    total_time_ms    : Safe_Int                   = Safe_Int(0)
\ No newline at end of file
+    total_time_ms    : Safe_Int                   = Safe_Int(0)
+
+class JS__AST__Compare__Result(Type_Safe):                                           # Structural AST comparison result
+    is_equal  : bool          = False
+    diff_path : Optional[str]                                                          # JSON pointer of the first difference, None when equal
+
+
+class JS__AST__Query__Request(Type_Safe):                                            # ESQuery selector request schema
+    code              : Optional[Safe_Str__Javascript]
+    handle            : Optional[str]                                                 # a stored AST, queried instead of parsing code
+    selectors         : List[str]
+    options           : Optional[JS__AST__Parser__Options]
+    include_ancestors : bool                         = False
+    max_matches       : Safe_UInt                    = Safe_UInt(1000)                # max matches returned per selector
+
+
+class JS__AST__Query__Response(Type_Safe):                                           # ESQuery selector response schema
+    success         : bool
+    results         : Optional[List[Dict[str, Any]]]                                  # one {selector, matches, truncated} per selector
+    error           : Optional[Safe_Str]
+    error_location  : Optional[JS__AST__Location]
+    query_time_ms   : Safe_Int = Safe_Int(0)
+
+
+class JS__AST__Parse__Batch__Item(Type_Safe):                                        # One source file in a batch parse
+    id           : str
+    code         : Safe_Str__Javascript
+    options      : Optional[JS__AST__Parser__Options]
+    start_offset : int = 0                                                           # where code sits in a larger file, AST positions are shifted to match
+    start_line   : int = 1
+    start_column : int = 0
+
+
+class JS__AST__Parse__Batch__Request(Type_Safe):                                     # Batch parse request schema
+    items     : List[JS__AST__Parse__Batch__Item]
+    processes : Safe_UInt = Safe_UInt(1)                                             # Deno processes the items are spread across
+
+
+class JS__AST__Parse__Stream__Request(Type_Safe):                                    # Streaming parse request schema
+    code    : Safe_Str__Javascript
+    options : Optional[JS__AST__Parser__Options]
+    format  : Safe_Str__Stream_Format = Safe_Str__Stream_Format("ndjson")
+
+
+class JS__AST__Graph__Request(Type_Safe):                                             # AST to node/edge graph request schema
+    code              : Safe_Str__Javascript
+    options           : Optional[JS__AST__Parser__Options]
+    include_positions : bool = True                                                   # False prunes start/end and loc from every node
+
+
+class JS__AST__Graph__Response(Type_Safe):                                            # Compact node/edge graph of an AST
+    success        : bool
+    node_types     : List[str]                                                        # interned, referenced by type_id
+    edge_types     : List[str]                                                        # interned child keys, referenced by edge_type_id
+    nodes          : list                                                             # [type_id, attrs, start, end, start_line, start_column, end_line, end_column]
+    edges          : list                                                             # [from, to, edge_type_id, list_index] (list_index -1 outside lists)
+    error          : Optional[Safe_Str]
+    error_location : Optional[JS__AST__Location]
+    graph_time_ms  : Safe_Int = Safe_Int(0)
+
+
+class JS__AST__Node__Request(Type_Safe):                                              # Subtree fetch from a stored AST
+    handle    : str
+    pointer   : str       = ''                                                        # RFC 6901 JSON pointer, '' for the Program
+    max_depth : Safe_UInt = Safe_UInt(2)                                              # node levels returned below the pointer before stubbing
+
+
+class JS__AST__Node__Response(Type_Safe):                                             # Subtree fetch response
+    success   : bool
+    handle    : Optional[str]
+    pointer   : Optional[str]
+    node      : Any                                                                   # subtree with deeper nodes as {type, start, end, truncated, pointer} stubs
+    error     : Optional[Safe_Str]
+
+
+class JS__AST__Outline__Response(Type_Safe):                                          # Declarations, imports and exports of a file, without bodies
+    success         : bool
+    imports         : List[Dict[str, Any]]                                            # {source, specifiers: [{kind, local, imported}], start, end}
+    exports         : List[Dict[str, Any]]                                            # {kind: named|default|all|commonjs, ...}
+    declarations    : List[Dict[str, Any]]                                            # functions, classes (with members) and variables
+    error           : Optional[Safe_Str]
+    error_location  : Optional[JS__AST__Location]
+    outline_time_ms : Safe_Int = Safe_Int(0)
+
+
+class JS__AST__Parse__Bundle__Request(Type_Safe):                                    # Bundle-aware parse request schema
+    code          : Safe_Str__Javascript__Bundle
+    options       : Optional[JS__AST__Parser__Options]
+    processes     : Safe_UInt = Safe_UInt(4)                                         # Deno processes the modules are spread across
+    stitch        : bool      = True                                                 # one Program AST, or the runtime plus one AST per module
+    return_handle : bool      = False                                                # keep the stitched AST server side and return a handle instead
+
+
+class JS__AST__Parse__Bundle__Response(Type_Safe):                                   # Bundle-aware parse response schema
+    success        : bool
+    bundle_format  : Optional[str]                                                   # webpack | esbuild, None when the bundle was parsed as one program
+    ast            : Optional[Dict[str, Any]]                                        # stitched Program, or the runtime with 0 placeholders when not stitching
+    modules        : Optional[List[Dict[str, Any]]]                                  # {id, start, end, success, ast | error} when not stitching
+    module_count   : Safe_UInt = Safe_UInt(0)
+    handle         : Optional[str]                                                   # set (and ast left empty) when return_handle was requested
+    error          : Optional[Safe_Str]
+    error_location : Optional[JS__AST__Location]
+    parse_time_ms  : Safe_Int = Safe_Int(0)
+
+
+class JS__AST__Text__Edit(Type_Safe):                                                # One text change to a parsed source
+    start : Safe_UInt                                                                # offsets in the handle's current source, as in the AST (UTF-16 code units)
+    end   : Safe_UInt
+    text  : str                                                                      # replacement ('' deletes)
+
+
+class JS__AST__Reparse__Request(Type_Safe):                                          # Incremental re-parse of a stored AST
+    handle     : str
+    edits      : List[JS__AST__Text__Edit]                                           # non-overlapping, all relative to the same (pre-edit) source
+    return_ast : bool = False                                                        # whole updated Program instead of the statement diff
+
+
+class JS__AST__Reparse__Response(Type_Safe):                                         # Incremental re-parse response
+    success         : bool
+    handle          : Optional[str]                                                  # None when the handle is unknown or expired
+    ast             : Optional[Dict[str, Any]]                                       # set when return_ast was requested
+    diff            : Optional[Dict[str, Any]]                                       # {start_index, delete_count, statements, offset_delta, line_delta, start, end}
+    full_reparse    : bool                                                           # the whole file had to be parsed again
+    conflict        : bool                                                           # the handle was updated by another reparse meanwhile, nothing applied
+    error           : Optional[Safe_Str]
+    error_location  : Optional[JS__AST__Location]
+    reparse_time_ms : Safe_Int = Safe_Int(0)
+
+
+class JS__AST__Diff__Request(Type_Safe):                                             # Structural diff between two sources (or stored ASTs)
+    code_before   : Optional[Safe_Str__Javascript]
+    code_after    : Optional[Safe_Str__Javascript]
+    handle_before : Optional[str]                                                    # used instead of the code when set
+    handle_after  : Optional[str]
+    options       : Optional[JS__AST__Parser__Options]
+
+
+class JS__AST__Diff__Response(Type_Safe):                                            # Structural diff response
+    success        : bool
+    edits          : Optional[List[Dict[str, Any]]]                                  # {op: delete|update|move|insert, path, new_path, type, changes | node}
+    edit_count     : Safe_UInt = Safe_UInt(0)
+    error          : Optional[Safe_Str]
+    error_location : Optional[JS__AST__Location]
+    diff_time_ms   : Safe_Int = Safe_Int(0)
+
+
+class JS__AST__Transform__Step(Type_Safe):                                           # One built-in transform, e.g. {name: 'rename', params: {map: {a: 'b'}}}
+    name   : str
+    params : Dict[str, Any]
+
+
+class JS__AST__Transform__Request(Type_Safe):                                        # parse -> transforms -> generate in one parser process
+    code              : Safe_Str__Javascript
+    steps             : List[JS__AST__Transform__Step]                               # applied in order
+    parser_options    : Optional[JS__AST__Parser__Options]
+    generator_options : Optional[JS__AST__Generator__Options]
+
+
+class JS__AST__Transform__Response(Type_Safe):                                       # Transform response
+    success           : bool
+    code              : Optional[Safe_Str__Javascript]
+    source_map        : Optional[Dict[str, Any]]                                     # source map v3, unless inlined into code
+    steps             : Optional[List[Dict[str, Any]]]                               # {name, changes} per step
+    error             : Optional[Safe_Str]
+    error_location    : Optional[JS__AST__Location]
+    transform_time_ms : Safe_Int = Safe_Int(0)
+
+
+class JS__AST__Minify__Request(Type_Safe):                                           # transforms -> mangle -> compact generate in one parser process
+    code           : Safe_Str__Javascript
+    mangle         : bool = True                                                     # shorten local names (top level names are kept)
+    steps          : List[JS__AST__Transform__Step]                                  # extra transforms run first, e.g. strip_console
+    parser_options : Optional[JS__AST__Parser__Options]
+    source_map     : bool = False                                                    # map back to the input (keeps the spaces astring writes)
+
+
+class JS__AST__Minify__Response(Type_Safe):                                          # Minify response with output size statistics
+    success           : bool
+    code              : Optional[Safe_Str__Javascript]
+    source_map        : Optional[Dict[str, Any]]
+    steps             : Optional[List[Dict[str, Any]]]                               # {name, changes} per step
+    input_bytes       : Safe_UInt = Safe_UInt(0)
+    output_bytes      : Safe_UInt = Safe_UInt(0)
+    input_gzip_bytes  : Safe_UInt = Safe_UInt(0)
+    output_gzip_bytes : Safe_UInt = Safe_UInt(0)
+    ratio             : float     = 1.0                                              # output_bytes / input_bytes
+    error             : Optional[Safe_Str]
+    error_location    : Optional[JS__AST__Location]
+    minify_time_ms    : Safe_Int = Safe_Int(0)
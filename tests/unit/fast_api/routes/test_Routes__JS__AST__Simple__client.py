@@ -1,6 +1,8 @@
+import json
 from unittest                                 import TestCase
 from tests.unit.Service__Fast_API__Test_Objs  import setup__service_fast_api_test_objs
 from tests.unit.Service__Fast_API__Test_Objs  import TEST_API_KEY__NAME, TEST_API_KEY__VALUE
+from mgraph_ai_service_js.service.deno.Deno__Module__Circuits import deno_module_circuits
 
 
 class test_Routes__JS__AST__Simple__client(TestCase):
@@ -11,6 +13,9 @@ class test_Routes__JS__AST__Simple__client(TestCase):
             cls.client = _.fast_api__client
             cls.client.headers[TEST_API_KEY__NAME] = TEST_API_KEY__VALUE
 
+    def setUp(self):
+        deno_module_circuits.reset()                                                # one CDN test tripping the shared breaker must not turn later ones --cached-only
+
     def test_js_to_ast_simple(self):
         """Test simple JS to AST conversion"""
         request_data = {
@@ -300,3 +305,26 @@ class test_Routes__JS__AST__Simple__client(TestCase):
         assert response.status_code in [404, 500]
         error = response.json()
         assert 'detail' in error
+
+    def test_url_to_ast_stream(self):
+        """Test URL to AST streaming as NDJSON events"""
+        request_data = { "url": "https://cdnjs.cloudflare.com/ajax/libs/js-cookie/3.0.1/js.cookie.min.js" }
+
+        response = self.client.get('/js-ast-simple/url-to-ast-stream', params=request_data)
+
+        if response.status_code == 404:
+            self.skipTest("External URL not accessible in test environment")
+
+        assert response.status_code             == 200
+        assert response.headers['content-type'] == 'application/x-ndjson'
+        events = [json.loads(line) for line in response.text.splitlines()]
+        assert events[0 ]['event'] == 'program'
+        assert events[-1]['event'] == 'end'
+        assert events[-1]['statements'] == len(events) - 2
+
+    def test_url_to_ast_stream_invalid_url(self):
+        """Test URL to AST streaming with invalid URL format"""
+        response = self.client.get('/js-ast-simple/url-to-ast-stream', params={ "url": "not-a-valid-url" })
+
+        assert response.status_code == 400
+        assert 'must start with http://' in response.json()['detail']
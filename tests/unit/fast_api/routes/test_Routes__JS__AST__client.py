@@ -1,6 +1,8 @@
+import json
 from unittest                                 import TestCase
 from tests.unit.Service__Fast_API__Test_Objs  import setup__service_fast_api_test_objs
 from tests.unit.Service__Fast_API__Test_Objs  import TEST_API_KEY__NAME, TEST_API_KEY__VALUE
+from mgraph_ai_service_js.service.deno.Deno__Module__Circuits import deno_module_circuits
 
 
 
@@ -12,6 +14,8 @@ class test_Routes__JS__AST__client(TestCase):
             cls.client = _.fast_api__client
             cls.client.headers[TEST_API_KEY__NAME] = TEST_API_KEY__VALUE
 
+    def setUp(self):
+        deno_module_circuits.reset()                                                # one CDN test tripping the shared breaker must not turn later ones --cached-only
 
     def test__ast_health(self):                                                      # Test health endpoint
         response = self.client.get('/js-ast/health')
@@ -334,4 +338,133 @@ class test_Routes__JS__AST__client(TestCase):
         assert response.status_code == 200
         result = response.json()
         assert result['success']    is True
-        assert "function test"      in result['code']
\ No newline at end of file
+        assert "function test"      in result['code']
+
+    def test__ast_query(self):                                                       # Test ESQuery selector endpoint
+        request_data = { "code"        : "import a from 'a'; fetch('/x'); console.log(a);",
+                         "selectors"   : ["CallExpression[callee.name='fetch']"]            ,
+                         "max_matches" : 10                                                  }
+
+        response = self.client.post('/js-ast/query', json=request_data)
+
+        assert response.status_code == 200
+        result = response.json()
+        assert result['success'] is True
+        assert len(result['results'])                                   == 1
+        assert result['results'][0]['matches'][0]['node']['callee']     == {'type': 'Identifier', 'name': 'fetch',
+                                                                            'start': 19, 'end': 24, 'range': [19, 24],
+                                                                            'loc': {'start': {'line': 1, 'column': 19},
+                                                                                    'end'  : {'line': 1, 'column': 24}}}
+
+    def test__ast_parse_batch(self):                                                 # Test NDJSON batch parse endpoint
+        request_data = { "items": [ {"id": "a.js", "code": "const a = 1;"},
+                                    {"id": "b.js", "code": "const b = ;" } ] }
+
+        response = self.client.post('/js-ast/parse-batch', json=request_data)
+
+        assert response.status_code                 == 200
+        assert response.headers['content-type']     == 'application/x-ndjson'
+        results = [json.loads(line) for line in response.text.splitlines()]
+        assert [result['id'     ] for result in results] == ['a.js', 'b.js']
+        assert [result['success'] for result in results] == [True  , False ]
+        assert results[0]['ast']['type']            == 'Program'
+
+    def test__ast_tokenize(self):                                                    # Test tokens-only endpoint
+        response = self.client.post('/js-ast/tokenize', json={"code": "let a = b;"})
+
+        assert response.status_code == 200
+        result = response.json()
+        assert result['success']              is True
+        assert result['token_count']          == 5
+        assert result['tokens']['starts']     == [0, 4, 6, 8, 9]
+        assert 'ast'                          not in result
+
+    def test__ast_to_graph(self):                                                    # Test AST to graph endpoint
+        response = self.client.post('/js-ast/to-graph', json={"code": "let a = b;", "include_positions": False})
+
+        assert response.status_code == 200
+        result = response.json()
+        assert result['success']          is True
+        assert result['node_types'][0]    == 'Program'
+        assert result['nodes'][0]         == [0, {'sourceType': 'module'}]
+        assert len(result['edges'])       == len(result['nodes']) - 1
+
+    def test__ast_node__handle(self):                                                # Test parse with a handle, then fetch a subtree
+        response = self.client.post('/js-ast/parse', json={"code": "let a = b;", "return_handle": True})
+        assert response.status_code == 200
+        handle = response.json()['handle']
+        assert response.json()['ast'] is None
+
+        response = self.client.get(f'/js-ast/node/{handle}', params={"pointer": "/body/0", "max_depth": 0})
+        assert response.status_code == 200
+        node = response.json()['node']
+        assert node['type']                         == 'VariableDeclaration'
+        assert node['declarations'][0]['truncated'] is True
+
+        assert self.client.get('/js-ast/node/unknown').status_code == 404
+
+    def test__ast_reparse(self):                                                     # Test incremental re-parse of a stored AST
+        code   = "let a = 1;\nlet b = 2;\nlet c = 3;\nlet d = 4;"
+        handle = self.client.post('/js-ast/parse', json={"code": code, "return_handle": True}).json()['handle']
+
+        response = self.client.post('/js-ast/reparse', json={"handle": handle, "edits": [{"start": 19, "end": 20, "text": "20"}]})
+        assert response.status_code == 200
+        diff = response.json()['diff']
+        assert (diff['start_index'], diff['delete_count'], diff['offset_delta']) == (0, 3, 1)
+        assert diff['statements'][1]['declarations'][0]['init']['value']        == 20
+
+        assert self.client.post('/js-ast/reparse', json={"handle": handle , "edits": [{"start": 0, "end": 99, "text": ""}]}).status_code == 400
+        assert self.client.post('/js-ast/reparse', json={"handle": "none" , "edits": [{"start": 0, "end": 0 , "text": ""}]}).status_code == 404
+
+    def test__ast_diff(self):                                                        # Test structural diff endpoint
+        response = self.client.post('/js-ast/diff', json={"code_before": "f(1); g();", "code_after": "g();\nf(2);"})
+
+        assert response.status_code == 200
+        edits = response.json()['edits']
+        assert [(edit['op'], edit.get('path'), edit.get('new_path')) for edit in edits] == [('update', '/body/0/expression/arguments/0', '/body/1/expression/arguments/0'),
+                                                                                           ('move'  , '/body/0'                       , '/body/1'                       )]
+        assert self.client.post('/js-ast/diff', json={"code_before": "f(1);"}).status_code == 400
+
+    def test__ast_outline(self):                                                     # Test outline endpoint
+        response = self.client.post('/js-ast/outline', json={"code": "export default function main() {}\nmodule.exports.x = 1;"})
+
+        assert response.status_code == 200
+        result = response.json()
+        assert result['success']                         is True
+        assert [entry['kind'] for entry in result['exports']] == ['default', 'commonjs']
+        assert result['declarations'][0]['name']         == 'main'
+
+    def test__ast_parse_bundle(self):                                                # Test bundle-aware parse endpoint
+        code     = "!function(e){e[0]()}([function(e,t){t.a=1},function(e,t){t.b=2}]);"
+        response = self.client.post('/js-ast/parse-bundle', json={"code": code, "processes": 2})
+
+        assert response.status_code == 200
+        result = response.json()
+        assert result['bundle_format']                   == 'webpack'
+        assert result['module_count']                    == 2
+        assert result['ast']                             == self.client.post('/js-ast/parse', json={"code": code}).json()['ast']
+
+        assert self.client.post('/js-ast/parse-bundle', json={"code": "const = ;"}).status_code == 400
+
+    def test__ast_transform(self):                                                   # Test server-side transform pipeline endpoint
+        response = self.client.post('/js-ast/transform', json={"code" : "debugger;\nlet userName = 1;\nuse(userName);",
+                                                               "steps": [{"name": "strip_debugger"},
+                                                                         {"name": "rename", "params": {"map": {"userName": "u"}}}]})
+        assert response.status_code == 200
+        result = response.json()
+        assert result['code'].strip()                    == 'let u = 1;\nuse(u);'
+        assert [step['changes'] for step in result['steps']] == [1, 2]
+        assert self.client.post('/js-ast/transform', json={"code": "x;", "steps": [{"name": "unknown"}]}).status_code == 400
+        assert self.client.post('/js-ast/transform', json={"code": "x;", "steps": []}).status_code                      == 422
+
+    def test__ast_minify(self):                                                      # Test minify endpoint
+        code     = "function greet(name) {\n  console.log(name);\n  return 'Hello ' + name;\n}"
+        response = self.client.post('/js-ast/minify', json={"code": code, "steps": [{"name": "strip_console"}]})
+
+        assert response.status_code == 200
+        result = response.json()
+        assert result['code']                            == "function greet(a){return 'Hello '+a;}"
+        assert result['input_bytes']                     == len(code)
+        assert result['output_bytes']                    == len(result['code'])
+        assert result['ratio']                           <  1
+        assert self.client.post('/js-ast/minify', json={"code": "const = ;"}).status_code == 400
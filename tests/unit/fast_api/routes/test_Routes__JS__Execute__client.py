@@ -1,8 +1,8 @@
+import json
 from unittest                                 import TestCase
 from osbot_utils.utils.Objects                import obj
 from tests.unit.Service__Fast_API__Test_Objs  import setup__service_fast_api_test_objs
 from tests.unit.Service__Fast_API__Test_Objs  import TEST_API_KEY__NAME, TEST_API_KEY__VALUE
-import json
 
 
 class test_Routes__JS__Execute__client(TestCase):
@@ -264,3 +264,44 @@ class test_Routes__JS__Execute__client(TestCase):
 
         assert response.text == ('{"detail":[{"type":"greater_than_equal","loc":["body","config","max_execution_time_ms"],"msg":"Input '
                                  'should be greater than or equal to 100","input":50,"ctx":{"ge":100}}]}')
+
+    def test__js_execute_stream(self):                                           # Test NDJSON streaming execution
+        request_data = {"code": "console.log('first'); console.log('second');"}
+
+        response = self.client.post('/js-execute/execute-stream', json=request_data)
+
+        assert response.status_code             == 200
+        assert response.headers['content-type'] == 'application/x-ndjson'
+        events = [json.loads(line) for line in response.text.splitlines()]
+        assert events[:2]             == [{'event': 'output', 'line': 'first' },
+                                          {'event': 'output', 'line': 'second'}]
+        assert events[2]['event'    ] == 'end'
+        assert events[2]['success'  ] is True
+
+    def test__js_execute__map(self):                                             # Test map execution over many inputs
+        request_data = {"code"        : "return INPUT * INPUT"                        ,
+                        "inputs"      : list(range(100))                              ,
+                        "parallelism" : 2                                             ,
+                        "reduce_code" : "return INPUT.reduce((a, b) => a + b, 0)"     }
+
+        response = self.client.post('/js-execute/map', json=request_data)
+
+        assert response.status_code == 200
+        result = response.json()
+        assert result['success']                              is True
+        assert [item['result'] for item in result['results']] == [x * x for x in range(100)]
+        assert result['reduced']                              == sum(x * x for x in range(100))
+        assert self.client.post('/js-execute/map', json={"code": "return (", "inputs": [1]}).status_code == 400
+
+    def test__js_execute__pipeline(self):                                        # Test a multi-step pipeline
+        request_data = {"steps"      : [{"code": "return INPUT.values.map(value => value * 2)"},
+                                        {"code": "return INPUT.reduce((a, b) => a + b, 0)"  }],
+                        "input_data" : {"values": [1, 2, 3]}                                   }
+
+        response = self.client.post('/js-execute/pipeline', json=request_data)
+
+        assert response.status_code == 200
+        result = response.json()
+        assert result['success']                         is True
+        assert result['result']                          == 12
+        assert [step['step'] for step in result['steps']] == [0, 1]
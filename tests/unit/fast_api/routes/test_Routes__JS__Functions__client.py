@@ -0,0 +1,33 @@
+from unittest                                 import TestCase
+from tests.unit.Service__Fast_API__Test_Objs  import setup__service_fast_api_test_objs
+from tests.unit.Service__Fast_API__Test_Objs  import TEST_API_KEY__NAME, TEST_API_KEY__VALUE
+
+
+class test_Routes__JS__Functions__client(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        with setup__service_fast_api_test_objs() as _:
+            cls.client = _.fast_api__client
+            cls.client.headers[TEST_API_KEY__NAME] = TEST_API_KEY__VALUE
+
+    def test__register_and_invoke(self):
+        response = self.client.post('/js-functions/register', json={'function_id': 'greet'                     ,
+                                                                   'code'       : 'return `hello ${INPUT.name}`'})
+        assert response.status_code            == 200
+        assert response.json()['function_id'] == 'greet'
+
+        response = self.client.post('/js-functions/greet/invoke', json={'input_data': {'name': 'world'}})
+        assert response.status_code         == 200
+        assert response.json()['success']   is True
+        assert response.json()['output']    == 'hello world'
+
+        assert self.client.get('/js-functions/info/greet').json()['invocations'] == 1
+        assert 'greet' in [function['function_id'] for function in self.client.get('/js-functions/list').json()['functions']]
+        assert self.client.get('/js-functions/pool').json()['workers'] >= 1
+        assert self.client.delete('/js-functions/delete/greet').status_code      == 200
+        assert self.client.post('/js-functions/greet/invoke', json={}).status_code == 404
+
+    def test__register__errors(self):
+        assert self.client.post('/js-functions/register', json={'function_id': 'broken', 'code': 'return ('}).status_code == 400
+        assert self.client.post('/js-functions/register', json={'function_id': 'bad id', 'code': 'return 1'}).status_code == 400
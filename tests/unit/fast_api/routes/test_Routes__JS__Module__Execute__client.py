@@ -2,6 +2,7 @@ import json
 from unittest                                 import TestCase
 from tests.unit.Service__Fast_API__Test_Objs  import setup__service_fast_api_test_objs
 from tests.unit.Service__Fast_API__Test_Objs  import TEST_API_KEY__NAME, TEST_API_KEY__VALUE
+from mgraph_ai_service_js.service.deno.Deno__Module__Circuits import deno_module_circuits
 
 
 class test_Routes__JS__Module__Execute__client(TestCase):
@@ -18,6 +19,9 @@ class test_Routes__JS__Module__Execute__client(TestCase):
             routes_module.setup_routes()
             _.fast_api.add_routes(Routes__JS__Module__Execute)
 
+    def setUp(self):
+        deno_module_circuits.reset()                                                # one CDN test tripping the shared breaker must not turn later ones --cached-only
+
     def test__module_health(self):                                               # Test health endpoint
         response = self.client.get('/js-module/health')
 
@@ -457,4 +461,66 @@ class test_Routes__JS__Module__Execute__client(TestCase):
         output_data = json.loads(result['output'])
         assert output_data == {'doubled' : [2, 4, 6, 8, 10],
                                'original': [1, 2, 3, 4, 5 ],
-                               'sum'     : 30              }   # 2+4+6+8+10
\ No newline at end of file
+                               'sum'     : 30              }   # 2+4+6+8+10
+
+    def test__module_cache(self):                                                # Test module cache stats endpoint
+        response = self.client.get('/js-module/cache')
+
+        assert response.status_code == 200
+        result = response.json()
+        assert result['deno_dir']                        == '/tmp/deno_cache'
+        assert result['modules_bytes']                   <= result['max_size_bytes']        # runs that download enforce the cap on the modules
+        assert result['modules_bytes']                   <= result['size_bytes']            # modules are one part of DENO_DIR
+        assert 'https://esm.sh/meriyah@'                 in result['pinned_prefixes']
+        assert set(result) >= {'modules', 'modules_bytes', 'pinned_modules', 'hits', 'misses', 'hit_rate', 'evicted_bytes'}
+        assert set(result['bundles']) >= {'supported', 'bundles', 'size_bytes', 'hits', 'builds', 'failed', 'evictions'}
+
+    def test__module_prefetch(self):                                             # Test module cache warm-up
+        response = self.client.post('/js-module/prefetch', json={"modules"   : ["lodash"],
+                                                                 "import_map": {"imports": {"lodash": "https://esm.sh/lodash@4.17.21"}}})
+        assert response.status_code == 200
+        result = response.json()
+        assert result['status']                          == 'done'
+        assert result['modules'][0]['url']               == 'https://esm.sh/lodash@4.17.21'
+        assert result['modules'][0]['success']           is True
+        assert result['cache_size_bytes']                > 0
+
+        response = self.client.post('/js-module/prefetch', json={"modules": ["https://esm.sh/lodash@4.17.21"], "background": True})
+        assert response.json()['status']                 in ('running', 'done')
+        assert self.client.get(f"/js-module/prefetch/{response.json()['prefetch_id']}").status_code == 200
+        assert self.client.get('/js-module/prefetch/unknown').status_code                           == 404
+        assert self.client.post('/js-module/prefetch', json={"modules": ["not-mapped"]}).status_code == 400
+
+    def test__module_import_map_and_lockfile(self):                              # Test pinned imports, reused by hash
+        code     = "import _ from 'lodash'; console.log(_.sum([1, 2, 3]));"
+        response = self.client.post('/js-module/execute', json={"code"  : code,
+                                                                "config": {"import_map": {"imports": {"lodash": "https://esm.sh/lodash@4.17.21"}}}})
+        assert response.status_code == 200
+        result   = response.json()
+        assert result['output']          == '6'
+        assert len(result['import_map_hash']) == 64
+
+        response = self.client.post('/js-module/execute', json={"code": code, "config": {"import_map_hash": result['import_map_hash']}})
+        assert response.json()['output'] == '6'
+
+        response = self.client.post('/js-module/execute', json={"code"  : code,
+                                                                "config": {"import_map_hash": result['import_map_hash'],
+                                                                           "lockfile"       : {"version": "4", "remote": {"https://esm.sh/lodash@4.17.21": "0" * 64}}}})
+        assert response.json()['success'] is False
+        assert 'Integrity check failed'   in response.json()['error']
+        assert self.client.post('/js-module/execute', json={"code": code, "config": {"import_map_hash": "0" * 64}}).status_code == 400
+
+    def test__module_mirror(self):                                               # Test the local module mirror
+        self.client.post('/js-module/execute', json={"code": "import _ from 'https://esm.sh/lodash@4.17.21'; console.log(_.sum([1]));"})
+        result = self.client.post('/js-module/mirror-export', json={"modules": ["https://esm.sh/lodash@4.17.21"]}).json()
+        assert result['modules'] >= 2                                                   # lodash@4.17.21 and the files it leads to
+        stats  = self.client.get('/js-module/mirror').json()
+        assert stats['available'] is True
+        assert 'esm.sh'           in stats['hosts']
+        assert self.client.post('/js-module/mirror-fill').json()['written'] == 0        # all of it is cached already
+
+    def test__module_circuits(self):                                             # Test per-host circuit breaker state
+        result = self.client.get('/js-module/circuits').json()
+        assert set(result) >= {'hosts', 'open', 'short_circuited', 'failure_threshold', 'slow_ms'}
+        response = self.client.post('/js-module/execute', json={"code": "console.log(1)", "config": {"on_open_circuit": "wait"}})
+        assert response.status_code == 422
@@ -10,6 +10,7 @@ from mgraph_ai_service_js.fast_api.routes.Routes__Info                import ROU
 from mgraph_ai_service_js.fast_api.routes.Routes__JS__AST__Simple     import ROUTES_PATHS__JS_AST_SIMPLE
 from mgraph_ai_service_js.fast_api.routes.Routes__JS__ASTpy           import ROUTES_PATHS__JS_AST
 from mgraph_ai_service_js.fast_api.routes.Routes__JS__Execute         import ROUTES_PATHS__JS_EXECUTE
+from mgraph_ai_service_js.fast_api.routes.Routes__JS__Functions       import ROUTES_PATHS__JS_FUNCTIONS
 from mgraph_ai_service_js.fast_api.routes.Routes__JS__Module__Execute import ROUTES_PATHS__JS_MODULE
 from tests.unit.Service__Fast_API__Test_Objs                          import setup__service_fast_api_test_objs, Service__Fast_API__Test_Objs, TEST_API_KEY__NAME
 
@@ -64,5 +65,6 @@ class test_Service__Fast_API__client(TestCase):
                                                        ROUTES_PATHS__INFO          +
                                                        ROUTES_PATHS__JS_EXECUTE    +
                                                        ROUTES_PATHS__JS_MODULE     +
+                                                       ROUTES_PATHS__JS_FUNCTIONS  +
                                                        ROUTES_PATHS__JS_AST        +
                                                        ROUTES_PATHS__JS_AST_SIMPLE )
\ No newline at end of file
@@ -236,6 +236,34 @@ class test_Deno__JS__Execution(TestCase):
         assert result.success is True
         assert "30" in result.output  # 2+4+6+8+10 = 30
 
+    def test_14__execute_js__stream(self):                                       # Test streamed output events
+        request = JS__Execution__Request(code   = "console.log('a'); console.log('b'); return 42;",
+                                         config = JS__Execution__Config())
+
+        events = list(self.deno_executor.execute_js__stream(request))
+
+        assert events[:3] == [{'event': 'output', 'line': 'a' },
+                              {'event': 'output', 'line': 'b' },
+                              {'event': 'output', 'line': '42'}]
+        assert events[3]['event'    ] == 'end'
+        assert events[3]['success'  ] is True
+        assert events[3]['error'    ] is None
+        assert events[3]['truncated'] is False
+
+    def test_15__execute_js__stream__truncated_and_errors(self):                 # Test streamed output limits and errors
+        request = JS__Execution__Request(code   = "while (true) { console.log('x'.repeat(100)); }",
+                                         config = JS__Execution__Config(max_output_size=1024))
+        events  = list(self.deno_executor.execute_js__stream(request))
+
+        assert len(events)            == 11                                     # 10 lines of 101 bytes fit in 1024
+        assert events[-1]['truncated'] is True
+
+        request = JS__Execution__Request(code="throw new Error('stream failed')")
+        events  = list(self.deno_executor.execute_js__stream(request))
+
+        assert events[-1]['success'] is False
+        assert events[-1]['error'  ] == 'Execution error: stream failed'
+
     # def test_14__cleanup(self):                                                 # Test cleanup (run last)
     #     # Note: Comment out this test during development to avoid re-downloading Deno
     #     # assert self.deno_executor.cleanup() is True
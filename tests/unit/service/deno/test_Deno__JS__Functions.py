@@ -0,0 +1,121 @@
+import time
+from unittest                                                   import TestCase
+from mgraph_ai_service_js.service.deno.Deno__JS__Execution      import JS__Execution__Config
+from mgraph_ai_service_js.service.deno.Deno__JS__Functions      import Deno__JS__Functions, JS__Map__Request
+from mgraph_ai_service_js.service.deno.Deno__JS__Functions      import JS__Pipeline__Request, JS__Pipeline__Step
+from mgraph_ai_service_js.service.deno.Deno__Worker__Pool       import Deno__Worker__Pool
+
+
+class test_Deno__JS__Functions(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.js_functions = Deno__JS__Functions(worker_pool=Deno__Worker__Pool(max_workers=2))
+        cls.js_functions.deno_executor.setup()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.js_functions.worker_pool.stop()
+
+    def test_register_and_invoke(self):
+        started  = self.js_functions.worker_pool.stats()['started']
+        function = self.js_functions.register('add', 'console.log("adding"); return INPUT.a + INPUT.b')
+        assert function.worker_name() in self.js_functions.worker_pool.idle[-1].functions
+        for a in range(3):
+            result = self.js_functions.invoke('add', {'a': a, 'b': 40})
+            assert result.success is True
+            assert result.output  == f'adding\n{a + 40}'
+        assert self.js_functions.functions['add'].invocations   == 3
+        assert self.js_functions.worker_pool.stats()['started'] <= started + 1             # warm workers served every call
+
+    def test_invoke__json_errors_and_limits(self):
+        self.js_functions.register('json' , 'return {sum: INPUT.values.reduce((a, b) => a + b, 0)}', JS__Execution__Config(json_output=True))
+        self.js_functions.register('fails', 'throw new Error("boom")')
+        self.js_functions.register('slow' , 'while (true) {}', JS__Execution__Config(max_execution_time_ms=500))
+        assert self.js_functions.invoke('json' , {'values': [1, 2, 3]}).output == '{"sum":6}'
+        assert self.js_functions.invoke('fails').error                         == 'Execution error: boom'
+        result = self.js_functions.invoke('slow')
+        assert result.success is False
+        assert result.error   == 'Execution timeout exceeded'
+        assert self.js_functions.invoke('json', {'values': [4]}).output        == '{"sum":4}'  # only the function's isolate was stopped
+        with self.assertRaises(ValueError):
+            self.js_functions.register('broken', 'return (')
+        with self.assertRaises(ValueError):
+            self.js_functions.register('bad id!', 'return 1')
+        with self.assertRaises(KeyError):
+            self.js_functions.invoke('unknown')
+        assert self.js_functions.delete('fails') is True
+        assert 'fails' not in [function['function_id'] for function in self.js_functions.list()]
+
+    def test_delete_and_replace(self):                                                          # old code is dropped from the workers
+        worker      = lambda: self.js_functions.worker_pool.idle[-1]
+        first       = self.js_functions.register('replaced', 'return 1')
+        same        = self.js_functions.register('same', 'return 1')                                # same code, its own compiled function
+        second      = self.js_functions.register('replaced', 'return 2')
+        assert first.worker_name()  not in worker().functions
+        assert first.worker_name()  not in self.js_functions.worker_pool.registered
+        assert same.worker_name()   in worker().functions
+        assert second.worker_name() in worker().functions
+        assert self.js_functions.delete('same') is True
+        assert same.worker_name()   not in worker().functions
+        assert self.js_functions.invoke('replaced').output == '2'
+        assert self.js_functions.delete('replaced') is True
+        assert second.worker_name() not in worker().functions
+
+    def test_invoke__isolated(self):                                                            # functions share a worker but no globals, timers or output
+        self.js_functions.register('a'    , 'setTimeout(() => console.log("A secret " + INPUT.token), 50); globalThis.leak = INPUT; return 1')
+        self.js_functions.register('b'    , 'await new Promise(resolve => setTimeout(resolve, 100)); return typeof leak')
+        self.js_functions.register('late' , 'setTimeout(() => { throw new Error("late") }, 10); return 1')
+        self.js_functions.register('stray', 'Promise.reject(new Error("stray")); return 1')
+        self.js_functions.register('exit' , 'Deno.exit(1)')
+        assert self.js_functions.invoke('a', {'token': 'xyz'}).output == '1'
+        assert self.js_functions.invoke('b').output                   == 'undefined'              # no leak, and A's pending timer never ran
+        assert self.js_functions.invoke('late').output                == '1'
+        time.sleep(0.1)
+        assert self.js_functions.invoke('b').success                  is True                     # the leftover timer was cleared
+        assert self.js_functions.invoke('stray').error                == 'Uncaught Error: stray'
+        assert self.js_functions.invoke('exit').error                 == 'Execution error: Deno.exit() is not available to functions'
+        assert self.js_functions.invoke('a', {'token': 'abc'}).output == '1'
+        assert self.js_functions.worker_pool.stats()['recycles']      == {}
+
+        code = 'globalThis.seen ||= []; seen.push(INPUT.user); return seen'                     # same code under two ids: still an isolate each
+        self.js_functions.register('tenant_a', code, JS__Execution__Config(json_output=True))
+        self.js_functions.register('tenant_b', code, JS__Execution__Config(json_output=True))
+        assert self.js_functions.invoke('tenant_a', {'user': 'alice'}).output == '["alice"]'
+        assert self.js_functions.invoke('tenant_b', {'user': 'bob'  }).output == '["bob"]'
+
+    def test_map(self):
+        code   = 'if (INPUT.x === 3) throw new Error("three"); if (INPUT.x === 4) console.log("four"); return INPUT.x * 2'
+        result = self.js_functions.map(JS__Map__Request(code        = code                                         ,
+                                                        inputs      = [{'x': x} for x in range(10)]                ,
+                                                        chunk_size  = 3                                            ,
+                                                        reduce_code = 'return INPUT.reduce((a, b) => a + (b ?? 0), 0)'))
+        assert [item['result'] for item in result.results] == [0, 2, 4, None, 8, 10, 12, 14, 16, 18]   # in input order
+        assert result.results[3]                           == {'success': False, 'result': None, 'error': 'Execution error: three', 'output': None}
+        assert result.results[4]['output']                 == 'four'
+        assert result.errors                               == 1
+        assert result.chunks                               == 4
+        assert result.parallelism                          == 2
+        assert result.reduced                              == 84
+        assert result.success                              is False
+        assert [name for worker in self.js_functions.worker_pool.workers for name in worker.functions if name.startswith(('map_', 'reduce_'))] == []   # one-off code is forgotten
+        with self.assertRaises(ValueError):
+            self.js_functions.map(JS__Map__Request(code='return (', inputs=[1]))
+
+    def test_pipeline(self):
+        steps  = [JS__Pipeline__Step(code='return {words: INPUT.text.split(" "), at: new Date(0)}'),
+                  JS__Pipeline__Step(code='console.log(typeof INPUT.at); return INPUT.words.map(word => word.length)'),
+                  JS__Pipeline__Step(code='return Math.max(...INPUT)', config=JS__Execution__Config(max_memory_mb=128))]  # another worker profile
+        result = self.js_functions.pipeline(JS__Pipeline__Request(steps=steps, input_data={'text': 'multi step pipelines'}))
+        assert result.success                             is True
+        assert result.result                              == 9
+        assert [step['step'] for step in result.steps]    == [0, 1, 2]
+        assert result.steps[1]['output']                  == 'string'                   # passed on as JSON
+        steps  = [JS__Pipeline__Step(code='return 1'), JS__Pipeline__Step(code='throw new Error("two")'), JS__Pipeline__Step(code='return 3')]
+        result = self.js_functions.pipeline(JS__Pipeline__Request(steps=steps))
+        assert (result.success, result.failed_step, result.error) == (False, 1, 'Execution error: two')
+        assert len(result.steps)                                  == 2
+        with self.assertRaises(ValueError) as context:
+            self.js_functions.pipeline(JS__Pipeline__Request(steps=[JS__Pipeline__Step(code='return 1'), JS__Pipeline__Step(code='return (')]))
+        assert str(context.exception).startswith('step 1 does not compile')
+        assert [name for worker in self.js_functions.worker_pool.workers for name in worker.functions if name.startswith('step_')] == []       # one-off code is forgotten
@@ -6,6 +6,7 @@ from mgraph_ai_service_js.service.deno.Deno__JS__Execution           import DENO
 from mgraph_ai_service_js.service.deno.Deno__JS__Module__Execution   import Deno__JS__Module__Execution
 from mgraph_ai_service_js.service.deno.Deno__JS__Module__Execution   import JS__Module__Execution__Config
 from mgraph_ai_service_js.service.deno.Deno__JS__Module__Execution   import JS__Module__Execution__Request
+from mgraph_ai_service_js.service.deno.Deno__Module__Circuits        import deno_module_circuits
 
 
 class test_Deno__JS__Module__Execution(TestCase):
@@ -15,6 +16,9 @@ class test_Deno__JS__Module__Execution(TestCase):
         cls.module_executor = Deno__JS__Module__Execution()
         cls.module_executor.setup()
 
+    def setUp(self):
+        deno_module_circuits.reset()                                                # one CDN test tripping the shared breaker must not turn later ones --cached-only
+
     def test__init__(self):                                                       # Test initialization
         with self.module_executor as _:
             assert type(_) is Deno__JS__Module__Execution
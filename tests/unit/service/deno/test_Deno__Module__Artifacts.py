@@ -0,0 +1,71 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from unittest                                                        import TestCase
+from mgraph_ai_service_js.service.deno.Deno__Module__Artifacts       import Deno__Module__Artifacts, resolve_import_map
+from mgraph_ai_service_js.service.deno.Deno__Module__Artifacts       import DENO_ARTIFACT__IMPORT_MAP, DENO_ARTIFACT__LOCKFILE
+from mgraph_ai_service_js.service.deno.Deno__JS__Module__Execution   import Deno__JS__Module__Execution, JS__Module__Execution__Config
+
+
+class test_Deno__Module__Artifacts(TestCase):
+
+    def setUp(self):
+        self.folder    = tempfile.mkdtemp()
+        self.artifacts = Deno__Module__Artifacts(folder=self.folder)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_put(self):
+        import_map = {'imports': {'lodash': 'https://esm.sh/lodash@4.17.21', 'std/': 'https://deno.land/std@0.208.0/'}}
+        hash_1     = self.artifacts.put(DENO_ARTIFACT__IMPORT_MAP, import_map)
+        hash_2     = self.artifacts.put(DENO_ARTIFACT__IMPORT_MAP, dict(reversed(list(import_map.items()))))  # same content, same file
+        assert hash_1 == hash_2
+        assert len(hash_1) == 64
+        assert self.artifacts.get (DENO_ARTIFACT__IMPORT_MAP, hash_1) == import_map
+        assert self.artifacts.path(DENO_ARTIFACT__IMPORT_MAP, hash_1) == os.path.join(self.folder, 'import_map', f'{hash_1}.json')
+        with self.assertRaises(ValueError):
+            self.artifacts.path(DENO_ARTIFACT__LOCKFILE, hash_1)                                # a hash only works for its own kind
+        with self.assertRaises(ValueError):
+            self.artifacts.path(DENO_ARTIFACT__IMPORT_MAP, '../../etc/passwd')
+
+    def test_put__unique_temp_file(self):                                                       # another writer's temp file is left alone
+        data  = json.dumps({'version': '4'}).replace(' ', '').encode()
+        path  = os.path.join(self.folder, 'lockfile', f'{hashlib.sha256(data).hexdigest()}.json')
+        os.makedirs(path + '.tmp')                                                              # in the way of a fixed temp name
+        assert self.artifacts.path(DENO_ARTIFACT__LOCKFILE, self.artifacts.put(DENO_ARTIFACT__LOCKFILE, {'version': '4'})) == path
+        assert sorted(os.listdir(os.path.dirname(path)))                                                                   == [os.path.basename(path), os.path.basename(path) + '.tmp']
+
+    def test_validate(self):
+        self.artifacts.validate(DENO_ARTIFACT__LOCKFILE  , {'version': '4', 'remote': {}})
+        self.artifacts.validate(DENO_ARTIFACT__IMPORT_MAP, {'scopes': {'https://esm.sh/': {'a': 'npm:a@1'}}})
+        for kind, content in ((DENO_ARTIFACT__IMPORT_MAP, {'imports': {'a': './a.js'}}         ),
+                              (DENO_ARTIFACT__IMPORT_MAP, {'imports': [] }                      ),
+                              (DENO_ARTIFACT__IMPORT_MAP, {'imports': {}, 'other': {}}          ),
+                              (DENO_ARTIFACT__LOCKFILE  , {'remote': {}}                        ),
+                              ('deno.json'              , {}                                    )):
+            with self.assertRaises(ValueError):
+                self.artifacts.validate(kind, content)
+
+    def test_resolve_import_map(self):
+        imports = {'lodash': 'https://esm.sh/lodash@4.17.21', 'lib/': 'http://localhost:8765/'}
+        assert resolve_import_map('lodash'          , imports) == 'https://esm.sh/lodash@4.17.21'
+        assert resolve_import_map('lib/a.js'        , imports) == 'http://localhost:8765/a.js'
+        assert resolve_import_map('https://esm.sh/a', imports) == 'https://esm.sh/a'
+        assert resolve_import_map('./local.js'      , imports) is None
+
+    def test_build_module_artifact_flags(self):
+        executor = Deno__JS__Module__Execution(module_artifacts=self.artifacts)
+        config   = JS__Module__Execution__Config(import_map = {'imports': {'lodash': 'https://esm.sh/lodash@4.17.21'}},
+                                                 lockfile   = {'version': '4', 'remote': {}})
+        flags    = executor.build_module_artifact_flags(config)
+        assert flags == [f'--import-map={self.artifacts.path(DENO_ARTIFACT__IMPORT_MAP, config.import_map_hash)}',
+                         f'--lock={self.artifacts.path(DENO_ARTIFACT__LOCKFILE, config.lockfile_hash)}'        ,
+                         '--frozen'                                                                            ]
+        by_hash  = JS__Module__Execution__Config(import_map_hash=config.import_map_hash, lockfile_hash=config.lockfile_hash)
+        assert executor.build_module_artifact_flags(by_hash) == flags
+        assert executor.module_imports(by_hash)              == {'lodash': 'https://esm.sh/lodash@4.17.21'}
+        with self.assertRaises(ValueError):
+            executor.build_module_artifact_flags(JS__Module__Execution__Config(import_map_hash='0' * 64))
@@ -0,0 +1,100 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+from unittest                                                        import TestCase
+from mgraph_ai_service_js.service.deno.Deno__Module__Bundles         import Deno__Module__Bundles, DENO_BUNDLE__MANIFEST
+from mgraph_ai_service_js.service.deno.Deno__Module__Cache           import Deno__Module__Cache
+
+
+class test_Deno__Module__Bundles(TestCase):
+
+    def setUp(self):
+        self.folder  = tempfile.mkdtemp()
+        self.cache   = Deno__Module__Cache  (deno_dir=os.path.join(self.folder, 'deno_dir'))
+        self.bundles = Deno__Module__Bundles(folder=os.path.join(self.folder, 'bundles'), module_cache=self.cache, min_runs=2)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def add_module(self, url, source):
+        path = self.cache.file_path(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as file:
+            file.write(f'{source}\n// denoCacheMetadata={json.dumps({"headers": {}, "url": url})}')
+        return path
+
+    def add_bundle(self, urls, exports):                                          # what build() leaves behind, without running deno bundle
+        folder = os.path.join(self.bundles.folder, self.bundles.key(urls))
+        os.makedirs(folder)
+        with open(os.path.join(folder, 'bundle.js'), 'w') as file:
+            file.write('export const m0 = {};')
+        self.bundles.write_facades(folder, urls, exports)
+        graph = self.cache.graph(urls)
+        with open(os.path.join(folder, DENO_BUNDLE__MANIFEST), 'w') as file:
+            json.dump({'urls': urls, 'graph': {url: os.stat(self.cache.file_path(url)).st_mtime for url in graph}}, file)
+        return folder
+
+    def test_key(self):
+        assert self.bundles.key(['https://esm.sh/a', 'https://esm.sh/b']) == self.bundles.key(['https://esm.sh/b', 'https://esm.sh/a', 'https://esm.sh/a'])
+        assert self.bundles.key(['https://esm.sh/a'])                     != self.bundles.key(['https://esm.sh/b'])
+
+    def test_setup(self):
+        assert self.bundles.setup('/no/such/deno').supported                           is False     # checked once, kept
+        assert Deno__Module__Bundles(supported=True).setup('/no/such/deno').supported is True
+        assert Deno__Module__Bundles().setup('deno', offline=True).supported          is False     # deno bundle needs npm, not probed offline
+
+    def test_use(self):
+        urls = ['https://esm.sh/a@1']
+        assert self.bundles.use(urls, ['esm.sh'], 'deno') is None                        # no setup (or no `deno bundle`): nothing counted or built
+        assert (self.bundles.runs, self.bundles.building) == ({}, {})
+
+        self.bundles.supported = True
+        assert self.bundles.use(urls, ['esm.sh'], 'deno') is None
+        assert list(self.bundles.runs.values())           == [1]
+        assert self.bundles.use(urls, ['esm.sh'], 'deno') is None                        # second run starts the build
+        for _ in range(100):
+            if not self.bundles.building:
+                break
+            time.sleep(0.05)
+        assert 'not cached' in self.bundles.failed[self.bundles.key(urls)]
+        assert self.bundles.use(urls, ['esm.sh'], 'deno') is None                        # failed sets are not counted or retried
+        assert self.bundles.runs                          == {}
+        assert self.bundles.use([]  , ['esm.sh'], 'deno') is None
+
+    def test_write_facades(self):
+        urls   = ['https://esm.sh/a@1', 'https://esm.sh/b@1']
+        folder = tempfile.mkdtemp(dir=self.folder)
+        self.bundles.write_facades(folder, urls, [['default', 'chunk'], ['a-b']])
+        with open(os.path.join(folder, 'import_map.json')) as file:
+            assert json.load(file) == {'imports': {'https://esm.sh/a@1': './facade_0.js', 'https://esm.sh/b@1': './facade_1.js'}}
+        with open(os.path.join(folder, 'facade_1.js')) as file:
+            assert file.read() == ('import { m1 as module } from "./bundle.js";\n'
+                                   'const e0 = module["a-b"]; export { e0 as "a-b" };\n')
+
+    def test_lookup(self):
+        self.add_module('https://esm.sh/lib@1'               , 'export * from "/lib@1/es2022/lib.mjs";')
+        dep    = self.add_module('https://esm.sh/lib@1/es2022/lib.mjs', 'export const x = 1;')
+        folder = self.add_bundle(['https://esm.sh/lib@1'], [['x']])
+        key    = self.bundles.key(['https://esm.sh/lib@1'])
+        assert self.bundles.lookup(key)             == os.path.join(folder, 'import_map.json')
+        self.bundles.supported = True
+        assert self.bundles.use(['https://esm.sh/lib@1'], ['esm.sh'], 'deno') == os.path.join(folder, 'import_map.json')
+        assert self.bundles.hits                    == 2
+
+        os.utime(dep, (1000, 1000))                                                      # module downloaded again: the bundle is stale
+        assert self.bundles.lookup(key)             is None
+        assert os.path.isdir(folder)                is False
+
+    def test_enforce(self):
+        self.add_module('https://esm.sh/a@1', 'export const a = 1;')
+        self.add_module('https://esm.sh/b@1', 'export const b = 1;')
+        old = self.add_bundle(['https://esm.sh/a@1'], [['a']])
+        new = self.add_bundle(['https://esm.sh/b@1'], [['b']])
+        os.utime(os.path.join(old, DENO_BUNDLE__MANIFEST), (1000, 1000))
+        assert [entry['key'] for entry in self.bundles.entries()] == [os.path.basename(old), os.path.basename(new)]
+        self.bundles.max_size_bytes = self.bundles.entries()[1]['size']
+        assert self.bundles.enforce()                          == 1                      # least recently used goes
+        assert self.bundles.stats()['bundles']                 == 1
+        assert os.path.isdir(new)                              is True
@@ -0,0 +1,98 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from unittest                                                        import TestCase
+from unittest.mock                                                   import patch
+from mgraph_ai_service_js.service.deno.Deno__Module__Cache           import Deno__Module__Cache, DENO_CACHE__PINNED_PREFIXES
+
+
+class test_Deno__Module__Cache(TestCase):
+
+    def setUp(self):
+        self.deno_dir = tempfile.mkdtemp()
+        self.cache    = Deno__Module__Cache(deno_dir=self.deno_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.deno_dir)
+
+    def add_module(self, url, source, accessed_at, headers=None):                # a module as Deno 2 caches it: source plus a metadata footer
+        path     = self.cache.file_path(url)
+        metadata = json.dumps({'headers': headers or {}, 'url': url, 'time': 0})
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as file:
+            file.write(f'{source}\n// denoCacheMetadata={metadata}')
+        os.utime(path, (accessed_at, accessed_at))
+        return path
+
+    def test_file_path(self):
+        assert self.cache.file_path('https://esm.sh/lodash@4.17.21?target=es2022') == os.path.join(
+            self.deno_dir, 'remote', 'https', 'esm.sh', hashlib.sha256(b'/lodash@4.17.21?target=es2022').hexdigest())
+        assert self.cache.file_path('http://localhost:8080/a.js').split(os.sep)[-2] == 'localhost_PORT8080'
+        assert self.cache.file_path('https://esm.sh:443/a.js')  == self.cache.file_path('https://esm.sh/a.js')
+        assert self.cache.file_path('file:///tmp/a.js')          is None
+
+    def test_module_urls(self):
+        code = "import a from 'https://esm.sh/a@1';\nimport './local.js';\nconst b = await import(\"https://esm.sh/b@2\");\nexport * from 'https://esm.sh/a@1';"
+        assert self.cache.module_urls(code) == ['https://esm.sh/a@1', 'https://esm.sh/b@2']
+        assert self.cache.module_urls("import _ from 'lodash';", {'lodash': 'https://esm.sh/lodash@4.17.21'}) == ['https://esm.sh/lodash@4.17.21']
+
+    def test_record_access(self):
+        entry = self.add_module('https://esm.sh/lib@1'               , 'export * from "/lib@1/es2022/lib.mjs";', accessed_at=1000)
+        dep   = self.add_module('https://esm.sh/lib@1/es2022/lib.mjs', 'export const x = 1;'                  , accessed_at=1000)
+
+        assert self.cache.record_access(['https://esm.sh/lib@1', 'https://esm.sh/other@2']) == 1
+        assert (self.cache.hits, self.cache.misses)                                            == (1, 1)
+        assert os.stat(entry).st_atime > 1000
+        assert os.stat(dep).st_atime   > 1000                                                   # imports of a used module count as used too
+        assert os.stat(dep).st_mtime  == 1000
+
+    def test_graph__links_cached(self):                                                        # each module is scanned for imports once per download
+        urls  = ['https://esm.sh/lib@1', 'https://esm.sh/lib@1/es2022/lib.mjs']
+        entry = self.add_module(urls[0], 'export * from "/lib@1/es2022/lib.mjs";', accessed_at=1000)
+        _     = self.add_module(urls[1], 'export const x = 1;'                  , accessed_at=1000)
+        assert self.cache.graph(urls[:1]) == urls
+        with patch('builtins.open', side_effect=AssertionError('read again')):
+            assert self.cache.graph(urls[:1]) == urls
+        self.add_module(urls[0], 'export const y = 2;', accessed_at=2000)                    # downloaded again: scanned again
+        assert self.cache.graph(urls[:1]) == urls[:1]
+        assert self.cache.links_by_path[entry] == (2000, [])
+
+    def test_enforce(self):
+        old      = self.add_module('https://esm.sh/old@1'                  , 'x' * 400, accessed_at=1000)
+        _        = self.add_module('https://esm.sh/new@1'                  , 'x' * 400, accessed_at=3000)
+        _        = self.add_module(DENO_CACHE__PINNED_PREFIXES[0] + '4.3.9', 'x' * 400, accessed_at=500 )
+        old_size = os.path.getsize(old)
+        assert [entry['url'] for entry in self.cache.entries()] == [DENO_CACHE__PINNED_PREFIXES[0] + '4.3.9', 'https://esm.sh/old@1', 'https://esm.sh/new@1']
+
+        self.cache.max_size_bytes = 10000
+        assert self.cache.enforce() == 0                                                        # under the cap
+        os.makedirs(os.path.join(self.deno_dir, 'gen'))
+        with open(os.path.join(self.deno_dir, 'gen', 'emit.js'), 'w') as file:                  # emit cache: in DENO_DIR, never evicted, not counted against the cap
+            file.write('x' * 20000)
+        assert self.cache.enforce() == 0
+        self.cache.max_size_bytes = int(sum(entry['size'] for entry in self.cache.entries()) * 0.85)   # evicts down to 80% of the cap: two modules left
+        assert self.cache.enforce() == 1                                                        # least recently used, never the pinned toolchain
+        assert [entry['url'] for entry in self.cache.entries()] == [DENO_CACHE__PINNED_PREFIXES[0] + '4.3.9', 'https://esm.sh/new@1']
+
+        stats = self.cache.stats()
+        assert (stats['modules'], stats['pinned_modules'], stats['evictions']) == (2, 1, 1)
+        assert stats['evicted_bytes']                                          == old_size
+        assert stats['hit_rate']                                               is None
+
+    def test_write__concurrent(self):                                                           # restores racing on the same module each write a whole file
+        url    = 'https://esm.sh/lib@1'
+        errors = []
+        def write():
+            try:
+                self.cache.write(url, b'export const x = 1;\n', {'content-type': 'application/javascript'})
+            except Exception as error:
+                errors.append(error)
+        threads = [threading.Thread(target=write) for _ in range(16)]
+        for thread in threads: thread.start()
+        for thread in threads: thread.join()
+        assert errors                                                        == []
+        assert self.cache.read(url)                                          == (b'export const x = 1;\n', {'content-type': 'application/javascript'})
+        assert os.listdir(os.path.dirname(self.cache.file_path(url)))        == [os.path.basename(self.cache.file_path(url))]   # no temp files left behind
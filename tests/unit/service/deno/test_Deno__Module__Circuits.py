@@ -0,0 +1,64 @@
+from unittest                                                        import TestCase
+from mgraph_ai_service_js.service.deno.Deno__Module__Circuits        import Deno__Module__Circuits, CIRCUIT__OPEN, CIRCUIT__HALF_OPEN, CIRCUIT__CLOSED
+
+ERROR__CONNECT = ("error: Import 'https://esm.sh/lib@1' failed.\n"
+                  "    0: error sending request for url (https://esm.sh/lib@1): client error (Connect): tcp connect error: Connection refused")
+
+
+class test_Deno__Module__Circuits(TestCase):
+
+    def setUp(self):
+        self.circuits = Deno__Module__Circuits()
+        self.urls     = ['https://esm.sh/lib@1']
+
+    def test_open_after_failures(self):
+        for _ in range(2):
+            self.circuits.record(self.urls, 100, ERROR__CONNECT)
+        assert self.circuits.open_hosts(self.urls)                    == []              # below the threshold
+        self.circuits.record(self.urls, 100, ERROR__CONNECT)
+        assert self.circuits.open_hosts(self.urls)                    == ['esm.sh']
+        assert self.circuits.open_hosts(['https://deno.land/x/a.ts']) == []              # per host
+        stats = self.circuits.stats()
+        assert stats['open']                                          == ['esm.sh']
+        assert stats['hosts']['esm.sh']['last_error']                 == "error: Import 'https://esm.sh/lib@1' failed."
+        assert self.circuits.describe(['esm.sh']).startswith('circuit open for esm.sh (retry in 30s')
+        self.circuits.hosts['esm.sh']['last_error'] = 'x' * 1000
+        assert len(self.circuits.describe(['esm.sh']))                < 200               # bounded, as it is added to the run's stderr
+        self.circuits.reset()
+        assert self.circuits.open_hosts(self.urls)                    == []
+
+    def test_record__what_counts(self):
+        self.circuits.record(self.urls, 100, "error: Module not found \"https://esm.sh/lib@1\".")   # the host answered
+        self.circuits.record(self.urls, 100, "error: Uncaught Error: boom")                         # the user's code failed
+        self.circuits.record(self.urls, 100, "error: Uncaught Error: boom\n    at file:///tmp/x.ts:503:11")
+        self.circuits.record(self.urls, 100, "error: Uncaught (in promise) TypeError: error sending request for url (https://api.example.com/)")
+        self.circuits.record(self.urls, 100, "request timed out, status code 502 from lodash.mjs:2:502")         # written by the user's code
+        self.circuits.record(self.urls, 100, timed_out=True, missing=[])                            # downloaded: the code was slow
+        self.circuits.record(self.urls, 20000              , missing=[])
+        assert self.circuits.hosts                          == {}
+        self.circuits.record(self.urls, 100, timed_out=True, missing=self.urls)
+        self.circuits.record(self.urls, 20000)                                                       # slow
+        assert self.circuits.hosts['esm.sh']['failures']    == 2
+        self.circuits.record(self.urls, 100, "error: Import 'https://esm.sh/lib@1' failed: 503 Service Unavailable\n    at file:///tmp/x.ts:1:15")
+        assert self.circuits.hosts['esm.sh']['last_error']  == "error: Import 'https://esm.sh/lib@1' failed: 503 Service Unavailable"
+        self.circuits.record(self.urls, 100)                                                         # one good run resets the count
+        assert self.circuits.hosts['esm.sh']['failures']    == 0
+        self.circuits.record(['https://deno.land/x/a.ts'], 100, ERROR__CONNECT)                     # blame the host named in the error
+        assert self.circuits.hosts['esm.sh']['failures']    == 1
+        assert 'deno.land'                                  not in self.circuits.hosts
+
+    def test_half_open(self):
+        self.circuits.open_seconds = 0
+        for _ in range(3):
+            self.circuits.record(self.urls, 100, ERROR__CONNECT)
+        assert self.circuits.hosts['esm.sh']['state']        == CIRCUIT__OPEN
+        self.circuits.open_seconds = 30
+        assert self.circuits.open_hosts(self.urls)           == []                       # cool-down over: this run probes
+        assert self.circuits.hosts['esm.sh']['state']        == CIRCUIT__HALF_OPEN
+        self.circuits.record(self.urls, 100, ERROR__CONNECT)                             # failed probe: open for twice as long
+        assert (self.circuits.hosts['esm.sh']['state'], self.circuits.hosts['esm.sh']['trips']) == (CIRCUIT__OPEN, 2)
+        self.circuits.hosts['esm.sh'].update(open_until=0)
+        assert self.circuits.open_hosts(self.urls)           == []
+        self.circuits.record(self.urls, 100)                                             # good probe closes it
+        assert self.circuits.hosts['esm.sh']['state']        == CIRCUIT__CLOSED
+        assert self.circuits.stats()['open']                 == []
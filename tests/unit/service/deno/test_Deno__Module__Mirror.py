@@ -0,0 +1,53 @@
+import os
+import shutil
+import tempfile
+from unittest                                                        import TestCase
+from mgraph_ai_service_js.service.deno.Deno__Module__Cache           import Deno__Module__Cache
+from mgraph_ai_service_js.service.deno.Deno__Module__Mirror          import Deno__Module__Mirror
+
+
+class test_Deno__Module__Mirror(TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.source = Deno__Module__Cache(deno_dir=os.path.join(self.folder, 'source'))           # where the modules were downloaded
+        self.target = Deno__Module__Cache(deno_dir=os.path.join(self.folder, 'target'))           # a cold cache somewhere else
+        self.source.write('https://esm.sh/lib@1'               , b''                                      , {'location': '/lib@1.2.0'})
+        self.source.write('https://esm.sh/lib@1.2.0'           , b'export * from "/lib@1.2.0/es2022/lib.mjs";\n', {'content-type': 'application/javascript', 'date': 'today'})
+        self.source.write('https://esm.sh/lib@1.2.0/es2022/lib.mjs', b'export const x = 1;\n'             , {'content-type': 'application/javascript'})
+        self.source.write('https://esm.sh/other@1'             , b'export const x = 1;\n'                 , {'content-type': 'application/javascript'})
+        mirror_dir  = os.path.join(self.folder, 'mirror')
+        self.export = Deno__Module__Mirror(mirror_dir=mirror_dir, module_cache=self.source)
+        self.mirror = Deno__Module__Mirror(mirror_dir=mirror_dir, module_cache=self.target)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_export(self):
+        assert self.mirror.load()                                    is False             # no mirror yet
+        assert self.export.export(['https://esm.sh/lib@1'])['added'] == 3                 # the graph of lib@1
+        assert self.export.export()['added']                         == 1                 # everything cached
+        assert self.export.export()['added']                         == 0
+        stats = self.mirror.stats()
+        assert (stats['available'], stats['modules'], stats['objects'], stats['hosts']) == (True, 4, 3, ['esm.sh'])  # same source, one object
+        assert self.mirror.modules['https://esm.sh/lib@1.2.0']['headers']              == {'content-type': 'application/javascript'}
+
+    def test_restore(self):
+        self.export.export()
+        assert self.mirror.closure('https://esm.sh/lib@1') == ['https://esm.sh/lib@1', 'https://esm.sh/lib@1.2.0', 'https://esm.sh/lib@1.2.0/es2022/lib.mjs']
+        assert self.mirror.restore(['https://esm.sh/lib@1', 'https://esm.sh/unknown@1']) == 3
+        assert self.mirror.restore(['https://esm.sh/lib@1'])                             == 0      # already cached
+        assert (self.mirror.restored, self.mirror.missing)                               == (3, 1)
+        assert self.target.read('https://esm.sh/lib@1.2.0') == (b'export * from "/lib@1.2.0/es2022/lib.mjs";\n', {'content-type': 'application/javascript'})
+        assert self.target.graph(['https://esm.sh/lib@1'])  == self.mirror.closure('https://esm.sh/lib@1')
+        assert self.mirror.fill()['written']                == 1
+
+    def test_restore__corrupted_object(self):
+        self.export.export(['https://esm.sh/other@1'])
+        self.mirror.load()
+        object_path = os.path.join(self.mirror.mirror_dir, 'objects', self.mirror.modules['https://esm.sh/other@1']['sha256'])
+        with open(object_path, 'wb') as file:
+            file.write(b'export const x = 2;\n')
+        with self.assertRaises(ValueError):
+            self.mirror.restore(['https://esm.sh/other@1'])
+        assert self.target.read('https://esm.sh/other@1') is None
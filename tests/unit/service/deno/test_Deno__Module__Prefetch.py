@@ -0,0 +1,29 @@
+from unittest                                                        import TestCase
+from mgraph_ai_service_js.service.deno.Deno__Module__Prefetch        import Deno__Module__Prefetch, JS__Module__Prefetch__Request
+
+
+class test_Deno__Module__Prefetch(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.prefetch = Deno__Module__Prefetch()
+
+    def test_resolve(self):
+        imports = {'lodash': 'https://esm.sh/lodash@4.17.21', 'std/': 'https://deno.land/std@0.208.0/', 'std/async/': 'https://esm.sh/async/'}
+        assert self.prefetch.resolve('lodash'             , imports) == 'https://esm.sh/lodash@4.17.21'
+        assert self.prefetch.resolve('std/fs/mod.ts'      , imports) == 'https://deno.land/std@0.208.0/fs/mod.ts'
+        assert self.prefetch.resolve('std/async/delay.ts' , imports) == 'https://esm.sh/async/delay.ts'       # longest prefix wins
+        assert self.prefetch.resolve('jsr:@std/path'      , imports) == 'jsr:@std/path'
+        assert self.prefetch.resolve('react'              , imports) is None
+
+    def test_plan(self):
+        request = JS__Module__Prefetch__Request(modules    = ['https://esm.sh/a@1', 'b', 'https://esm.sh/a@1'],
+                                                import_map = {'imports': {'b': 'https://esm.sh/b@2'}})
+        assert [(item['specifier'], item['url']) for item in self.prefetch.plan(request)] == [('https://esm.sh/a@1', 'https://esm.sh/a@1'),
+                                                                                               ('b'                 , 'https://esm.sh/b@2')]
+        for modules, import_map in ((['https://example.com/a.js'], None                                ),       # host not allowed
+                                    (['react']                   , None                                ),       # bare name without a mapping
+                                    (['a']                       , {'imports': {'a': './relative.js'}}),
+                                    ([]                          , None                                )):
+            with self.assertRaises(ValueError):
+                self.prefetch.plan(JS__Module__Prefetch__Request(modules=modules, import_map=import_map))
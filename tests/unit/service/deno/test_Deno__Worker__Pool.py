@@ -0,0 +1,79 @@
+import signal
+import time
+from unittest                                                   import TestCase
+from unittest.mock                                              import patch
+from mgraph_ai_service_js.service.deno.Deno__JS__Execution      import JS__Execution__Config
+from mgraph_ai_service_js.service.deno.Deno__JS__Functions      import Deno__JS__Functions, JS__Pipeline__Request, JS__Pipeline__Step
+from mgraph_ai_service_js.service.deno.Deno__Worker__Pool       import Deno__Worker__Pool, RECYCLE__EXECUTIONS, RECYCLE__HEAP, RECYCLE__TIMEOUT, RECYCLE__EXITED
+
+
+class test_Deno__Worker__Pool(TestCase):
+
+    def setUp(self):
+        self.worker_pool  = Deno__Worker__Pool(max_workers=2)
+        self.js_functions = Deno__JS__Functions(worker_pool=self.worker_pool)
+        self.js_functions.deno_executor.setup()
+
+    def tearDown(self):
+        self.wait_for_warming()
+        self.worker_pool.stop()
+
+    def wait_for_warming(self):
+        for _ in range(100):
+            if self.worker_pool.stats()['warming'] == 0:
+                return
+            time.sleep(0.05)
+
+    def test_recycle__executions(self):
+        self.worker_pool.max_executions = 3
+        self.js_functions.register('echo', 'return INPUT.value')
+        outputs = [self.js_functions.invoke('echo', {'value': value}).output for value in range(5)]
+        assert outputs == ['0', '1', '2', '3', '4']                                                 # recycling never failed a call
+        self.wait_for_warming()
+        stats = self.worker_pool.stats()
+        assert stats['recycles']                                          == {RECYCLE__EXECUTIONS: 1}
+        assert stats['workers']                                           == 1
+        assert self.worker_pool.idle[0].functions                         == {self.js_functions.functions['echo'].worker_name(): 'return INPUT.value'}   # warmed before use
+
+    def test_recycle__registered_functions_only(self):                                         # one-off and deleted code is left behind
+        echo = self.js_functions.register('echo', 'return INPUT.value').worker_name()
+        gone = self.js_functions.register('gone', 'return 0'         ).worker_name()
+        with self.worker_pool.worker(self.js_functions.deno_path(), self.js_functions.worker_flags(JS__Execution__Config()), 5) as worker:
+            worker.define('one_off', 'return 1', 5)
+            self.js_functions.delete('gone')                                                        # while the worker is busy
+            worker.executions = self.worker_pool.max_executions                                     # recycled on release
+        assert sorted(worker.functions) == sorted([echo, gone, 'one_off'])
+        self.wait_for_warming()
+        assert self.worker_pool.stats()['recycles'] == {RECYCLE__EXECUTIONS: 1}
+        assert self.worker_pool.idle[-1].functions  == {echo: 'return INPUT.value'}
+
+    def test_recycle__heap_timeout_and_exit(self):
+        self.worker_pool.heap_percent = 1                                                           # 1% of 256MB is below any worker's heap
+        self.js_functions.register('big', 'globalThis.keep = new Array(1e6).fill(1); return 1')
+        self.js_functions.invoke('big')
+        self.wait_for_warming()
+        assert self.worker_pool.stats()['recycles'] == {RECYCLE__HEAP: 1}
+        self.worker_pool.heap_percent = 100
+        self.js_functions.register('slow', 'while (true) {}', JS__Execution__Config(max_execution_time_ms=200))
+        assert self.js_functions.invoke('slow').error == 'Execution timeout exceeded'                # ends the function's isolate at once
+        self.wait_for_warming()                                                                     # and replaces the worker in the background
+        assert self.worker_pool.stats()['recycles']   == {RECYCLE__HEAP: 1, RECYCLE__TIMEOUT: 1}
+        assert self.js_functions.invoke('slow').error == 'Execution timeout exceeded'                # the replacement recompiled it
+        self.wait_for_warming()
+        assert self.worker_pool.stats()['recycles']   == {RECYCLE__HEAP: 1, RECYCLE__TIMEOUT: 2}
+        self.worker_pool.idle[-1].process.send_signal(signal.SIGSTOP)                               # a worker that stops answering is killed
+        with patch('mgraph_ai_service_js.service.deno.Deno__Worker.DENO_WORKER__GRACE_S', 0.5):
+            assert self.js_functions.invoke('big').error == 'Execution timeout exceeded'
+        self.wait_for_warming()
+        self.worker_pool.idle[-1].process.kill()                                                    # and one that died while idle is retired
+        self.worker_pool.idle[-1].process.wait()
+        assert self.js_functions.invoke('big').output == '1'
+        self.wait_for_warming()
+        assert self.worker_pool.stats()['recycles'] == {RECYCLE__HEAP: 1, RECYCLE__TIMEOUT: 3, RECYCLE__EXITED: 1}
+
+    def test_recycle__pipeline_step_timeout(self):
+        steps  = [JS__Pipeline__Step(code='return 1'), JS__Pipeline__Step(code='while (true) {}', config=JS__Execution__Config(max_execution_time_ms=200))]
+        result = self.js_functions.pipeline(JS__Pipeline__Request(steps=steps))
+        assert (result.success, result.failed_step, result.error) == (False, 1, 'Execution timeout exceeded')
+        self.wait_for_warming()
+        assert self.worker_pool.stats()['recycles']               == {RECYCLE__TIMEOUT: 1}
@@ -0,0 +1,90 @@
+from unittest                                                              import TestCase
+from mgraph_ai_service_js.service.js_ast.JS__AST__Bundle__Splitter         import JS__AST__Bundle__Splitter, JS__AST__Bundle__Split
+
+
+WEBPACK_5 = """(() => {
+var __webpack_modules__ = ({
+/***/ "./src/a.js":
+/*!*****!*\\
+  !*** ./src/a.js ***!
+  \\*****/
+/***/ ((module) => {
+module.exports = `x${ {a: 1}.a }}` + /}[/]/.source + 10 / 2;
+/***/ }),
+/***/ 42:
+/***/ (function(module, exports, __webpack_require__) {
+var s = "})"; exports.b = __webpack_require__("./src/a.js");
+/***/ })
+});
+var __webpack_module_cache__ = {};
+})();"""
+
+WEBPACK_4 = '!function(e){var t={};function n(r){return e[r].call()}n(0)}([function(e,t,n){e.exports=1},,function(e,t){t.x="\U0001F600"}]);'
+
+ESBUILD   = """var __commonJS = (cb, mod) => function __require() { return mod; };
+var require_a = __commonJS({
+  "src/a.js"(exports, module) {
+    module.exports = 1;
+  }
+});
+var init_b = __esm({ "src/b.js"() { } });"""
+
+
+class test_JS__AST__Bundle__Splitter(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.splitter = JS__AST__Bundle__Splitter()
+
+    def test_split__webpack_5(self):
+        split = self.splitter.split(WEBPACK_5)
+        assert type(split)          is JS__AST__Bundle__Split
+        assert split.bundle_format  == 'webpack'
+        assert [module['id'] for module in split.modules] == ['./src/a.js', '42']
+        module_a, module_42 = split.modules
+        assert WEBPACK_5[module_a['start']:module_a['end']].startswith('((module) => {')
+        assert WEBPACK_5[module_a['start']:module_a['end']].endswith  ('})')
+        assert (module_a['line'], module_a['column'])   == (7, 6)
+        assert (module_42['end_line'], module_42['end_column']) == (13, 8)
+        assert len(split.skeleton)                      == len(WEBPACK_5)
+        assert split.skeleton.count('\n')               == WEBPACK_5.count('\n')                  # lines are kept, so runtime positions still match
+        assert split.skeleton[module_a['start']]        == '0'
+        assert 'module.exports' not in split.skeleton
+
+    def test_split__webpack_4_array(self):                                            # holes keep their index, astral chars count twice
+        split = self.splitter.split(WEBPACK_4)
+        assert split.bundle_format  == 'webpack'
+        assert [module['id'] for module in split.modules] == ['0', '2']
+        module_2 = split.modules[1]
+        assert module_2['end_offset'] - module_2['offset'] == (module_2['end'] - module_2['start']) + 1
+        assert len(split.skeleton)  == len(WEBPACK_4) + 1                                       # the emoji became two spaces
+        assert self.splitter.module_source(WEBPACK_4, split.modules[0]) == '(function(e,t,n){e.exports=1})'
+
+    def test_split__esbuild(self):
+        split = self.splitter.split(ESBUILD)
+        assert split.bundle_format  == 'esbuild'
+        assert [module['id'] for module in split.modules] == ['src/a.js', 'src/b.js']
+        assert all(module['is_method'] for module in split.modules)
+        assert self.splitter.module_prefix(split.modules[0])    == 2
+        assert self.splitter.module_source(ESBUILD, split.modules[1]) == '({"src/b.js"() { }})'
+        assert 'var init_b = __esm({ _:0              });' in split.skeleton
+
+    def test_split__not_a_bundle(self):
+        for code in ('const x = 1; function f() { return {a() {}}; }',                 # no module map
+                     'f({a: function () {}, b: 1})',                                     # not every entry is a function
+                     'const s = "unterminated'):                                        # scan failure
+            split = self.splitter.split(code)
+            assert split.bundle_format is None
+            assert split.modules       == []
+            assert split.skeleton      == code
+
+    def test_bracket_pairs(self):
+        with self.splitter as _:
+            assert _.bracket_pairs('a(b[c]{d})')                == {1: 9, 3: 5, 6: 8}
+            assert _.bracket_pairs('"(" + \'[\' + `{${ (x) }` ') == {17: 19}
+            assert _.bracket_pairs('x = a / (b) / c; y = /[(]/g') == {8: 10}
+            assert _.bracket_pairs('return /)/.test(s) // )\n/* ( */') == {15: 17}
+            with self.assertRaises(ValueError):
+                _.bracket_pairs('(]')
+            with self.assertRaises(ValueError):
+                _.bracket_pairs('f(')
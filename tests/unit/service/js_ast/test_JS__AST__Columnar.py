@@ -0,0 +1,92 @@
+import json
+from array                                                         import array
+from unittest                                                      import TestCase
+from mgraph_ai_service_js.service.js_ast.JS__AST__Columnar         import JS__AST__Columnar, COLUMNAR__NONE
+from mgraph_ai_service_js.service.js_ast.JS__AST__Compare          import JS__AST__Compare
+
+
+def loc(start_line, start_column, end_line, end_column):
+    return {'start': {'line': start_line, 'column': start_column}, 'end': {'line': end_line, 'column': end_column}}
+
+def identifier(name, start):
+    end = start + len(name)
+    return {'type': 'Identifier', 'name': name, 'start': start, 'end': end, 'range': [start, end], 'loc': loc(1, start, 1, end)}
+
+
+class test_JS__AST__Columnar(TestCase):
+
+    @classmethod
+    def setUpClass(cls):                                                              # const [a, , b] = f(x);
+        cls.ast = {'type': 'Program', 'sourceType': 'module', 'start': 0, 'end': 22, 'range': [0, 22], 'loc': loc(1, 0, 1, 22),
+                   'body': [{'type': 'VariableDeclaration', 'kind': 'const', 'start': 0, 'end': 22, 'range': [0, 22], 'loc': loc(1, 0, 1, 22),
+                             'declarations': [{'type': 'VariableDeclarator', 'start': 6, 'end': 21, 'range': [6, 21], 'loc': loc(1, 6, 1, 21),
+                                               'id'  : {'type': 'ArrayPattern', 'start': 6, 'end': 14, 'range': [6, 14], 'loc': loc(1, 6, 1, 14),
+                                                        'elements': [identifier('a', 7), None, identifier('b', 12)]},
+                                               'init': {'type': 'CallExpression', 'optional': False, 'start': 17, 'end': 21,
+                                                        'callee'   : identifier('f', 17),
+                                                        'arguments': [identifier('x', 19)]}}]}]}
+        cls.columnar = JS__AST__Columnar().load_estree(cls.ast)
+
+    def test_load_estree(self):
+        with self.columnar as _:
+            assert _.node_count()                   == 10
+            assert type(_.type_ids)                 is array
+            assert [_.node_type(row) for row in range(_.node_count())] == ['Program', 'VariableDeclaration', 'VariableDeclarator',
+                                                                            'ArrayPattern', 'Identifier', None, 'Identifier',
+                                                                            'CallExpression', 'Identifier', 'Identifier']
+            assert list(_.parents)                  == [-1, 0, 1, 2, 3, 3, 3, 2, 7, 7]
+            assert list(_.depths)                   == [0, 1, 2, 3, 4, 4, 4, 3, 4, 4]
+            assert list(_.subtree_ends)             == [10, 10, 10, 7, 5, 6, 7, 10, 9, 10]
+            assert list(_.list_indexes[4:7])        == [0, 1, 2]
+            assert _.strings[_.key_ids[7]]          == 'init'
+            assert (_.starts[4], _.ends[4])         == (7, 8)
+            assert _.values.count('const')          == 1                                  # attribute values are interned
+
+    def test_to_estree(self):
+        with self.columnar as _:
+            estree = _.to_estree()
+            assert estree                           == self.ast
+            assert json.dumps(estree)               == json.dumps(self.ast)              # key order is kept too
+            assert _.to_estree(3)                   == self.ast['body'][0]['declarations'][0]['id']
+            assert _.to_estree(5)                   is None                              # hole
+
+    def test_to_estree__unusual_values(self):                                         # anything not columnar goes through the values pool
+        ast      = {'type': 'Program', 'start': -1, 'range': [1, 2], 'loc': {'start': 0}, 'body': [],
+                    'extra': {'regex': {'pattern': 'a', 'flags': 'g'}}, 'items': [1, {'type': 'Literal'}],
+                    'value': 1.0, 'flag': True}
+        columnar = JS__AST__Columnar().load_estree(ast)
+        assert columnar.node_count()                == 1
+        assert columnar.to_estree()                 == ast
+        assert json.dumps(columnar.to_estree())     == json.dumps(ast)
+
+    def test_load_estree__deep_tree(self):                                            # iterative walk has no recursion limit
+        ast = {'type': 'Literal', 'value': 1}
+        for _ in range(5000):
+            ast = {'type': 'UnaryExpression', 'operator': '!', 'argument': ast}
+        columnar = JS__AST__Columnar().load_estree(ast)
+        assert columnar.node_count()                == 5001
+        assert columnar.depth_histogram()[5000]     == 1
+        assert JS__AST__Compare().is_equal(columnar.to_estree(), ast) is True
+
+    def test_load_estree__not_a_node(self):
+        with self.assertRaises(ValueError):
+            JS__AST__Columnar().load_estree({'body': []})
+
+    def test_count_by_type(self):
+        assert self.columnar.count_by_type()        == {'Identifier': 4, 'Program': 1, 'VariableDeclaration': 1,
+                                                        'VariableDeclarator': 1, 'ArrayPattern': 1, 'CallExpression': 1}
+
+    def test_find_descendants(self):
+        with self.columnar as _:
+            assert _.find_by_type('Identifier')                      == [4, 6, 8, 9]
+            assert _.find_by_type('Missing')                         == []
+            assert _.find_descendants(3)                             == [4, 6]
+            assert _.find_descendants(7, 'Identifier')               == [8, 9]
+            assert _.find_descendants(7, 'CallExpression')           == []
+            assert _.find_descendants(7, 'CallExpression', True)     == [7]
+            assert _.children(3)                                     == [4, 5, 6]
+            assert _.children(4)                                     == []
+            assert _.type_id('Missing')                              == COLUMNAR__NONE
+
+    def test_depth_histogram(self):
+        assert self.columnar.depth_histogram()      == {0: 1, 1: 1, 2: 1, 3: 2, 4: 5}
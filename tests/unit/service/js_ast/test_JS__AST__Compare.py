@@ -0,0 +1,83 @@
+from unittest                                                      import TestCase
+from mgraph_ai_service_js.service.js_ast.JS__AST__Compare          import JS__AST__Compare, json_pointer
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas  import JS__AST__Compare__Result
+
+
+class test_JS__AST__Compare(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.ast_compare = JS__AST__Compare()
+        cls.ast_1       = {'type': 'Program', 'sourceType': 'script', 'start': 0, 'end': 13,
+                           'body': [{'type': 'VariableDeclaration', 'kind': 'const', 'start': 0, 'end': 13,
+                                     'declarations': [{'type': 'VariableDeclarator',
+                                                       'id'  : {'type': 'Identifier', 'name': 'x'},
+                                                       'init': {'type': 'Literal', 'value': 42, 'raw': '42'}}]}]}
+
+    def ast_2(self, value=42, raw='42', start=5):                                     # same tree as ast_1 with different positions
+        return {'type': 'Program', 'sourceType': 'script', 'start': start, 'end': 99,
+                'body': [{'type': 'VariableDeclaration', 'kind': 'const', 'loc': {'start': {'line': 2}},
+                          'declarations': [{'type': 'VariableDeclarator',
+                                            'id'  : {'type': 'Identifier', 'name': 'x'},
+                                            'init': {'type': 'Literal', 'value': value, 'raw': raw}}]}]}
+
+    def test_compare__equal(self):
+        with self.ast_compare as _:
+            result = _.compare(self.ast_1, self.ast_2())
+            assert type(result)      is JS__AST__Compare__Result
+            assert result.is_equal   is True
+            assert result.diff_path  is None
+            assert _.is_equal(self.ast_1, self.ast_2(raw='0x2A')) is True                # raw is ignored
+
+    def test_compare__diff_path(self):
+        with self.ast_compare as _:
+            result = _.compare(self.ast_1, self.ast_2(value=43))
+            assert result.is_equal  is False
+            assert result.diff_path == '/body/0/declarations/0/init/value'
+            assert _.first_difference(self.ast_1, self.ast_2(value=42.0)) == '/body/0/declarations/0/init/value'
+            assert _.first_difference(self.ast_1, self.ast_2(value=True)) == '/body/0/declarations/0/init/value'
+            assert _.first_difference({'body': [1, 2]}, {'body': [1]})    == '/body'
+            assert _.first_difference({'a': 1}, {'a': 1, 'b': 2})         == '/b'
+            assert _.first_difference({'a': 1, 'b': 2}, {'a': 1})         == '/b'
+            assert _.first_difference([1], {'0': 1})                      == ''
+            assert _.first_difference({'a': 1, 'b': 2}, {'a': 3, 'b': 4}) == '/a'                   # the first differing key, in key order
+            assert _.first_difference({'a': {'x': 1}, 'b': 2}, {'a': {'x': 3}}) == '/a/x'           # before a later missing key
+
+    def test_compare__matches_json_semantics(self):                                   # same answers as comparing normalised json dumps
+        pairs = [({'a': [1, {'b': None}]}, {'a': [1, {'b': None, 'range': [0, 1]}]}, True ),
+                 ({'a': None}            , {}                                     , False),
+                 ({'a': 'x'}             , {'a': 'x', 'leadingComments': []}      , True ),
+                 ({'a': 1}               , {'a': '1'}                             , False)]
+        for ast_1, ast_2, expected in pairs:
+            assert self.ast_compare.is_equal(ast_1, ast_2) is expected
+
+    def test_compare__deep_tree(self):                                                # iterative walk has no recursion limit
+        deep_1 = deep_2 = {'type': 'Literal', 'value': 1}
+        for _ in range(5000):
+            deep_1 = {'type': 'UnaryExpression', 'argument': deep_1}
+            deep_2 = {'type': 'UnaryExpression', 'argument': deep_2, 'start': 0}
+        assert self.ast_compare.is_equal(deep_1, deep_2) is True
+        assert self.ast_compare.merkle_hash(deep_1) == self.ast_compare.merkle_hash(deep_2)
+
+    def test_merkle_hash(self):
+        with self.ast_compare as _:
+            ast_hash = _.merkle_hash(self.ast_1)
+            assert len(ast_hash)                                 == 32
+            assert _.merkle_hash(self.ast_2())                   == ast_hash
+            assert _.matches_hash(self.ast_2(start=100), ast_hash) is True
+            assert _.matches_hash(self.ast_2(value=43) , ast_hash) is False
+            assert _.merkle_hash({'a': 1, 'b': 2})               == _.merkle_hash({'b': 2, 'a': 1})
+            assert _.merkle_hash([1, 2])                         != _.merkle_hash([2, 1])
+            assert _.merkle_hash(1)                              != _.merkle_hash(1.0)
+
+    def test_merkle_hashes(self):
+        with self.ast_compare as _:
+            hashes = _.merkle_hashes(self.ast_1)
+            init   = self.ast_1['body'][0]['declarations'][0]['init']
+            assert hashes[id(self.ast_1)] == _.merkle_hash(self.ast_1)
+            assert hashes[id(init)]       == _.merkle_hash({'type': 'Literal', 'value': 42})
+
+    def test_json_pointer(self):
+        assert json_pointer(None)                        == ''
+        assert json_pointer(((None, 'body'), 0))         == '/body/0'
+        assert json_pointer(((None, 'a/b'), 'c~d'))      == '/a~1b/c~0d'
@@ -0,0 +1,66 @@
+from unittest                                                              import TestCase
+from mgraph_ai_service_js.service.js_ast.JS__AST__Diff                     import JS__AST__Diff
+
+
+def identifier(name, start=0):
+    return {'type': 'Identifier', 'name': name, 'start': start, 'end': start + len(name)}
+
+
+def call(callee, *arguments):                                                        # `callee(arguments);`
+    return {'type'      : 'ExpressionStatement',
+            'expression': {'type': 'CallExpression', 'callee': identifier(callee), 'arguments': list(arguments), 'optional': False}}
+
+
+def literal(value):
+    return {'type': 'Literal', 'value': value, 'raw': repr(value)}
+
+
+def program(*statements):
+    return {'type': 'Program', 'sourceType': 'module', 'body': list(statements)}
+
+
+class test_JS__AST__Diff(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.ast_diff = JS__AST__Diff()
+
+    def test_diff__no_changes(self):
+        before = program(call('f', literal(1)), call('g'))
+        after  = program(call('f', {**literal(1), 'raw': '0x1', 'start': 7}), call('g'))    # formatting only
+        assert self.ast_diff.diff(before, after) == []
+
+    def test_diff__update(self):
+        edits = self.ast_diff.diff(program(call('f', literal(1)), call('g')),
+                                   program(call('f', literal(2)), call('h')))
+        assert edits == [{'op': 'update', 'path': '/body/0/expression/arguments/0', 'new_path': '/body/0/expression/arguments/0',
+                          'type': 'Literal'   , 'changes': {'value': [1, 2]}},
+                         {'op': 'update', 'path': '/body/1/expression/callee'     , 'new_path': '/body/1/expression/callee',
+                          'type': 'Identifier', 'changes': {'name': ['g', 'h']}}]
+
+    def test_diff__move_insert_delete(self):
+        before = program(call('a', literal(1)), call('b', literal(2)), call('c', literal(3)))
+        after  = program(call('c', literal(3)), call('a', literal(1)), call('d', identifier('x')))
+        edits  = self.ast_diff.diff(before, after)
+        assert [(edit['op'], edit.get('path'), edit.get('new_path')) for edit in edits] == [
+            ('delete', '/body/1/expression/arguments/0', None                            ),    # b(2) became d(x): same statement, edited
+            ('update', '/body/1/expression/callee'     , '/body/2/expression/callee'     ),
+            ('move'  , '/body/2'                       , '/body/0'                       ),    # c(3) moved ahead of a(1)
+            ('insert', None                            , '/body/2/expression/arguments/0')]
+        assert edits[1]['changes'] == {'name': ['b', 'd']}
+        assert edits[3]['node']    == identifier('x')
+
+    def test_diff__move_across_parents(self):
+        wrapped = {'type': 'BlockStatement', 'body': [call('f', literal(1))]}
+        edits   = self.ast_diff.diff(program(call('f', literal(1)), call('g', literal(2))),
+                                     program(wrapped              , call('g', literal(2))))
+        assert [(edit['op'], edit.get('path'), edit.get('new_path')) for edit in edits] == [('move'  , '/body/0', '/body/0/body/0'),
+                                                                                           ('insert', None     , '/body/0'       )]
+
+    def test_flatten(self):
+        tree = self.ast_diff.flatten(program(call('f', literal(1))))
+        assert tree.path   == ['', '/body/0', '/body/0/expression', '/body/0/expression/callee', '/body/0/expression/arguments/0']
+        assert tree.parent == [-1, 0, 1, 2, 2]
+        assert tree.size   == [4, 3, 2, 0, 0]
+        assert tree.height == [4, 3, 2, 1, 1]
+        assert tree.label[2] == {'type': 'CallExpression', 'optional': False}
@@ -0,0 +1,95 @@
+import time
+from unittest                                                      import TestCase
+from mgraph_ai_service_js.service.js_ast.JS__AST__Handle__Store    import JS__AST__Handle__Store, JS__AST__Handle__Entry, HANDLE_STORE__MAX_BYTES
+from mgraph_ai_service_js.service.js_ast.JS__AST__Handle__Store    import resolve_json_pointer, limit_ast_depth, js_ast__handle_store
+
+
+class test_JS__AST__Handle__Store(TestCase):
+
+    def setUp(self):
+        self.store = JS__AST__Handle__Store(max_entries=2, ttl_seconds=60)
+        self.ast   = {'type': 'Program', 'start': 0, 'end': 4,
+                      'body': [{'type': 'ExpressionStatement', 'start': 0, 'end': 4,
+                                'expression': {'type': 'CallExpression', 'start': 0, 'end': 3,
+                                               'callee'   : {'type': 'Identifier', 'name': 'f', 'start': 0, 'end': 1},
+                                               'arguments': []}}]}
+
+    def test_add_get(self):
+        with self.store as _:
+            handle = _.add(self.ast, 'f();')
+            entry  = _.get(handle)
+            assert len(handle)          == 32
+            assert type(entry)          is JS__AST__Handle__Entry
+            assert entry.ast            is self.ast
+            assert entry.code           == 'f();'
+            assert _.get('unknown')     is None
+            assert _.remove(handle)     is True
+            assert _.get(handle)        is None
+            assert type(js_ast__handle_store) is JS__AST__Handle__Store
+
+    def test_update(self):
+        with self.store as _:
+            handle = _.add(self.ast, 'f();')
+            entry  = _.get(handle)
+            assert _.update(handle, entry.version, {'type': 'Program', 'body': []}, '') is True
+            assert _.update(handle, entry.version, self.ast, 'f();')                   is False     # raced: based on the tree before the first update
+            assert (entry.ast, entry.code, entry.version)                              == (self.ast, 'f();', 0)   # holders of the old entry see it unchanged
+            assert (_.get(handle).code, _.get(handle).version)                         == ('', 1)
+            assert _.update('unknown', 0, self.ast, 'f();')                            is False
+
+    def test_lru_eviction(self):
+        with self.store as _:
+            handle_1 = _.add(self.ast, '1')
+            handle_2 = _.add(self.ast, '2')
+            _.get(handle_1)                                                          # handle_2 is now the least recently used
+            handle_3 = _.add(self.ast, '3')
+            assert _.get(handle_2)      is None
+            assert _.get(handle_1)      is not None
+            assert _.get(handle_3)      is not None
+            assert _.stats()            == {'entries': 2, 'max_entries': 2, 'size_bytes': 2, 'max_bytes': HANDLE_STORE__MAX_BYTES, 'ttl_seconds': 60}
+
+    def test_size_eviction(self):
+        with JS__AST__Handle__Store(max_entries=10, max_bytes=10, ttl_seconds=60) as _:
+            handle_1 = _.add(self.ast, 'a' * 4)
+            handle_2 = _.add(self.ast, 'b' * 4)
+            handle_3 = _.add(self.ast, 'c' * 4)                                     # 12 bytes: the least recently used goes
+            assert (_.get(handle_1), _.size_bytes)                               == (None, 8)
+            assert _.update(handle_2, 0, self.ast, 'b' * 2)                      is True
+            assert _.size_bytes                                                  == 6
+            handle_4 = _.add(self.ast, 'd' * 20)                                     # over the cap on its own: kept, everything else goes
+            assert [_.get(handle) is not None for handle in (handle_2, handle_3, handle_4)] == [False, False, True]
+            assert _.remove(handle_4)                                            is True
+            assert _.size_bytes                                                  == 0
+
+    def test_size_eviction__update(self):                                           # reparses that grow a source are held to max_bytes too
+        with JS__AST__Handle__Store(max_entries=10, max_bytes=10, ttl_seconds=60) as _:
+            handle_1 = _.add(self.ast, 'a' * 4)
+            handle_2 = _.add(self.ast, 'b' * 4)
+            assert _.update(handle_1, 0, self.ast, 'a' * 7)                      is True     # 11 bytes: handle_2 is now the least recently used
+            assert (_.get(handle_2), _.size_bytes)                               == (None, 7)
+            assert _.update(handle_1, 1, self.ast, 'a' * 20)                     is True     # over the cap on its own: kept
+            assert (_.get(handle_1).code, _.size_bytes)                          == ('a' * 20, 20)
+
+    def test_ttl_eviction(self):
+        with self.store as _:
+            handle = _.add(self.ast, 'f();')
+            _.entries[handle].accessed_at = time.time() - 61
+            assert _.get(handle)        is None
+            assert _.stats()['entries'] == 0
+
+    def test_resolve_json_pointer(self):
+        assert resolve_json_pointer(self.ast, '')                                   is self.ast
+        assert resolve_json_pointer(self.ast, '/body/0/expression/callee/name')     == 'f'
+        assert resolve_json_pointer({'a/b': {'c~d': 1}}, '/a~1b/c~0d')              == 1
+        for pointer in ('body', '/body/1', '/body/x', '/missing'):
+            with self.assertRaises(KeyError):
+                resolve_json_pointer(self.ast, pointer)
+
+    def test_limit_ast_depth(self):
+        assert limit_ast_depth(self.ast, 0) == {'type': 'Program', 'start': 0, 'end': 4,
+                                                'body': [{'type': 'ExpressionStatement', 'truncated': True, 'pointer': '/body/0',
+                                                          'start': 0, 'end': 4}]}
+        statement = limit_ast_depth(self.ast['body'][0], 1, '/body/0')
+        assert statement['expression']['callee'] == {'type': 'Identifier', 'truncated': True,
+                                                      'pointer': '/body/0/expression/callee', 'start': 0, 'end': 1}
+        assert limit_ast_depth(self.ast, 10)      == self.ast
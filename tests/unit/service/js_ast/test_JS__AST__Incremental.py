@@ -0,0 +1,86 @@
+from unittest                                                              import TestCase
+from mgraph_ai_service_js.service.js_ast.JS__AST__Incremental              import JS__AST__Incremental
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas          import JS__AST__Text__Edit
+
+CODE = "let a = 1;\nlet b = 2;\nlet c = 3;\nlet d = 4;\nlet e = 5;"
+
+
+def statement(index, start, end):                                                   # one line per statement, as CODE is laid out
+    line = index + 1
+    return {'type'  : 'VariableDeclaration',
+            'start' : start, 'end': end, 'range': [start, end],
+            'loc'   : {'start': {'line': line, 'column': 0}, 'end': {'line': line, 'column': end - start}},
+            'declarations': [{'type': 'VariableDeclarator', 'start': start + 4, 'end': end - 1,
+                              'loc' : {'start': {'line': line, 'column': 4}, 'end': {'line': line, 'column': end - start - 1}}}]}
+
+
+def program():
+    body = [statement(index, index * 11, index * 11 + 10) for index in range(5)]
+    return {'type': 'Program', 'start': 0, 'end': len(CODE), 'range': [0, len(CODE)], 'body': body,
+            'loc' : {'start': {'line': 1, 'column': 0}, 'end': {'line': 5, 'column': 10}}}
+
+
+def edit(start, end, text):
+    return JS__AST__Text__Edit(start=start, end=end, text=text)
+
+
+class test_JS__AST__Incremental(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.incremental = JS__AST__Incremental()
+
+    def test_apply_edits(self):
+        assert self.incremental.apply_edits(CODE, [edit(30, 31, '30'), edit(19, 20, '10')])[:34] == "let a = 1;\nlet b = 10;\nlet c = 30;"
+        assert self.incremental.apply_edits("'\U0001F600';x", [edit(5, 6, 'y')])             == "'\U0001F600';y"   # offsets count UTF-16 units
+
+        with self.assertRaises(ValueError):
+            self.incremental.apply_edits(CODE, [edit(8, 12, ''), edit(10, 11, '')])              # overlapping
+        with self.assertRaises(ValueError):
+            self.incremental.apply_edits(CODE, [edit(60, 61, '')])                               # past the end
+
+    def test_plan(self):
+        plan = self.incremental.plan(program(), CODE, [edit(30, 31, '3 +\n 3')])     # inside `let c = 3;`
+        assert plan.first_index                                == 1                  # one neighbour on each side
+        assert plan.last_index                                 == 3
+        assert plan.code[plan.region_start:plan.region_end]    == "let b = 2;\nlet c = 3 +\n 3;\nlet d = 4;"
+        assert (plan.start_offset, plan.start_line, plan.start_column) == (11, 2, 0)
+        assert plan.end_offset                                 == 48
+        assert (plan.offset_delta, plan.line_delta)            == (5, 1)
+        assert plan.closing_type                               == 'VariableDeclaration'
+
+        plan = self.incremental.plan(program(), CODE, [edit(52, 53, '50')])          # the last statement runs the region to the end of file
+        assert (plan.first_index, plan.last_index, plan.region_end) == (3, 4, len(CODE) + 1)
+
+        assert self.incremental.plan(program(), CODE, []) is None
+        with_directive = program()
+        with_directive['body'][0]['directive'] = 'use strict'
+        assert self.incremental.plan(with_directive, CODE, [edit(8, 9, '0')]) is None    # the prologue decides strict mode
+
+    def test_apply(self):
+        ast      = program()
+        plan     = self.incremental.plan(ast, CODE, [edit(30, 31, '3 +\n 3')])
+        region   = {'type': 'Program', 'body': [{'type': 'Replaced'}]}
+        ast      = self.incremental.apply(ast, plan, region)
+        before   = program()
+        self.incremental.apply(before, plan, region)
+        assert before                                          == program()                 # the stored tree is never changed in place
+        last     = ast['body'][-1]
+        assert [node['type'] for node in ast['body']]          == ['VariableDeclaration', 'Replaced', 'VariableDeclaration']
+        assert (last['start'], last['end'], last['range'])     == (49, 59, [49, 59])
+        assert last['loc']                                     == {'start': {'line': 6, 'column': 0}, 'end': {'line': 6, 'column': 10}}
+        assert last['declarations'][0]['start']                == 53
+        assert (ast['start'], ast['end'], ast['loc']['end'])   == (0, len(CODE) + 5, {'line': 6, 'column': 10})
+
+        before   = program()
+        plan     = self.incremental.plan(before, CODE, [edit(8, 9, '10')])                  # same line: only offsets move
+        ast      = self.incremental.apply(before, plan, region)
+        assert (ast['body'][-1]['start'], before['body'][-1]['start'])     == (45, 44)
+        assert ast['body'][-1]['loc']                                      is before['body'][-1]['loc']   # unchanged positions are shared, not copied
+
+    def test_region_fits(self):
+        plan      = self.incremental.plan(program(), CODE, [edit(30, 31, '3 +\n 3')])
+        closing   = {'type': 'VariableDeclaration', 'start': 38, 'end': 48}
+        assert self.incremental.region_fits(plan, {'body': [{'type': 'VariableDeclaration'}, closing]})                  is True
+        assert self.incremental.region_fits(plan, {'body': [{**closing, 'type': 'ExpressionStatement'}]})                is False   # the neighbour merged into something else
+        assert self.incremental.region_fits(plan, {'body': []})                                                          is False
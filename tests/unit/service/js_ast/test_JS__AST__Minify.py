@@ -0,0 +1,27 @@
+from unittest                                                              import TestCase
+from mgraph_ai_service_js.service.js_ast.JS__AST__Minify                   import JS__AST__Minify
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas          import JS__AST__Minify__Request, JS__AST__Transform__Step
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas          import Safe_Str__Javascript
+
+
+class test_JS__AST__Minify(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.minify = JS__AST__Minify()
+
+    def test_steps(self):
+        request = JS__AST__Minify__Request(code  = Safe_Str__Javascript('x;'),
+                                           steps = [JS__AST__Transform__Step(name='mangle'), JS__AST__Transform__Step(name='strip_debugger')])
+        assert [step.name for step in self.minify.steps(request)] == ['strip_debugger', 'mangle']        # mangle always runs last
+        request.mangle = False
+        assert [step.name for step in self.minify.steps(request)] == ['strip_debugger']
+
+    def test_size_stats(self):
+        source = 'const value = "é";\n' * 100
+        stats  = self.minify.size_stats(source, 'const a="é";')
+        assert stats['input_bytes']       == len(source) + 100                                            # é is two bytes in UTF-8
+        assert stats['output_bytes']      == 13
+        assert stats['input_gzip_bytes']  <  stats['input_bytes']
+        assert stats['ratio']             == round(13 / stats['input_bytes'], 4)
+        assert self.minify.size_stats('', '')['ratio'] == 1.0
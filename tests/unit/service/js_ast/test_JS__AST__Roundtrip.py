@@ -1,15 +1,32 @@
+import json
 import re
 import pytest
 from unittest                                                      import TestCase
-from mgraph_ai_service_js.service.js_ast.JS__AST__Roundtrip        import JS__AST__Roundtrip
+from unittest.mock                                                 import patch
+from mgraph_ai_service_js.service.js_ast.JS__AST__Roundtrip        import JS__AST__Roundtrip, safe_error
 from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas  import JS__AST__Parser__Options, Safe_Str__Code__Formatting
 from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas  import JS__AST__Generator__Options
 from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas  import JS__AST__Parse__Request
 from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas  import JS__AST__Generate__Request
 from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas  import JS__AST__Roundtrip__Request
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas  import JS__AST__Query__Request
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas  import JS__AST__Parse__Batch__Request
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas  import JS__AST__Parse__Batch__Item
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas  import JS__AST__Parse__Stream__Request
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas  import JS__AST__Parse__Bundle__Request
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas  import JS__AST__Graph__Request
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas  import JS__AST__Node__Request
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas  import JS__AST__Reparse__Request
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas  import JS__AST__Text__Edit
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas  import JS__AST__Diff__Request
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas  import JS__AST__Transform__Request
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas  import JS__AST__Transform__Step
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas  import JS__AST__Minify__Request
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas  import Safe_Str__Stream_Format
 from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas  import Safe_Str__Javascript
 from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas  import Safe_Str__ECMAVersion
 from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas  import Safe_Str__SourceType
+from mgraph_ai_service_js.service.deno.Deno__Module__Circuits      import deno_module_circuits
 
 
 class test_JS__AST__Roundtrip(TestCase):
@@ -18,6 +35,13 @@ class test_JS__AST__Roundtrip(TestCase):
     def setUpClass(cls):
         cls.ast_service = JS__AST__Roundtrip()
 
+    def setUp(self):
+        deno_module_circuits.reset()                                                # one CDN test tripping the shared breaker must not turn later ones --cached-only
+
+    def test_00_safe_error(self):                                                    # deno's stderr (e.g. during a CDN outage) can run past what Safe_Str holds
+        assert len(safe_error('x' * 2000)) == 512
+        assert safe_error(None)             == ''
+
     def test_01_parse_simple_code(self):                                             # Test parsing simple JavaScript
         request = JS__AST__Parse__Request(
             code    = Safe_Str__Javascript("const x = 42;"),
@@ -248,4 +272,283 @@ class Example {
                                                   line_end = Safe_Str__Code__Formatting("\r\n"))
 
         assert str(gen_options.indent)   == "\t"
-        assert str(gen_options.line_end) == "\r\n"
\ No newline at end of file
+        assert str(gen_options.line_end) == "\r\n"
+
+    def test_12_query_ast(self):                                                     # Test ESQuery selectors against the AST
+        code    = Safe_Str__Javascript("import a from 'a';\nfetch('/x');\nfunction f() { fetch('/y'); }")
+        request = JS__AST__Query__Request(code              = code                                                       ,
+                                          selectors         = ["CallExpression[callee.name='fetch']", "ImportDeclaration"],
+                                          include_ancestors = True                                                       )
+
+        response = self.ast_service.query_ast(request)
+
+        assert response.success is True
+        fetch_calls, imports = response.results
+        assert fetch_calls['selector']                              == "CallExpression[callee.name='fetch']"
+        assert len(fetch_calls['matches'])                          == 2
+        assert fetch_calls['matches'][0]['node']['type']            == 'CallExpression'
+        assert fetch_calls['matches'][0]['ancestors'][-1]['type']   == 'Program'
+        assert fetch_calls['matches'][1]['ancestors'][2]            == {'type': 'FunctionDeclaration', 'name': 'f',
+                                                                       'start': 32, 'end': 61}
+        assert fetch_calls['truncated']                             is False
+        assert [match['node']['type'] for match in imports['matches']] == ['ImportDeclaration']
+
+        handle   = self.ast_service.parse_to_ast(JS__AST__Parse__Request(code=code, return_handle=True)).handle
+        response = self.ast_service.query_ast(JS__AST__Query__Request(handle=handle, selectors=request.selectors, include_ancestors=True))
+        assert response.results == [fetch_calls, imports]                               # the stored tree, not parsed again
+        assert self.ast_service.query_ast(JS__AST__Query__Request(handle='unknown', selectors=request.selectors)).success is False
+        with self.assertRaises(ValueError):
+            self.ast_service.query_ast(JS__AST__Query__Request(selectors=request.selectors))
+
+    def test_13_query_ast__invalid_selector(self):                                   # Test invalid selector error
+        request  = JS__AST__Query__Request(code      = Safe_Str__Javascript("const x = 42;"),
+                                           selectors = ["CallExpression[["]                )
+        response = self.ast_service.query_ast(request)
+
+        assert response.success is False
+        assert response.results is None
+
+    def test_14_parse_batch(self):                                                   # Test batch parsing with a failing item
+        items   = [JS__AST__Parse__Batch__Item(id='a.js', code=Safe_Str__Javascript("export const a = 1;")),
+                   JS__AST__Parse__Batch__Item(id='b.js', code=Safe_Str__Javascript("const b = ;"        )),
+                   JS__AST__Parse__Batch__Item(id='c.js', code=Safe_Str__Javascript("let c = a + 1;"     ),
+                                               options=JS__AST__Parser__Options(source_type=Safe_Str__SourceType("script")))]
+        results = {result['id']: result for result in self.ast_service.parse_batch(JS__AST__Parse__Batch__Request(items=items))}
+
+        assert list(results)                        == ['a.js', 'b.js', 'c.js']
+        assert results['a.js']['success']           is True
+        assert results['a.js']['ast']['body'][0]['type'] == 'ExportNamedDeclaration'
+        assert results['b.js']['success']           is False
+        assert results['b.js']['error']             is not None
+        assert results['c.js']['ast']['sourceType'] == 'script'
+
+    def test_15_parse_batch__multiple_processes(self):                               # Test batch parsing spread across processes
+        items   = [JS__AST__Parse__Batch__Item(id=f'file_{index}.js', code=Safe_Str__Javascript(f"const x = {index};"))
+                   for index in range(6)]
+        results = list(self.ast_service.parse_batch(JS__AST__Parse__Batch__Request(items=items, processes=3)))
+
+        assert sorted(result['id'] for result in results) == sorted(item.id for item in items)
+        assert all(result['success'] for result in results)
+
+    def test_16_parse_to_ast__stream(self):                                          # Test streaming the AST statement by statement
+        code    = Safe_Str__Javascript("const a = 1;\nconst b = 2;")
+        request = JS__AST__Parse__Stream__Request(code=code)
+        events  = [json.loads(line) for line in self.ast_service.parse_to_ast__stream(request)]
+
+        assert [event['event'] for event in events] == ['program', 'statement', 'statement', 'end']
+        assert events[0]['node']['type']            == 'Program'
+        assert 'body'                               not in events[0]['node']
+        assert events[2]['index']                   == 1
+        assert events[3]['statements']              == 2
+
+        request  = JS__AST__Parse__Stream__Request(code=code, format=Safe_Str__Stream_Format('json'))
+        document = json.loads('\n'.join(self.ast_service.parse_to_ast__stream(request)))
+        assert document == self.ast_service.parse_to_ast(JS__AST__Parse__Request(code=code)).ast
+
+    def test_17_tokenize(self):                                                      # Test the tokens-only mode and parse with tokens
+        code     = Safe_Str__Javascript("const x = 42;")
+        response = self.ast_service.tokenize(JS__AST__Parse__Request(code=code))
+
+        assert response.success     is True
+        assert response.token_count == 5
+        tokens = response.tokens
+        assert [tokens['types'][type_id] for type_id in tokens['type_ids']] == ['Keyword', 'Identifier', 'Punctuator',
+                                                                                'NumericLiteral', 'Punctuator']
+        assert tokens['starts'] == [0, 6, 8, 10, 12]
+        assert tokens['ends'  ] == [5, 7, 9, 12, 13]
+
+        parse_response = self.ast_service.parse_to_ast(JS__AST__Parse__Request(code    = code                                 ,
+                                                                                options = JS__AST__Parser__Options(tokens=True)))
+        assert parse_response.tokens         == tokens
+        assert parse_response.ast['type']    == 'Program'
+        assert self.ast_service.parse_to_ast(JS__AST__Parse__Request(code=code)).tokens is None
+        assert self.ast_service.tokenize(JS__AST__Parse__Request(code=Safe_Str__Javascript("const = ;"))).success is False
+
+    def test_18_generate_with_source_map(self):                                      # Test source maps built during generation
+        ast = self.ast_service.parse_to_ast(JS__AST__Parse__Request(code=Safe_Str__Javascript("const answer    = 42;"))).ast
+
+        options  = JS__AST__Generator__Options(source_map=True, source_file='src/answer.js')
+        response = self.ast_service.generate_from_ast(JS__AST__Generate__Request(ast=ast, options=options))
+        assert response.success                  is True
+        assert str(response.code)                == 'const answer = 42;\n'
+        assert response.source_map['version']    == 3
+        assert response.source_map['sources']    == ['src/answer.js']
+        assert 'answer'                          in response.source_map['names']
+        assert response.source_map['mappings']   != ''
+
+        options  = JS__AST__Generator__Options(source_map=True, source_map_inline=True)
+        response = self.ast_service.generate_from_ast(JS__AST__Generate__Request(ast=ast, options=options))
+        assert response.source_map               is None
+        assert '//# sourceMappingURL=data:application/json;charset=utf-8;base64,' in str(response.code)
+
+        response = self.ast_service.generate_from_ast(JS__AST__Generate__Request(ast=ast))
+        assert response.source_map               is None
+
+    def test_19_ast_to_graph(self):                                                  # Test the streamed node/edge graph
+        code     = Safe_Str__Javascript("const a = f(1);")
+        response = self.ast_service.ast_to_graph(JS__AST__Graph__Request(code=code))
+
+        assert response.success                             is True
+        assert len(response.nodes)                          == len(response.edges) + 1
+        program, declaration = response.nodes[0], response.nodes[1]
+        assert response.node_types[program[0]]              == 'Program'
+        assert program[2:4]                                 == [0, 15]
+        assert declaration[1]                               == {'kind': 'const'}
+        assert response.edges[0]                            == [0, 1, response.edge_types.index('body'), 0]
+        call_id = next(index for index, node in enumerate(response.nodes) if response.node_types[node[0]] == 'CallExpression')
+        assert [edge[1] for edge in response.edges if edge[0] == call_id] == [call_id + 1, call_id + 2]
+
+        pruned = self.ast_service.ast_to_graph(JS__AST__Graph__Request(code=code, include_positions=False))
+        assert all(len(node) == 2 for node in pruned.nodes)
+        assert pruned.edges                                 == response.edges
+
+        assert self.ast_service.ast_to_graph(JS__AST__Graph__Request(code=Safe_Str__Javascript("const = ;"))).success is False
+
+    def test_20_parse_with_handle(self):                                             # Test keeping the AST server side and fetching subtrees
+        code     = Safe_Str__Javascript("const a = f(1);")
+        response = self.ast_service.parse_to_ast(JS__AST__Parse__Request(code=code, return_handle=True))
+        assert response.success is True
+        assert response.ast     is None
+        assert response.handle  is not None
+
+        node = self.ast_service.fetch_node(JS__AST__Node__Request(handle=response.handle, pointer='/body/0/declarations/0', max_depth=0))
+        assert node.success                 is True
+        assert node.node['type']            == 'VariableDeclarator'
+        assert node.node['init']            == {'type': 'CallExpression', 'truncated': True, 'start': 10, 'end': 14,
+                                                'pointer': '/body/0/declarations/0/init'}
+
+        assert self.ast_service.fetch_node(JS__AST__Node__Request(handle=response.handle, pointer='/body/5')).success is False
+        assert self.ast_service.fetch_node(JS__AST__Node__Request(handle='unknown'                       )).success is False
+
+    def test_21_outline(self):                                                       # Test the declarations/imports/exports outline
+        code     = Safe_Str__Javascript("import a, {b as c} from 'm';\n"
+                                        "export function f(x) { return a(x); }\n"
+                                        "class K extends Base { get v() { return 1; } }\n"
+                                        "const {y, z: [w]} = c;")
+        response = self.ast_service.outline(JS__AST__Parse__Request(code=code))
+
+        assert response.success is True
+        assert response.imports  == [{'source': 'm', 'start': 0, 'end': 28, 'line': 1,
+                                      'specifiers': [{'kind': 'default', 'local': 'a', 'imported': None},
+                                                     {'kind': 'named'  , 'local': 'c', 'imported': 'b' }]}]
+        assert response.exports  == [{'kind': 'named', 'names': ['f'], 'source': None, 'start': 29, 'end': 66, 'line': 2}]
+        function, klass, variable = response.declarations
+        assert function['name']         == 'f'
+        assert function['exported']     is True
+        assert function['params']       == 1
+        assert 'body'                   not in function
+        assert klass['super_class']     == 'Base'
+        assert klass['members'][0]['kind'] == 'get'
+        assert variable['names']        == ['y', 'w']
+
+        assert self.ast_service.outline(JS__AST__Parse__Request(code=Safe_Str__Javascript("const = ;"))).success is False
+
+    def test_22_parse_bundle(self):                                                  # Test bundle-aware parsing across processes
+        code     = ("var __webpack_modules__ = ({\n"
+                    "  \"./a.js\": ((module) => { module.exports = 1; }),\n"
+                    "  \"./b.js\": (function(module) { module.exports = 2; })\n"
+                    "});")
+        whole    = self.ast_service.parse_to_ast(JS__AST__Parse__Request(code=Safe_Str__Javascript(code)))
+        response = self.ast_service.parse_bundle(JS__AST__Parse__Bundle__Request(code=code, processes=2))
+
+        assert response.success       is True
+        assert response.bundle_format == 'webpack'
+        assert response.module_count  == 2
+        assert response.ast           == whole.ast                                    # same tree and positions as a monolithic parse
+
+        response = self.ast_service.parse_bundle(JS__AST__Parse__Bundle__Request(code=code, stitch=False))
+        assert [module['id'] for module in response.modules]         == ['./a.js', './b.js']
+        assert response.modules[1]['ast']['type']                    == 'FunctionExpression'
+        assert response.modules[1]['ast']['loc']['start']            == {'line': 3, 'column': 13}
+
+        response = self.ast_service.parse_bundle(JS__AST__Parse__Bundle__Request(code="const x = 1;"))
+        assert response.success       is True                                         # not a bundle, parsed as one program
+        assert response.bundle_format is None
+
+    def test_23_reparse(self):                                                       # Test incremental re-parse of a stored AST after text edits
+        code     = "const a = 1;\nfunction f() { return a; }\nlet b = f();\nclass C {}\nexport { b };"
+        handle   = self.ast_service.parse_to_ast(JS__AST__Parse__Request(code=Safe_Str__Javascript(code), return_handle=True)).handle
+        edit     = JS__AST__Text__Edit(start=code.index('a;'), end=code.index('a;') + 1, text='a *\n 2')
+        response = self.ast_service.reparse(JS__AST__Reparse__Request(handle=handle, edits=[edit]))
+        new_code = code.replace('a;', 'a *\n 2;')
+        whole    = self.ast_service.parse_to_ast(JS__AST__Parse__Request(code=Safe_Str__Javascript(new_code)))
+
+        assert response.success                                  is True
+        assert response.full_reparse                             is False
+        assert response.diff['start_index']                      == 0                # the edited function plus its neighbours
+        assert response.diff['delete_count']                     == 3
+        assert (response.diff['offset_delta'], response.diff['line_delta']) == (5, 1)
+        assert self.ast_service.fetch_node(JS__AST__Node__Request(handle=handle, max_depth=100)).node == whole.ast
+
+        edit     = JS__AST__Text__Edit(start=0, end=5, text='(')                     # a syntax error keeps the previous tree
+        response = self.ast_service.reparse(JS__AST__Reparse__Request(handle=handle, edits=[edit], return_ast=True))
+        assert response.success                                  is False
+        assert response.full_reparse                             is True
+        assert self.ast_service.reparse(JS__AST__Reparse__Request(handle='unknown', edits=[edit])).handle is None
+
+        stored   = self.ast_service.handle_store.get(handle)                          # another reparse lands while this one parses
+        edit     = JS__AST__Text__Edit(start=new_code.index('1;'), end=new_code.index('1;') + 1, text='3')
+        with patch.object(self.ast_service.handle_store, 'get', side_effect=[stored, stored]):
+            self.ast_service.handle_store.update(handle, stored.version, stored.ast, stored.code)
+            response = self.ast_service.reparse(JS__AST__Reparse__Request(handle=handle, edits=[edit]))
+        assert (response.success, response.conflict)             == (False, True)
+        assert self.ast_service.handle_store.get(handle).code    == new_code          # left as the other reparse made it
+
+    def test_24_diff(self):                                                          # Test the structural diff between two versions
+        before   = Safe_Str__Javascript("const x = 1;\nfunction f(a) { return a + 1; }")
+        response = self.ast_service.diff(JS__AST__Diff__Request(code_before = before,
+                                                                code_after  = Safe_Str__Javascript("const x=1; function f(a){return a+1}")))
+        assert response.success    is True
+        assert response.edits      == []                                              # formatting only
+
+        handle   = self.ast_service.parse_to_ast(JS__AST__Parse__Request(code=before, return_handle=True)).handle
+        response = self.ast_service.diff(JS__AST__Diff__Request(handle_before = handle,
+                                                                code_after    = Safe_Str__Javascript("const x = 2;\nfunction f(a) { return a + 1; }")))
+        assert response.edit_count == 1
+        assert response.edits[0]   == {'op': 'update', 'path': '/body/0/declarations/0/init', 'new_path': '/body/0/declarations/0/init',
+                                       'type': 'Literal', 'changes': {'value': [1, 2]}}
+
+        response = self.ast_service.diff(JS__AST__Diff__Request(code_before=before, code_after=Safe_Str__Javascript("const = ;")))
+        assert response.success    is False
+
+    def test_25_transform(self):                                                     # Test built-in transforms in one parse/generate pass
+        code     = Safe_Str__Javascript("if (process.env.NODE_ENV !== 'production') { console.log('dev'); debugger; }\nconst total = add(1, 2);\nconsole.log(total);")
+        steps    = [JS__AST__Transform__Step(name='define'              , params={'map': {'process.env.NODE_ENV': 'production'}}),
+                    JS__AST__Transform__Step(name='remove_dead_branches'),
+                    JS__AST__Transform__Step(name='strip_console'       ),
+                    JS__AST__Transform__Step(name='rename'              , params={'map': {'total': 't'}})]
+        response = self.ast_service.transform(JS__AST__Transform__Request(code=code, steps=steps))
+
+        assert response.success                                  is True
+        assert str(response.code).strip()                        == 'const t = add(1, 2);'
+        assert response.steps                                    == [{'name': 'define'              , 'changes': 1},
+                                                                     {'name': 'remove_dead_branches', 'changes': 1},
+                                                                     {'name': 'strip_console'       , 'changes': 1},
+                                                                     {'name': 'rename'              , 'changes': 1}]
+
+        dead     = Safe_Str__Javascript("if (false) { var x = 1; let y = 2 }\nwhile (false) { var i = 0 }\nconsole.log(x, i);")
+        response = self.ast_service.transform(JS__AST__Transform__Request(code=dead, steps=[JS__AST__Transform__Step(name='remove_dead_branches')]))
+        assert str(response.code).strip()                        == 'var x;\nvar i;\nconsole.log(x, i);'    # hoisted names survive their branch
+
+        response = self.ast_service.transform(JS__AST__Transform__Request(code=Safe_Str__Javascript("const = ;"), steps=steps))
+        assert response.success                                  is False
+        with self.assertRaises(ValueError):
+            self.ast_service.transform(JS__AST__Transform__Request(code=code, steps=[JS__AST__Transform__Step(name='minify')]))
+
+    def test_26_minify(self):                                                        # Test compact generation, mangling and size stats
+        code     = Safe_Str__Javascript("export function add(first, second) {\n  // sum\n  const total = first + second;\n  return typeof total;\n}\n")
+        response = self.ast_service.minify(JS__AST__Minify__Request(code=code))
+
+        assert response.success                                  is True
+        assert str(response.code)                                == 'export function add(a,b){const c=a+b;return typeof c;}'
+        assert response.steps                                    == [{'name': 'mangle', 'changes': 3}]
+        assert response.input_bytes                              == len(str(code))
+        assert response.output_bytes                             == len(str(response.code))
+        assert response.output_gzip_bytes                        >  0
+
+        response = self.ast_service.minify(JS__AST__Minify__Request(code=code, mangle=False, steps=[JS__AST__Transform__Step(name='strip_console')]))
+        assert str(response.code)                                == 'export function add(first,second){const total=first+second;return typeof total;}'
+
+        parsed   = self.ast_service.parse_to_ast(JS__AST__Parse__Request(code=Safe_Str__Javascript("let x = a + +b;\nif (x) {\n  f(x);\n}")))
+        compact  = self.ast_service.generate_from_ast(JS__AST__Generate__Request(ast=parsed.ast, options=JS__AST__Generator__Options(compact=True)))
+        assert str(compact.code)                                 == 'let x=a+ +b;if(x){f(x);}'
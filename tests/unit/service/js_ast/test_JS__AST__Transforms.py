@@ -0,0 +1,32 @@
+from unittest                                                              import TestCase
+from mgraph_ai_service_js.service.js_ast.JS__AST__Transforms               import JS__AST__Transforms, TRANSFORM__MAX_STEPS
+from mgraph_ai_service_js.service.js_ast.schemas.JS__AST__Schemas          import JS__AST__Transform__Step
+
+
+def step(name, **params):
+    return JS__AST__Transform__Step(name=name, params=params)
+
+
+class test_JS__AST__Transforms(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.transforms = JS__AST__Transforms()
+
+    def test_validate(self):
+        assert self.transforms.validate([step('strip_debugger'), step('strip_console', methods=['log'])]) == [
+            {'name': 'strip_debugger', 'params': {}},
+            {'name': 'strip_console' , 'params': {'methods': ['log']}}]
+        assert self.transforms.validate([step('mangle')])                                            == [{'name': 'mangle', 'params': {}}]
+        assert self.transforms.validate([step('define', map={'process.env.NODE_ENV': 'production', 'DEBUG': False})])[0]['params']['map']['DEBUG'] is False
+
+    def test_validate__errors(self):
+        for steps in ([step('minify')]                                           ,          # unknown step
+                      [step('rename')]                                           ,          # missing map
+                      [step('rename', map={'a': 'not valid'})]                   ,
+                      [step('define', map={'a[0]': 1})]                          ,
+                      [step('define', map={'DEBUG': {'nested': True}})]          ,
+                      [step('strip_console', methods='log')]                     ,
+                      [step('strip_debugger')] * (TRANSFORM__MAX_STEPS + 1)      ):
+            with self.assertRaises(ValueError):
+                self.transforms.validate(steps)